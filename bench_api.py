@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Load test for the kiosk HTTP API (utils/api_server.py)
+
+Usage: python bench_api.py [concurrency] [seconds] [url]
+
+Without a url, starts a local server on a temporary database. With one,
+targets that server using the key in MEDICAL_API_KEY and patient
+BENCH_PATIENT_ID (default 1).
+
+Each worker loops over a kiosk-like mix: hearing prediction, hearing test
+save, eye photo validation and a history read. 503s are the server's
+backpressure and are counted separately from errors.
+"""
+
+import asyncio
+import io
+import os
+import random
+import secrets
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+import numpy as np
+from aiohttp import ClientSession, ClientTimeout, web
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import api_server
+from database import MedicalDB
+
+
+def photo_bytes(seed=0):
+    """A 640x480 JPEG of noise - the cost of decoding and detection without a face"""
+    rng = np.random.default_rng(seed)
+    buffer = io.BytesIO()
+    Image.fromarray(rng.integers(0, 255, (480, 640, 3), dtype=np.uint8)).save(buffer, format="JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def requests_for(patient_id, photo):
+    """(name, method, path, kwargs) making up one kiosk session"""
+    return [
+        ("hearing_predict", "POST", "/v1/hearing/predict",
+         {"json": {"age": random.randint(20, 80), "physical_score": random.uniform(20, 50)}}),
+        ("hearing_test", "POST", "/v1/hearing/test",
+         {"json": {"patient_id": patient_id, "left_threshold_db": random.randint(0, 80),
+                   "right_threshold_db": random.randint(0, 80)}}),
+        ("eye_validate", "POST", "/v1/eye/validate",
+         {"data": photo, "headers": {"Content-Type": "image/jpeg"}}),
+        ("history", "GET", f"/v1/patients/{patient_id}/assessments?limit=20", {}),
+    ]
+
+
+async def worker(session, base_url, patient_id, photo, deadline, latencies, statuses):
+    while time.perf_counter() < deadline:
+        for name, method, path, kwargs in requests_for(patient_id, photo):
+            start = time.perf_counter()
+            try:
+                async with session.request(method, base_url + path, **kwargs) as response:
+                    await response.read()
+                    status = response.status
+            except Exception as e:
+                status = type(e).__name__
+            latencies[name].append((time.perf_counter() - start) * 1000)
+            statuses[name][status] += 1
+            if status == 503:
+                await asyncio.sleep(api_server.RETRY_AFTER_SECONDS)
+
+
+async def run_load(base_url, api_key, patient_id, concurrency, seconds):
+    photo = photo_bytes()
+    latencies = defaultdict(list)
+    statuses = defaultdict(Counter)
+    headers = {api_server.API_KEY_HEADER: api_key}
+    async with ClientSession(headers=headers, timeout=ClientTimeout(total=60)) as session:
+        deadline = time.perf_counter() + seconds
+        await asyncio.gather(*(worker(session, base_url, patient_id, photo, deadline, latencies, statuses)
+                               for _ in range(concurrency)))
+    return latencies, statuses
+
+
+async def start_local_server(api_key):
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    patient_id = db.add_patient("Bench Kiosk", 50, "Female")
+    runner = web.AppRunner(api_server.create_app(api_key, repository=db))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://127.0.0.1:{port}", patient_id
+
+
+async def main_async(concurrency, seconds, url):
+    runner = None
+    if url:
+        api_key = os.environ.get(api_server.API_KEY_ENV, "")
+        patient_id = int(os.environ.get("BENCH_PATIENT_ID", "1"))
+    else:
+        api_key = secrets.token_hex(16)
+        runner, url, patient_id = await start_local_server(api_key)
+
+    print(f"{concurrency} concurrent clients for {seconds}s against {url}\n")
+    try:
+        latencies, statuses = await run_load(url.rstrip("/"), api_key, patient_id, concurrency, seconds)
+    finally:
+        if runner is not None:
+            await runner.cleanup()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{'Endpoint':<16} {'Requests':>9} {'Req/s':>8} {'p50 ms':>8} {'p95 ms':>8}  Statuses")
+    for name in sorted(latencies):
+        samples = latencies[name]
+        print(f"{name:<16} {len(samples):>9} {len(samples) / seconds:>8.1f} {np.percentile(samples, 50):>8.1f} "
+              f"{np.percentile(samples, 95):>8.1f}  {dict(statuses[name])}")
+    print(f"\nTotal: {total} requests, {total / seconds:.1f} req/s on {os.cpu_count()} cores")
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    url = sys.argv[3] if len(sys.argv) > 3 else None
+    asyncio.run(main_async(concurrency, seconds, url))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+Eye model variants: accuracy vs latency against the float32 model
+
+Build the variants first with: python utils/eye_model.py <calibration folder>
+
+Usage: python bench_eye_variants.py <evaluation image folder> [runs] [threads]
+
+Agreement is measured against the float32 model's predictions (top-1 match
+and largest probability difference), so no labels are needed.
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import eye_model
+
+
+def time_predictor(predictor, image, runs):
+    """Mean and p95 single-image latency in ms, after one warm-up call"""
+    predictor(image)
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        predictor(image)
+        samples.append((time.perf_counter() - start) * 1000)
+    return float(np.mean(samples)), float(np.percentile(samples, 95))
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    try:
+        import tensorflow  # noqa: F401
+    except ImportError:
+        print("TensorFlow is not installed - nothing to benchmark")
+        return 1
+
+    images = eye_model.load_calibration_images(sys.argv[1], limit=500)
+    if not images:
+        print(f"No images found in {sys.argv[1]}")
+        return 1
+    batch = np.concatenate(images)
+
+    reference = eye_model.load_eye_predictor("float32")
+    if reference is None:
+        print(f"Could not load {eye_model.EYE_MODEL_PATH}")
+        return 1
+    expected = np.asarray(reference(batch))
+    base_ms = None
+
+    print(f"{len(images)} images, {runs} timed runs per variant\n")
+    print(f"{'Variant':<9} {'Size MB':>8} {'Mean ms':>8} {'p95 ms':>8} {'Speed-up':>9} {'Top-1 agree':>12} {'Max |dp|':>9}")
+    for variant in eye_model.VARIANTS:
+        path = eye_model.variant_path(variant)
+        if not Path(path).exists():
+            print(f"{variant:<9} not built")
+            continue
+        predictor = reference if variant == "float32" else eye_model.TFLitePredictor(path, num_threads=threads)
+
+        mean_ms, p95_ms = time_predictor(predictor, images[0], runs)
+        base_ms = base_ms or mean_ms
+        predicted = np.asarray(predictor(batch))
+        agreement = float(np.mean(predicted.argmax(axis=1) == expected.argmax(axis=1)))
+        max_diff = float(np.abs(predicted - expected).max())
+
+        print(f"{variant:<9} {Path(path).stat().st_size / 1024 / 1024:>8.1f} {mean_ms:>8.1f} {p95_ms:>8.1f} "
+              f"{base_ms / mean_ms:>8.1f}x {agreement:>11.1%} {max_diff:>9.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
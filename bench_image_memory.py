@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Per-photo memory of the eye pipeline: validate, crop the eyes, grayscale
+
+Usage: python bench_image_memory.py [photo] [width height]
+
+Without a photo, a synthetic face is scaled to the given size (default
+4032x3024, a 12 MP phone photo) and JPEG-encoded. Reports the tracemalloc
+peak (NumPy/OpenCV arrays and Python objects; Pillow's own pixel buffers
+aren't traced) and the growth of the process's peak RSS, which covers
+everything (Linux), each as a multiple of the decoded RGB frame.
+"""
+
+import io
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import core
+from test_result_cache import synthetic_face
+
+
+def synthetic_photo(width, height):
+    face = cv2.imdecode(np.frombuffer(synthetic_face(), np.uint8), cv2.IMREAD_COLOR)
+    side = min(width, height)
+    frame = np.full((height, width, 3), 40, np.uint8)
+    x, y = (width - side) // 2, (height - side) // 2
+    frame[y:y+side, x:x+side] = cv2.resize(face, (side, side), interpolation=cv2.INTER_CUBIC)
+    frame = np.clip(frame + np.random.default_rng(0).normal(0, 3, frame.shape), 0, 255).astype(np.uint8)
+    return cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, 90])[1].tobytes()
+
+
+def process(data):
+    """What the eye page does with one photo"""
+    photo = core.Photo.open(io.BytesIO(data))
+    is_valid, error_type, message, details, annotated = core.validate_and_draw_boxes(photo)
+    eye_image, notice = core.crop_eye_region(photo)
+    grayscale = core.convert_to_grayscale(eye_image if eye_image is not None else photo)
+    return is_valid, message, annotated.size if annotated else None, grayscale.size
+
+
+def rss_mb(field):
+    """VmRSS / VmHWM (peak) from /proc, in MB; Linux only"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1]) / 1024
+
+
+def reset_peak_rss():
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0].isdigit():
+        # Measure in a fresh process so building the photo doesn't raise its peak RSS
+        width, height = (int(args[0]), int(args[1])) if len(args) > 1 else (4032, 3024)
+        with tempfile.NamedTemporaryFile(suffix=".jpg") as f:
+            f.write(synthetic_photo(width, height))
+            f.flush()
+            return subprocess.call([sys.executable, __file__, f.name])
+    data = Path(args[0]).read_bytes()
+
+    process(synthetic_photo(320, 240))  # imports, cascades, first-call allocations
+    core.clear_result_cache()
+
+    width, height = Image.open(io.BytesIO(data)).size
+    frame_mb = width * height * 3 / 1024 / 1024
+    reset_peak_rss()
+    rss_before = rss_mb("VmRSS")
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = process(data)
+    elapsed = time.perf_counter() - start
+    _, traced_peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    traced_mb = traced_peak / 1024 / 1024
+    rss_growth = rss_mb("VmHWM") - rss_before
+
+    print(f"Photo {width}x{height}, {len(data) / 1024 / 1024:.1f} MB encoded, {frame_mb:.1f} MB decoded RGB")
+    print(f"valid={result[0]} ({result[1]}), annotated {result[2]}, grayscale {result[3]}")
+    print(f"{'Time':<24} {elapsed:>8.2f} s")
+    print(f"{'tracemalloc peak':<24} {traced_mb:>8.1f} MB  {traced_mb / frame_mb:>5.1f}x frame")
+    print(f"{'Peak RSS growth':<24} {rss_growth:>8.1f} MB  {rss_growth / frame_mb:>5.1f}x frame")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
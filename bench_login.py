@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Login throughput benchmark: per-call connections vs the pooled, cached auth path
+
+Usage: python bench_login.py [users] [logins] [threads]
+"""
+
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import auth
+
+
+def seed_users(count):
+    """Create a users database with `count` patient accounts"""
+    auth.close_user_store()
+    auth.USERS_DB_PATH = str(Path(tempfile.mkdtemp()) / "users.db")
+    auth.ensure_user_store()
+    rows = [(f"user{i}", f"user{i}@example.com", auth.hash_password(f"pw{i}"), "patient", f"User {i}")
+            for i in range(count)]
+    with auth.get_users_pool().connection() as conn:
+        conn.executemany('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)', rows)
+
+
+def legacy_verify_user(username, password):
+    """The previous verify_user: new connection and hash comparison in SQL per call"""
+    conn = sqlite3.connect(auth.USERS_DB_PATH)
+    c = conn.cursor()
+    c.execute('SELECT id, username, email, role, full_name FROM users WHERE username=? AND password=?',
+              (username, auth.hash_password(password)))
+    user = c.fetchone()
+    conn.close()
+    return user
+
+
+def run(label, verify, logins, threads, user_count):
+    """Time `logins` logins spread over `threads` workers (shift-start burst)"""
+    def login(i):
+        n = i % user_count
+        return verify(f"user{n}", f"pw{n}")
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        results = list(pool.map(login, range(logins)))
+    elapsed = time.perf_counter() - start
+
+    assert all(results), f"{label}: some logins failed"
+    print(f"{label:<28} {logins / elapsed:>10.0f} logins/s   {elapsed * 1000 / logins:.3f} ms/login")
+
+
+def main():
+    user_count = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    logins = int(sys.argv[2]) if len(sys.argv) > 2 else 20000
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+
+    print(f"Seeding {user_count} users...")
+    seed_users(user_count)
+    print(f"{logins} logins over {threads} threads\n")
+
+    run("Connection per call", legacy_verify_user, logins, threads, user_count)
+
+    auth.clear_credential_cache()
+    auth.CREDENTIAL_CACHE_SIZE = 0
+    run("Pooled, no cache", auth.verify_user, logins, threads, user_count)
+
+    auth.CREDENTIAL_CACHE_SIZE = user_count
+    auth.clear_credential_cache()
+    run("Pooled + credential cache", auth.verify_user, logins, threads, user_count)
+
+    auth.close_user_store()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Patient search benchmark: FTS5 search_patients() vs pandas str.contains
+
+Usage: python bench_patient_search.py [patients]   (default 300000)
+"""
+
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from database import MedicalDB
+
+
+FIRST = ["John", "Jane", "Maria", "Ahmed", "Wei", "Olga", "Carlos", "Priya", "Kofi", "Hana", "Luca", "Sara"]
+LAST = ["Smith", "Garcia", "Khan", "Chen", "Ivanova", "Silva", "Patel", "Mensah", "Sato", "Rossi", "Cohen", "Nowak"]
+SYLLABLES = ["ka", "lo", "mi", "ra", "ne", "so", "ti", "va", "du", "be", "ch", "an", "el", "or", "is"]
+QUERIES = ["jo", "john", "john sm", "mar gar", "chen", "priya patel", "kofi", "555 01", "zzz"]
+
+
+def make_name(rng, common):
+    """Mostly generated names, with some common ones for realistic prefix overlap"""
+    if rng.random() < 0.2:
+        return rng.choice(common)
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).title()
+
+
+def make_db(count, seed=0):
+    rng = random.Random(seed)
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    rows = []
+    for i in range(count):
+        first, last = make_name(rng, FIRST), make_name(rng, LAST)
+        rows.append((f"{first} {last}", rng.randint(5, 90), rng.choice(["Male", "Female"]),
+                     f"{first.lower()}.{last.lower()}{rng.randint(1, 99)}@example.com",
+                     f"555 {rng.randint(0, 9999):04d} {rng.randint(0, 9999):04d}"))
+    conn = sqlite3.connect(db.db_path)
+    conn.executemany("INSERT INTO patients (name, age, gender, email, phone) VALUES (?, ?, ?, ?, ?)", rows)
+    conn.commit()
+    conn.close()
+    return db
+
+
+def timed_ms(func, repeat=20):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        func()
+    return (time.perf_counter() - start) * 1000 / repeat
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300_000
+    print(f"Seeding {count} patients...")
+    db = make_db(count)
+    names = db.get_all_patients()['name']
+
+    print(f"\n{'query':<14} {'FTS5 (limit 20)':>16} {'str.contains':>14} {'hits':>6}")
+    for query in QUERIES:
+        fts_ms = timed_ms(lambda: db.search_patients(query, limit=20))
+        pandas_ms = timed_ms(lambda: names.str.contains(query, case=False, na=False), repeat=3)
+        hits = len(db.search_patients(query, limit=20))
+        print(f"{query:<14} {fts_ms:>13.2f} ms {pandas_ms:>11.1f} ms {hits:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Patient summary benchmark: lambda groupby vs the vectorised summariser
+
+Usage: python bench_patient_summary.py [rows ...]   (default 10000 100000 1000000)
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from analytics import clear_summary_cache, get_patient_summary, summarize_patients
+
+
+def make_assessments(rows, seed=0):
+    """Synthetic get_all_assessments() frame, newest first like the query"""
+    rng = np.random.default_rng(seed)
+    patients = max(rows // 10, 1)
+    patient_ids = rng.integers(1, patients + 1, rows)
+    seconds = rng.integers(0, 365 * 24 * 3600, rows)
+    created = pd.Timestamp("2024-01-01") + pd.to_timedelta(seconds, unit="s")
+    df = pd.DataFrame({
+        'id': np.arange(1, rows + 1),
+        'patient_id': patient_ids,
+        'assessment_type': rng.choice(['eye', 'hearing'], rows),
+        'risk_level': rng.choice(['High', 'Moderate', 'Low', 'Normal'], rows),
+        'critical_flag': rng.integers(0, 2, rows),
+        'created_at': created.strftime('%Y-%m-%d %H:%M:%S'),
+        'name': pd.Series(patient_ids).map(lambda i: f"Patient {i}").values,
+        'age': patient_ids % 80 + 10,
+        'gender': np.where(patient_ids % 2, 'Male', 'Female'),
+    })
+    return df.sort_values('created_at', ascending=False).reset_index(drop=True)
+
+
+def lambda_groupby(df):
+    """The previous implementation"""
+    return df.groupby('patient_id').agg({
+        'name': 'first',
+        'age': 'first',
+        'gender': 'first',
+        'created_at': 'max',
+        'risk_level': lambda x: x.iloc[-1],
+        'critical_flag': 'max',
+        'assessment_type': 'count'
+    }).reset_index()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    func(*args)
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+
+    print(f"{'rows':>10} {'lambda groupby':>16} {'vectorised':>12} {'cached rerun':>14}")
+    for rows in sizes:
+        df = make_assessments(rows)
+        clear_summary_cache()
+        old_ms = timed(lambda_groupby, df)
+        new_ms = timed(summarize_patients, df)
+        get_patient_summary(df)
+        cached_ms = timed(get_patient_summary, df)
+        print(f"{rows:>10} {old_ms:>13.1f} ms {new_ms:>9.1f} ms {cached_ms:>11.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Temporary databases for the test scripts, deleted with their archives and snapshots when done
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from database import MedicalDB
+
+
+DAY = 86400
+
+
+@contextmanager
+def temp_folder():
+    """A temporary folder, removed with everything in it afterwards"""
+    folder = tempfile.mkdtemp()
+    try:
+        yield Path(folder)
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def add_assessments(db, patient_id, epochs, results=None):
+    """Insert one eye assessment per epoch directly; every 10th is critical"""
+    conn = sqlite3.connect(db.db_path)
+    try:
+        conn.executemany(
+            "INSERT INTO assessments (patient_id, assessment_type, results, risk_level, critical_flag, "
+            "created_at, created_epoch) VALUES (?, 'eye', ?, 'Low', ?, datetime(?, 'unixepoch'), ?)",
+            [(patient_id, results, i % 10 == 0, epoch, epoch) for i, epoch in enumerate(epochs)]
+        )
+        conn.commit()
+    finally:
+        conn.close()
+
+
+@contextmanager
+def temp_db(rows=0, spacing_days=1, results=None):
+    """(db, patient_id): a fresh database with one patient in a temporary folder.
+
+    The patient has `rows` assessments, the newest now and each one
+    `spacing_days` days before the last.
+    """
+    with temp_folder() as folder:
+        db = MedicalDB(str(folder / "medical.db"))
+        patient_id = db.add_patient("Test Patient", 50, "Female")
+        now = int(time.time())
+        add_assessments(db, patient_id, [now - i * spacing_days * DAY for i in range(rows)], results)
+        yield db, patient_id
@@ -9,6 +9,7 @@ st.set_page_config(page_title="Home", page_icon="🏠", layout="wide")
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 from auth import init_session_state
 from navbar import show_streamlit_navbar
+from repository import get_repository
 
 # Custom CSS for professional red and white theme
 def load_custom_css():
@@ -453,24 +454,13 @@ def get_user_recent_assessments():
     """Get current user's recent assessments"""
     try:
         import pandas as pd
-        import sqlite3
         
         if not st.session_state.get('user_id'):
             return pd.DataFrame()
         
-        conn = sqlite3.connect('data/medical_assessment.db')
-        
-        query = """
-        SELECT a.assessment_type, a.risk_level, a.created_at, a.recommendations
-        FROM assessments a 
-        JOIN patients p ON a.patient_id = p.id 
-        WHERE p.id = ?
-        ORDER BY a.created_at DESC 
-        LIMIT 3
-        """
-        
-        df = pd.read_sql_query(query, conn, params=[st.session_state['user_id']])
-        conn.close()
+        # Latest 3 - archive months are only opened if the live database has fewer
+        df = get_repository().get_patient_assessments(st.session_state['user_id'], limit=3)
+        df = df[['assessment_type', 'risk_level', 'created_at', 'recommendations']] if not df.empty else df
         return df
         
     except Exception as e:
@@ -3,11 +3,6 @@ from pathlib import Path
 import sys
 import json
 import time
-from PIL import Image
-import io
-import cv2
-import numpy as np
-import pandas as pd
 import warnings
 
 # --- NEW IMPORTS FOR REAL-TIME CAMERA ---
@@ -57,13 +52,30 @@ utils_path = PROJECT_ROOT / "utils"
 if str(utils_path) not in sys.path:
     sys.path.append(str(utils_path))
 
+import core
+from image_store import get_image_store
+
 # Import from utils (assuming these files exist in the utils directory)
 try:
     from auth import init_session_state
     from navbar import show_streamlit_navbar
-    from database import MedicalDB
+    from repository import get_repository
+    from perf import render_timer, show_fragment_timing, show_render_timings
+    from display_image import show_display_image, show_image_bytes
 except ImportError:
     st.error("Failed to import utility modules (auth, navbar, database). Ensure they are in the 'utils' directory relative to the main app file.")
+    from contextlib import nullcontext
+    def render_timer(label):
+        return nullcontext()
+    def show_fragment_timing(fragment_label, page_label):
+        pass
+    def show_render_timings():
+        pass
+    def show_display_image(source, page, caption=None, use_container_width=True):
+        st.image(get_image_store().path(source) if isinstance(source, str) else source,
+                 caption=caption, use_container_width=use_container_width)
+    def show_image_bytes():
+        pass
     # Define dummy functions to avoid crashing the app
     def init_session_state():
         if 'authenticated' not in st.session_state:
@@ -83,6 +95,7 @@ except ImportError:
         def add_assessment(self, **kwargs):
             st.info("Dummy DB: Assessment data received but not saved.")
             print("Dummy DB: Assessment data received:", kwargs)
+    get_repository = MedicalDB
 
 
 #
@@ -286,129 +299,38 @@ def generate_ai_pdf(analysis_results, quality_metrics, overall, validation_detai
     return pdf.output(dest='S').encode('latin-1')
 
 
-# --- Database saving functions (Unchanged) ---
+# --- Database saving functions ---
+def current_user_id():
+    """Logged-in user's id, or None after showing why results can't be saved"""
+    user_id = st.session_state.get('user_id')
+    if not user_id:
+        if not st.session_state.get('authenticated'):
+            st.error("User not authenticated. Please log in to save results.")
+        else:
+            st.error("User ID missing in session state even though authenticated.")
+    return user_id
+
 def save_eye_assessment_results(data, accuracy, acuity, status):
     """Save eye assessment results to database"""
     try:
-        db = MedicalDB()
-        user_id = st.session_state.get('user_id')
-
+        user_id = current_user_id()
         if not user_id:
-            # Check authentication status again
-            if not st.session_state.get('authenticated'):
-                st.error("User not authenticated. Please log in to save results.")
-            else:
-                st.error("User ID missing in session state even though authenticated.")
             return False
-
-        # Determine risk level and recommendations
-        if accuracy >= 90:
-            risk_level = "Normal"
-            recommendations = "Excellent visual acuity detected. Continue regular eye care and annual check-ups."
-            critical_flag = False
-        elif accuracy >= 75:
-            risk_level = "Mild"
-            recommendations = "Good visual acuity with minor issues. Consider annual eye examination."
-            critical_flag = False
-        elif accuracy >= 60:
-            risk_level = "Moderate"
-            recommendations = "Fair visual acuity detected. Schedule an eye examination within 6 months."
-            critical_flag = False
-        else:
-            risk_level = "High"
-            recommendations = "Poor visual acuity detected. Schedule immediate comprehensive eye examination with an optometrist or ophthalmologist."
-            critical_flag = True
-
-        # Prepare results data
-        results_data = {
-            'test_type': 'Visual Acuity Test',
-            'accuracy_percentage': accuracy,
-            'estimated_acuity': acuity,
-            'status': status,
-            'total_lines': len(data.get('lines', [])), # Safer access
-            'correct_count': data.get('correct_count', 0), # Safer access
-            'total_count': data.get('total_count', 0), # Safer access
-            'detailed_answers': data.get('answers', []),
-            'test_date': str(pd.Timestamp.now().date()) if 'pd' in globals() else str(time.strftime("%Y-%m-%d"))
-        }
-
-        # Save to database
-        db.add_assessment(
-            patient_id=user_id,
-            assessment_type="Visual Acuity Test",
-            results=results_data,
-            risk_level=risk_level,
-            recommendations=recommendations,
-            critical_flag=critical_flag
-        )
-
+        core.save_acuity_results(user_id, data, accuracy, acuity, status, get_repository())
         return True
-
     except Exception as e:
         st.error(f"Error saving visual acuity results: {str(e)}")
         return False
 
-def save_ai_detection_results(analysis_results, quality_metrics, overall, validation_details):
+def save_ai_detection_results(analysis_results, quality_metrics, overall, validation_details, images=None):
     """Save AI detection results to database"""
     try:
-        db = MedicalDB()
-        user_id = st.session_state.get('user_id')
-
+        user_id = current_user_id()
         if not user_id:
-             if not st.session_state.get('authenticated'):
-                 st.error("User not authenticated. Please log in to save results.")
-             else:
-                 st.error("User ID missing in session state even though authenticated.")
-             return False
-
-        # Determine risk level based on AI results
-        conditions_detected = 0
-        max_risk_condition = "normal"
-
-        # Use .get with default empty dict to avoid errors if analysis_results is None
-        for condition, data in (analysis_results or {}).items():
-            if condition != 'normal' and data.get('detected', False):
-                conditions_detected += 1
-                max_risk_condition = condition
-
-        # Use .get with defaults for overall dict
-        if conditions_detected == 0 and overall.get('healthy', False):
-            risk_level = "Normal"
-            recommendations = "AI analysis shows no significant eye conditions detected. Continue regular eye care."
-            critical_flag = False
-        elif conditions_detected == 1:
-            risk_level = "Mild"
-            recommendations = "AI detected potential indicators. Schedule an eye examination for professional assessment."
-            critical_flag = False
-        else: # Covers conditions_detected > 1 or healthy=False
-            risk_level = "High"
-            recommendations = "AI detected multiple potential conditions or other concerns. Schedule immediate comprehensive eye examination."
-            critical_flag = True
-
-        # Prepare results data
-        results_data = {
-            'test_type': 'AI Eye Disease Detection',
-            'overall_healthy': overall.get('healthy', False),
-            'conditions_detected_count': conditions_detected,
-            'analysis_results': analysis_results or {}, # Ensure it's not None
-            'quality_metrics': quality_metrics or {}, # Ensure it's not None
-            'validation_details': validation_details or {}, # Ensure it's not None
-            'recommendation': overall.get('recommendation', 'N/A'),
-            'test_date': str(pd.Timestamp.now().date()) if 'pd' in globals() else str(time.strftime("%Y-%m-%d"))
-        }
-
-        # Save to database
-        db.add_assessment(
-            patient_id=user_id,
-            assessment_type="AI Eye Disease Detection",
-            results=results_data,
-            risk_level=risk_level,
-            recommendations=recommendations,
-            critical_flag=critical_flag
-        )
-
+            return False
+        core.save_ai_detection_results(user_id, analysis_results, quality_metrics, overall, validation_details,
+                                       get_repository(), images)
         return True
-
     except Exception as e:
         st.error(f"Error saving AI detection results: {str(e)}")
         return False
@@ -1004,8 +926,6 @@ def visual_acuity_test():
                 st.session_state[session_key_submit_flag] = False
                 st.rerun()
 
-        audio_output = None
-
         # --- Layout Definition ---
         col_left, col_right = st.columns([1, 1], gap="large")
 
@@ -1042,126 +962,7 @@ def visual_acuity_test():
             """, unsafe_allow_html=True)
 
         with col_right:
-            st.markdown("### 🎤 Voice Recording")
-            try:
-                from streamlit_mic_recorder import mic_recorder
-                st.markdown("""
-                <div class="audio-recorder-container" style="padding: 1rem;">
-                    <h4 style="margin-top: 0; color: #1f2937; font-size: 1rem;">🎙️ Record Your Answer</h4>
-                    <p style="color: #6b7280; margin-bottom: 0.5rem; font-size: 0.9rem;">Read the letters from left to right</p>
-                </div>
-                """, unsafe_allow_html=True)
-                audio_output = mic_recorder(
-                    start_prompt="🎤 Start Recording",
-                    stop_prompt="⏹ Stop Recording",
-                    just_once=False,
-                    use_container_width=True,
-                    format="webm",
-                    key=f"recorder_{current_line_idx}"
-                )
-            except ImportError:
-                st.error("Audio recorder component `streamlit_mic_recorder` not found. Install: `pip install streamlit-mic-recorder`")
-            except Exception as e:
-                st.error(f"Error loading audio recorder: {e}")
-
-            # --- Audio Processing Logic ---
-            last_processed_id = st.session_state.get(session_key_processed_audio_id)
-            current_audio_id = audio_output['id'] if audio_output else None
-
-            status_message_placeholder = st.empty()
-
-            if audio_output and current_audio_id != last_processed_id:
-                st.audio(audio_output['bytes'])
-
-                try:
-                    import speech_recognition as sr
-                    import tempfile
-                    from pydub import AudioSegment
-
-                    with st.spinner("🔄 Processing audio..."):
-                        tmp_webm_path = None
-                        tmp_wav_path = None
-                        processing_success = False
-
-                        try:
-                            temp_dir = tempfile.gettempdir()
-                            tmp_webm_path = os.path.join(temp_dir, f"audio_{current_audio_id}.webm")
-                            with open(tmp_webm_path, 'wb') as f:
-                                f.write(audio_output['bytes'])
-
-                            if not AudioSegment.converter or not os.path.exists(AudioSegment.converter):
-                                raise Exception("FFmpeg not found.")
-                            if not AudioSegment.ffprobe or not os.path.exists(AudioSegment.ffprobe):
-                                raise Exception("FFprobe not found.")
-
-                            audio_segment = AudioSegment.from_file(tmp_webm_path, format="webm")
-                            tmp_wav_path = os.path.join(temp_dir, f"audio_{current_audio_id}.wav")
-                            audio_segment.export(tmp_wav_path, format="wav", parameters=["-ar", "16000", "-ac", "1"])
-                            time.sleep(0.1)
-
-                            recognizer = sr.Recognizer()
-                            with sr.AudioFile(tmp_wav_path) as source:
-                                recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                                audio_data = recognizer.record(source)
-                                text = recognizer.recognize_google(audio_data)
-                                cleaned_text = ''.join(text.split()).upper()
-
-                            # Update session state with recognized text
-                            st.session_state[session_key_text] = cleaned_text
-                            st.session_state[session_key_processed_audio_id] = current_audio_id
-                            status_message_placeholder.success(f"✅ Detected: **{cleaned_text}**")
-                            processing_success = True
-
-                            # Force rerun to update the text input
-                            st.rerun()
-
-                        except sr.UnknownValueError:
-                            status_message_placeholder.warning("⚠️ Could not understand. Try again or type manually.")
-                        except sr.RequestError as e:
-                            status_message_placeholder.error(f"❌ Speech recognition error: {e}")
-                            st.info("💡 Type the letters manually below.")
-                        except Exception as e:
-                            status_message_placeholder.error(f"❌ Audio Processing Error: {str(e)}")
-                            st.info("💡 Type the letters manually below.")
-                        finally:
-                            # Cleanup temp files
-                            try:
-                                if tmp_webm_path and os.path.exists(tmp_webm_path):
-                                    os.unlink(tmp_webm_path)
-                                if tmp_wav_path and os.path.exists(tmp_wav_path):
-                                    os.unlink(tmp_wav_path)
-                            except Exception as cleanup_error:
-                                st.warning(f"Could not delete temp audio file: {cleanup_error}")
-
-                        # If processing failed, reset processed_id
-                        if not processing_success:
-                            st.session_state[session_key_processed_audio_id] = None
-
-                except ImportError:
-                    st.warning("Speech recognition library not available.")
-                    st.info("Type letters manually.")
-
-            st.markdown("---")
-
-            # Form with text input bound to session state
-            with st.form(key=f"answer_form_{current_line_idx}"):
-                st.markdown("**📝 Review & Submit**")
-
-                # Text input directly bound to session state
-                user_input = st.text_input(
-                    "Detected letters (edit if needed):",
-                    key=session_key_text,
-                    placeholder="Letters will appear here...",
-                    max_chars=20,
-                    help="Edit this field if needed"
-                )
-
-                submit_button = st.form_submit_button("✅ Submit Answer", use_container_width=True, type="primary")
-
-                if submit_button:
-                    # Set flag to process submission on next rerun
-                    st.session_state[session_key_submit_flag] = True
-                    st.rerun()
+            show_acuity_answer_panel(current_line_idx)
 
     else:
         show_acuity_results()
@@ -1187,6 +988,146 @@ def visual_acuity_test():
         st.rerun()
 # --- END REPLACED FUNCTION ---
 
+@st.fragment
+def show_acuity_answer_panel(current_line_idx):
+    """Voice recorder, speech recognition and answer form for one acuity line.
+
+    Runs as a fragment so recorder events and typing only rerun this panel,
+    not the page CSS, navbar and Snellen chart. Submitting still triggers a
+    full rerun to advance to the next line.
+    """
+    with render_timer("Acuity answer panel (fragment)"):
+        render_acuity_answer_panel(current_line_idx)
+    show_fragment_timing("Acuity answer panel (fragment)", "Full page")
+
+def render_acuity_answer_panel(current_line_idx):
+    """Body of the acuity answer panel fragment"""
+    session_key_text = f'recognized_text_{current_line_idx}'
+    session_key_processed_audio_id = f'processed_audio_id_{current_line_idx}'
+    session_key_submit_flag = f'submit_flag_{current_line_idx}'
+    audio_output = None
+
+    st.markdown("### 🎤 Voice Recording")
+    try:
+        from streamlit_mic_recorder import mic_recorder
+        st.markdown("""
+        <div class="audio-recorder-container" style="padding: 1rem;">
+            <h4 style="margin-top: 0; color: #1f2937; font-size: 1rem;">🎙️ Record Your Answer</h4>
+            <p style="color: #6b7280; margin-bottom: 0.5rem; font-size: 0.9rem;">Read the letters from left to right</p>
+        </div>
+        """, unsafe_allow_html=True)
+        audio_output = mic_recorder(
+            start_prompt="🎤 Start Recording",
+            stop_prompt="⏹ Stop Recording",
+            just_once=False,
+            use_container_width=True,
+            format="webm",
+            key=f"recorder_{current_line_idx}"
+        )
+    except ImportError:
+        st.error("Audio recorder component `streamlit_mic_recorder` not found. Install: `pip install streamlit-mic-recorder`")
+    except Exception as e:
+        st.error(f"Error loading audio recorder: {e}")
+
+    # --- Audio Processing Logic ---
+    last_processed_id = st.session_state.get(session_key_processed_audio_id)
+    current_audio_id = audio_output['id'] if audio_output else None
+
+    status_message_placeholder = st.empty()
+
+    if audio_output and current_audio_id != last_processed_id:
+        st.audio(audio_output['bytes'])
+
+        try:
+            import speech_recognition as sr
+            import tempfile
+            from pydub import AudioSegment
+
+            with st.spinner("🔄 Processing audio..."):
+                tmp_webm_path = None
+                tmp_wav_path = None
+                processing_success = False
+
+                try:
+                    temp_dir = tempfile.gettempdir()
+                    tmp_webm_path = os.path.join(temp_dir, f"audio_{current_audio_id}.webm")
+                    with open(tmp_webm_path, 'wb') as f:
+                        f.write(audio_output['bytes'])
+
+                    if not AudioSegment.converter or not os.path.exists(AudioSegment.converter):
+                        raise Exception("FFmpeg not found.")
+                    if not AudioSegment.ffprobe or not os.path.exists(AudioSegment.ffprobe):
+                        raise Exception("FFprobe not found.")
+
+                    audio_segment = AudioSegment.from_file(tmp_webm_path, format="webm")
+                    tmp_wav_path = os.path.join(temp_dir, f"audio_{current_audio_id}.wav")
+                    audio_segment.export(tmp_wav_path, format="wav", parameters=["-ar", "16000", "-ac", "1"])
+                    time.sleep(0.1)
+
+                    recognizer = sr.Recognizer()
+                    with sr.AudioFile(tmp_wav_path) as source:
+                        recognizer.adjust_for_ambient_noise(source, duration=0.5)
+                        audio_data = recognizer.record(source)
+                        text = recognizer.recognize_google(audio_data)
+                        cleaned_text = ''.join(text.split()).upper()
+
+                    # Update session state with recognized text
+                    st.session_state[session_key_text] = cleaned_text
+                    st.session_state[session_key_processed_audio_id] = current_audio_id
+                    status_message_placeholder.success(f"✅ Detected: **{cleaned_text}**")
+                    processing_success = True
+
+                    # Force rerun to update the text input
+                    st.rerun()
+
+                except sr.UnknownValueError:
+                    status_message_placeholder.warning("⚠️ Could not understand. Try again or type manually.")
+                except sr.RequestError as e:
+                    status_message_placeholder.error(f"❌ Speech recognition error: {e}")
+                    st.info("💡 Type the letters manually below.")
+                except Exception as e:
+                    status_message_placeholder.error(f"❌ Audio Processing Error: {str(e)}")
+                    st.info("💡 Type the letters manually below.")
+                finally:
+                    # Cleanup temp files
+                    try:
+                        if tmp_webm_path and os.path.exists(tmp_webm_path):
+                            os.unlink(tmp_webm_path)
+                        if tmp_wav_path and os.path.exists(tmp_wav_path):
+                            os.unlink(tmp_wav_path)
+                    except Exception as cleanup_error:
+                        st.warning(f"Could not delete temp audio file: {cleanup_error}")
+
+                # If processing failed, reset processed_id
+                if not processing_success:
+                    st.session_state[session_key_processed_audio_id] = None
+
+        except ImportError:
+            st.warning("Speech recognition library not available.")
+            st.info("Type letters manually.")
+
+    st.markdown("---")
+
+    # Form with text input bound to session state
+    with st.form(key=f"answer_form_{current_line_idx}"):
+        st.markdown("**📝 Review & Submit**")
+
+        # Text input directly bound to session state
+        user_input = st.text_input(
+            "Detected letters (edit if needed):",
+            key=session_key_text,
+            placeholder="Letters will appear here...",
+            max_chars=20,
+            help="Edit this field if needed"
+        )
+
+        submit_button = st.form_submit_button("✅ Submit Answer", use_container_width=True, type="primary")
+
+        if submit_button:
+            # Set flag to process submission on next rerun
+            st.session_state[session_key_submit_flag] = True
+            st.rerun()
+
 #show acutity results function
 
 # --- MODIFIED: show_acuity_results includes download button ---
@@ -1340,330 +1281,42 @@ def show_acuity_results():
                 if k in st.session_state: del st.session_state[k]
             st.rerun()
 
-# --- Box drawing function (Unchanged) ---
+# --- Image pipeline (detection and analysis live in utils/core) ---
+IMAGE_PAGE = "Eye Assessment"  # label for image bytes sent (?perf=1)
+
 def validate_and_draw_boxes(image_data):
     """
     Validates the image and draws boxes on it for visual feedback.
     Returns: (is_valid, error_type, message, validation_details, annotated_pil_image)
     """
-    try:
-        # --- 1. Load Image ---
-        image_data.seek(0)
-        try:
-            image = Image.open(image_data)
-            image.verify()
-            image_data.seek(0)
-            image = Image.open(image_data)
-        except Exception as img_err:
-             st.error(f"Invalid image file provided: {img_err}")
-             return False, 'invalid_image', "Invalid image file provided.", {}, None
-
-        img_array = np.array(image.convert('RGB'))
-        img_bgr = cv2.cvtColor(img_array, cv2.COLOR_RGB2BGR)
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-        annotated_image_bgr = img_bgr.copy() # We will draw on this copy
-
-        # --- 2. Load Classifiers ---
-        face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        eye_cascade_path = cv2.data.haarcascades + 'haarcascade_eye.xml'
-
-        if not os.path.exists(face_cascade_path) or not os.path.exists(eye_cascade_path):
-            st.error("Haar cascade files not found. Cannot perform validation.")
-            return False, 'error', "Missing model files.", {}, image # Return original image
-
-        face_cascade = cv2.CascadeClassifier(face_cascade_path)
-        eye_cascade = cv2.CascadeClassifier(eye_cascade_path)
-
-        # --- 3. Run Detection and Validation ---
-        faces = face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(30, 30))
-        
-        faces_detected = len(faces)
-        eyes_detected_total = 0
-        is_valid = False
-        message = ""
-        error_type = ""
-
-        # Define colors (BGR)
-        COLOR_RED = (0, 0, 255)
-        COLOR_GREEN = (0, 255, 0)
-        COLOR_BLUE = (255, 0, 0)
-        COLOR_YELLOW = (0, 255, 255)
-
-        if faces_detected == 0:
-            message = "No face detected. Please ensure your face is clearly visible and well-lit."
-            error_type = 'no_face'
-        
-        elif faces_detected > 1:
-            message = f"Multiple faces detected ({faces_detected}). Please ensure only one person is in the frame."
-            error_type = 'multiple_faces'
-            # Draw red boxes on all detected faces
-            for (x, y, w, h) in faces:
-                cv2.rectangle(annotated_image_bgr, (x, y), (x+w, y+h), COLOR_RED, 2)
-        
-        else: # Exactly one face detected
-            (x, y, w, h) = faces[0]
-            
-            # Draw a pending (yellow) box first
-            cv2.rectangle(annotated_image_bgr, (x, y), (x+w, y+h), COLOR_YELLOW, 2)
-            
-            # Detect eyes within the face ROI
-            roi_gray = gray[y:y+h, x:x+w]
-            roi_color_annotated = annotated_image_bgr[y:y+h, x:x+w] # Get the same ROI from the annotated image
-            
-            eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5, minSize=(int(w*0.1), int(h*0.1)))
-            eyes_detected_total = len(eyes)
-
-            # Draw blue boxes on all detected eyes
-            for (ex, ey, ew, eh) in eyes:
-                cv2.rectangle(roi_color_annotated, (ex, ey), (ex+ew, ey+eh), COLOR_BLUE, 2)
-
-            if eyes_detected_total < 2:
-                message = f"Eyes not clearly detected ({eyes_detected_total} eye(s) found). Please ensure both eyes are open and visible."
-                error_type = 'no_eyes'
-                # Overwrite the yellow face box with a red one
-                cv2.rectangle(annotated_image_bgr, (x, y), (x+w, y+h), COLOR_RED, 2)
-            else:
-                message = "Image validation successful"
-                error_type = None
-                is_valid = True
-                # Overwrite the yellow face box with a green one
-                cv2.rectangle(annotated_image_bgr, (x, y), (x+w, y+h), COLOR_GREEN, 2)
-
-        # --- 4. Finalize and Return ---
-        validation_details = {
-            'faces_detected': faces_detected,
-            'eyes_detected': eyes_detected_total
-        }
-        
-        # Convert the annotated BGR image back to PIL (RGB) for display in Streamlit
-        annotated_pil_image = cv2_to_pil(annotated_image_bgr)
-        
-        return is_valid, error_type, message, validation_details, annotated_pil_image
-
-    except Exception as e:
-        st.error(f"Error during image validation and drawing: {str(e)}")
-        # Try to return the original image if drawing fails
-        try:
-            image_data.seek(0)
-            original_image = Image.open(image_data)
-            return False, 'error', f"Error processing image: {str(e)}", {}, original_image
-        except:
-            return False, 'error', f"Error processing image: {str(e)}", {}, None
+    result = core.validate_and_draw_boxes(image_data)
+    if result[1] in ('invalid_image', 'error'):
+        st.error(result[2])
+    return result
 
-# --- AI analysis functions (Unchanged) ---
 def analyze_eye_disease(image_data, validation_details):
-    """
-    Lightweight analysis - simplified version for low-spec systems
-    """
+    """(analysis_results, quality_metrics, overall), or Nones if the analysis fails"""
     try:
-        # Simple mock analysis - in production, use a trained model
-        analysis_results = {
-            'diabetic_retinopathy': {
-                'detected': False,
-                'confidence': 96.8,
-                'severity': 'None',
-                'risk_level': 'Low'
-            },
-            'glaucoma': {
-                'detected': False,
-                'confidence': 94.5,
-                'severity': 'None',
-                'risk_level': 'Low'
-            },
-            'cataracts': {
-                'detected': False,
-                'confidence': 97.2,
-                'severity': 'None',
-                'risk_level': 'Low'
-            },
-            'amd': { # Age-related Macular Degeneration
-                'detected': False,
-                'confidence': 95.1,
-                'severity': 'None',
-                'risk_level': 'Low'
-            },
-            'hypertensive_retinopathy': {
-                'detected': False,
-                'confidence': 93.8,
-                'severity': 'None',
-                'risk_level': 'Low'
-            }
-        }
-
-        quality_metrics = {
-            'overall_quality': 'Good' # Could add more metrics like brightness, sharpness later
-        }
-
-        overall = {
-            'healthy': True, # Assume healthy unless specific conditions detected
-            'conditions_detected': 0,
-            'recommendation': 'Your eye health appears to be in good condition based on this screening. Continue regular check-ups.'
-        }
-
-        # Example: Modify results based on validation (e.g., if few eyes detected, lower confidence)
-        if validation_details.get('eyes_detected', 0) < 2:
-             quality_metrics['overall_quality'] = 'Fair - Eye detection limited'
-             # Could adjust confidence scores here if desired
-
-        # --- Placeholder for actual AI model integration ---
-        # Replace this section with loading your model and performing inference
-        # e.g., model_output = your_eye_model.predict(preprocessed_image)
-        # Populate analysis_results, quality_metrics, overall based on model_output
-
-        return analysis_results, quality_metrics, overall
-
+        return core.analyze_eye_disease(image_data, validation_details)
     except Exception as e:
         st.error(f"Error during AI analysis simulation: {str(e)}")
         return None, None, None
 
-def pil_to_cv2(pil_image):
-    """Convert PIL Image to OpenCV (BGR) format"""
-    try:
-        # Convert PIL image to numpy array
-        open_cv_image = np.array(pil_image.convert('RGB'))
-        # Convert RGB to BGR (OpenCV's default format)
-        return open_cv_image[:, :, ::-1].copy()
-    except Exception as e:
-        st.error(f"Error in pil_to_cv2 conversion: {e}")
-        return None
-
-def cv2_to_pil(cv2_image):
-    """Convert OpenCV (BGR) image to PIL (RGB) format"""
-    try:
-        # Ensure input is a valid numpy array
-        if not isinstance(cv2_image, np.ndarray):
-            raise TypeError("Input must be a NumPy array")
-        # Ensure it has 3 dimensions (height, width, channels)
-        if cv2_image.ndim != 3 or cv2_image.shape[2] != 3:
-             raise ValueError("Input array must be in BGR format (3 channels)")
-
-        cv2_image_rgb = cv2.cvtColor(cv2_image, cv2.COLOR_BGR2RGB)
-        return Image.fromarray(cv2_image_rgb)
-    except Exception as e:
-        st.error(f"Error in cv2_to_pil conversion: {e}")
-        return None
-
 def crop_eye_region(image_data):
     """Crops the image to the bounding box containing both detected eyes."""
-    try:
-        image_data.seek(0) # Reset buffer
-        try:
-            image = Image.open(image_data)
-            image.verify()
-            image_data.seek(0)
-            image = Image.open(image_data)
-        except (IOError, SyntaxError, Image.UnidentifiedImageError) as img_err:
-             st.error(f"Invalid image file for cropping: {img_err}")
-             return None
-
-        img_bgr = pil_to_cv2(image)
-        if img_bgr is None: return None
-
-        gray = cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
-
-        face_cascade_path = cv2.data.haarcascades + 'haarcascade_frontalface_default.xml'
-        eye_cascade_path = cv2.data.haarcascades + 'haarcascade_eye.xml'
-
-        if not os.path.exists(face_cascade_path) or not os.path.exists(eye_cascade_path):
-            st.error("Haar cascade files not found for cropping.")
-            return None
-
-        face_cascade = cv2.CascadeClassifier(face_cascade_path)
-        eye_cascade = cv2.CascadeClassifier(eye_cascade_path)
-
-        faces = face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(30,30))
-
-        if len(faces) == 0:
-            st.warning("No face detected for cropping eyes.")
-            return None # No face
-
-        # Assume the largest detected face is the correct one if multiple are found
-        faces = sorted(faces, key=lambda f: f[2]*f[3], reverse=True)
-        (x, y, w, h) = faces[0]
-        roi_gray = gray[y:y+h, x:x+w]
-        roi_color = img_bgr[y:y+h, x:x+w]
-
-        eyes = eye_cascade.detectMultiScale(roi_gray, 1.1, 5, minSize=(int(w*0.1), int(h*0.1))) # Relative min size
-
-        if len(eyes) < 2:
-            st.warning(f"Could not detect two eyes for cropping (found {len(eyes)}). Showing full face ROI instead.")
-             # Fallback: return the detected face region if eyes aren't clear
-            face_roi_color = img_bgr[y:y+h, x:x+w]
-            return cv2_to_pil(face_roi_color)
-
-
-        # Find bounding box containing all detected eyes within the face ROI
-        min_ex, min_ey = w, h # Initialize with max values within ROI
-        max_ex, max_ey = 0, 0 # Initialize with min values
-
-        for (ex, ey, ew, eh) in eyes:
-            min_ex = min(min_ex, ex)
-            min_ey = min(min_ey, ey)
-            max_ex = max(max_ex, ex + ew)
-            max_ey = max(max_ey, ey + eh)
-
-        # Add some padding relative to eye region size
-        eye_width = max_ex - min_ex
-        eye_height = max_ey - min_ey
-
-        # Ensure width/height are positive before calculating padding
-        if eye_width <= 0 or eye_height <= 0:
-             st.warning("Detected eye region has zero or negative dimensions. Falling back to face ROI.")
-             face_roi_color = img_bgr[y:y+h, x:x+w]
-             return cv2_to_pil(face_roi_color)
-
-        padding_x = int(eye_width * 0.3) # 30% padding horizontally
-        padding_y = int(eye_height * 0.5) # 50% padding vertically
-
-        # Ensure coordinates are within the face ROI boundaries
-        crop_x1 = max(0, min_ex - padding_x)
-        crop_y1 = max(0, min_ey - padding_y)
-        crop_x2 = min(w, max_ex + padding_x) # w is width of face ROI
-        crop_y2 = min(h, max_ey + padding_y) # h is height of face ROI
-
-        # Check if coordinates are valid
-        if crop_y1 >= crop_y2 or crop_x1 >= crop_x2:
-             st.warning("Calculated eye crop coordinates are invalid. Falling back to face ROI.")
-             face_roi_color = img_bgr[y:y+h, x:x+w]
-             return cv2_to_pil(face_roi_color)
-
-        # Crop from the face's color ROI using calculated coordinates
-        eye_region_color = roi_color[crop_y1:crop_y2, crop_x1:crop_x2]
-
-        # Check if the crop resulted in an empty image (should be caught by coord check, but safety)
-        if eye_region_color.size == 0:
-             st.warning("Eye cropping resulted in an empty image. Falling back to face ROI.")
-             face_roi_color = img_bgr[y:y+h, x:x+w]
-             return cv2_to_pil(face_roi_color)
-
-        # Convert back to PIL image
-        return cv2_to_pil(eye_region_color)
-
-    except Exception as e:
-        st.error(f"Error during eye region cropping: {e}")
-        # Attempt to return original image if cropping fails badly
-        try:
-            image_data.seek(0)
-            return Image.open(image_data)
-        except:
-             return None # Give up if even reopening fails
+    eye_image, notice = core.crop_eye_region(image_data)
+    if notice:
+        st.warning(notice)
+    return eye_image
 
+def show_image(source, caption=None, use_container_width=True):
+    """Display-size JPEG of an image-store digest or PIL image, counted against this page"""
+    show_display_image(source, IMAGE_PAGE, caption=caption, use_container_width=use_container_width)
 
 def convert_to_grayscale(image_data):
-    """Converts an image (PIL or BytesIO) to grayscale PIL image."""
+    """Converts an image (PIL, BytesIO or Photo) to grayscale PIL image."""
     try:
-        img_to_convert = None
-        if isinstance(image_data, io.BytesIO):
-            image_data.seek(0) # Reset buffer
-            img_to_convert = Image.open(image_data)
-        elif isinstance(image_data, Image.Image):
-            img_to_convert = image_data # Already a PIL image
-        else:
-             st.error(f"Invalid data type for grayscale conversion: {type(image_data)}")
-             return None # Unknown type
-
-        return img_to_convert.convert('L') # 'L' is the mode for grayscale
-
+        return core.convert_to_grayscale(image_data)
     except Exception as e:
         st.error(f"Error converting image to grayscale: {e}")
         return None
@@ -1766,11 +1419,15 @@ def show_capture_ui():
             # Run the new validation function that also returns the annotated image
             is_valid, error_type, message, validation_details, annotated_pil_image = validate_and_draw_boxes(captured_data)
 
-            # Store the *original* photo for the AI analysis
-            st.session_state.captured_photo = captured_data
+            # Sessions keep only image-store digests, not the image data:
+            # the *original* photo for the AI analysis...
+            image_store = get_image_store()
+            st.session_state.captured_photo = image_store.put(captured_data)
 
-            # Store the *annotated* photo for display
-            st.session_state.annotated_photo = annotated_pil_image
+            # ...and the *annotated* photo for display
+            st.session_state.annotated_photo = (
+                image_store.put_image(annotated_pil_image) if annotated_pil_image is not None else None
+            )
 
             # Store the validation result
             st.session_state.validation_status = {
@@ -1808,13 +1465,14 @@ def run_ai_analysis_simulation():
     Runs the simulated AI analysis process with professional compact layout.
     """
     try:
-        # Get data from session state
-        camera_photo_bytesio = st.session_state.captured_photo
+        # Get data from session state (image-store digests)
+        image_store = get_image_store()
         validation_status = st.session_state.get('validation_status')
-        annotated_photo_pil = st.session_state.get('annotated_photo')
+        annotated_photo = st.session_state.get('annotated_photo')
 
         # Validation check
-        if not validation_status or not validation_status.get('is_valid') or not annotated_photo_pil:
+        if (not validation_status or not validation_status.get('is_valid') or not annotated_photo
+                or not image_store.exists(st.session_state.captured_photo)):
             st.error("Cannot proceed with analysis: Image validation was missing, failed, or annotated image is missing.")
             if st.button("Try Capture/Upload Again"):
                 keys_to_clear = ['captured_photo', 'validation_status', 'analysis_results', 'quality_metrics', 'overall_results', 'validation_details_final', 'annotated_photo']
@@ -1860,7 +1518,7 @@ def run_ai_analysis_simulation():
             
             # Added margin to center image vertically a bit more
             st.markdown('<div class="ai-image-container" style="margin-top: 0.75rem; margin-bottom: 0.75rem;">', unsafe_allow_html=True)
-            st.image(annotated_photo_pil, caption="Detected Face & Eyes", use_container_width=True)
+            show_image(annotated_photo, caption="Detected Face & Eyes")
             st.markdown('</div>', unsafe_allow_html=True)
             st.success(f"✅ {validation_status.get('message', 'Ready for analysis.')}")
             
@@ -1872,16 +1530,18 @@ def run_ai_analysis_simulation():
         time.sleep(2)
 
         # --- Crop Eyes ---
+        # Read back from the image store and decoded once for this run only; nothing is kept in the session
+        camera_photo = core.Photo.open(image_store.open(st.session_state.captured_photo))
         status_placeholder.info("⏳ Cropping eye region (Step 2/3)...")
         progress_bar.progress(25)
-        eye_image = crop_eye_region(camera_photo_bytesio)
+        eye_image = crop_eye_region(camera_photo)
 
         if eye_image is not None:
             # --- THIS IS THE FIX for box size ---
             # Use the container and wrap the image
             with image_display_area:
                 st.markdown('<div class="ai-image-container" style="border-color: #f59e0b; margin: 1rem auto;">', unsafe_allow_html=True)
-                st.image(eye_image, caption="AI Focus Region", use_container_width=True)
+                show_image(eye_image, caption="AI Focus Region")
                 st.markdown('</div>', unsafe_allow_html=True)
         else:
             # Use the container for the warning
@@ -1894,7 +1554,7 @@ def run_ai_analysis_simulation():
         # --- Grayscale ---
         status_placeholder.info("⏳ Converting to grayscale (Step 3/3)...")
         progress_bar.progress(50)
-        image_for_grayscale = eye_image if eye_image is not None else camera_photo_bytesio
+        image_for_grayscale = eye_image if eye_image is not None else camera_photo
         grayscale_image = convert_to_grayscale(image_for_grayscale)
 
         if grayscale_image is not None:
@@ -1902,7 +1562,7 @@ def run_ai_analysis_simulation():
             # Use the container and wrap the image
             with image_display_area:
                 st.markdown('<div class="ai-image-container" style="border-color: #6b7280; margin: 1rem auto;">', unsafe_allow_html=True)
-                st.image(grayscale_image, caption="Grayscale Analysis", use_container_width=True)
+                show_image(grayscale_image, caption="Grayscale Analysis")
                 st.markdown('</div>', unsafe_allow_html=True)
         else:
             # Use the container for the warning
@@ -1933,7 +1593,7 @@ def run_ai_analysis_simulation():
         # --- Get results ---
         validation_details = validation_status.get('validation_details', {})
         analysis_results, quality_metrics, overall = analyze_eye_disease(
-            camera_photo_bytesio, validation_details
+            camera_photo, validation_details
         )
 
         # --- Save results ---
@@ -1973,8 +1633,8 @@ def display_ai_analysis_results():
     Displays the final AI analysis results after the simulation is complete.
     """
     # Retrieve results safely using .get
-    camera_photo_bytesio = st.session_state.get('captured_photo') # Original Photo
-    annotated_photo_pil = st.session_state.get('annotated_photo') # Photo with Boxes
+    captured_photo = st.session_state.get('captured_photo') # Original photo digest
+    annotated_photo = st.session_state.get('annotated_photo') # Photo with boxes digest
     analysis_results = st.session_state.get('analysis_results', {})
     quality_metrics = st.session_state.get('quality_metrics', {})
     overall = st.session_state.get('overall_results', {})
@@ -1982,7 +1642,8 @@ def display_ai_analysis_results():
     validation_status = st.session_state.get('validation_status', {}) # Get original status
     user_id = st.session_state.get('user_id', 'UnknownUser') # Get user ID for PDF
 
-    if not camera_photo_bytesio or not annotated_photo_pil:
+    image_store = get_image_store()
+    if not captured_photo or not annotated_photo or not image_store.exists(annotated_photo):
          st.error("Captured photo missing. Please restart the test.")
          if st.button("Restart Test"):
              # Clear relevant state
@@ -2009,7 +1670,7 @@ def display_ai_analysis_results():
             <div class="ai-section-content" style="padding: 0.75rem;">
         """, unsafe_allow_html=True)
         
-        st.image(annotated_photo_pil, caption="Analyzed Image (with detected features)", use_container_width=True)
+        show_image(annotated_photo, caption="Analyzed Image (with detected features)")
         
         st.markdown("</div></div>", unsafe_allow_html=True)
     
@@ -2189,7 +1850,8 @@ def display_ai_analysis_results():
 
     with col_act2:
         if st.button("💾 Save Report", key="save_ai_report"):
-             save_success = save_ai_detection_results(analysis_results, quality_metrics, overall, validation_details)
+             save_success = save_ai_detection_results(analysis_results, quality_metrics, overall, validation_details,
+                                                      {'photo': captured_photo, 'annotated': annotated_photo})
              if save_success:
                  st.success("✅ AI detection report saved successfully!")
                  st.info("📋 You can view saved reports from your Profile page.")
@@ -2243,13 +1905,13 @@ def camera_detection_test():
 
     # Initialize session state keys if they don't exist
     if 'captured_photo' not in st.session_state:
-        st.session_state.captured_photo = None # This will hold the BytesIO data
+        st.session_state.captured_photo = None # This will hold the photo's image-store digest
     if 'validation_status' not in st.session_state:
         st.session_state.validation_status = None # This will hold {'is_valid': ..., 'message': ..., 'details': ...}
     if 'analysis_results' not in st.session_state:
         st.session_state.analysis_results = None # This will hold the final AI output
     if 'annotated_photo' not in st.session_state:
-        st.session_state.annotated_photo = None # This will hold the PIL image with boxes
+        st.session_state.annotated_photo = None # This will hold the digest of the photo with boxes
 
     # --- Main Routing Logic ---
 
@@ -2269,7 +1931,8 @@ def camera_detection_test():
 
             # Show the annotated (failed) image so the user knows why
             if st.session_state.annotated_photo:
-                st.image(st.session_state.annotated_photo, caption="Validation Failed (Red/Yellow boxes indicate issues)")
+                show_image(st.session_state.annotated_photo,
+                           caption="Validation Failed (Red/Yellow boxes indicate issues)", use_container_width=False)
 
             st.info("Please try again with a clearer, well-lit photo.")
             if st.button("📸 Try Capture/Upload Again"):
@@ -2350,4 +2013,7 @@ def main():
         show_test_selection()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with render_timer("Full page"):
+        main()
+    show_render_timings()
+    show_image_bytes()
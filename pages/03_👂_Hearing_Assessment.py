@@ -1,11 +1,7 @@
 import streamlit as st
-import numpy as np
-import soundfile as sf
-import io
 import pandas as pd
 import streamlit.components.v1 as components
 import time
-import json
 import sys
 from pathlib import Path
 
@@ -23,10 +19,22 @@ except Exception:
 try:
     from auth import init_session_state
     from navbar import show_streamlit_navbar
-    from database import MedicalDB
+    from repository import get_repository
+    from perf import render_timer, show_fragment_timing, show_render_timings
 except ImportError:
     st.warning("Could not import custom utils (auth, navbar, database). Using mock functions.")
     
+    from contextlib import nullcontext
+    
+    def render_timer(label):
+        return nullcontext()
+    
+    def show_fragment_timing(fragment_label, page_label):
+        pass
+    
+    def show_render_timings():
+        pass
+    
     def init_session_state():
         if 'authenticated' not in st.session_state:
             st.session_state.authenticated = True  # Mock authentication
@@ -48,41 +56,24 @@ except ImportError:
             print(f"Critical: {critical_flag}")
             print("----------------------")
 
+    get_repository = MedicalDB
+
+from core import (analyze_single_ear_results, ear_result, generate_hearing_level_tone, get_hearing_interpretation,
+                  hearing_test_results, overall_hearing_result, save_hearing_test_results)
+
 
 st.set_page_config(page_title="Online Hearing Test", page_icon="👂", layout="wide")
 
 def save_assessment_result(assessment_type, results, risk_level):
     """Save assessment results to database"""
     try:
-        db = MedicalDB()
         user_id = st.session_state.get('user_id')
         
         if not user_id:
             st.error("User not authenticated. Please log in.")
             return False
         
-        # Determine if critical based on results
-        critical_flag = False
-        if risk_level == "Significant":
-            critical_flag = True
-        
-        # Create recommendations based on risk level
-        if risk_level == "Normal":
-            recommendations = "Your hearing is within normal limits. Continue to protect your hearing from loud noises."
-        elif risk_level == "Mild":
-            recommendations = "Mild hearing changes detected. Consider a professional audiological evaluation for further assessment."
-        else:  # Significant
-            recommendations = "Significant hearing loss detected. Please consult an audiologist as soon as possible for comprehensive evaluation and treatment options."
-            
-        # Save to database
-        db.add_assessment(
-            patient_id=user_id,
-            assessment_type=assessment_type,
-            results=json.dumps(results),
-            risk_level=risk_level,
-            recommendations=recommendations,
-            critical_flag=critical_flag
-        )
+        save_hearing_test_results(user_id, assessment_type, results, risk_level, get_repository())
         
         st.success("Assessment results saved successfully!")
         return True
@@ -535,7 +526,6 @@ def show_single_audio_test(ear_side, test_state):
     # Use a standard test frequency (1000 Hz is commonly used for hearing screening)
     test_frequency = 1000
     hearing_level_key = f'hearing_level_{ear_side}'
-    audio_key = f'audio_{ear_side}'
     
     # ***CORRECTED: Indentation fixed***
     # Initialize hearing level (starts at 0 dB HL - silent)
@@ -550,9 +540,114 @@ def show_single_audio_test(ear_side, test_state):
     
     st.markdown("<p style='text-align:center; color:#888; margin-bottom: 2rem;'>Adjust the hearing level until you can just barely hear the tone</p>", unsafe_allow_html=True)
 
+    # Level display, adjuster and tone player rerun on their own
+    show_hearing_level_controls(ear_side, test_frequency)
+
+    # Instructions (Updated based on last request)
+    st.markdown(f'''
+    <div style='text-align:center; background:#f8f9fa; padding:1.5rem; border-radius:12px; margin:2rem 0;'>
+        <p style='margin: 0; color:#666; font-size: 16px;'>
+            <strong>Instructions:</strong> 
+            <br>1. Click "Play Test Tone" to start the audio
+            <br>2. The test will start at <strong>0 dB</strong> (silent)
+            <br>3. <strong>Slowly increase</strong> the level until you can *just barely* hear the tone
+            <br>4. This is your hearing threshold. Click "Continue"
+        </p>
+    </div>
+    ''', unsafe_allow_html=True)
+
+    # Navigation
+    st.markdown('<div class="nav-buttons">', unsafe_allow_html=True)
+    col1, col2, col3 = st.columns([4, 1, 1])
+    with col2:
+        if st.button("Back", key=f"{ear_side}_back", type="secondary"):
+            test_state['audio_playing'] = False
+            test_state['current_audio_data'] = None
+                
+            if ear_side == 'left':
+                st.session_state.test_phase = 'introduction'
+            else:
+                st.session_state.test_phase = 'left_ear'
+            st.rerun()
+    with col3:
+        if st.button("Continue", key=f"{ear_side}_continue", type="primary"):
+            test_state['audio_playing'] = False
+            test_state['current_audio_data'] = None
+            
+            # Save the hearing threshold (kept up to date by the controls fragment)
+            result_data = ear_result(st.session_state[hearing_level_key], test_frequency)
+            
+            # Save to session state
+            if ear_side == 'left':
+                st.session_state.left_ear_results = result_data
+            else:
+                st.session_state.right_ear_results = result_data
+                
+            test_state['completed'] = True
+            st.rerun()
+    st.markdown('</div>', unsafe_allow_html=True)
+
+@st.fragment
+def show_hearing_level_controls(ear_side, test_frequency):
+    """Hearing level display, adjuster and tone player.
+    
+    Runs as a fragment: the +/- buttons, slider and play/stop buttons only
+    rerun this function, not the page CSS, navbar and instructions.
+    """
+    with render_timer("Hearing controls (fragment)"):
+        render_hearing_level_controls(ear_side, test_frequency)
+    show_fragment_timing("Hearing controls (fragment)", "Full page")
+
+def set_hearing_level(ear_side, test_frequency, new_level):
+    """Store a new hearing level, keeping the slider and playing tone in sync."""
+    hearing_level_key = f'hearing_level_{ear_side}'
+    new_level = min(100, max(0, new_level))
+    st.session_state[hearing_level_key] = new_level
+    st.session_state[f"hl_slider_{hearing_level_key}"] = new_level
+    # Pass ear_side
+    update_audio_if_playing(st.session_state[f'{ear_side}_ear_test'], test_frequency, new_level, ear_side, f'audio_{ear_side}')
+
+def on_hearing_slider_change(ear_side, test_frequency):
+    """Slider callback - runs before the fragment rerenders."""
+    slider_key = f"hl_slider_hearing_level_{ear_side}"
+    set_hearing_level(ear_side, test_frequency, st.session_state[slider_key])
+
+def start_test_tone(ear_side, test_frequency):
+    """Play button callback."""
+    test_state = st.session_state[f'{ear_side}_ear_test']
+    hearing_level = st.session_state.get(f'hearing_level_{ear_side}', 0)
+    # Pass ear_side
+    audio_data = generate_hearing_level_tone(test_frequency, hearing_level, ear_side, duration=3.0)
+    if audio_data:
+        test_state['current_audio_data'] = audio_data
+        test_state['audio_playing'] = True
+        test_state['last_audio_update'] = time.time()
+        test_state['audio_error'] = False
+    else:
+        test_state['audio_error'] = True
+
+def stop_test_tone(ear_side):
+    """Stop button callback."""
+    test_state = st.session_state[f'{ear_side}_ear_test']
+    test_state['audio_playing'] = False
+    test_state['current_audio_data'] = None
+
+def render_hearing_level_controls(ear_side, test_frequency):
+    """Body of the hearing level controls fragment.
+    
+    Buttons and the slider update state in on_click/on_change callbacks, so a
+    click costs one fragment run instead of a run plus st.rerun().
+    """
+    test_state = st.session_state[f'{ear_side}_ear_test']
+    hearing_level_key = f'hearing_level_{ear_side}'
+    slider_key = f"hl_slider_{hearing_level_key}"
+    audio_key = f'audio_{ear_side}'
+
     # ***CORRECTED: Default value changed from 25 to 0***
     # Current test info
     current_hearing_level = st.session_state.get(hearing_level_key, 0)
+    if slider_key not in st.session_state:
+        st.session_state[slider_key] = current_hearing_level
     
     st.markdown(f'''
     <div class="frequency-display">
@@ -571,12 +666,8 @@ def show_single_audio_test(ear_side, test_state):
     
     with col1:
         st.markdown('<div class="freq-btn">', unsafe_allow_html=True)
-        if st.button("−5", key=f"dec_{hearing_level_key}", help="Decrease hearing level"):
-            new_level = max(0, current_hearing_level - 5)
-            st.session_state[hearing_level_key] = new_level
-            # Pass ear_side
-            update_audio_if_playing(test_state, test_frequency, new_level, ear_side, audio_key)
-            st.rerun()
+        st.button("−5", key=f"dec_{hearing_level_key}", help="Decrease hearing level",
+                  on_click=set_hearing_level, args=(ear_side, test_frequency, current_hearing_level - 5))
         st.markdown('</div>', unsafe_allow_html=True)
         
     with col2:
@@ -588,14 +679,15 @@ def show_single_audio_test(ear_side, test_state):
             st.markdown(f'<div class="volume-indicator">0</div>', unsafe_allow_html=True)
         
         with subcol2:
-            new_hearing_level = st.slider(
+            st.slider(
                 f"Hearing Level", 
                 0, 100, 
-                current_hearing_level, 
                 step=5,
-                key=f"hl_slider_{hearing_level_key}", 
+                key=slider_key, 
                 label_visibility="collapsed",
-                help="Adjust the hearing level until you can just hear the tone"
+                help="Adjust the hearing level until you can just hear the tone",
+                on_change=on_hearing_slider_change,
+                args=(ear_side, test_frequency)
             )
         
         with subcol3:
@@ -605,28 +697,18 @@ def show_single_audio_test(ear_side, test_state):
             
     with col3:
         st.markdown('<div class="freq-btn">', unsafe_allow_html=True)
-        if st.button("+5", key=f"inc_{hearing_level_key}", help="Increase hearing level"):
-            new_level = min(100, current_hearing_level + 5)
-            st.session_state[hearing_level_key] = new_level
-            # Pass ear_side
-            update_audio_if_playing(test_state, test_frequency, new_level, ear_side, audio_key)
-            st.rerun()
+        st.button("+5", key=f"inc_{hearing_level_key}", help="Increase hearing level",
+                  on_click=set_hearing_level, args=(ear_side, test_frequency, current_hearing_level + 5))
         st.markdown('</div>', unsafe_allow_html=True)
         
     st.markdown('</div>', unsafe_allow_html=True)
 
-    # Update hearing level if slider changed
-    if new_hearing_level != current_hearing_level:
-        st.session_state[hearing_level_key] = new_hearing_level
-        # Pass ear_side
-        update_audio_if_playing(test_state, test_frequency, new_hearing_level, ear_side, audio_key)
-
     # Show hearing level interpretation
-    interpretation, color = get_hearing_interpretation(new_hearing_level)
+    interpretation, color = get_hearing_interpretation(current_hearing_level)
     
     st.markdown(f'''
     <div class="hearing-level-info">
-        🎯 <strong>Current Level:</strong> {new_hearing_level} dB HL<br>
+        🎯 <strong>Current Level:</strong> {current_hearing_level} dB HL<br>
         📊 <strong>Classification:</strong> <span style="color: {color}; font-weight: bold;">{interpretation}</span><br>
         💡 <strong>Goal:</strong> Find the minimum level where you can just detect the tone
     </div>
@@ -638,27 +720,19 @@ def show_single_audio_test(ear_side, test_state):
     
     with col2:
         if not test_state['audio_playing']:
-            if st.button("🔊 Play Test Tone", key=f"start_{audio_key}", type="primary", use_container_width=True):
-                # Pass ear_side
-                audio_data = generate_hearing_level_tone(test_frequency, new_hearing_level, ear_side, duration=3.0)
-                if audio_data:
-                    test_state['current_audio_data'] = audio_data
-                    test_state['audio_playing'] = True
-                    test_state['last_audio_update'] = time.time()
-                    st.rerun()
-                else:
-                    st.error("Failed to generate audio tone.")
+            st.button("🔊 Play Test Tone", key=f"start_{audio_key}", type="primary", use_container_width=True,
+                      on_click=start_test_tone, args=(ear_side, test_frequency))
+            if test_state.get('audio_error'):
+                st.error("Failed to generate audio tone.")
         else:
             # Show audio status
-            if new_hearing_level > 0:
+            if current_hearing_level > 0:
                 st.markdown(f'<div class="audio-status">🎵 <strong>Tone is playing in {ear_side} ear...</strong><br>Adjust the level to find your hearing threshold</div>', unsafe_allow_html=True)
             else:
                 st.markdown('<div class="audio-status">🔇 <strong>Tone is silent</strong><br>Increase the hearing level to hear the tone</div>', unsafe_allow_html=True)
                 
-            if st.button("⏹️ Stop Tone", key=f"stop_{audio_key}", type="secondary", use_container_width=True):
-                test_state['audio_playing'] = False
-                test_state['current_audio_data'] = None
-                st.rerun()
+            st.button("⏹️ Stop Tone", key=f"stop_{audio_key}", type="secondary", use_container_width=True,
+                      on_click=stop_test_tone, args=(ear_side,))
             
     st.markdown('</div>', unsafe_allow_html=True)
 
@@ -670,54 +744,6 @@ def show_single_audio_test(ear_side, test_state):
             st.error(f"Error playing audio: {str(e)}")
             test_state['audio_playing'] = False
 
-    # Instructions (Updated based on last request)
-    st.markdown(f'''
-    <div style='text-align:center; background:#f8f9fa; padding:1.5rem; border-radius:12px; margin:2rem 0;'>
-        <p style='margin: 0; color:#666; font-size: 16px;'>
-            <strong>Instructions:</strong> 
-            <br>1. Click "Play Test Tone" to start the audio
-            <br>2. The test will start at <strong>0 dB</strong> (silent)
-            <br>3. <strong>Slowly increase</strong> the level until you can *just barely* hear the tone
-            <br>4. This is your hearing threshold. Click "Continue"
-        </p>
-    </div>
-    ''', unsafe_allow_html=True)
-
-    # Navigation
-    st.markdown('<div class="nav-buttons">', unsafe_allow_html=True)
-    col1, col2, col3 = st.columns([4, 1, 1])
-    with col2:
-        if st.button("Back", key=f"{ear_side}_back", type="secondary"):
-            test_state['audio_playing'] = False
-            test_state['current_audio_data'] = None
-                
-            if ear_side == 'left':
-                st.session_state.test_phase = 'introduction'
-            else:
-                st.session_state.test_phase = 'left_ear'
-            st.rerun()
-    with col3:
-        if st.button("Continue", key=f"{ear_side}_continue", type="primary"):
-            test_state['audio_playing'] = False
-            test_state['current_audio_data'] = None
-            
-            # Save the hearing threshold
-            result_data = {
-                'hearing_threshold_db': new_hearing_level,
-                'classification': interpretation,
-                'test_frequency': test_frequency
-            }
-            
-            # Save to session state
-            if ear_side == 'left':
-                st.session_state.left_ear_results = result_data
-            else:
-                st.session_state.right_ear_results = result_data
-                
-            test_state['completed'] = True
-            st.rerun()
-    st.markdown('</div>', unsafe_allow_html=True)
-
 def show_ear_test_completion(ear_side, test_state):
     """Shows completion screen for an ear test with results."""
     st.success(f"✅ {ear_side.title()} ear test completed!")
@@ -812,18 +838,8 @@ def show_results():
     # Analyze results
     left_score, left_status, left_color = analyze_single_ear_results(left_results)
     right_score, right_status, right_color = analyze_single_ear_results(right_results)
-    overall_score = (left_score + right_score) // 2 if left_score is not None and right_score is not None else 0
-
-    # Determine overall color and risk level
-    if overall_score >= 80:
-        overall_color = "#4caf50"
-        risk_level = "Normal"
-    elif overall_score >= 60:
-        overall_color = "#ff9800"
-        risk_level = "Mild"
-    else:
-        overall_color = "#f44336"
-        risk_level = "Significant"
+    overall_score, risk_level = overall_hearing_result(left_score, right_score)
+    overall_color = {"Normal": "#4caf50", "Mild": "#ff9800"}.get(risk_level, "#f44336")
 
     # Results cards
     col1, col2, col3 = st.columns(3)
@@ -915,16 +931,7 @@ def show_results():
             st.info("Complete the test for both ears to see detailed results.")
 
     # Save results to database
-    results_data = {
-        "left_ear": left_results, 
-        "right_ear": right_results,
-        "overall_score": overall_score,
-        "test_date": str(pd.Timestamp.now().date()),
-        "left_threshold": left_results.get('hearing_threshold_db', 'N/A'),
-        "right_threshold": right_results.get('hearing_threshold_db', 'N/A'),
-        "left_classification": left_results.get('classification', 'Not tested'),
-        "right_classification": right_results.get('classification', 'Not tested')
-    }
+    results_data = hearing_test_results(left_results, right_results, overall_score)
     
     # Save assessment result to database
     save_result = save_assessment_result("Online Hearing Test", results_data, risk_level)
@@ -984,41 +991,6 @@ def show_results():
     if save_result:
         st.balloons()
 
-def analyze_single_ear_results(results):
-    """Analyze single ear test results and return score, status, and color."""
-    if not results: 
-        return None, "Not Tested", "#999"
-    
-    # Get hearing threshold
-    threshold = results.get('hearing_threshold_db', 0)
-    
-    # Score based on hearing threshold (lower threshold = better hearing = higher score)
-    score = max(0, 100 - threshold)
-    
-    if threshold <= 20:
-        return int(score), "Normal Hearing", "#4caf50"
-    elif threshold <= 40:
-        return int(score), "Mild Hearing Loss", "#ff9800"
-    elif threshold <= 70:
-        return int(score), "Moderate Hearing Loss", "#f44336"
-    elif threshold <= 90:
-        return int(score), "Severe Hearing Loss", "#d32f2f"
-    else:
-        return int(score), "Profound Hearing Loss", "#8e24aa"
-
-def get_hearing_interpretation(hearing_level):
-    """Get hearing interpretation based on dB HL level."""
-    if hearing_level <= 20:
-        return "Normal Hearing", "#4caf50"
-    elif hearing_level <= 40:
-        return "Mild Hearing Loss", "#ff9800"
-    elif hearing_level <= 70:
-        return "Moderate Hearing Loss", "#f44336"
-    elif hearing_level <= 90:
-        return "Severe Hearing Loss", "#d32f2f"
-    else:
-        return "Profound Hearing Loss", "#8e24aa"
-
 def update_audio_if_playing(test_state, frequency, hearing_level, ear_side, audio_key):
     """Update audio if currently playing and enough time has passed."""
     if (test_state['audio_playing'] and 
@@ -1038,85 +1010,12 @@ def reset_test_session():
         'test_phase', 'questionnaire_data', 'left_ear_results', 'right_ear_results', 
         'left_ear_test', 'right_ear_test'
     ]
-    other_keys = [k for k in st.session_state.keys() if k.startswith(('hearing_level_', 'audio_'))]
+    other_keys = [k for k in st.session_state.keys() if k.startswith(('hearing_level_', 'hl_slider_', 'audio_'))]
     for key in keys_to_reset + other_keys:
         if key in st.session_state: 
             del st.session_state[key]
 
-def generate_hearing_level_tone(frequency, hearing_level_db, ear_side, duration=3.0):
-    """
-    Generate a tone at a specific hearing level (dB HL) for a specific ear.
-    
-    Args:
-        frequency (int): Frequency in Hz
-        hearing_level_db (int): Hearing level in dB HL (0-100)
-        ear_side (str): 'left' or 'right'
-        duration (float): Duration in seconds
-    
-    Returns:
-        BytesIO: WAV audio data or None if error
-    """
-    try:
-        sample_rate = 44100
-        t = np.linspace(0, duration, int(sample_rate * duration), endpoint=False)
-        
-        # Convert hearing level to amplitude
-        if hearing_level_db <= 0:
-            amplitude = 0.0  # Silent
-        else:
-            # Exponential mapping for more realistic hearing level simulation
-            # Map 0-100 dB HL to 0-0.7 amplitude (avoid clipping)
-            normalized_db = min(100, max(0, hearing_level_db))
-            amplitude = (normalized_db / 100.0) ** 0.4 * 0.7
-        
-        # Generate pure tone
-        tone = np.sin(2 * np.pi * frequency * t)
-        
-        # Apply amplitude and envelope
-        audio_signal = np.zeros_like(tone) # Start with silence
-        
-        if amplitude > 0:
-            # Create smooth envelope to prevent clicks
-            fade_samples = int(0.02 * sample_rate)  # 20ms fade
-            envelope = np.ones(len(t))
-            
-            if len(t) > 2 * fade_samples:
-                # Smooth fade in/out using raised cosine
-                fade_in = 0.5 * (1 - np.cos(np.pi * np.arange(fade_samples) / fade_samples))
-                fade_out = 0.5 * (1 + np.cos(np.pi * np.arange(fade_samples) / fade_samples))
-                envelope[:fade_samples] = fade_in
-                envelope[-fade_samples:] = fade_out
-            
-            audio_signal = amplitude * envelope * tone
-        
-        # --- Create Stereo Signal ---
-        # Create a 2-channel array (shape: [samples, 2])
-        stereo_signal = np.zeros((len(t), 2))
-        
-        if ear_side == 'left':
-            stereo_signal[:, 0] = audio_signal  # Put signal in Left channel (index 0)
-        elif ear_side == 'right':
-            stereo_signal[:, 1] = audio_signal  # Put signal in Right channel (index 1)
-        
-        # Normalize to prevent clipping
-        if np.max(np.abs(stereo_signal)) > 0:
-            max_val = np.max(np.abs(stereo_signal))
-            if max_val > 0.95:
-                stereo_signal = stereo_signal * 0.95 / max_val
-        
-        # Convert to 16-bit PCM
-        audio_data = np.clip(stereo_signal * 32767, -32767, 32767).astype(np.int16)
-        
-        # Create WAV file in memory
-        buffer = io.BytesIO()
-        sf.write(buffer, audio_data, sample_rate, format='WAV', subtype='PCM_16')
-        buffer.seek(0)
-        
-        return buffer
-        
-    except Exception as e:
-        print(f"Error in generate_hearing_level_tone: {str(e)}")
-        return None
-
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    with render_timer("Full page"):
+        main()
+    show_render_timings()
\ No newline at end of file
@@ -1,5 +1,4 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 import sys
@@ -16,6 +15,8 @@ from reportlab.lib import colors
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 from auth import init_session_state
 from navbar import show_streamlit_navbar
+from repository import get_repository
+from image_store import IMAGES_KEY, get_image_store
 
 st.set_page_config(page_title="Results History", page_icon="📋", layout="wide")
 
@@ -54,38 +55,8 @@ def main():
 def load_user_assessments(user_id, username):
     """Load user's assessment history from database"""
     try:
-        conn = sqlite3.connect('data/medical_assessment.db')
-        
-        # First, let's check what columns exist in the assessments table
-        cursor = conn.cursor()
-        cursor.execute("PRAGMA table_info(assessments)")
-        column_info = cursor.fetchall()
-        columns = [row[1] for row in column_info]  # Fixed: was row[40], should be row[1]
-        
-        # Build query based on available columns
-        if 'patient_id' in columns:
-            query = """
-            SELECT id, assessment_type, results, risk_level, recommendations, 
-                   created_at, 
-                   CASE WHEN critical_flag IS NOT NULL THEN critical_flag ELSE 0 END as critical_flag
-            FROM assessments 
-            WHERE patient_id = ?
-            ORDER BY created_at DESC
-            """
-            df = pd.read_sql_query(query, conn, params=[user_id])
-        else:
-            # Fallback: try to get all assessments (for testing)
-            query = """
-            SELECT id, assessment_type, results, risk_level, recommendations, 
-                   created_at,
-                   CASE WHEN critical_flag IS NOT NULL THEN critical_flag ELSE 0 END as critical_flag
-            FROM assessments 
-            ORDER BY created_at DESC
-            LIMIT 50
-            """
-            df = pd.read_sql_query(query, conn)
-        
-        conn.close()
+        # Includes archived months, newest first
+        df = get_repository().get_patient_assessments(user_id)
         
         # Debug: Show what we found
         if not df.empty:
@@ -97,16 +68,6 @@ def load_user_assessments(user_id, username):
         
     except Exception as e:
         st.error(f"Error loading assessment data: {e}")
-        # Debug: Show database structure
-        try:
-            conn = sqlite3.connect('data/medical_assessment.db')
-            cursor = conn.cursor()
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            st.info(f"Available tables: {[table[0] for table in tables]}")
-            conn.close()
-        except:
-            pass
         return pd.DataFrame()
 
 def show_no_results():
@@ -311,6 +272,15 @@ def display_ai_eye_results(data):
         quality = data['quality_metrics']
         if isinstance(quality, dict) and 'overall_quality' in quality:
             st.write(f"**Image Quality:** {quality['overall_quality']}")
+    
+    # Stored photos, as thumbnails
+    images = data.get(IMAGES_KEY)
+    if isinstance(images, dict):
+        image_store = get_image_store()
+        stored = [(role, digest) for role, digest in images.items() if image_store.exists(digest)]
+        for col, (role, digest) in zip(st.columns(max(len(stored), 1)), stored):
+            with col:
+                st.image(image_store.thumbnail(digest), caption=role.title())
 
 def display_hearing_results(data):
     """Display hearing assessment results"""
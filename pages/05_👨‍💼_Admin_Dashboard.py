@@ -1,7 +1,6 @@
 import streamlit as st
 import sqlite3
 import pandas as pd
-import matplotlib.pyplot as plt
 import seaborn as sns
 import numpy as np
 from datetime import datetime, timedelta
@@ -11,8 +10,14 @@ from pathlib import Path
 
 # Add utils to path
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
-from auth import init_session_state
-from database import MedicalDB
+from auth import end_session, init_session_state
+from charts import render_chart
+from analytics import get_patient_summary
+from db_maintenance import backup_database, database_metrics, format_age, format_bytes, optimize_database
+from tiering import HOT_MONTHS, roll_over
+from snapshot import refresh_snapshot
+from repository import get_analytics_repository, get_repository, is_sqlite
+from change_watch import CRITICAL_POLL_SECONDS, get_critical_watcher
 
 st.set_page_config(
     page_title="Admin Dashboard", 
@@ -78,6 +83,26 @@ def apply_custom_css():
             color: white;
         }
         
+        /* Section navigation (horizontal radio styled like the tab bar) */
+        .stRadio [role="radiogroup"] {
+            gap: 1rem;
+            background-color: white;
+            border-radius: 15px;
+            padding: 1rem;
+            box-shadow: 0 2px 8px rgba(0,0,0,0.1);
+        }
+        
+        .stRadio [role="radiogroup"] label {
+            padding: 0.5rem 1.5rem;
+            border-radius: 10px;
+            font-weight: 600;
+        }
+        
+        .stRadio [role="radiogroup"] label:has(input:checked) {
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
+            color: white;
+        }
+        
         /* Button styling */
         .stButton > button {
             border-radius: 25px !important;
@@ -362,6 +387,8 @@ def show_admin_navbar():
     
     with col4:
         if st.button("🚪 Logout", use_container_width=True):
+            # Revoke the session token, then clear session state for logout
+            end_session()
             for key in list(st.session_state.keys()):
                 del st.session_state[key]
             st.switch_page("streamlit_app.py")
@@ -395,49 +422,301 @@ def main():
     # Admin dashboard content
     show_admin_dashboard()
 
+PATIENT_SEARCH_LIMIT = 100
+
+ADMIN_SECTIONS = [
+    "📊 System Overview", 
+    "👥 Patient Management", 
+    "🚨 Critical Cases", 
+    "📈 Analytics & Reports",
+    "⚙️ System Settings"
+]
+
 def show_admin_dashboard():
     """Comprehensive Admin Dashboard - System Management & Oversight"""
     
     st.title("👨‍💼 Medical Assessment System - Administrative Control Panel")
     
-    # Load data
+    # SQLite reports read the analytics snapshot, never the live file the
+    # screening pages write to. Only the cheap COUNT queries run up front;
+    # each section loads its own data
     try:
-        db = MedicalDB()
-        all_assessments = db.get_all_assessments()
-        critical_patients = db.get_critical_patients()
+        db, as_of = get_analytics_repository()
         stats = db.get_statistics()
     except Exception as e:
         st.error(f"❌ Database Error: {e}")
         return
     
     # Check if system has data
-    if all_assessments.empty:
+    if not stats.get('total_assessments', 0):
         show_empty_admin_state()
         return
     
-    # Main Admin Dashboard Tabs
-    tab1, tab2, tab3, tab4, tab5 = st.tabs([
-        "📊 System Overview", 
-        "👥 Patient Management", 
-        "🚨 Critical Cases", 
-        "📈 Analytics & Reports",
-        "⚙️ System Settings"
-    ])
-    
-    with tab1:
-        show_system_overview(all_assessments, critical_patients, stats)
+    # Section navigation - unlike st.tabs, only the selected section executes
+    section = st.radio(
+        "Dashboard Section",
+        ADMIN_SECTIONS,
+        horizontal=True,
+        key="admin_section",
+        label_visibility="collapsed"
+    )
     
-    with tab2:
-        show_patient_management(all_assessments)
+    if section != ADMIN_SECTIONS[-1] and is_sqlite(db):
+        show_snapshot_status(as_of)
     
-    with tab3:
-        show_critical_cases_management(critical_patients)
-    
-    with tab4:
-        show_analytics_reports(all_assessments, stats)
-    
-    with tab5:
-        show_system_settings()
+    try:
+        if section == "📊 System Overview":
+            show_system_overview(db.get_all_assessments(), db.get_critical_patients(), stats)
+        
+        elif section == "👥 Patient Management":
+            show_patient_management(db.get_all_assessments(), db)
+        
+        elif section == "🚨 Critical Cases":
+            show_critical_cases_management(db.get_critical_patients())
+        
+        elif section == "📈 Analytics & Reports":
+            show_analytics_reports(db.get_all_assessments(), stats, db)
+        
+        else:
+            show_system_settings()
+    except Exception as e:
+        st.error(f"❌ Database Error: {e}")
+
+def show_snapshot_status(as_of):
+    """'Data as of' line for the report sections, with a manual refresh"""
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        st.caption(f"🕒 Data as of {as_of.strftime('%Y-%m-%d %H:%M:%S')} ({format_age(as_of)}) - reports read a periodically refreshed snapshot")
+    with col2:
+        if st.button("🔄 Refresh Data", key="refresh_snapshot", use_container_width=True):
+            refresh_snapshot(get_repository().db_path)
+            st.rerun()
+
+# ============ CHART DRAWING ============
+# Each function draws one chart from a small aggregate. render_chart() caches
+# the resulting PNG per data version, so a rerun with unchanged data skips
+# matplotlib entirely.
+
+def show_chart(name, data, draw, figsize=(10, 6)):
+    """Display a cached chart image"""
+    st.image(render_chart(name, data, draw, figsize=figsize), use_container_width=True)
+
+def label_vertical_bars(ax, bars, fontsize=10, fontweight='normal'):
+    """Add value labels on top of vertical bars"""
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+               f'{int(height)}',
+               ha='center', va='bottom', fontsize=fontsize, fontweight=fontweight)
+
+def label_horizontal_bars(ax, bars, prefix='', fontsize=11):
+    """Add value labels at the end of horizontal bars"""
+    for bar in bars:
+        width = bar.get_width()
+        ax.text(width, bar.get_y() + bar.get_height()/2.,
+               f'{prefix}{int(width)}',
+               ha='left', va='center', fontsize=fontsize, fontweight='bold')
+
+def draw_assessment_types(fig, ax, assessment_counts):
+    colors = sns.color_palette("husl", len(assessment_counts))
+    bars = ax.bar(range(len(assessment_counts)), assessment_counts.values, color=colors)
+    ax.set_xticks(range(len(assessment_counts)))
+    ax.set_xticklabels(assessment_counts.index, rotation=45, ha='right')
+    ax.set_ylabel('Number of Assessments', fontsize=12)
+    ax.set_title('Assessment Types Performed', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    label_vertical_bars(ax, bars)
+
+def draw_risk_pie(fig, ax, risk_counts):
+    colors = ['#ff6b6b', '#feca57', '#48dbfb', '#1dd1a1'][:len(risk_counts)]
+    explode = [0.1 if 'High' in idx or 'Critical' in idx else 0 for idx in risk_counts.index]
+    ax.pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%',
+           startangle=90, colors=colors, explode=explode,
+           textprops={'fontsize': 11, 'fontweight': 'bold'}, shadow=True)
+    ax.set_title('Patient Risk Levels', fontsize=14, fontweight='bold')
+
+def draw_age_histogram(fig, ax, ages):
+    ax.hist(ages, bins=15, color='#5f27cd', alpha=0.7, edgecolor='black')
+    ax.set_xlabel('Age', fontsize=12)
+    ax.set_ylabel('Number of Patients', fontsize=12)
+    ax.set_title('Age Distribution Histogram', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+def draw_age_groups(fig, ax, age_group_counts):
+    colors = sns.color_palette("viridis", len(age_group_counts))
+    bars = ax.bar(range(len(age_group_counts)), age_group_counts.values, color=colors)
+    ax.set_xticks(range(len(age_group_counts)))
+    ax.set_xticklabels(age_group_counts.index)
+    ax.set_ylabel('Number of Patients', fontsize=12)
+    ax.set_title('Patients by Age Group', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    label_vertical_bars(ax, bars)
+
+GENDER_COLORS = ['#3742fa', '#ff6348', '#ffa502']
+
+def draw_gender_pie(fig, ax, gender_counts):
+    colors = GENDER_COLORS[:len(gender_counts)]
+    ax.pie(gender_counts.values, labels=gender_counts.index,
+           autopct='%1.1f%%', startangle=90, colors=colors,
+           textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
+    ax.set_title('Gender Distribution', fontsize=14, fontweight='bold')
+
+def draw_gender_bars(fig, ax, gender_counts):
+    colors = GENDER_COLORS[:len(gender_counts)]
+    bars = ax.bar(gender_counts.index, gender_counts.values, color=colors)
+    ax.set_ylabel('Number of Patients', fontsize=12)
+    ax.set_title('Gender Count Comparison', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    label_vertical_bars(ax, bars, fontsize=11, fontweight='bold')
+
+def draw_patient_risk_bars(fig, ax, risk_dist):
+    colors = ['#ee5a6f', '#f79f1f', '#0abde3', '#10ac84'][:len(risk_dist)]
+    bars = ax.barh(risk_dist.index, risk_dist.values, color=colors)
+    ax.set_xlabel('Number of Patients', fontsize=12)
+    ax.set_title('Patient Risk Distribution', fontsize=14, fontweight='bold')
+    ax.grid(axis='x', alpha=0.3)
+    label_horizontal_bars(ax, bars)
+
+def draw_assessment_frequency(fig, ax, assessment_counts):
+    colors = sns.color_palette("coolwarm", len(assessment_counts))
+    bars = ax.bar(assessment_counts.index.astype(str), assessment_counts.values, color=colors)
+    ax.set_xlabel('Number of Assessments', fontsize=12)
+    ax.set_ylabel('Number of Patients', fontsize=12)
+    ax.set_title('Assessment Frequency Distribution', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    label_vertical_bars(ax, bars)
+
+def draw_critical_types(fig, ax, type_counts):
+    colors = ['#eb3b5a', '#fa8231', '#f7b731'][:len(type_counts)]
+    ax.pie(type_counts.values, labels=type_counts.index, autopct='%1.1f%%',
+           startangle=90, colors=colors, textprops={'fontsize': 11, 'fontweight': 'bold'},
+           shadow=True, explode=[0.1] * len(type_counts))
+    ax.set_title('Critical Cases Distribution', fontsize=14, fontweight='bold')
+
+def draw_critical_timeline(fig, ax, timeline):
+    ax.plot(timeline.index, timeline.values, marker='o', color='#eb3b5a',
+           linewidth=2, markersize=8)
+    ax.fill_between(timeline.index, timeline.values, alpha=0.3, color='#eb3b5a')
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Number of Critical Cases', fontsize=12)
+    ax.set_title('Critical Cases Over Time', fontsize=14, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis='x', rotation=45)
+
+def draw_patient_growth(fig, ax, growth):
+    dates, growth_data = growth
+    ax.plot(dates, growth_data, marker='o', linewidth=2.5, markersize=8, color='#5f27cd')
+    ax.fill_between(dates, growth_data, alpha=0.3, color='#5f27cd')
+    ax.set_xlabel('Date', fontsize=12)
+    ax.set_ylabel('Cumulative Patients', fontsize=12)
+    ax.set_title('Patient Growth Trend', fontsize=16, fontweight='bold')
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis='x', rotation=45)
+
+def draw_assessment_volume(fig, ax, values):
+    categories = ['Eye\nAssessments', 'Hearing\nAssessments']
+    colors = ['#6c5ce7', '#fd79a8']
+    bars = ax.bar(categories, values, color=colors, width=0.6)
+    ax.set_ylabel('Number of Assessments', fontsize=12)
+    ax.set_title('Assessment Type Volume', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+    # Add value labels
+    for bar in bars:
+        height = bar.get_height()
+        ax.text(bar.get_x() + bar.get_width()/2., height,
+               f'{int(height)}\n({height/sum(values)*100:.1f}%)',
+               ha='center', va='bottom', fontsize=12, fontweight='bold')
+
+def draw_risk_comparison(fig, ax, risk_counts):
+    colors = {'High': '#eb3b5a', 'Moderate': '#fa8231', 'Low': '#0abde3', 'Normal': '#10ac84'}
+    bar_colors = [colors.get(risk, '#95a5a6') for risk in risk_counts.index]
+    bars = ax.barh(risk_counts.index, risk_counts.values, color=bar_colors)
+    ax.set_xlabel('Number of Patients', fontsize=12)
+    ax.set_title('Risk Level Distribution', fontsize=14, fontweight='bold')
+    ax.grid(axis='x', alpha=0.3)
+    label_horizontal_bars(ax, bars, prefix=' ', fontsize=12)
+
+def draw_eye_conditions(fig, ax, condition_counts):
+    conditions, counts = condition_counts
+    colors = sns.color_palette("viridis", len(conditions))
+    bars = ax.bar(conditions, counts, color=colors, width=0.7)
+    ax.set_ylabel('Number of Cases', fontsize=13)
+    ax.set_xlabel('Detected Condition', fontsize=13)
+    ax.set_title('Eye Condition Distribution Across All Patients', fontsize=16, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+    label_vertical_bars(ax, bars, fontsize=11, fontweight='bold')
+
+def draw_hearing_conditions(fig, ax, hearing_sizes):
+    hearing_labels = ['Good', 'Mild\nDifficulty', 'Moderate\nLoss', 'Severe\nLoss']
+    colors = ['#10ac84', '#f9ca24', '#ff9f43', '#ee5a6f']
+    explode = (0, 0, 0.1, 0.15)
+    ax.pie(hearing_sizes, explode=explode, labels=hearing_labels,
+           autopct='%1.1f%%', startangle=90, colors=colors,
+           textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
+    ax.set_title('Hearing Condition Distribution', fontsize=14, fontweight='bold')
+
+def draw_completion_rate(fig, ax, completion_data):
+    colors = ['#feca57', '#48dbfb']
+    ax.pie(list(completion_data.values()), labels=list(completion_data.keys()),
+           autopct='%1.1f%%', startangle=90, colors=colors,
+           textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
+    ax.set_title('Patient Completion Rate', fontsize=14, fontweight='bold')
+
+def draw_activity_heatmap(fig, ax, heatmap_data):
+    sns.heatmap(heatmap_data, cmap='YlOrRd', annot=True, fmt='g', cbar_kws={'label': 'Number of Assessments'},
+               linewidths=0.5, ax=ax)
+    ax.set_xlabel('Hour of Day', fontsize=13)
+    ax.set_ylabel('Day of Week', fontsize=13)
+    ax.set_title('Assessment Activity Heatmap (Day vs Hour)', fontsize=16, fontweight='bold')
+
+RISK_BOX_COLORS = ['#10ac84', '#48dbfb', '#feca57', '#ee5a6f']
+
+def draw_age_risk_box(fig, ax, ages_by_risk):
+    available_risks = list(ages_by_risk.keys())
+    bp = ax.boxplot(list(ages_by_risk.values()), tick_labels=available_risks, patch_artist=True)
+    for patch, color in zip(bp['boxes'], RISK_BOX_COLORS[:len(available_risks)]):
+        patch.set_facecolor(color)
+        patch.set_alpha(0.7)
+    ax.set_xlabel('Risk Level', fontsize=12)
+    ax.set_ylabel('Age', fontsize=12)
+    ax.set_title('Age Distribution by Risk Level', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+def draw_age_risk_violin(fig, ax, ages_by_risk):
+    available_risks = list(ages_by_risk.keys())
+    parts = ax.violinplot(list(ages_by_risk.values()),
+                         positions=range(len(available_risks)),
+                         showmeans=True, showmedians=True)
+    for pc, color in zip(parts['bodies'], RISK_BOX_COLORS[:len(available_risks)]):
+        pc.set_facecolor(color)
+        pc.set_alpha(0.7)
+    ax.set_xticks(range(len(available_risks)))
+    ax.set_xticklabels(available_risks)
+    ax.set_xlabel('Risk Level', fontsize=12)
+    ax.set_ylabel('Age', fontsize=12)
+    ax.set_title('Age Density by Risk Level', fontsize=14, fontweight='bold')
+    ax.grid(axis='y', alpha=0.3)
+
+def draw_monthly_trend(fig, ax, monthly_counts):
+    months = [str(m) for m in monthly_counts.index]
+    ax.plot(months, monthly_counts.values, marker='o', linewidth=2.5,
+           markersize=10, color='#5f27cd', label='Total Assessments')
+    ax.fill_between(range(len(months)), monthly_counts.values, alpha=0.3, color='#5f27cd')
+
+    # Add trend line (needs at least two points to fit)
+    if len(monthly_counts) > 1:
+        z = np.polyfit(range(len(monthly_counts)), monthly_counts.values, 1)
+        p = np.poly1d(z)
+        ax.plot(months, p(range(len(monthly_counts))), "r--", alpha=0.8,
+               linewidth=2, label='Trend Line')
+
+    ax.set_xlabel('Month', fontsize=12)
+    ax.set_ylabel('Number of Assessments', fontsize=12)
+    ax.set_title('Monthly Assessment Volume with Trend', fontsize=16, fontweight='bold')
+    ax.legend(fontsize=11)
+    ax.grid(True, alpha=0.3)
+    ax.tick_params(axis='x', rotation=45)
 
 def show_system_overview(all_assessments, critical_patients, stats):
     """System overview with key metrics and visual charts"""
@@ -481,43 +760,14 @@ def show_system_overview(all_assessments, critical_patients, stats):
         st.markdown("### 📊 Assessment Type Distribution")
         if not all_assessments.empty and 'assessment_type' in all_assessments.columns:
             assessment_counts = all_assessments['assessment_type'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = sns.color_palette("husl", len(assessment_counts))
-            bars = ax.bar(range(len(assessment_counts)), assessment_counts.values, color=colors)
-            ax.set_xticks(range(len(assessment_counts)))
-            ax.set_xticklabels(assessment_counts.index, rotation=45, ha='right')
-            ax.set_ylabel('Number of Assessments', fontsize=12)
-            ax.set_title('Assessment Types Performed', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels on bars
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=10)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_assessment_types', assessment_counts, draw_assessment_types)
     
     with col2:
         # Risk Level Distribution (Pie Chart)
         st.markdown("### 🎯 Risk Level Distribution")
         if not all_assessments.empty and 'risk_level' in all_assessments.columns:
             risk_counts = all_assessments['risk_level'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['#ff6b6b', '#feca57', '#48dbfb', '#1dd1a1'][:len(risk_counts)]
-            explode = [0.1 if 'High' in idx or 'Critical' in idx else 0 for idx in risk_counts.index]
-            
-            ax.pie(risk_counts.values, labels=risk_counts.index, autopct='%1.1f%%',
-                   startangle=90, colors=colors, explode=explode,
-                   textprops={'fontsize': 11, 'fontweight': 'bold'}, shadow=True)
-            ax.set_title('Patient Risk Levels', fontsize=14, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_risk_pie', risk_counts, draw_risk_pie)
     
     st.markdown("---")
     
@@ -526,44 +776,19 @@ def show_system_overview(all_assessments, critical_patients, stats):
     if not all_assessments.empty and 'age' in all_assessments.columns:
         col1, col2 = st.columns(2)
         
+        ages = all_assessments['age'].dropna()
+        
         with col1:
             # Histogram
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ages = all_assessments['age'].dropna()
-            ax.hist(ages, bins=15, color='#5f27cd', alpha=0.7, edgecolor='black')
-            ax.set_xlabel('Age', fontsize=12)
-            ax.set_ylabel('Number of Patients', fontsize=12)
-            ax.set_title('Age Distribution Histogram', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_age_histogram', ages.to_numpy(), draw_age_histogram)
         
         with col2:
             # Age Groups Bar Chart
-            fig, ax = plt.subplots(figsize=(10, 6))
             age_bins = [0, 18, 30, 45, 60, 100]
             age_labels = ['0-18', '19-30', '31-45', '46-60', '60+']
             age_groups = pd.cut(ages, bins=age_bins, labels=age_labels)
             age_group_counts = age_groups.value_counts().sort_index()
-            
-            colors = sns.color_palette("viridis", len(age_group_counts))
-            bars = ax.bar(range(len(age_group_counts)), age_group_counts.values, color=colors)
-            ax.set_xticks(range(len(age_group_counts)))
-            ax.set_xticklabels(age_group_counts.index)
-            ax.set_ylabel('Number of Patients', fontsize=12)
-            ax.set_title('Patients by Age Group', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=10)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_age_groups', age_group_counts, draw_age_groups)
     
     st.markdown("---")
     
@@ -574,36 +799,13 @@ def show_system_overview(all_assessments, critical_patients, stats):
         
         with col1:
             gender_counts = all_assessments['gender'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(8, 6))
-            colors = ['#3742fa', '#ff6348', '#ffa502'][:len(gender_counts)]
-            wedges, texts, autotexts = ax.pie(gender_counts.values, labels=gender_counts.index,
-                   autopct='%1.1f%%', startangle=90, colors=colors,
-                   textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
-            ax.set_title('Gender Distribution', fontsize=14, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_gender_pie', gender_counts, draw_gender_pie, figsize=(8, 6))
         
         with col2:
             # Gender counts bar chart
-            fig, ax = plt.subplots(figsize=(8, 6))
-            bars = ax.bar(gender_counts.index, gender_counts.values, color=colors)
-            ax.set_ylabel('Number of Patients', fontsize=12)
-            ax.set_title('Gender Count Comparison', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=11, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('overview_gender_bars', gender_counts, draw_gender_bars, figsize=(8, 6))
 
-def show_patient_management(all_assessments):
+def show_patient_management(all_assessments, db):
     """Comprehensive patient management interface with visualizations"""
     st.markdown("## 👥 Patient Management System")
     
@@ -621,24 +823,16 @@ def show_patient_management(all_assessments):
     
     # Get unique patients with their latest info
     if not all_assessments.empty:
-        # Build aggregation dictionary based on available columns
-        agg_dict = {
-            'name': 'first',
-            'age': 'first', 
-            'gender': 'first',
-            'created_at': 'max',
-            'risk_level': lambda x: x.iloc[-1],
-            'critical_flag': 'max',
-            'assessment_type': 'count'
-        }
-        
-        patient_summary = all_assessments.groupby('patient_id').agg(agg_dict).reset_index()
+        # Latest details per patient, reused until the assessments change
+        patient_summary = get_patient_summary(all_assessments)
         
         # Apply filters
         if search_term:
-            patient_summary = patient_summary[
-                patient_summary['name'].str.contains(search_term, case=False, na=False)
-            ]
+            # Ranked FTS5 lookup instead of scanning every name in pandas
+            matches = db.search_patients(search_term, limit=PATIENT_SEARCH_LIMIT)['id'].tolist()
+            rank = {patient_id: position for position, patient_id in enumerate(matches)}
+            patient_summary = patient_summary[patient_summary['patient_id'].isin(rank)]
+            patient_summary = patient_summary.sort_values('patient_id', key=lambda ids: ids.map(rank))
         
         if risk_filter != "All":
             patient_summary = patient_summary[patient_summary['risk_level'] == risk_filter]
@@ -654,45 +848,12 @@ def show_patient_management(all_assessments):
         with col1:
             st.markdown("### 📊 Patients by Risk Level")
             risk_dist = patient_summary['risk_level'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['#ee5a6f', '#f79f1f', '#0abde3', '#10ac84'][:len(risk_dist)]
-            bars = ax.barh(risk_dist.index, risk_dist.values, color=colors)
-            ax.set_xlabel('Number of Patients', fontsize=12)
-            ax.set_title('Patient Risk Distribution', fontsize=14, fontweight='bold')
-            ax.grid(axis='x', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width, bar.get_y() + bar.get_height()/2.,
-                       f'{int(width)}',
-                       ha='left', va='center', fontsize=11, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('patients_risk_bars', risk_dist, draw_patient_risk_bars)
         
         with col2:
             st.markdown("### 📈 Assessments per Patient")
             assessment_counts = patient_summary['assessment_type'].value_counts().sort_index()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = sns.color_palette("coolwarm", len(assessment_counts))
-            bars = ax.bar(assessment_counts.index.astype(str), assessment_counts.values, color=colors)
-            ax.set_xlabel('Number of Assessments', fontsize=12)
-            ax.set_ylabel('Number of Patients', fontsize=12)
-            ax.set_title('Assessment Frequency Distribution', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}',
-                       ha='center', va='bottom', fontsize=10)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('patients_assessment_frequency', assessment_counts, draw_assessment_frequency)
         
         # Display patient list
         st.markdown(f"### 📋 Patient Directory ({len(patient_summary)} patients)")
@@ -717,10 +878,70 @@ def show_patient_management(all_assessments):
                     if st.button(f"📄 Generate Report", key=f"report_{patient['patient_id']}"):
                         st.info("Report generation feature")
 
+def show_critical_case(case, title, key_prefix=""):
+    """One critical case card with its action buttons"""
+    with st.container():
+        st.markdown(f"""
+        <div style="
+            background: linear-gradient(135deg, #ff6b6b 0%, #ee5a52 100%);
+            color: white;
+            padding: 1.5rem;
+            border-radius: 10px;
+            margin: 1rem 0;
+            box-shadow: 0 4px 15px rgba(255, 107, 107, 0.3);
+        ">
+            <h4 style="margin: 0 0 1rem 0; color: white;">{title}</h4>
+            <p style="margin: 0.5rem 0;"><strong>Patient:</strong> {case.get('name', 'Unknown')}</p>
+            <p style="margin: 0.5rem 0;"><strong>Assessment:</strong> {case.get('assessment_type', 'Unknown')}</p>
+            <p style="margin: 0.5rem 0;"><strong>Date:</strong> {case.get('created_at', 'Unknown')}</p>
+            <p style="margin: 0.5rem 0;"><strong>Action Required:</strong> {case.get('recommendations', 'Immediate medical consultation')}</p>
+        </div>
+        """, unsafe_allow_html=True)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button(f"📄 Generate Urgent Report", key=f"{key_prefix}urgent_{case.get('id', title)}"):
+                st.info("Urgent report generation feature")
+        with col2:
+            if st.button(f"✅ Mark as Addressed", key=f"{key_prefix}resolve_{case.get('id', title)}"):
+                st.success("Case marked as addressed")
+
+@st.fragment(run_every=CRITICAL_POLL_SECONDS)
+def show_new_critical_cases(db_path, baseline_id):
+    """Critical cases written since the report data was taken.
+    
+    Reruns on its own every few seconds; each run is one PRAGMA
+    data_version call unless something new was written, so the rest of the
+    dashboard is never reloaded.
+    """
+    if st.session_state.get('critical_watch_baseline') != baseline_id:
+        st.session_state.critical_watch_baseline = baseline_id
+        st.session_state.critical_watch_last_id = baseline_id
+        st.session_state.critical_watch_new = pd.DataFrame()
+    
+    rows, last_id = get_critical_watcher(db_path).poll(st.session_state.critical_watch_last_id)
+    st.session_state.critical_watch_last_id = last_id
+    if not rows.empty:
+        st.session_state.critical_watch_new = pd.concat([rows, st.session_state.critical_watch_new], ignore_index=True)
+    
+    new_cases = st.session_state.critical_watch_new
+    if new_cases.empty:
+        st.caption(f"🟢 Watching for new critical screenings (every {CRITICAL_POLL_SECONDS}s)")
+        return
+    
+    st.error(f"🆕 **{len(new_cases)} NEW CRITICAL CASE{'S' if len(new_cases) != 1 else ''}** since the report data was taken")
+    for _, case in new_cases.iterrows():
+        show_critical_case(case, f"🆕 NEW CRITICAL CASE - {case.get('name', 'Unknown')}", key_prefix="new_")
+
 def show_critical_cases_management(critical_patients):
     """Critical cases management with visualizations"""
     st.markdown("## 🚨 Critical Cases Management")
     
+    # The watcher polls the SQLite file; server-database reports are read live
+    repository = get_repository()
+    if is_sqlite(repository):
+        show_new_critical_cases(repository.db_path, int(critical_patients['id'].max()) if not critical_patients.empty else 0)
+    
     if critical_patients.empty:
         st.success("✅ No critical cases requiring immediate attention")
         st.info("System is operating normally. All patients are within safe parameters.")
@@ -735,66 +956,21 @@ def show_critical_cases_management(critical_patients):
         st.markdown("### 📊 Critical Cases by Type")
         if 'assessment_type' in critical_patients.columns:
             type_counts = critical_patients['assessment_type'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            colors = ['#eb3b5a', '#fa8231', '#f7b731'][:len(type_counts)]
-            ax.pie(type_counts.values, labels=type_counts.index, autopct='%1.1f%%',
-                   startangle=90, colors=colors, textprops={'fontsize': 11, 'fontweight': 'bold'},
-                   shadow=True, explode=[0.1] * len(type_counts))
-            ax.set_title('Critical Cases Distribution', fontsize=14, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('critical_types', type_counts, draw_critical_types)
     
     with col2:
         st.markdown("### ⏰ Critical Cases Timeline")
         if 'created_at' in critical_patients.columns:
             critical_patients['date'] = pd.to_datetime(critical_patients['created_at']).dt.date
             timeline = critical_patients['date'].value_counts().sort_index()
-            
-            fig, ax = plt.subplots(figsize=(10, 6))
-            ax.plot(timeline.index, timeline.values, marker='o', color='#eb3b5a',
-                   linewidth=2, markersize=8)
-            ax.fill_between(timeline.index, timeline.values, alpha=0.3, color='#eb3b5a')
-            ax.set_xlabel('Date', fontsize=12)
-            ax.set_ylabel('Number of Critical Cases', fontsize=12)
-            ax.set_title('Critical Cases Over Time', fontsize=14, fontweight='bold')
-            ax.grid(True, alpha=0.3)
-            plt.xticks(rotation=45)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('critical_timeline', timeline, draw_critical_timeline)
     
     # Critical cases list
     st.markdown("### 🚨 Priority Action Required")
     for idx, (_, case) in enumerate(critical_patients.iterrows()):
-        with st.container():
-            st.markdown(f"""
-            <div style="
-                background: linear-gradient(135deg, #ff6b6b 0%, #ee5a52 100%);
-                color: white;
-                padding: 1.5rem;
-                border-radius: 10px;
-                margin: 1rem 0;
-                box-shadow: 0 4px 15px rgba(255, 107, 107, 0.3);
-            ">
-                <h4 style="margin: 0 0 1rem 0; color: white;">🚨 CRITICAL CASE #{idx+1}</h4>
-                <p style="margin: 0.5rem 0;"><strong>Patient:</strong> {case.get('name', 'Unknown')}</p>
-                <p style="margin: 0.5rem 0;"><strong>Assessment:</strong> {case.get('assessment_type', 'Unknown')}</p>
-                <p style="margin: 0.5rem 0;"><strong>Date:</strong> {case.get('created_at', 'Unknown')}</p>
-                <p style="margin: 0.5rem 0;"><strong>Action Required:</strong> {case.get('recommendations', 'Immediate medical consultation')}</p>
-            </div>
-            """, unsafe_allow_html=True)
-            
-            col1, col2 = st.columns(2)
-            with col1:
-                if st.button(f"📄 Generate Urgent Report", key=f"urgent_{case.get('id', idx)}"):
-                    st.info("Urgent report generation feature")
-            with col2:
-                if st.button(f"✅ Mark as Addressed", key=f"resolve_{case.get('id', idx)}"):
-                    st.success("Case marked as addressed")
+        show_critical_case(case, f"🚨 CRITICAL CASE #{idx+1}")
 
-def show_analytics_reports(all_assessments, stats):
+def show_analytics_reports(all_assessments, stats, db):
     """Advanced analytics with comprehensive visualizations"""
     st.markdown("## 📈 System Analytics & Medical Reports")
     
@@ -803,18 +979,7 @@ def show_analytics_reports(all_assessments, stats):
     dates = pd.date_range(end=datetime.now(), periods=12, freq='M')
     total_patients = stats.get('total_patients', 100)
     growth_data = [int(total_patients * (i+1) / 12) for i in range(12)]
-    
-    fig, ax = plt.subplots(figsize=(14, 6))
-    ax.plot(dates, growth_data, marker='o', linewidth=2.5, markersize=8, color='#5f27cd')
-    ax.fill_between(dates, growth_data, alpha=0.3, color='#5f27cd')
-    ax.set_xlabel('Date', fontsize=12)
-    ax.set_ylabel('Cumulative Patients', fontsize=12)
-    ax.set_title('Patient Growth Trend', fontsize=16, fontweight='bold')
-    ax.grid(True, alpha=0.3)
-    plt.xticks(rotation=45)
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+    show_chart('analytics_growth', (dates.to_numpy(), growth_data), draw_patient_growth, figsize=(14, 6))
     
     st.markdown("---")
     
@@ -826,51 +991,14 @@ def show_analytics_reports(all_assessments, stats):
         if not all_assessments.empty and 'assessment_type' in all_assessments.columns:
             eye_count = len(all_assessments[all_assessments['assessment_type'].str.contains('Eye|Visual', case=False, na=False)])
             hearing_count = len(all_assessments[all_assessments['assessment_type'].str.contains('Hearing', case=False, na=False)])
-            
-            fig, ax = plt.subplots(figsize=(10, 7))
-            categories = ['Eye\nAssessments', 'Hearing\nAssessments']
-            values = [eye_count, hearing_count]
-            colors = ['#6c5ce7', '#fd79a8']
-            
-            bars = ax.bar(categories, values, color=colors, width=0.6)
-            ax.set_ylabel('Number of Assessments', fontsize=12)
-            ax.set_title('Assessment Type Volume', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                height = bar.get_height()
-                ax.text(bar.get_x() + bar.get_width()/2., height,
-                       f'{int(height)}\n({height/sum(values)*100:.1f}%)',
-                       ha='center', va='bottom', fontsize=12, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('analytics_volume', [eye_count, hearing_count], draw_assessment_volume, figsize=(10, 7))
     
     with col2:
         # Risk Level Comparison
         st.markdown("### 🎯 Risk Level Comparison")
         if not all_assessments.empty and 'risk_level' in all_assessments.columns:
             risk_counts = all_assessments['risk_level'].value_counts()
-            
-            fig, ax = plt.subplots(figsize=(10, 7))
-            colors = {'High': '#eb3b5a', 'Moderate': '#fa8231', 'Low': '#0abde3', 'Normal': '#10ac84'}
-            bar_colors = [colors.get(risk, '#95a5a6') for risk in risk_counts.index]
-            
-            bars = ax.barh(risk_counts.index, risk_counts.values, color=bar_colors)
-            ax.set_xlabel('Number of Patients', fontsize=12)
-            ax.set_title('Risk Level Distribution', fontsize=14, fontweight='bold')
-            ax.grid(axis='x', alpha=0.3)
-            
-            # Add value labels
-            for bar in bars:
-                width = bar.get_width()
-                ax.text(width, bar.get_y() + bar.get_height()/2.,
-                       f' {int(width)}',
-                       ha='left', va='center', fontsize=12, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('analytics_risk_comparison', risk_counts, draw_risk_comparison, figsize=(10, 7))
     
     st.markdown("---")
     
@@ -878,24 +1006,7 @@ def show_analytics_reports(all_assessments, stats):
     st.markdown("### 👁️ Eye Condition Distribution (Simulated Data)")
     conditions = ['Normal', 'Cataracts', 'Diabetic\nRetinopathy', 'Glaucoma', 'AMD', 'Hypertensive\nRetinopathy']
     counts = [350, 280, 180, 140, 110, 40]
-    
-    fig, ax = plt.subplots(figsize=(14, 7))
-    colors = sns.color_palette("viridis", len(conditions))
-    bars = ax.bar(conditions, counts, color=colors, width=0.7)
-    ax.set_ylabel('Number of Cases', fontsize=13)
-    ax.set_xlabel('Detected Condition', fontsize=13)
-    ax.set_title('Eye Condition Distribution Across All Patients', fontsize=16, fontweight='bold')
-    ax.grid(axis='y', alpha=0.3)
-    
-    # Add value labels
-    for bar in bars:
-        height = bar.get_height()
-        ax.text(bar.get_x() + bar.get_width()/2., height,
-               f'{int(height)}',
-               ha='center', va='bottom', fontsize=11, fontweight='bold')
-    
-    plt.tight_layout()
-    st.pyplot(fig)
+    show_chart('analytics_eye_conditions', (conditions, counts), draw_eye_conditions, figsize=(14, 7))
     
     st.markdown("---")
     
@@ -904,20 +1015,8 @@ def show_analytics_reports(all_assessments, stats):
     with col1:
         # Hearing condition distribution
         st.markdown("### 👂 Hearing Condition Distribution")
-        hearing_labels = ['Good', 'Mild\nDifficulty', 'Moderate\nLoss', 'Severe\nLoss']
         hearing_sizes = [55, 25, 12, 8]
-        
-        fig, ax = plt.subplots(figsize=(10, 8))
-        colors = ['#10ac84', '#f9ca24', '#ff9f43', '#ee5a6f']
-        explode = (0, 0, 0.1, 0.15)
-        
-        wedges, texts, autotexts = ax.pie(hearing_sizes, explode=explode, labels=hearing_labels,
-               autopct='%1.1f%%', startangle=90, colors=colors,
-               textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
-        ax.set_title('Hearing Condition Distribution', fontsize=14, fontweight='bold')
-        
-        plt.tight_layout()
-        st.pyplot(fig)
+        show_chart('analytics_hearing_conditions', hearing_sizes, draw_hearing_conditions, figsize=(10, 8))
     
     with col2:
         # Assessment completion status
@@ -928,135 +1027,46 @@ def show_analytics_reports(all_assessments, stats):
                 'One Assessment': len(patient_counts[patient_counts == 1]),
                 'Both Assessments': len(patient_counts[patient_counts >= 2])
             }
-            
-            fig, ax = plt.subplots(figsize=(10, 8))
-            colors = ['#feca57', '#48dbfb']
-            wedges, texts, autotexts = ax.pie(completion_data.values(), labels=completion_data.keys(),
-                   autopct='%1.1f%%', startangle=90, colors=colors,
-                   textprops={'fontsize': 12, 'fontweight': 'bold'}, shadow=True)
-            ax.set_title('Patient Completion Rate', fontsize=14, fontweight='bold')
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('analytics_completion', completion_data, draw_completion_rate, figsize=(10, 8))
     
     st.markdown("---")
     
     # Weekly activity heatmap
     st.markdown("### 📊 Weekly Assessment Activity Heatmap")
-    if not all_assessments.empty and 'created_at' in all_assessments.columns:
-        all_assessments['datetime'] = pd.to_datetime(all_assessments['created_at'])
-        all_assessments['day_of_week'] = all_assessments['datetime'].dt.day_name()
-        all_assessments['hour'] = all_assessments['datetime'].dt.hour
-        
-        # Create pivot table for heatmap
-        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-        heatmap_data = all_assessments.groupby(['day_of_week', 'hour']).size().unstack(fill_value=0)
-        heatmap_data = heatmap_data.reindex(day_order)
-        
-        fig, ax = plt.subplots(figsize=(16, 8))
-        sns.heatmap(heatmap_data, cmap='YlOrRd', annot=True, fmt='g', cbar_kws={'label': 'Number of Assessments'},
-                   linewidths=0.5, ax=ax)
-        ax.set_xlabel('Hour of Day', fontsize=13)
-        ax.set_ylabel('Day of Week', fontsize=13)
-        ax.set_title('Assessment Activity Heatmap (Day vs Hour)', fontsize=16, fontweight='bold')
-        
-        plt.tight_layout()
-        st.pyplot(fig)
+    # Day x hour buckets are counted in SQL - no timestamp parsing in pandas
+    heatmap_data = db.get_activity_heatmap()
+    if not heatmap_data.columns.empty:
+        show_chart('analytics_heatmap', heatmap_data, draw_activity_heatmap, figsize=(16, 8))
     
     st.markdown("---")
     
     # Age vs Risk Level Analysis
     st.markdown("### 📈 Age vs Risk Level Analysis")
     if not all_assessments.empty and 'age' in all_assessments.columns and 'risk_level' in all_assessments.columns:
+        risk_order = ['Low', 'Normal', 'Moderate', 'High']
+        present_risks = set(all_assessments['risk_level'].unique())
+        ages_by_risk = {
+            risk: all_assessments.loc[all_assessments['risk_level'] == risk, 'age'].dropna().to_numpy()
+            for risk in risk_order if risk in present_risks
+        }
+        
         col1, col2 = st.columns(2)
         
         with col1:
             # Box plot
-            fig, ax = plt.subplots(figsize=(10, 7))
-            risk_order = ['Low', 'Normal', 'Moderate', 'High']
-            available_risks = [r for r in risk_order if r in all_assessments['risk_level'].unique()]
-            
-            data_to_plot = [all_assessments[all_assessments['risk_level'] == risk]['age'].dropna() 
-                           for risk in available_risks]
-            
-            bp = ax.boxplot(data_to_plot, labels=available_risks, patch_artist=True)
-            
-            colors = ['#10ac84', '#48dbfb', '#feca57', '#ee5a6f'][:len(available_risks)]
-            for patch, color in zip(bp['boxes'], colors):
-                patch.set_facecolor(color)
-                patch.set_alpha(0.7)
-            
-            ax.set_xlabel('Risk Level', fontsize=12)
-            ax.set_ylabel('Age', fontsize=12)
-            ax.set_title('Age Distribution by Risk Level', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('analytics_age_risk_box', ages_by_risk, draw_age_risk_box, figsize=(10, 7))
         
         with col2:
             # Violin plot
-            fig, ax = plt.subplots(figsize=(10, 7))
-            
-            # Prepare data for violin plot
-            risk_age_data = []
-            risk_labels = []
-            for risk in available_risks:
-                ages = all_assessments[all_assessments['risk_level'] == risk]['age'].dropna()
-                risk_age_data.extend(ages)
-                risk_labels.extend([risk] * len(ages))
-            
-            df_violin = pd.DataFrame({'Risk Level': risk_labels, 'Age': risk_age_data})
-            
-            parts = ax.violinplot([all_assessments[all_assessments['risk_level'] == risk]['age'].dropna() 
-                                  for risk in available_risks],
-                                 positions=range(len(available_risks)),
-                                 showmeans=True, showmedians=True)
-            
-            for pc, color in zip(parts['bodies'], colors):
-                pc.set_facecolor(color)
-                pc.set_alpha(0.7)
-            
-            ax.set_xticks(range(len(available_risks)))
-            ax.set_xticklabels(available_risks)
-            ax.set_xlabel('Risk Level', fontsize=12)
-            ax.set_ylabel('Age', fontsize=12)
-            ax.set_title('Age Density by Risk Level', fontsize=14, fontweight='bold')
-            ax.grid(axis='y', alpha=0.3)
-            
-            plt.tight_layout()
-            st.pyplot(fig)
+            show_chart('analytics_age_risk_violin', ages_by_risk, draw_age_risk_violin, figsize=(10, 7))
     
     st.markdown("---")
     
     # Monthly trends
     st.markdown("### 📅 Monthly Assessment Trends")
-    if not all_assessments.empty and 'created_at' in all_assessments.columns:
-        all_assessments['month'] = pd.to_datetime(all_assessments['created_at']).dt.to_period('M')
-        monthly_counts = all_assessments.groupby('month').size()
-        
-        fig, ax = plt.subplots(figsize=(14, 6))
-        months = [str(m) for m in monthly_counts.index]
-        
-        ax.plot(months, monthly_counts.values, marker='o', linewidth=2.5, 
-               markersize=10, color='#5f27cd', label='Total Assessments')
-        ax.fill_between(range(len(months)), monthly_counts.values, alpha=0.3, color='#5f27cd')
-        
-        # Add trend line
-        z = np.polyfit(range(len(monthly_counts)), monthly_counts.values, 1)
-        p = np.poly1d(z)
-        ax.plot(months, p(range(len(monthly_counts))), "r--", alpha=0.8, 
-               linewidth=2, label='Trend Line')
-        
-        ax.set_xlabel('Month', fontsize=12)
-        ax.set_ylabel('Number of Assessments', fontsize=12)
-        ax.set_title('Monthly Assessment Volume with Trend', fontsize=16, fontweight='bold')
-        ax.legend(fontsize=11)
-        ax.grid(True, alpha=0.3)
-        plt.xticks(rotation=45)
-        
-        plt.tight_layout()
-        st.pyplot(fig)
+    monthly_counts = db.get_monthly_assessment_counts()
+    if not monthly_counts.empty:
+        show_chart('analytics_monthly_trend', monthly_counts, draw_monthly_trend, figsize=(14, 6))
     
     st.markdown("---")
     
@@ -1118,7 +1128,7 @@ def show_system_settings():
     with col1:
         if st.button("🔧 Test Database Connection", use_container_width=True):
             try:
-                db = MedicalDB()
+                db = get_repository()
                 if db.test_connection():
                     st.success("✅ Database connection successful")
                 else:
@@ -1156,19 +1166,56 @@ def show_system_settings():
     
     # System maintenance
     st.markdown("### 🔧 System Maintenance")
-    col1, col2, col3 = st.columns(3)
-    
-    with col1:
-        if st.button("🧹 Clean Old Data", use_container_width=True):
-            st.info("Data cleanup feature - would archive data older than 1 year")
+    repository = get_repository()
+    if not is_sqlite(repository):
+        # Archiving, backups and VACUUM work on the SQLite file; a server
+        # database is maintained with its own tooling
+        st.info("Archiving, backups and optimization are managed on the database server.")
+    else:
+        archive_months = st.number_input("Keep this many months in the live database", min_value=1, max_value=120,
+                                         value=HOT_MONTHS, step=1, key="archive_months",
+                                         help="Older assessments move to monthly archive files and are still read when needed")
+        col1, col2, col3 = st.columns(3)
     
-    with col2:
-        if st.button("💾 Backup Database", use_container_width=True):
-            st.success("Database backup initiated")
+        with col1:
+            if st.button("🧹 Clean Old Data", use_container_width=True):
+                try:
+                    with st.spinner("Archiving old assessments..."):
+                        moved = roll_over(repository.db_path, months=int(archive_months))
+                    if moved:
+                        st.success(f"Archived {moved} assessments from before the last {archive_months} months")
+                    else:
+                        st.info(f"No assessments from before the last {archive_months} months")
+                except Exception as e:
+                    st.error(f"Archiving failed: {e}")
     
-    with col3:
-        if st.button("📈 Optimize Database", use_container_width=True):
-            st.success("Database optimization complete")
+        with col2:
+            if st.button("💾 Backup Database", use_container_width=True):
+                try:
+                    progress_bar = st.progress(0.0, text="Backing up...")
+                    backup_path = backup_database(
+                        repository.db_path,
+                        progress=lambda remaining, total: progress_bar.progress(
+                            (total - remaining) / total if total else 1.0, text="Backing up...")
+                    )
+                    progress_bar.empty()
+                    st.success(f"Backup written to {backup_path}")
+                except Exception as e:
+                    st.error(f"Backup failed: {e}")
+    
+        with col3:
+            if st.button("📈 Optimize Database", use_container_width=True):
+                try:
+                    with st.spinner("Optimizing database..."):
+                        result = optimize_database(repository.db_path)
+                    message = "Database optimization complete - statistics refreshed"
+                    if result['bytes_freed'] > 0:
+                        message += f", {format_bytes(result['bytes_freed'])} freed"
+                    if result['full_vacuum']:
+                        message += " (switched to incremental vacuum)"
+                    st.success(message)
+                except Exception as e:
+                    st.error(f"Optimization failed: {e}")
     
     st.markdown("---")
     
@@ -1198,11 +1245,32 @@ def show_system_settings():
     with col1:
         st.metric("System Version", "2.0.1")
     
+    if not is_sqlite(repository):
+        return
+    
+    # Read after the maintenance buttons so the numbers reflect what they just did
+    try:
+        metrics = database_metrics(repository.db_path)
+    except Exception as e:
+        st.error(f"Could not read database metrics: {e}")
+        return
+    
+    with col2:
+        st.metric("Database Size", format_bytes(metrics['size_bytes']))
+    
+    with col3:
+        st.metric("Last Backup", format_age(metrics['last_backup']))
+    
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Pages", f"{metrics['page_count']:,}", help=f"{format_bytes(metrics['page_size'])} per page")
+    
     with col2:
-        st.metric("Database Size", "245 MB")
+        st.metric("Free Pages", f"{metrics['freelist_count']:,}", help=f"{format_bytes(metrics['free_bytes'])} reclaimable")
     
     with col3:
-        st.metric("Last Backup", "2 hours ago")
+        st.metric("Archive Size", format_bytes(metrics['archive_bytes']), help=f"auto_vacuum: {metrics['auto_vacuum']}")
 
 def show_empty_admin_state():
     """Show when no data exists in system"""
@@ -1243,7 +1311,7 @@ def show_empty_admin_state():
     with col1:
         if st.button("🔧 Test Database Connection", use_container_width=True):
             try:
-                db = MedicalDB()
+                db = get_repository()
                 if db.test_connection():
                     st.success("✅ Database connection successful")
                 else:
@@ -1,5 +1,4 @@
 import streamlit as st
-import sqlite3
 import pandas as pd
 from datetime import datetime, timedelta
 import sys
@@ -17,6 +16,7 @@ from reportlab.lib import colors
 sys.path.append(str(Path(__file__).parent.parent / "utils"))
 from auth import init_session_state
 from navbar import show_streamlit_navbar
+from repository import get_repository
 
 
 st.set_page_config(page_title="User Profile", page_icon="👤", layout="wide")
@@ -25,25 +25,12 @@ st.set_page_config(page_title="User Profile", page_icon="👤", layout="wide")
 def load_user_profile():
     """Load user profile information"""
     try:
-        conn = sqlite3.connect('data/medical_assessment.db')
         user_id = st.session_state.get('user_id')
         
         if not user_id:
             return None
         
-        # Get user details
-        user_query = """
-        SELECT name, age, gender, email, phone, created_at
-        FROM patients 
-        WHERE id = ?
-        """
-        user_df = pd.read_sql_query(user_query, conn, params=[user_id])
-        
-        conn.close()
-        
-        if not user_df.empty:
-            return user_df.iloc[0].to_dict()
-        return None
+        return get_repository().get_patient(user_id)
         
     except Exception as e:
         st.error(f"Error loading profile: {e}")
@@ -53,23 +40,13 @@ def load_user_profile():
 def load_user_assessments():
     """Load user's assessment history"""
     try:
-        conn = sqlite3.connect('data/medical_assessment.db')
         user_id = st.session_state.get('user_id')
         
         if not user_id:
             return pd.DataFrame()
         
-        query = """
-        SELECT id, assessment_type, results, risk_level, recommendations, 
-               critical_flag, created_at
-        FROM assessments 
-        WHERE patient_id = ?
-        ORDER BY created_at DESC
-        """
-        df = pd.read_sql_query(query, conn, params=[user_id])
-        conn.close()
-        
-        return df
+        # Includes archived months, newest first
+        return get_repository().get_patient_assessments(user_id)
         
     except Exception as e:
         st.error(f"Error loading assessments: {e}")
@@ -267,18 +244,9 @@ def show_profile_settings():
             
             if st.form_submit_button("Update Profile", use_container_width=True):
                 try:
-                    conn = sqlite3.connect('data/medical_assessment.db')
                     user_id = st.session_state.get('user_id')
-                    
-                    cursor = conn.cursor()
-                    cursor.execute("""
-                        UPDATE patients 
-                        SET name = ?, age = ?, gender = ?, email = ?, phone = ?
-                        WHERE id = ?
-                    """, (name, age, gender, email, phone, user_id))
-                    
-                    conn.commit()
-                    conn.close()
+                    get_repository().update_patient(user_id, name=name, age=age, gender=gender,
+                                                    email=email, phone=phone)
                     
                     st.success("Profile updated successfully!")
                     st.rerun()
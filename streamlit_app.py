@@ -8,8 +8,13 @@ from datetime import datetime, timedelta
 # Add utils to path
 sys.path.append(str(Path(__file__).parent / "utils"))
 
-# FIXED IMPORT - Use utils.auth instead of just auth
-from utils.auth import init_session_state, show_login_signup, show_user_profile, is_admin_authenticated, get_current_user, logout
+# Same module name as the pages use - one copy of auth (and its caches) per process
+from auth import init_session_state, show_login_signup, show_user_profile, is_admin_authenticated, get_current_user, logout
+from tiering import start_rollover_job
+from inference_server import load_local_models
+from tf_runtime import start_warm_up
+from image_store import start_image_gc_job
+from repository import get_repository, is_sqlite
 
 # Page config
 st.set_page_config(
@@ -21,6 +26,19 @@ st.set_page_config(
 
 
 def main():
+    # Move assessments past the hot window into monthly archives (once per process);
+    # archive tiers are SQLite-only - a server database keeps every row in one table
+    repository = get_repository()
+    if is_sqlite(repository):
+        start_rollover_job(repository.db_path)
+
+    # Remove stored photos no saved assessment refers to
+    start_image_gc_job(get_repository)
+
+    # Load and trace the models in the background so the first patient after a deploy
+    # doesn't wait - unless the shared inference server already holds them
+    start_warm_up(load_local_models)
+    
     # Initialize session state
     init_session_state()
     
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Test the read-only analytics snapshot used by the admin dashboard
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import snapshot
+import tiering
+from db_fixtures import temp_db, temp_folder
+
+
+def test_snapshot_matches_live():
+    """Reports on the snapshot see the same data as the live database"""
+    print("Testing snapshot contents...")
+    with temp_db(100, spacing_days=5) as (db, _):
+        analytics_db, as_of = snapshot.get_analytics_db(db.db_path)
+
+        assert os.path.exists(snapshot.snapshot_path_for(db.db_path))
+        assert abs(time.time() - as_of.timestamp()) < 60
+        assert analytics_db.read_only
+        assert len(analytics_db.get_all_assessments()) == len(db.get_all_assessments()) == 100
+        assert analytics_db.get_statistics()['critical_cases'] == db.get_statistics()['critical_cases'] == 10
+        print("SUCCESS: Snapshot matches live data")
+
+
+def test_snapshot_is_read_only_and_stable():
+    """New screenings land in the live file only, until the next refresh"""
+    print("Testing snapshot isolation...")
+    with temp_db(10, spacing_days=5) as (db, patient_id):
+        analytics_db, _ = snapshot.get_analytics_db(db.db_path)
+
+        db.add_assessment(patient_id, "hearing", {}, "High", "", True)
+        assert len(db.get_all_assessments()) == 11
+        assert len(analytics_db.get_all_assessments()) == 10
+
+        try:
+            conn = analytics_db._connect()
+            conn.execute("DELETE FROM assessments")
+            raise AssertionError("snapshot accepted a write")
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.close()
+
+        snapshot.refresh_snapshot(db.db_path)
+        assert len(analytics_db.get_all_assessments()) == 11
+        print("SUCCESS: Snapshot is read-only and stable")
+
+
+def test_writes_not_blocked_by_long_read():
+    """A long report transaction on the snapshot doesn't hold up screening writes"""
+    print("Testing writes during a long read...")
+    with temp_db(10, spacing_days=5) as (db, patient_id):
+        analytics_db, _ = snapshot.get_analytics_db(db.db_path)
+
+        reader = analytics_db._connect()
+        reader.execute("BEGIN")
+        reader.execute("SELECT COUNT(*) FROM assessments").fetchone()
+        try:
+            start = time.perf_counter()
+            for _ in range(20):
+                assert db.add_assessment(patient_id, "eye", {}, "Low", "", False)
+            assert time.perf_counter() - start < 2
+        finally:
+            reader.close()
+        print("SUCCESS: Writes not blocked")
+
+
+def test_stale_snapshot_refreshes_in_background():
+    """A stale snapshot is served immediately and refreshed by one thread"""
+    print("Testing background refresh...")
+    with temp_db(10, spacing_days=5) as (db, patient_id):
+        _, first = snapshot.get_analytics_db(db.db_path)
+        db.add_assessment(patient_id, "eye", {}, "Low", "", False)
+
+        analytics_db, as_of = snapshot.get_analytics_db(db.db_path, max_age=-1)
+        assert as_of == first
+
+        deadline = time.time() + 10
+        while len(analytics_db.get_all_assessments()) == 10 and time.time() < deadline:
+            time.sleep(0.05)
+        assert len(analytics_db.get_all_assessments()) == 11
+        print("SUCCESS: Stale snapshot refreshed in background")
+
+
+def test_rollover_after_snapshot_not_double_counted():
+    """Archive months written after the snapshot was taken are not read again"""
+    print("Testing snapshot with later rollover...")
+    with temp_db(100, spacing_days=5) as (db, _):
+        analytics_db, _ = snapshot.get_analytics_db(db.db_path)
+
+        moved = tiering.roll_over(db.db_path, months=6)
+        assert moved > 0
+        assert len(db.get_all_assessments()) == 100
+        assert len(analytics_db.get_all_assessments()) == 100
+        assert analytics_db.get_statistics()['total_assessments'] == 100
+        print("SUCCESS: No double counting after rollover")
+
+
+def test_fresh_database_snapshots_empty():
+    """A database no page has opened yet gives an empty snapshot, not an error"""
+    print("Testing snapshot of a fresh database...")
+    with temp_folder() as folder:
+        db_path = str(folder / "fresh.db")
+        analytics_db, _ = snapshot.get_analytics_db(db_path)
+        assert analytics_db.get_all_assessments().empty
+        assert analytics_db.get_statistics()['total_assessments'] == 0
+
+        # A failed copy leaves no partial file behind
+        original = snapshot.ensure_schema
+        snapshot.ensure_schema = lambda path: None
+        try:
+            (folder / "broken").mkdir()
+            broken = str(folder / "broken" / "broken.db")
+            sqlite3.connect(broken).close()
+            try:
+                snapshot.refresh_snapshot(broken)
+                raise AssertionError("snapshot of a database without tables succeeded")
+            except sqlite3.OperationalError:
+                pass
+            assert os.listdir(snapshot.snapshot_dir_for(broken)) == []
+        finally:
+            snapshot.ensure_schema = original
+        print("SUCCESS: Fresh database snapshot")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Analytics Snapshot...\n")
+
+    tests = [
+        test_snapshot_matches_live,
+        test_snapshot_is_read_only_and_stable,
+        test_writes_not_blocked_by_long_read,
+        test_stale_snapshot_refreshes_in_background,
+        test_rollover_after_snapshot_not_double_counted,
+        test_fresh_database_snapshots_empty,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
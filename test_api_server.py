@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Test the kiosk HTTP API against an in-process server and a temporary database
+"""
+
+import asyncio
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+from aiohttp import FormData
+from aiohttp.test_utils import TestClient, TestServer
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import api_server
+from database import MedicalDB
+
+API_KEY = "test-key"
+HEADERS = {api_server.API_KEY_HEADER: API_KEY}
+
+
+def blank_png():
+    buffer = io.BytesIO()
+    Image.fromarray(np.full((120, 160, 3), 128, dtype=np.uint8)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def run_with_client(check, **app_options):
+    """Run `check(client, app, db)` against a fresh app and database"""
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+
+    async def run():
+        app = api_server.create_app(API_KEY, repository=db, **app_options)
+        async with TestClient(TestServer(app)) as client:
+            await check(client, app, db)
+
+    asyncio.run(run())
+
+
+def test_api_key_required():
+    """Only /health is reachable without the key"""
+    print("Testing API key...")
+
+    async def check(client, app, db):
+        assert (await client.get("/health")).status == 200
+        response = await client.post("/v1/hearing/predict", json={"age": 40, "physical_score": 30})
+        assert response.status == 401
+        assert "error" in await response.json()
+        response = await client.post("/v1/hearing/predict", json={"age": 40, "physical_score": 30},
+                                     headers={api_server.API_KEY_HEADER: "wrong"})
+        assert response.status == 401
+
+    run_with_client(check)
+    print("SUCCESS: API key")
+
+
+def test_hearing_test_saved_and_listed():
+    """A hearing test with patient_id is scored, saved and shows up in the history"""
+    print("Testing hearing test and history...")
+
+    async def check(client, app, db):
+        patient_id = db.add_patient("Kiosk Patient", 70, "Male")
+        response = await client.post("/v1/hearing/test", headers=HEADERS, json={
+            "patient_id": patient_id, "left_threshold_db": 55, "right_threshold_db": 60})
+        assert response.status == 200
+        body = await response.json()
+        assert body["risk_level"] == "Significant"
+        assert body["results"]["left_classification"] == "Moderate Hearing Loss"
+
+        response = await client.get(f"/v1/patients/{patient_id}/assessments", headers=HEADERS)
+        history = await response.json()
+        assert [row["id"] for row in history] == [body["assessment_id"]]
+        assert history[0]["critical_flag"] == 1
+
+        response = await client.post("/v1/assessments", headers=HEADERS, json={
+            "patient_id": patient_id, "assessment_type": "Kiosk Screening",
+            "results": {"score": 3}, "risk_level": "Low"})
+        assert response.status == 201
+        response = await client.get(f"/v1/patients/{patient_id}/assessments?limit=1", headers=HEADERS)
+        assert [row["assessment_type"] for row in await response.json()] == ["Kiosk Screening"]
+
+        assert (await client.get("/v1/patients/9999/assessments", headers=HEADERS)).status == 404
+        response = await client.post("/v1/hearing/predict", headers=HEADERS, json={"age": "old"})
+        assert response.status == 400
+
+    run_with_client(check)
+    print("SUCCESS: Hearing test and history")
+
+
+def test_eye_uploads():
+    """Raw and multipart uploads are validated; oversized uploads are refused"""
+    print("Testing eye uploads...")
+    png = blank_png()
+
+    async def check(client, app, db):
+        response = await client.post("/v1/eye/validate", data=png, headers={**HEADERS, "Content-Type": "image/png"})
+        body = await response.json()
+        assert response.status == 200 and body["error_type"] == "poor_quality"
+
+        form = FormData()
+        form.add_field("image", png, filename="eye.png", content_type="image/png")
+        response = await client.post("/v1/eye/analyze", data=form, headers=HEADERS)
+        assert response.status == 422
+        assert "blurry" in (await response.json())["validation_details"]["quality"]["rejected"]
+
+        response = await client.post("/v1/eye/validate", data=b"not an image", headers=HEADERS)
+        assert response.status == 400
+
+        response = await client.post("/v1/eye/validate", data=png + b"\0" * 4096, headers=HEADERS)
+        assert response.status == 413
+
+    run_with_client(check, max_upload_bytes=len(png) + 1024)
+    print("SUCCESS: Eye uploads")
+
+
+def test_backpressure():
+    """With every CPU slot taken, requests get 503 + Retry-After instead of queueing"""
+    print("Testing backpressure...")
+
+    async def check(client, app, db):
+        busy = asyncio.ensure_future(app[api_server.CPU_POOL].run(time.sleep, 0.5))
+        await asyncio.sleep(0.05)
+        response = await client.post("/v1/hearing/predict", headers=HEADERS, json={"age": 40, "physical_score": 30})
+        assert response.status == 503
+        assert response.headers["Retry-After"] == str(api_server.RETRY_AFTER_SECONDS)
+
+        # Uploads are turned away before their body is buffered
+        reads = []
+        original = api_server.read_upload
+        api_server.read_upload = lambda request: reads.append(request) or original(request)
+        try:
+            response = await client.post("/v1/eye/validate", data=blank_png(),
+                                         headers={**HEADERS, "Content-Type": "image/png"})
+        finally:
+            api_server.read_upload = original
+        assert response.status == 503 and reads == []
+        await busy
+
+        response = await client.post("/v1/hearing/predict", headers=HEADERS, json={"age": 40, "physical_score": 30})
+        assert response.status == 200
+        assert app[api_server.CPU_POOL].stats["rejected"] == 2
+
+        # A call that raises counts as failed, not completed
+        stats = dict(app[api_server.CPU_POOL].stats)
+        try:
+            await app[api_server.CPU_POOL].run(int, "not a number")
+            raise AssertionError("failing call succeeded")
+        except ValueError:
+            pass
+        assert app[api_server.CPU_POOL].stats["failed"] == stats["failed"] + 1
+        assert app[api_server.CPU_POOL].stats["completed"] == stats["completed"]
+        assert app[api_server.CPU_POOL].pending == 0
+
+    run_with_client(check, cpu_workers=1, max_pending_cpu=1)
+    print("SUCCESS: Backpressure")
+
+
+def test_query_bounds():
+    """Limits, ids and epochs below their minimum are rejected, so -1 never means no limit"""
+    print("Testing query bounds...")
+
+    async def check(client, app, db):
+        patient_id = db.add_patient("Bounded Patient", 40, "Female")
+        for query in ("limit=-1", "limit=0", "since=-5", "limit=ten"):
+            response = await client.get(f"/v1/patients/{patient_id}/assessments?{query}", headers=HEADERS)
+            assert response.status == 400, query
+        response = await client.get(f"/v1/patients/{patient_id}/assessments?limit=1&since=0", headers=HEADERS)
+        assert response.status == 200
+        assert (await client.get("/v1/patients/-1/assessments", headers=HEADERS)).status in (400, 404)
+
+    run_with_client(check)
+    print("SUCCESS: Query bounds")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Kiosk API Server...\n")
+
+    tests = [
+        test_api_key_required,
+        test_hearing_test_saved_and_listed,
+        test_eye_uploads,
+        test_backpressure,
+        test_query_bounds,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
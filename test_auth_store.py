@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Test the users database bootstrap, pooling and credential cache in auth
+"""
+
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import auth
+
+
+KEY_CREATOR = '''
+import sys
+sys.path.append({utils!r})
+from key_file import read_or_create_key
+print(read_or_create_key({path!r}).hex())
+'''
+
+
+def use_temp_user_store():
+    """Point auth at a fresh users database"""
+    auth.close_user_store()
+    auth.USERS_DB_PATH = str(Path(tempfile.mkdtemp()) / "users.db")
+
+
+def test_bootstrap_runs_once():
+    """The schema/seed step only touches the database on the first call"""
+    print("Testing one-time user store bootstrap...")
+    use_temp_user_store()
+
+    calls = []
+    original = auth.create_user_table
+
+    def counting_create():
+        calls.append(1)
+        return original()
+
+    auth.create_user_table = counting_create
+    try:
+        for _ in range(5):
+            assert auth.ensure_user_store()
+    finally:
+        auth.create_user_table = original
+
+    assert len(calls) == 1
+    assert auth.verify_user("admin", "admin123")["role"] == "admin"
+    assert auth.verify_user("doctor", "doctor123")["role"] == "doctor"
+    print("SUCCESS: Bootstrap ran once and seeded default accounts")
+
+
+def test_login_uses_username_index():
+    """Credential lookups search the UNIQUE(username) index, not the table"""
+    print("\nTesting indexed credential lookup...")
+    use_temp_user_store()
+    auth.ensure_user_store()
+
+    with auth.get_users_pool().connection() as conn:
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT id, username, email, role, full_name, password FROM users WHERE username=?",
+            ("admin",)
+        ).fetchall()
+    detail = " ".join(row[-1] for row in plan)
+    assert "USING INDEX" in detail, detail
+    print(f"SUCCESS: {detail}")
+
+
+def test_credential_cache_and_invalidation():
+    """Cached rows are reused until users.db changes, in any process"""
+    print("\nTesting credential cache...")
+    use_temp_user_store()
+    auth.ensure_user_store()
+
+    assert auth.create_user("pat", "pat@example.com", "secret1", full_name="Pat")
+    assert not auth.create_user("pat", "other@example.com", "secret1")
+    assert auth.verify_user("pat", "secret1")
+    assert "pat" in auth._credential_cache
+
+    cached = auth._credential_cache["pat"]
+    assert auth.verify_user("pat", "secret1")
+    assert auth._credential_cache["pat"] is cached
+
+    # Change the password on a second connection, as another worker process would
+    conn = sqlite3.connect(auth.USERS_DB_PATH)
+    conn.execute("UPDATE users SET password=? WHERE username=?", (auth.hash_password("secret2"), "pat"))
+    conn.commit()
+    assert auth.verify_user("pat", "secret1") is None
+    assert auth.verify_user("pat", "secret2")
+    assert auth.verify_user("pat", "wrong") is None
+    assert auth.verify_user("nobody", "secret1") is None
+
+    # A removed account can't log in with its cached row either
+    conn.execute("DELETE FROM users WHERE username=?", ("pat",))
+    conn.commit()
+    conn.close()
+    assert auth.verify_user("pat", "secret2") is None
+    print("SUCCESS: Cache served lookups and refreshed after changes elsewhere")
+
+
+def test_session_tokens():
+    """Signed tokens round-trip, reject tampering/expiry/revocation and are cached"""
+    print("\nTesting signed session tokens...")
+    use_temp_user_store()
+    auth.ensure_user_store()
+    auth.SESSION_SECRET_PATH = str(Path(auth.USERS_DB_PATH).parent / "session_secret.key")
+    auth._session_secret = None
+
+    user = auth.verify_user("doctor", "doctor123")
+    token = auth.issue_session_token(user)
+    claims = auth.decode_session_token(token)
+    assert claims["id"] == user["id"] and claims["role"] == "doctor"
+
+    # A fresh process (empty cache) still accepts the token, without reading the users table
+    auth._session_cache.clear()
+    assert auth.decode_session_token(token)["username"] == "doctor"
+    assert token in auth._session_cache
+
+    payload, signature = token.split(".")
+    forged = auth._b64encode(auth._b64decode(payload).replace(b'"doctor"', b'"admin"')) + "." + signature
+    assert auth.decode_session_token(forged) is None
+    assert auth.decode_session_token("garbage") is None
+    assert auth.decode_session_token(None) is None
+
+    expired = auth.issue_session_token(user, ttl=-1)
+    assert auth.decode_session_token(expired) is None
+
+    auth.revoke_session_token(token)
+    assert auth.decode_session_token(token) is None
+    print("SUCCESS: Tokens verified, cached and rejected when invalid")
+
+
+def test_revocation_shared_across_processes():
+    """A logout or password change made elsewhere invalidates cached tokens here"""
+    print("\nTesting shared session revocation...")
+    use_temp_user_store()
+    auth.ensure_user_store()
+    user = auth.verify_user("admin", "admin123")
+    token, other = auth.issue_session_token(user), auth.issue_session_token(user, ttl=60)
+    assert auth.decode_session_token(token) and auth.decode_session_token(other)
+
+    # Another worker process logs the token out: only users.db is shared
+    with auth.get_users_pool().connection() as conn:
+        conn.execute("INSERT INTO revoked_sessions (token_hash, expires) VALUES (?, ?)",
+                     (auth._token_hash(token), int(time.time()) + 60))
+    assert auth.decode_session_token(token) is None
+    assert auth.decode_session_token(other)["username"] == "admin"
+
+    # A password change ends every earlier session; new ones work
+    auth.end_user_sessions(user["id"])
+    assert auth.decode_session_token(other) is None
+    fresh = auth.issue_session_token(user)
+    assert auth.decode_session_token(fresh)["gen"] == 1
+
+    # Revoked and expired rows are pruned on the next logout
+    with auth.get_users_pool().connection() as conn:
+        conn.execute("UPDATE revoked_sessions SET expires = 0")
+    auth.revoke_session_token(fresh)
+    with auth.get_users_pool().connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM revoked_sessions").fetchone()[0] == 1
+
+    # Without a readable users.db no token is trusted
+    valid = auth.issue_session_token(user)
+    blocker = Path(tempfile.mkdtemp()) / "not-a-directory"
+    blocker.write_text("")
+    auth._session_cache.clear()
+    auth.close_user_store()
+    auth.USERS_DB_PATH = str(blocker / "users.db")
+    assert auth.decode_session_token(valid) is None
+    print("SUCCESS: Revocations and generations apply across processes")
+
+
+def test_session_secret_private():
+    """The signing key is owner-only, and workers starting together share one key"""
+    print("\nTesting session secret file...")
+    folder = Path(tempfile.mkdtemp())
+    auth.SESSION_SECRET_PATH = str(folder / "session_secret.key")
+    auth._session_secret = None
+    secret = auth._get_session_secret()
+    assert len(secret) == 32
+    assert os.stat(auth.SESSION_SECRET_PATH).st_mode & 0o777 == 0o600
+
+    script = KEY_CREATOR.format(utils=str(Path(__file__).parent / "utils"), path=str(folder / "shared.key"))
+    workers = [subprocess.Popen([sys.executable, "-c", script], stdout=subprocess.PIPE, text=True) for _ in range(8)]
+    keys = {worker.communicate()[0].strip() for worker in workers}
+    assert len(keys) == 1 and "" not in keys
+    assert sorted(os.listdir(folder)) == ["session_secret.key", "shared.key"]
+
+    os.chmod(auth.SESSION_SECRET_PATH, 0o644)
+    auth._session_secret = None
+    try:
+        auth._get_session_secret()
+        raise AssertionError("world-readable session secret used")
+    except PermissionError:
+        pass
+    finally:
+        os.chmod(auth.SESSION_SECRET_PATH, 0o600)
+        auth._session_secret = None
+    print("SUCCESS: Session secret private and shared")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Auth User Store...\n")
+
+    tests = [
+        test_bootstrap_runs_once,
+        test_login_uses_username_index,
+        test_credential_cache_and_invalidation,
+        test_session_tokens,
+        test_revocation_shared_across_processes,
+        test_session_secret_private,
+    ]
+
+    for test in tests:
+        test()
+
+    auth.close_user_store()
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Test cross-process invalidation of cached MedicalDB reads
+"""
+
+import sqlite3
+import subprocess
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import cache_bus
+from db_fixtures import temp_db
+
+
+WRITER = '''
+import sys
+sys.path.append({utils!r})
+from database import MedicalDB
+db = MedicalDB({db_path!r})
+db.add_assessment({patient_id}, "hearing", {{}}, "High", "Urgent", True)
+'''
+
+
+@contextmanager
+def make_db():
+    with temp_db() as (db, patient_id):
+        db.add_assessment(patient_id, "eye", {}, "Low", "", False)
+        yield db, patient_id
+
+
+def test_repeated_reads_hit_cache():
+    """Unchanged data is served from the cache as independent copies"""
+    print("Testing cache hits...")
+    cache_bus.clear_read_cache()
+    with make_db() as (db, patient_id):
+        first = db.get_patient_assessments(patient_id)
+        first['risk_level'] = "Edited"
+        second = db.get_patient_assessments(patient_id)
+
+        assert cache_bus.read_cache_stats()['hits'] == 1
+        assert second['risk_level'].tolist() == ["Low"]
+        print("SUCCESS: Cache hit with independent copies")
+
+
+def test_local_writes_invalidate():
+    """add_assessment / add_patient bump the epoch"""
+    print("Testing local invalidation...")
+    with make_db() as (db, patient_id):
+        epoch = cache_bus.get_epoch_watcher(db.db_path).current()
+
+        assert len(db.get_all_assessments()) == 1
+        db.add_assessment(patient_id, "eye", {}, "High", "", True)
+        assert cache_bus.get_epoch_watcher(db.db_path).current() > epoch
+        assert len(db.get_all_assessments()) == 2
+
+        db.add_patient("Second Patient", 30, "Male")
+        assert len(db.get_all_patients()) == 2
+        print("SUCCESS: Local writes invalidate")
+
+
+def test_other_process_write_invalidates():
+    """A write from another process is seen on the next read"""
+    print("Testing cross-process invalidation...")
+    with make_db() as (db, patient_id):
+        assert db.get_critical_patients().empty
+
+        assert db.get_statistics()['total_assessments'] == 1
+        script = WRITER.format(utils=str(Path(__file__).parent / "utils"), db_path=db.db_path, patient_id=patient_id)
+        subprocess.run([sys.executable, "-c", script], check=True, capture_output=True)
+
+        assert db.get_statistics()['total_assessments'] == 2
+        assert len(db.get_critical_patients()) == 1
+        print("SUCCESS: Other process write invalidates")
+
+
+def test_raw_sql_writes_invalidate():
+    """Pages that still write with raw SQL are covered by the triggers"""
+    print("Testing raw SQL invalidation...")
+    with make_db() as (db, patient_id):
+        assert db.get_all_patients().iloc[0]['name'] == "Test Patient"
+
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("UPDATE patients SET name = 'Renamed' WHERE id = ?", (patient_id,))
+        conn.commit()
+        conn.close()
+
+        assert db.get_all_patients().iloc[0]['name'] == "Renamed"
+        print("SUCCESS: Raw SQL writes invalidate")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Cache Bus...\n")
+
+    tests = [
+        test_repeated_reads_hit_cache,
+        test_local_writes_invalidate,
+        test_other_process_write_invalidates,
+        test_raw_sql_writes_invalidate,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test incremental critical-case polling with PRAGMA data_version
+"""
+
+import sqlite3
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from change_watch import CriticalCaseWatcher, get_critical_watcher
+from db_fixtures import temp_db
+
+
+@contextmanager
+def make_db():
+    with temp_db() as (db, patient_id):
+        db.add_assessment(patient_id, "eye", {}, "High", "See a doctor", True)
+        db.add_assessment(patient_id, "eye", {}, "Low", "", False)
+        yield db, patient_id
+
+
+class CountingConnection:
+    """Wraps a connection and records the statements it runs"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.statements = []
+
+    def execute(self, sql, *args):
+        self.statements.append(sql.strip())
+        return self.conn.execute(sql, *args)
+
+    def close(self):
+        self.conn.close()
+
+
+def test_poll_returns_only_new_critical_rows():
+    """Rows after the given id come back once, non-critical rows are skipped"""
+    print("Testing incremental critical polling...")
+    with make_db() as (db, patient_id):
+        watcher = CriticalCaseWatcher(db.db_path)
+
+        rows, last_id = watcher.poll(0)
+        assert len(rows) == 1 and last_id == 2
+        assert rows.iloc[0]['name'] == "Test Patient"
+
+        rows, last_id = watcher.poll(last_id)
+        assert rows.empty and last_id == 2
+
+        db.add_assessment(patient_id, "hearing", {}, "Low", "", False)
+        new_id = db.add_assessment(patient_id, "hearing", {}, "High", "Urgent", True)
+        rows, last_id = watcher.poll(last_id)
+        assert rows['id'].tolist() == [new_id]
+        assert last_id == new_id
+        watcher.close()
+        print("SUCCESS: Only new critical rows returned")
+
+
+def test_row_committed_mid_poll_returned_once():
+    """A critical row written between the max-id read and the query waits for the next poll"""
+    print("Testing a write during a poll...")
+    with make_db() as (db, patient_id):
+        watcher = CriticalCaseWatcher(db.db_path)
+        written = []
+
+        class InterleavingConnection(sqlite3.Connection):
+            def execute(self, sql, *args):
+                cursor = super().execute(sql, *args)
+                if "MAX(id)" in sql and not written:
+                    written.append(db.add_assessment(patient_id, "eye", {}, "High", "Urgent", True))
+                return cursor
+
+        watcher._conn.close()
+        watcher._conn = sqlite3.connect(db.db_path, check_same_thread=False, factory=InterleavingConnection)
+        rows, last_id = watcher.poll(0)
+        assert rows['id'].tolist() == [1] and last_id == 2
+
+        rows, last_id = watcher.poll(last_id)
+        assert rows['id'].tolist() == written and last_id == written[0]
+        watcher.close()
+        print("SUCCESS: Mid-poll write returned once")
+
+
+def test_idle_poll_reads_no_tables():
+    """With no writes since the last poll, only PRAGMA data_version runs"""
+    print("Testing idle polls...")
+    with make_db() as (db, patient_id):
+        watcher = CriticalCaseWatcher(db.db_path)
+        _, last_id = watcher.poll(0)
+
+        watcher._conn = CountingConnection(watcher._conn)
+        for _ in range(10):
+            rows, last_id = watcher.poll(last_id)
+            assert rows.empty
+        assert set(watcher._conn.statements) == {"PRAGMA data_version"}
+        watcher._conn = watcher._conn.conn
+
+        db.add_assessment(patient_id, "eye", {}, "High", "Urgent", True)
+        rows, last_id = watcher.poll(last_id)
+        assert len(rows) == 1
+        watcher.close()
+        print("SUCCESS: Idle polls only check data_version")
+
+
+def test_watchers_are_shared_per_database():
+    """Sessions share one watcher (and connection) per database"""
+    print("Testing shared watchers...")
+    with make_db() as (db, _):
+        assert get_critical_watcher(db.db_path) is get_critical_watcher(db.db_path)
+        print("SUCCESS: Watcher shared")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Change Watch...\n")
+
+    tests = [
+        test_poll_returns_only_new_critical_rows,
+        test_row_committed_mid_poll_returned_once,
+        test_idle_poll_reads_no_tables,
+        test_watchers_are_shared_per_database,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
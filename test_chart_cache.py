@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Memory regression test for the admin dashboard chart cache
+"""
+
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+from charts import ChartCache, data_version, render_chart
+
+
+def draw_bars(fig, ax, counts):
+    ax.bar(counts.index, counts.values)
+    ax.set_title('Risk Levels')
+
+
+def simulate_rerun(cache, counts):
+    """One dashboard rerun: a handful of charts over the same aggregates"""
+    for name in ('risk_bars', 'risk_bars_small', 'risk_bars_wide'):
+        render_chart(name, counts, draw_bars, figsize=(4, 3), cache=cache)
+
+
+def test_data_version_tracks_content():
+    """Same aggregates hash equal, changed aggregates do not"""
+    print("Testing data version hashing...")
+
+    a = pd.Series([3, 2, 1], index=['High', 'Moderate', 'Low'])
+    b = pd.Series([3, 2, 1], index=['High', 'Moderate', 'Low'])
+    c = pd.Series([3, 2, 2], index=['High', 'Moderate', 'Low'])
+
+    assert data_version(a) == data_version(b)
+    assert data_version(a) != data_version(c)
+    assert data_version({'x': np.arange(3)}) != data_version({'x': np.arange(4)})
+    print("SUCCESS: Data versions follow the aggregate contents")
+
+
+def test_cached_chart_is_reused():
+    """Unchanged data returns the cached bytes without re-rendering"""
+    print("\nTesting chart reuse...")
+
+    cache = ChartCache(max_entries=8)
+    counts = pd.Series([5, 3], index=['High', 'Low'])
+    draws = []
+
+    def counting_draw(fig, ax, data):
+        draws.append(1)
+        draw_bars(fig, ax, data)
+
+    first = render_chart('risk', counts, counting_draw, figsize=(4, 3), cache=cache)
+    second = render_chart('risk', counts.copy(), counting_draw, figsize=(4, 3), cache=cache)
+    assert first == second
+    assert first.startswith(b'\x89PNG')
+    assert len(draws) == 1
+
+    render_chart('risk', pd.Series([6, 3], index=['High', 'Low']), counting_draw, figsize=(4, 3), cache=cache)
+    assert len(draws) == 2
+    print(f"SUCCESS: Cache stats {cache.stats()}")
+
+
+def test_lru_eviction():
+    """The cache never grows past its entry limit"""
+    print("\nTesting LRU eviction...")
+
+    cache = ChartCache(max_entries=3)
+    for i in range(10):
+        cache.put(('chart', i), b'x' * 10)
+    cache.get(('chart', 7))
+    cache.put(('chart', 10), b'x')
+
+    assert len(cache) == 3
+    assert cache.get(('chart', 7)) is not None
+    assert cache.get(('chart', 8)) is None
+    print("SUCCESS: Least recently used charts are evicted")
+
+
+def test_memory_stable_over_reruns():
+    """Many simulated reruns leave no open figures and no memory growth"""
+    print("\nTesting memory over simulated reruns...")
+
+    cache = ChartCache(max_entries=8)
+    counts = pd.Series([12, 7, 3], index=['High', 'Moderate', 'Low'])
+    open_before = len(plt.get_fignums())
+
+    # Warm up matplotlib's font and renderer caches before measuring
+    for version in range(20):
+        simulate_rerun(cache, counts + version)
+
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    for rerun in range(100):
+        # Data changes every 20 reruns, like new assessments arriving
+        simulate_rerun(cache, counts + rerun // 20)
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    growth = current - baseline
+    print(f"Memory growth after 100 reruns: {growth / 1024:.1f} KiB")
+    assert len(plt.get_fignums()) == open_before
+    assert len(cache) <= 8
+    # Bounded by the cache contents and matplotlib's own text-layout LRU,
+    # not by the number of reruns (an unclosed pyplot figure alone is ~1 MiB)
+    assert growth < 4 * 1024 * 1024
+    print("SUCCESS: No figures leaked and memory stayed bounded")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Admin Dashboard Chart Cache...\n")
+
+    tests = [
+        test_data_version_tracks_content,
+        test_cached_chart_is_reused,
+        test_lru_eviction,
+        test_memory_stable_over_reruns,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
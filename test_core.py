@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the headless core package: importable and usable without Streamlit
+"""
+
+import io
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import soundfile as sf
+from PIL import Image
+
+UTILS = Path(__file__).parent / "utils"
+sys.path.append(str(UTILS))
+
+import core
+from database import MedicalDB
+
+
+def png_bytes(array):
+    buffer = io.BytesIO()
+    Image.fromarray(array).save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def test_import_without_streamlit():
+    """Importing core pulls in neither Streamlit nor TensorFlow"""
+    print("Testing headless import...")
+    check = ("import sys; sys.path.insert(0, sys.argv[1]); import core; "
+             "print(sorted(m for m in ('streamlit', 'tensorflow') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", check, str(UTILS)], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "[]", result.stdout
+    print("SUCCESS: Headless import")
+
+
+def test_detection_without_face():
+    """Validation and cropping report problems as values instead of UI messages"""
+    print("Testing detection...")
+    blank = png_bytes(np.full((240, 320, 3), 128, dtype=np.uint8))
+    texture = png_bytes(np.random.default_rng(0).integers(60, 200, (240, 320, 3), dtype=np.uint8))
+
+    is_valid, error_type, message, details, annotated = core.validate_and_draw_boxes(texture)
+    assert not is_valid and error_type == "no_face"
+    assert details["faces_detected"] == 0 and details["eyes_detected"] == 0
+    assert annotated.size == (320, 240)
+
+    # A featureless photo never reaches the detector
+    is_valid, error_type, message, details, annotated = core.validate_and_draw_boxes(blank)
+    assert not is_valid and error_type == "poor_quality" and "blurry" in message
+    assert details["quality"]["rejected"] == ["blurry"]
+
+    image, notice = core.crop_eye_region(blank)
+    assert image is None and "No face" in notice
+
+    is_valid, error_type, message, _, annotated = core.validate_and_draw_boxes(io.BytesIO(b"not an image"))
+    assert error_type == "invalid_image" and annotated is None
+
+    assert core.convert_to_grayscale(blank).mode == "L"
+    print("SUCCESS: Detection")
+
+
+def test_scoring():
+    """Risk levels and critical flags match the assessment pages"""
+    print("Testing scoring...")
+    assert core.score_acuity(95)[0] == "Normal"
+    assert core.score_acuity(50)[0] == "High" and core.score_acuity(50)[2] is True
+
+    analysis, quality, overall = core.analyze_eye_disease(None, {"eyes_detected": 1})
+    assert quality["overall_quality"].startswith("Fair")
+    assert core.score_ai_detection(analysis, overall)[0] == "Normal"
+    analysis["glaucoma"]["detected"] = True
+    analysis["cataracts"]["detected"] = True
+    assert core.score_ai_detection(analysis, overall)[2] is True
+
+    assert core.score_hearing_test("Significant")[1] is True
+    assert core.score_hearing_test("Mild")[1] is False
+    assert core.get_hearing_interpretation(35)[0] == "Mild Hearing Loss"
+    assert core.analyze_single_ear_results({"hearing_threshold_db": 10})[:2] == (90, "Normal Hearing")
+    assert core.is_critical({"Normal": 0.1, "Severe Diabetic Retinopathy": 0.9}, "Low")
+    print("SUCCESS: Scoring")
+
+
+def test_hearing_tone():
+    """Tones are stereo WAV with the signal only in the tested ear"""
+    print("Testing tone generation...")
+    audio, sample_rate = sf.read(core.generate_hearing_level_tone(1000, 40, "left", duration=0.5))
+    assert sample_rate == 44100 and audio.shape == (22050, 2)
+    assert np.abs(audio[:, 0]).max() > 0.1
+    assert np.abs(audio[:, 1]).max() == 0
+    print("SUCCESS: Tone generation")
+
+
+def test_persistence():
+    """Save helpers store scored results for an explicit patient id"""
+    print("Testing persistence...")
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    patient_id = db.add_patient("Batch Patient", 61, "Female")
+
+    assert core.save_acuity_results(patient_id, {"lines": [1, 2]}, 55, "20/70", "Poor", db)
+    assert core.save_hearing_test_results(patient_id, "Online Hearing Test", {"left_ear": {}}, "Normal", db)
+
+    rows = {row["assessment_type"]: row for _, row in db.get_patient_assessments(patient_id).iterrows()}
+    acuity = rows["Visual Acuity Test"]
+    assert acuity["risk_level"] == "High" and acuity["critical_flag"]
+    assert json.loads(acuity["results"])["total_lines"] == 2
+    assert not rows["Online Hearing Test"]["critical_flag"]
+    print("SUCCESS: Persistence")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Headless Core...\n")
+
+    tests = [
+        test_import_without_streamlit,
+        test_detection_without_face,
+        test_scoring,
+        test_hearing_tone,
+        test_persistence,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
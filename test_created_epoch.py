@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Test the integer created_epoch column: migration, backfill, writes and index use
+"""
+
+import calendar
+import sqlite3
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from database import MedicalDB
+
+
+def epoch(text):
+    return calendar.timegm(time.strptime(text, '%Y-%m-%d %H:%M:%S'))
+
+
+def make_legacy_db():
+    """Database with the original schema (no created_epoch) and a few rows"""
+    path = str(Path(tempfile.mkdtemp()) / "medical.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE patients (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, age INTEGER, "
+                 "gender TEXT, email TEXT, phone TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("CREATE TABLE assessments (id INTEGER PRIMARY KEY AUTOINCREMENT, patient_id INTEGER, "
+                 "assessment_type TEXT NOT NULL, results TEXT, risk_level TEXT, recommendations TEXT, "
+                 "critical_flag BOOLEAN DEFAULT FALSE, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO patients (name, age, gender) VALUES ('Old Patient', 60, 'Male')")
+    conn.executemany("INSERT INTO assessments (patient_id, assessment_type, risk_level, created_at) VALUES (1, 'eye', ?, ?)",
+                     [('Low', '2023-05-01 10:00:00'), ('High', '2023-06-01 12:30:00')])
+    conn.commit()
+    conn.close()
+    return path
+
+
+def test_migration_backfills_epoch():
+    """Opening a legacy database adds and fills created_epoch"""
+    print("Testing created_epoch migration...")
+    db = MedicalDB(make_legacy_db())
+
+    conn = sqlite3.connect(db.db_path)
+    rows = conn.execute("SELECT created_at, created_epoch FROM assessments ORDER BY id").fetchall()
+    conn.close()
+    assert [e for _, e in rows] == [epoch(t) for t, _ in rows]
+
+    latest = db.get_patient_assessments(1)
+    assert latest.iloc[0]['risk_level'] == 'High'
+    print("SUCCESS: Existing rows backfilled")
+
+
+def test_writes_populate_epoch():
+    """add_assessment and raw INSERTs both set created_epoch"""
+    print("\nTesting created_epoch on write...")
+    db = MedicalDB(make_legacy_db())
+    before = int(time.time())
+    new_id = db.add_assessment(1, 'hearing', {'score': 1}, 'Moderate', 'None')
+
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("INSERT INTO assessments (patient_id, assessment_type, created_at) VALUES (1, 'eye', '2024-01-02 03:04:05')")
+    conn.commit()
+    created_at, created_epoch = conn.execute("SELECT created_at, created_epoch FROM assessments WHERE id=?", (new_id,)).fetchone()
+    raw_epoch = conn.execute("SELECT created_epoch FROM assessments ORDER BY id DESC LIMIT 1").fetchone()[0]
+    conn.close()
+
+    assert before <= created_epoch <= int(time.time())
+    assert created_epoch == epoch(created_at)
+    assert raw_epoch == epoch('2024-01-02 03:04:05')
+
+    daily = db.get_statistics()['daily_assessments']
+    assert daily['count'].sum() == 1
+    print("SUCCESS: New rows carry created_epoch")
+
+
+def test_queries_use_epoch_index():
+    """Range and latest-N queries search the epoch indexes"""
+    print("\nTesting index use...")
+    db = MedicalDB(make_legacy_db())
+    conn = sqlite3.connect(db.db_path)
+    range_plan = conn.execute("EXPLAIN QUERY PLAN SELECT COUNT(*) FROM assessments WHERE created_epoch >= ?", (0,)).fetchall()
+    latest_plan = conn.execute("EXPLAIN QUERY PLAN SELECT * FROM assessments WHERE patient_id = ? "
+                               "ORDER BY created_epoch DESC LIMIT 3", (1,)).fetchall()
+    conn.close()
+
+    assert "idx_assessments_created_epoch" in " ".join(row[-1] for row in range_plan)
+    latest_detail = " ".join(row[-1] for row in latest_plan)
+    assert "idx_assessments_patient_epoch" in latest_detail and "TEMP B-TREE" not in latest_detail
+    print("SUCCESS: Queries use the epoch indexes")
+
+
+def main():
+    """Run all tests"""
+    print("Testing created_epoch...\n")
+
+    tests = [
+        test_migration_backfills_epoch,
+        test_writes_populate_epoch,
+        test_queries_use_epoch_index,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test the admin database maintenance operations: optimize and backup
+"""
+
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import db_maintenance
+from db_fixtures import DAY, temp_db
+
+
+def count(path, table="assessments"):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_backup_is_complete_copy():
+    """Online backup copies every row and prunes old backups"""
+    print("Testing online backup...")
+    with temp_db(300, spacing_days=2, results="x" * 500) as (db, _):
+        backup_dir = str(Path(db.db_path).parent / "backups")
+        steps = []
+
+        assert db_maintenance.last_backup_time(backup_dir) is None
+        for _ in range(3):
+            path = db_maintenance.backup_database(db.db_path, backup_dir, pages=4, keep=2,
+                                                  progress=lambda remaining, total: steps.append(remaining))
+
+        assert count(path) == count(db.db_path) == 300
+        assert len(db_maintenance.list_backups(backup_dir)) == 2
+        assert len(steps) > 3 and steps[-1] == 0
+        assert db_maintenance.database_metrics(db.db_path, backup_dir)["last_backup"] is not None
+        print("SUCCESS: Backup copied all rows in steps")
+
+
+def test_optimize_reclaims_space():
+    """Optimize switches to incremental vacuum and frees deleted pages"""
+    print("\nTesting optimize...")
+    with temp_db(300, spacing_days=2, results="x" * 500) as (db, _):
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("DELETE FROM assessments WHERE created_epoch < ?", (time.time() - 30 * DAY,))
+        conn.commit()
+        conn.close()
+        before = db_maintenance.database_metrics(db.db_path)
+        assert before["freelist_count"] > 0
+
+        first = db_maintenance.optimize_database(db.db_path)
+        assert first["full_vacuum"] and first["after"]["auto_vacuum"] == "incremental"
+        assert first["after"]["freelist_count"] == 0 and first["pages_freed"] > 0
+
+        conn = sqlite3.connect(db.db_path)
+        conn.execute("DELETE FROM assessments")
+        conn.commit()
+        conn.close()
+        second = db_maintenance.optimize_database(db.db_path)
+        assert not second["full_vacuum"] and second["pages_freed"] > 0
+        print("SUCCESS: Space reclaimed")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Database Maintenance...\n")
+
+    tests = [
+        test_backup_is_complete_copy,
+        test_optimize_reclaims_space,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test display-size image encoding, its cache and the bytes-sent report
+"""
+
+import io
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+UTILS = Path(__file__).parent / "utils"
+sys.path.append(str(UTILS))
+
+import display_image
+
+
+def photo(width=3000, height=2000, mode="RGB"):
+    rng = np.random.default_rng(0)
+    shape = (height, width, 3) if mode == "RGB" else (height, width)
+    return Image.fromarray(rng.integers(0, 255, shape, dtype=np.uint8))
+
+
+def test_resized_to_display_width():
+    """Large images shrink to the display width, small ones aren't enlarged"""
+    print("Testing resizing...")
+    data = display_image.encode_display_image(photo(), width=720)
+    image = Image.open(io.BytesIO(data))
+    assert image.format == "JPEG" and image.size == (720, 480)
+
+    small = Image.open(io.BytesIO(display_image.encode_display_image(photo(300, 200), width=720)))
+    assert small.size == (300, 200)
+
+    gray = Image.open(io.BytesIO(display_image.encode_display_image(photo(mode="L"))))
+    assert gray.mode == "L"
+
+    webp = Image.open(io.BytesIO(display_image.encode_display_image(photo(), format="WEBP")))
+    assert webp.format == "WEBP"
+    try:
+        display_image.encode_display_image(photo(), format="BMP")
+        raise AssertionError("unsupported format accepted")
+    except ValueError:
+        pass
+    print("SUCCESS: Resizing")
+
+
+def test_far_smaller_than_full_size():
+    """A display JPEG is a small fraction of what st.image would send"""
+    print("Testing size reduction...")
+    image = photo(4032, 3024)
+    full = io.BytesIO()
+    image.save(full, format="JPEG", quality=100)  # what st.image sends for a PIL image
+    sent = display_image.encode_display_image(image)
+    print(f"  {len(full.getvalue()) / 1024:.0f} KB -> {len(sent) / 1024:.0f} KB")
+    assert len(sent) * 10 < len(full.getvalue())
+    print("SUCCESS: Size reduction")
+
+
+def test_cached_per_image_hash():
+    """Equal pixels (or bytes) are encoded once, whatever object holds them"""
+    print("Testing encode cache...")
+    before = display_image.display_cache_stats()
+    first = display_image.display_image_bytes(photo(1000, 800))
+    second = display_image.display_image_bytes(photo(1000, 800))
+    assert first is second
+
+    path = Path(tempfile.mkdtemp()) / "photo.png"
+    photo(1000, 800).save(path)
+    from_path = display_image.display_image_bytes(str(path))
+    assert display_image.display_image_bytes(path.read_bytes()) is from_path
+    assert display_image.display_image_bytes(photo(1000, 800), width=400) is not first
+
+    after = display_image.display_cache_stats()
+    assert after["hits"] - before["hits"] == 2
+    assert after["misses"] - before["misses"] == 3
+    assert display_image.image_hash(np.asarray(photo(10, 10))) == display_image.image_hash(np.asarray(photo(10, 10)))
+    print("SUCCESS: Encode cache")
+
+
+def test_cache_bounded_by_bytes():
+    """Least recently used encodings are dropped past DISPLAY_CACHE_BYTES"""
+    print("Testing cache bound...")
+    limit = display_image.DISPLAY_CACHE_BYTES
+    try:
+        display_image.DISPLAY_CACHE_BYTES = 1
+        display_image.display_image_bytes(photo(500, 400))
+        assert display_image.display_cache_stats()["bytes"] <= 1
+    finally:
+        display_image.DISPLAY_CACHE_BYTES = limit
+    print("SUCCESS: Cache bound")
+
+
+BYTES_SENT_PAGE = """
+import sys
+
+import numpy as np
+from PIL import Image
+
+sys.path.append({utils!r})
+from display_image import show_display_image, show_image_bytes
+
+big = Image.fromarray(np.random.default_rng(0).integers(0, 255, (2000, 3000, 3), dtype=np.uint8))
+show_display_image(big, "Eye Assessment", caption="Photo")
+show_display_image(big, "Eye Assessment", caption="Again")
+show_image_bytes()
+"""
+
+
+def test_bytes_sent_reported_per_page():
+    """Each displayed image is counted against its page for the session"""
+    print("Testing bytes-sent report...")
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_string(BYTES_SENT_PAGE.format(utils=str(UTILS)), default_timeout=60)
+    at.query_params["perf"] = "1"
+    at.run()
+    assert not at.exception, at.exception
+    assert len(at.get("imgs")) == 2
+
+    counts = at.session_state[display_image.IMAGE_BYTES_KEY]["Eye Assessment"]
+    assert counts["images"] == 2
+    assert 0 < counts["largest"] <= counts["bytes"] < 2 * 1024 * 1024
+    assert len(at.sidebar.get("arrow_data_frame")) == 1
+    print("SUCCESS: Bytes-sent report")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Display Images...\n")
+
+    tests = [
+        test_resized_to_display_width,
+        test_far_smaller_than_full_size,
+        test_cached_per_image_hash,
+        test_cache_bounded_by_bytes,
+        test_bytes_sent_reported_per_page,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
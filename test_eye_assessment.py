@@ -15,7 +15,7 @@ def test_imports():
     print("🧪 Testing imports...")
     
     try:
-        from utils.auth import init_session_state
+        from auth import init_session_state
         print("✅ Auth utilities imported successfully")
     except ImportError as e:
         print(f"❌ Auth import failed: {e}")
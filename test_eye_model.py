@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Test eye model variant selection and int8 tensor conversion
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import eye_model
+
+
+def test_variant_paths():
+    """Quantised variants sit next to the .h5 file"""
+    print("Testing variant paths...")
+    assert eye_model.variant_path("float32") == "models/eye_disease_model.h5"
+    assert eye_model.variant_path("float16") == "models/eye_disease_model_float16.tflite"
+    assert eye_model.variant_path("int8") == "models/eye_disease_model_int8.tflite"
+    try:
+        eye_model.variant_path("int4")
+        raise AssertionError("unknown variant accepted")
+    except ValueError:
+        pass
+    print("SUCCESS: Variant paths")
+
+
+def test_missing_variant_falls_back_to_float32():
+    """Selecting a variant that hasn't been built serves float32"""
+    print("Testing variant fallback...")
+    model_path = os.path.join(tempfile.mkdtemp(), "eye.h5")
+    assert eye_model.resolve_variant("int8", model_path) == "float32"
+
+    Path(eye_model.variant_path("int8", model_path)).touch()
+    assert eye_model.resolve_variant("int8", model_path) == "int8"
+    assert eye_model.resolve_variant("float32", model_path) == "float32"
+    print("SUCCESS: Variant fallback")
+
+
+def test_model_version_tracks_file():
+    """The cache version changes when the served file does"""
+    print("Testing model version...")
+    model_path = os.path.join(tempfile.mkdtemp(), "eye.h5")
+    assert eye_model.model_version("float32", model_path) == "float32:missing"
+    assert eye_model.model_version("int8", model_path) == "float32:missing"
+
+    Path(model_path).write_bytes(b"1")
+    first = eye_model.model_version("float32", model_path)
+    assert first.startswith("float32:1:")
+    Path(model_path).write_bytes(b"22")
+    assert eye_model.model_version("float32", model_path) != first
+
+    Path(eye_model.variant_path("int8", model_path)).touch()
+    assert eye_model.model_version("int8", model_path).startswith("int8:0:")
+    print("SUCCESS: Model version")
+
+
+def test_quantize_round_trip():
+    """int8 input/output conversion stays within half a quantisation step"""
+    print("Testing int8 conversion...")
+    values = np.linspace(0, 1, 101, dtype=np.float32)
+    scale, zero_point = 1 / 255, -128
+
+    quantized = eye_model.quantize(values, scale, zero_point, np.int8)
+    assert quantized.dtype == np.int8
+    assert quantized.min() == -128 and quantized.max() == 127
+
+    restored = eye_model.dequantize(quantized, scale, zero_point)
+    assert np.abs(restored - values).max() <= scale / 2 + 1e-6
+
+    # Out-of-range inputs saturate instead of wrapping around
+    assert eye_model.quantize(np.array([2.0]), scale, zero_point, np.int8)[0] == 127
+    print("SUCCESS: int8 conversion")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Eye Model Variants...\n")
+
+    tests = [
+        test_variant_paths,
+        test_missing_variant_falls_back_to_float32,
+        test_model_version_tracks_file,
+        test_quantize_round_trip,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
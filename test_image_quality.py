@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test the photo quality checks that run before face/eye detection
+"""
+
+import io
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import core
+from core import detection
+from test_result_cache import synthetic_face
+
+
+def face_bgr(size=None):
+    """The synthetic face, optionally resized with fresh sensor noise on top"""
+    face = cv2.imdecode(np.frombuffer(synthetic_face(), np.uint8), cv2.IMREAD_COLOR)
+    if size is None:
+        return face
+    face = cv2.resize(face, size, interpolation=cv2.INTER_CUBIC)
+    noise = np.random.default_rng(2).normal(0, 3, face.shape)
+    return np.clip(face + noise, 0, 255).astype(np.uint8)
+
+
+def png_bytes(img_bgr):
+    buffer = io.BytesIO()
+    Image.fromarray(cv2.cvtColor(img_bgr, cv2.COLOR_BGR2RGB)).save(buffer, format="PNG")
+    buffer.seek(0)
+    return buffer
+
+
+def test_good_photo_passes():
+    """A sharp, evenly lit photo has no rejections"""
+    print("Testing good photo...")
+    quality = core.assess_image_quality(face_bgr((480, 480)))
+    assert quality["rejected"] == [] and quality["warnings"] == [], quality
+    assert quality["overall_quality"] == "Good"
+    assert (quality["width"], quality["height"]) == (480, 480)
+    print("SUCCESS: Good photo")
+
+
+def test_bad_photos_rejected():
+    """Blur, darkness, overexposure and glare are each caught"""
+    print("Testing bad photos...")
+    face = face_bgr((480, 480))
+    cases = {
+        "blurry": cv2.GaussianBlur(face, (0, 0), 6),
+        "underexposed": (face * 0.25).astype(np.uint8),
+        "overexposed": (face * 0.2 + 215).astype(np.uint8),
+        "low_resolution": cv2.resize(face, (120, 120), interpolation=cv2.INTER_AREA),
+    }
+    glare = face.copy()
+    glare[:, :200] = 255
+    cases["glare"] = glare
+
+    for issue, image in cases.items():
+        quality = core.assess_image_quality(image)
+        assert issue in quality["rejected"], (issue, quality)
+        assert quality["overall_quality"].startswith("Poor")
+        assert core.quality_message(quality)
+    print("SUCCESS: Bad photos")
+
+
+def test_borderline_photo_flagged():
+    """Issues short of the reject thresholds only lower overall_quality"""
+    print("Testing borderline photo...")
+    quality = core.assess_image_quality(face_bgr())  # 240px: usable but small
+    assert quality["rejected"] == [] and quality["warnings"] == ["low_resolution"]
+    assert quality["overall_quality"] == "Fair - Low resolution"
+
+    analysis, metrics, overall = core.analyze_eye_disease(None, {"eyes_detected": 2, "quality": quality})
+    assert metrics["overall_quality"] == "Fair - Low resolution"
+    assert metrics["sharpness"] == quality["sharpness"]
+    print("SUCCESS: Borderline photo")
+
+
+def test_rejected_photo_skips_detection():
+    """validate_and_draw_boxes stops before the Haar cascades"""
+    print("Testing detection is skipped...")
+    calls = []
+    original = detection.detect_features
+    try:
+        detection.detect_features = lambda *args: calls.append(args) or original(*args)
+        blurry = png_bytes(cv2.GaussianBlur(face_bgr(), (0, 0), 6))
+        is_valid, error_type, message, details, annotated = core.validate_and_draw_boxes(blurry)
+        assert not is_valid and error_type == "poor_quality"
+        assert details["quality"]["rejected"] == ["blurry"] and "blurry" in message
+        assert annotated is not None and calls == []
+
+        is_valid, _, _, details, _ = core.validate_and_draw_boxes(png_bytes(face_bgr()))
+        assert is_valid and len(calls) == 1
+        assert details["quality"]["overall_quality"] == "Fair - Low resolution"
+    finally:
+        detection.detect_features = original
+    print("SUCCESS: Detection is skipped")
+
+
+def test_checks_are_fast():
+    """A full-HD photo is checked in a few milliseconds"""
+    print("Testing speed...")
+    photo = face_bgr((1920, 1080))
+    core.assess_image_quality(photo)
+    samples = []
+    for _ in range(20):
+        start = time.perf_counter()
+        core.assess_image_quality(photo)
+        samples.append((time.perf_counter() - start) * 1000)
+    median = float(np.median(samples))
+    print(f"  median {median:.2f} ms")
+    assert median < 50, median
+    print("SUCCESS: Speed")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Image Quality Checks...\n")
+
+    tests = [
+        test_good_photo_passes,
+        test_bad_photos_rejected,
+        test_borderline_photo_flagged,
+        test_rejected_photo_skips_detection,
+        test_checks_are_fast,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed image store and its garbage collection
+"""
+
+import io
+import os
+import sys
+import tempfile
+import time
+from hashlib import sha256
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import core
+from database import MedicalDB
+from image_store import ImageStore, collect_garbage, referenced_digests
+
+
+def photo(seed, size=(480, 640)):
+    buffer = io.BytesIO()
+    rng = np.random.default_rng(seed)
+    Image.fromarray(rng.integers(0, 255, (*size, 3), dtype=np.uint8)).save(buffer, format="PNG")
+    return buffer
+
+
+def test_write_once_sharded():
+    """Images are stored once under their SHA-256, sharded by its first bytes"""
+    print("Testing content addressing...")
+    store = ImageStore(tempfile.mkdtemp())
+    upload = photo(1)
+
+    digest = store.put(upload)
+    assert digest == sha256(upload.getvalue()).hexdigest()
+    path = store.path(digest)
+    assert path == os.path.join(store.root, digest[:2], digest[2:4], digest)
+    assert store.open(digest).getvalue() == upload.getvalue()
+
+    # Same bytes again: same digest, file not rewritten
+    inode = os.stat(path).st_ino
+    assert store.put(upload.getvalue()) == digest
+    assert os.stat(path).st_ino == inode
+    assert len(list(store.digests())) == 1
+
+    try:
+        store.path("../../etc/passwd")
+        raise AssertionError("path traversal accepted")
+    except ValueError:
+        pass
+    assert not store.exists("not-a-digest")
+    print("SUCCESS: Content addressing")
+
+
+def test_thumbnails():
+    """A JPEG thumbnail no larger than THUMBNAIL_SIZE is written next to each image"""
+    print("Testing thumbnails...")
+    store = ImageStore(tempfile.mkdtemp())
+    digest = store.put_image(store.load_image(store.put(photo(2))).convert("L"))
+
+    with Image.open(store.thumbnail(digest)) as thumbnail:
+        assert thumbnail.format == "JPEG"
+        assert max(thumbnail.size) <= 256
+
+    os.remove(store.thumbnail_path(digest))
+    assert os.path.exists(store.thumbnail(digest))  # recreated on demand
+    print("SUCCESS: Thumbnails")
+
+
+def test_garbage_collection():
+    """Only unreferenced images past the grace period are removed"""
+    print("Testing garbage collection...")
+    store = ImageStore(tempfile.mkdtemp())
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    patient_id = db.add_patient("Stored Photo", 50, "Female")
+
+    saved, abandoned, recent = store.put(photo(3)), store.put(photo(4)), store.put(photo(5))
+    analysis, quality, overall = core.analyze_eye_disease(None, {"eyes_detected": 2})
+    core.save_ai_detection_results(patient_id, analysis, quality, overall, {}, db, images={"photo": saved})
+    assert referenced_digests(db) == {saved}
+
+    old = time.time() - 2 * 24 * 60 * 60
+    for digest in (saved, abandoned):
+        os.utime(store.path(digest), (old, old))
+
+    assert collect_garbage(db, store) == 1
+    assert store.exists(saved) and store.exists(recent)
+    assert not store.exists(abandoned)
+    assert not os.path.exists(store.thumbnail_path(abandoned))
+
+    # Re-uploading refreshes the timestamp, restarting the grace period
+    os.utime(store.path(recent), (old, old))
+    store.put(photo(5))
+    assert collect_garbage(db, store) == 0
+    print("SUCCESS: Garbage collection")
+
+
+class FailingRepository:
+    """A repository whose assessment reads fail, as with a locked database"""
+
+    def get_all_assessments(self, since=None, raise_errors=False):
+        if raise_errors:
+            raise RuntimeError("database is locked")
+        return pd.DataFrame()
+
+
+def test_garbage_collection_keeps_images_when_reads_fail():
+    """A failed or empty reference read never deletes stored images"""
+    print("Testing garbage collection safety...")
+    store = ImageStore(tempfile.mkdtemp())
+    digests = [store.put(photo(seed)) for seed in (6, 7)]
+    old = time.time() - 2 * 24 * 60 * 60
+    for digest in digests:
+        os.utime(store.path(digest), (old, old))
+
+    try:
+        collect_garbage(FailingRepository(), store)
+        raise AssertionError("gc ran without the referenced images")
+    except RuntimeError:
+        pass
+    assert all(store.exists(digest) for digest in digests)
+
+    # A readable database that refers to no images at all: also left alone
+    empty = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    assert collect_garbage(empty, store) == 0
+    assert all(store.exists(digest) for digest in digests)
+
+    # A missing database file can't be read either
+    missing = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    os.remove(missing.db_path)
+    try:
+        collect_garbage(missing, store)
+        raise AssertionError("gc ran against a missing database")
+    except Exception as e:
+        assert not isinstance(e, AssertionError)
+    assert all(store.exists(digest) for digest in digests)
+    print("SUCCESS: Garbage collection safety")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Image Store...\n")
+
+    tests = [
+        test_write_once_sharded,
+        test_thumbnails,
+        test_garbage_collection,
+        test_garbage_collection_keeps_images_when_reads_fail,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
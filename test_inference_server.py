@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+Test the shared inference server and its micro-batching
+"""
+
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from multiprocessing import AuthenticationError
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import inference_server
+from inference_server import InferenceClient, InferenceServer, MicroBatcher
+from key_file import read_or_create_key
+
+inference_server.INFERENCE_KEY_PATH = os.path.join(tempfile.mkdtemp(), "inference.key")
+
+
+class RecordingModel:
+    """Stands in for a Keras model: one output row per input row, batch sizes recorded"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.batch_sizes = []
+
+    def __call__(self, inputs):
+        self.batch_sizes.append(len(inputs))
+        time.sleep(self.delay)
+        return inputs.sum(axis=1, keepdims=True)
+
+
+def start_server(models, **kwargs):
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    server = InferenceServer(models, address, **kwargs)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, address
+
+
+def test_batcher_coalesces_concurrent_requests():
+    """Requests arriving together share one predict call, results split back"""
+    print("Testing micro-batching...")
+    model = RecordingModel(delay=0.02)
+    batcher = MicroBatcher({"hearing": model}, max_batch=64, max_wait=0.05)
+
+    inputs = [np.array([[i, 1.0]]) for i in range(40)]
+    with ThreadPoolExecutor(max_workers=40) as pool:
+        outputs = list(pool.map(lambda x: batcher.submit("hearing", x).result(5), inputs))
+
+    assert [float(o[0][0]) for o in outputs] == [i + 1.0 for i in range(40)]
+    assert sum(model.batch_sizes) == 40
+    assert len(model.batch_sizes) < 40
+    assert batcher.stats["requests"] == 40
+    batcher.close()
+    print(f"SUCCESS: 40 requests in {len(model.batch_sizes)} batches")
+
+
+def test_batch_size_and_models_kept_apart():
+    """Batches respect max_batch and never mix models"""
+    print("Testing batch limits...")
+    eye, hearing = RecordingModel(), RecordingModel()
+    batcher = MicroBatcher({"eye": eye, "hearing": hearing}, max_batch=4, max_wait=0.05)
+
+    futures = [batcher.submit("eye" if i % 2 else "hearing", np.ones((1, 3))) for i in range(12)]
+    for future in futures:
+        assert future.result(5).shape == (1, 1)
+    assert max(eye.batch_sizes + hearing.batch_sizes) <= 4
+    assert sum(eye.batch_sizes) == sum(hearing.batch_sizes) == 6
+
+    try:
+        batcher.submit("missing", np.ones((1, 3))).result(5)
+        raise AssertionError("unknown model accepted")
+    except KeyError:
+        pass
+    batcher.close()
+    print("SUCCESS: Batch limits respected")
+
+
+def test_socket_round_trip():
+    """Clients in several threads share one connection to the server"""
+    print("Testing server round trip...")
+    model = RecordingModel(delay=0.01)
+    server, address = start_server({"hearing": model}, max_wait=0.02)
+    try:
+        client = InferenceClient(address)
+        with ThreadPoolExecutor(max_workers=16) as pool:
+            outputs = list(pool.map(lambda i: client.predict("hearing", np.array([[i, i]])), range(32)))
+        assert [float(o[0][0]) for o in outputs] == [2.0 * i for i in range(32)]
+        assert len(model.batch_sizes) < 32
+
+        try:
+            client.predict("eye", np.ones((1, 2)))
+            raise AssertionError("unknown model accepted")
+        except RuntimeError as e:
+            assert "Model not loaded" in str(e)
+        client.close()
+    finally:
+        server.close()
+    assert not os.path.exists(address)
+    print(f"SUCCESS: 32 remote requests in {len(model.batch_sizes)} batches")
+
+
+def test_remote_predict_falls_back_without_server():
+    """remote_predict() returns None when no server is listening"""
+    print("Testing fallback...")
+    address = os.path.join(tempfile.mkdtemp(), "inference.sock")
+    assert inference_server.remote_predict("hearing", np.ones((1, 2)), address) is None
+
+    server, address = start_server({"hearing": RecordingModel()})
+    try:
+        output = inference_server.remote_predict("hearing", np.ones((1, 2)), address)
+        assert float(output[0][0]) == 2.0
+    finally:
+        server.close()
+    print("SUCCESS: Fallback when server is missing")
+
+
+def test_no_local_warm_up_while_server_runs():
+    """Startup warm-up loads nothing locally when the shared server answers"""
+    print("Testing local warm-up skip...")
+    loaded = []
+    original = inference_server.load_models
+    inference_server.load_models = lambda model_files: loaded.append(model_files) or {"hearing": RecordingModel()}
+    try:
+        server, address = start_server({"hearing": RecordingModel()})
+        try:
+            assert inference_server.load_local_models(address) == {}
+            assert loaded == []
+        finally:
+            server.close()
+        client = inference_server._clients.get(address)
+        deadline = time.time() + 5
+        while client is not None and client.connected and time.time() < deadline:
+            time.sleep(0.01)  # the client's reader thread sees the server close
+        assert list(inference_server.load_local_models(address)) == ["hearing"]
+        assert len(loaded) == 1
+    finally:
+        inference_server.load_models = original
+    print("SUCCESS: Local warm-up skipped")
+
+
+def test_socket_and_key_private():
+    """The per-host key and the socket are owner-only; a wrong key gets nothing"""
+    print("Testing authentication...")
+    server, address = start_server({"hearing": RecordingModel()})
+    try:
+        assert os.stat(inference_server.INFERENCE_KEY_PATH).st_mode & 0o777 == 0o600
+        assert os.stat(address).st_mode & 0o777 == 0o600
+        assert len(inference_server.get_inference_authkey()) == 32
+
+        try:
+            InferenceClient(address, authkey=b"medical-inference")
+            raise AssertionError("wrong key accepted")
+        except AuthenticationError:
+            pass
+        # The server keeps serving after a failed handshake
+        assert float(inference_server.remote_predict("hearing", np.ones((1, 2)), address)[0][0]) == 2.0
+    finally:
+        server.close()
+
+    # A socket planted by someone without the key is refused by clients
+    planted, address = start_server({"hearing": RecordingModel()}, authkey=b"not-the-host-key")
+    try:
+        assert inference_server.get_inference_client(address) is None
+    finally:
+        planted.close()
+
+    os.chmod(inference_server.INFERENCE_KEY_PATH, 0o644)
+    try:
+        read_or_create_key(inference_server.INFERENCE_KEY_PATH)
+        raise AssertionError("world-readable key used")
+    except PermissionError:
+        pass
+    finally:
+        os.chmod(inference_server.INFERENCE_KEY_PATH, 0o600)
+    print("SUCCESS: Authentication")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Inference Server...\n")
+
+    tests = [
+        test_batcher_coalesces_concurrent_requests,
+        test_batch_size_and_models_kept_apart,
+        test_socket_round_trip,
+        test_remote_predict_falls_back_without_server,
+        test_no_local_warm_up_while_server_runs,
+        test_socket_and_key_private,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
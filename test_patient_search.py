@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test the FTS5 patient search used by the admin directory
+"""
+
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from database import MedicalDB
+
+
+def make_db():
+    db = MedicalDB(str(Path(tempfile.mkdtemp()) / "medical.db"))
+    db.add_patient("John Smith", 45, "Male", "john.smith@example.com", "555-0101")
+    db.add_patient("Johanna Smythe", 38, "Female", "jo@clinic.org", "555-0202")
+    db.add_patient("José Álvarez", 61, "Male", "jalvarez@example.com", "555-0303")
+    return db
+
+
+def names(results):
+    return list(results['name'])
+
+
+def test_prefix_and_accent_matching():
+    """Words match as prefixes, case- and accent-insensitively"""
+    print("Testing prefix matching...")
+    db = make_db()
+    assert names(db.search_patients("john sm")) == ["John Smith"]
+    assert set(names(db.search_patients("jo"))) == {"John Smith", "Johanna Smythe", "José Álvarez"}
+    assert names(db.search_patients("alvarez")) == ["José Álvarez"]
+    assert names(db.search_patients("clinic")) == ["Johanna Smythe"]
+    assert names(db.search_patients("0303")) == ["José Álvarez"]
+    assert db.search_patients("   ").empty
+    assert len(db.search_patients("jo", limit=2)) == 2
+    print("SUCCESS: Prefix search works")
+
+
+def test_fallback_and_id_lookup():
+    """Unmatched word combinations fall back to any-word, numbers match IDs"""
+    print("\nTesting fallbacks...")
+    db = make_db()
+    assert set(names(db.search_patients("smith alvarez"))) == {"John Smith", "José Álvarez"}
+    assert names(db.search_patients("2"))[0] == "Johanna Smythe"
+    print("SUCCESS: Fallbacks work")
+
+
+def test_index_follows_patient_changes():
+    """Triggers keep the index in sync; existing patients are indexed on migration"""
+    print("\nTesting index sync...")
+    db = make_db()
+    conn = sqlite3.connect(db.db_path)
+    conn.execute("UPDATE patients SET name = 'Jonathan Smith' WHERE id = 1")
+    conn.execute("DELETE FROM patients WHERE id = 2")
+    conn.commit()
+    conn.close()
+    assert names(db.search_patients("jonathan")) == ["Jonathan Smith"]
+    assert db.search_patients("johanna").empty
+
+    # A database created before the search table existed gets rebuilt
+    path = str(Path(tempfile.mkdtemp()) / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE patients (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL, age INTEGER, "
+                 "gender TEXT, email TEXT, phone TEXT, created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)")
+    conn.execute("INSERT INTO patients (name) VALUES ('Legacy Patient')")
+    conn.commit()
+    conn.close()
+    assert names(MedicalDB(path).search_patients("legacy")) == ["Legacy Patient"]
+    print("SUCCESS: Index stays in sync")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Patient Search...\n")
+
+    tests = [
+        test_prefix_and_accent_matching,
+        test_fallback_and_id_lookup,
+        test_index_follows_patient_changes,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
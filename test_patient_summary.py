@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Test the vectorised patient summary used by the admin dashboard
+"""
+
+import sys
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import analytics
+from analytics import get_patient_summary, summarize_patients
+
+
+def make_assessments():
+    """Two patients, newest first as get_all_assessments() returns them"""
+    return pd.DataFrame({
+        'id': [4, 3, 2, 1],
+        'patient_id': [1, 2, 1, 1],
+        'assessment_type': ['eye', 'hearing', 'hearing', 'eye'],
+        'risk_level': ['Low', 'Moderate', 'High', 'High'],
+        'critical_flag': [0, 0, 1, 0],
+        'created_at': ['2024-03-01 10:00:00', '2024-02-15 09:00:00', '2024-02-01 08:00:00', '2024-01-01 08:00:00'],
+        'name': ['Ann', 'Bob', 'Ann', 'Ann'],
+        'age': [40, 55, 40, 40],
+        'gender': ['Female', 'Male', 'Female', 'Female'],
+    })
+
+
+def test_latest_risk_level():
+    """Risk level comes from the newest assessment, not the oldest"""
+    print("Testing latest risk level per patient...")
+    summary = summarize_patients(make_assessments())
+
+    assert list(summary['patient_id']) == [1, 2]
+    ann = summary.iloc[0]
+    assert ann['risk_level'] == 'Low'
+    assert ann['created_at'] == '2024-03-01 10:00:00'
+    assert ann['critical_flag'] == 1
+    assert ann['assessment_type'] == 3
+    assert summary.iloc[1]['risk_level'] == 'Moderate'
+    assert list(summary.columns) == analytics.SUMMARY_COLUMNS
+    print("SUCCESS: Summary uses each patient's latest assessment")
+
+
+def test_order_independent():
+    """Shuffled input gives the same summary"""
+    print("\nTesting input order independence...")
+    df = make_assessments()
+    shuffled = df.sample(frac=1, random_state=3)
+    pd.testing.assert_frame_equal(summarize_patients(df), summarize_patients(shuffled))
+    assert summarize_patients(df.iloc[0:0]).empty
+    print("SUCCESS: Summary does not depend on row order")
+
+
+def test_summary_cached_per_data_version():
+    """Same data reuses the summary; new rows or patient edits rebuild it"""
+    print("\nTesting summary cache...")
+    analytics.clear_summary_cache()
+    df = make_assessments()
+
+    first = get_patient_summary(df)
+    assert get_patient_summary(df.copy()) is first
+
+    renamed = df.copy()
+    renamed.loc[renamed['patient_id'] == 2, 'name'] = 'Robert'
+    assert get_patient_summary(renamed).iloc[1]['name'] == 'Robert'
+
+    newer = pd.concat([pd.DataFrame([{**df.iloc[1].to_dict(), 'id': 5, 'risk_level': 'High',
+                                      'created_at': '2024-04-01 08:00:00'}]), df], ignore_index=True)
+    assert get_patient_summary(newer).iloc[1]['risk_level'] == 'High'
+    print("SUCCESS: Cache follows the data version")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Patient Summary...\n")
+
+    tests = [
+        test_latest_risk_level,
+        test_order_independent,
+        test_summary_cached_per_data_version,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
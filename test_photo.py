@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test the decode-once Photo container used by the eye pipeline
+"""
+
+import io
+import sys
+import tracemalloc
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import core
+from core import photo as photo_module
+from test_result_cache import synthetic_face
+
+
+def encoded(rgb, format="PNG", **options):
+    buffer = io.BytesIO()
+    Image.fromarray(rgb).save(buffer, format=format, **options)
+    buffer.seek(0)
+    return buffer
+
+
+def large_face(side):
+    """The synthetic face scaled up to `side` pixels, with fresh sensor noise"""
+    face = np.asarray(Image.open(io.BytesIO(synthetic_face())).convert("RGB"))
+    face = cv2.resize(face, (side, side), interpolation=cv2.INTER_CUBIC)
+    return np.clip(face + np.random.default_rng(3).normal(0, 3, face.shape), 0, 255).astype(np.uint8)
+
+
+def test_decodes_like_pil():
+    """Pixels match PIL's RGB decode for the usual upload formats"""
+    print("Testing decoding...")
+    rgb = large_face(300)
+    uploads = {
+        "jpeg": encoded(rgb, "JPEG", quality=90),
+        "png": encoded(rgb),
+        "grayscale png": encoded(rgb[:, :, 0]),
+        "rgba png": encoded(np.dstack([rgb, rgb[:, :, 0]])),
+    }
+    for name, upload in uploads.items():
+        photo = core.Photo.open(upload)
+        expected = np.asarray(Image.open(upload).convert("RGB"))
+        assert np.array_equal(photo.rgb, expected), name
+        assert photo.digest == core.image_digest(upload)
+        assert not photo.rgb.flags.writeable
+    try:
+        core.Photo.open(io.BytesIO(b"not an image"))
+        raise AssertionError("invalid bytes decoded")
+    except Exception as e:
+        assert not isinstance(e, AssertionError)
+    print("SUCCESS: Decoding")
+
+
+def test_views_are_lazy_and_shared():
+    """Crops are slices; gray and the detection view are made once"""
+    print("Testing views...")
+    photo = core.Photo.open(encoded(large_face(2000)))
+    assert photo.size == (2000, 2000)
+
+    crop = photo.crop((10, 20, 110, 70))
+    assert crop.shape == (50, 100, 3) and np.shares_memory(crop, photo.rgb)
+    assert photo.gray is photo.gray and photo.gray.shape == (2000, 2000)
+
+    gray, scale = photo.detection_view()
+    assert gray.shape == (photo_module.DETECTION_MAX_SIDE,) * 2 and scale == photo_module.DETECTION_MAX_SIDE / 2000
+    assert photo.detection_view()[0] is gray
+
+    canvas, scale = photo.display()
+    assert max(canvas.shape[:2]) == photo_module.DISPLAY_MAX_SIDE and canvas.flags.writeable
+    assert not np.shares_memory(canvas, photo.rgb)
+
+    small = core.Photo.open(encoded(large_face(240)))
+    canvas, scale = small.display()
+    assert scale == 1 and canvas.flags.writeable and not np.shares_memory(canvas, small.rgb)
+    print("SUCCESS: Views")
+
+
+def test_large_photo_boxes_in_full_resolution():
+    """Detection on the downscaled view reports boxes in full-photo pixels"""
+    print("Testing large photo...")
+    core.clear_result_cache()
+    side = 2560
+    photo = core.Photo.open(encoded(large_face(side)))
+    is_valid, error_type, message, details, annotated = core.validate_and_draw_boxes(photo)
+    assert is_valid, message
+    assert max(annotated.size) == photo_module.DISPLAY_MAX_SIDE
+
+    small = core.detect_features(core.Photo.open(io.BytesIO(synthetic_face())))
+    large = core.detect_features(photo)
+    ratio = side / 240
+    for small_value, large_value in zip(small["face"], large["face"]):
+        assert abs(small_value * ratio - large_value) <= 0.1 * side, (small["face"], large["face"])
+
+    eye_image, notice = core.crop_eye_region(photo)
+    assert notice is None and eye_image.size[0] > 240
+    print("SUCCESS: Large photo")
+
+
+def test_photo_and_bytes_agree():
+    """Passing a decoded Photo gives the same results as passing the upload"""
+    print("Testing Photo and bytes agree...")
+    upload = io.BytesIO(synthetic_face())
+    photo = core.Photo.open(upload)
+
+    from_bytes = core.validate_and_draw_boxes(upload)
+    from_photo = core.validate_and_draw_boxes(photo)
+    assert from_bytes[:4] == from_photo[:4]
+    assert np.array_equal(np.asarray(from_bytes[4]), np.asarray(from_photo[4]))
+    assert core.validate_and_draw_boxes(photo, annotate=False)[4] is None
+
+    crop_bytes, _ = core.crop_eye_region(upload)
+    crop_photo, _ = core.crop_eye_region(photo)
+    assert np.array_equal(np.asarray(crop_bytes), np.asarray(crop_photo))
+    assert core.convert_to_grayscale(photo).size == photo.size
+    print("SUCCESS: Photo and bytes agree")
+
+
+def test_validation_allocates_less_than_a_frame():
+    """Quality checks, detection and annotation never copy the full frame"""
+    print("Testing validation allocations...")
+    core.clear_result_cache()
+    rgb = np.zeros((1080, 1920, 3), np.uint8)
+    rgb[:, 420:1500] = cv2.resize(large_face(1080), (1080, 1080))
+    photo = core.Photo.open(encoded(rgb))
+    core.validate_and_draw_boxes(core.Photo.open(io.BytesIO(synthetic_face())))  # first-call allocations
+
+    tracemalloc.start()
+    core.validate_and_draw_boxes(photo)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"  peak {peak / 1024 / 1024:.1f} MB for a {rgb.nbytes / 1024 / 1024:.1f} MB frame")
+    assert peak < rgb.nbytes, peak
+    print("SUCCESS: Validation allocations")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Photo Container...\n")
+
+    tests = [
+        test_decodes_like_pil,
+        test_views_are_lazy_and_shared,
+        test_large_photo_boxes_in_full_resolution,
+        test_photo_and_bytes_agree,
+        test_validation_allocates_less_than_a_frame,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
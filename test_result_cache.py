@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Test the result cache: repeated images skip detection and inference
+"""
+
+import io
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+from PIL import Image
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import core
+from core import inference, pipeline, result_cache
+
+
+def synthetic_face():
+    """PNG of a drawn face the Haar cascades find one face and two eyes in
+
+    Blurred and noisy like a webcam frame, so it also passes the quality checks.
+    """
+    size = 240
+    gray = np.full((size, size), 40, np.uint8)
+    c = size // 2
+    cv2.ellipse(gray, (c, c), (int(size * 0.28), int(size * 0.38)), 0, 0, 360, 170, -1)
+    for dx in (-1, 1):
+        ex, ey = c + dx * int(size * 0.11), c - int(size * 0.06)
+        cv2.ellipse(gray, (ex, ey), (int(size * 0.06), int(size * 0.03)), 0, 0, 360, 235, -1)
+        cv2.circle(gray, (ex, ey), int(size * 0.03 * 0.9), 20, -1)
+        cv2.ellipse(gray, (ex, ey - int(size * 0.06)), (int(size * 0.08), int(size * 0.02)), 0, 180, 360, 40, 4)
+    cv2.ellipse(gray, (c, c + int(size * 0.06)), (int(size * 0.03), int(size * 0.02)), 0, 0, 360, 119, -1)
+    cv2.ellipse(gray, (c, c + int(size * 0.19)), (int(size * 0.09), int(size * 0.025)), 0, 0, 360, 60, -1)
+    gray = cv2.GaussianBlur(gray, (0, 0), 2)
+    gray = np.clip(gray + np.random.default_rng(1).normal(0, 3, gray.shape), 0, 255).astype(np.uint8)  # sensor noise
+
+    buffer = io.BytesIO()
+    Image.fromarray(cv2.cvtColor(gray, cv2.COLOR_GRAY2RGB)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def test_repeated_image_hits_cache():
+    """A second upload of the same bytes reuses the stored boxes"""
+    print("Testing detection cache hits...")
+    core.clear_result_cache()
+    photo = synthetic_face()
+
+    first = core.validate_and_draw_boxes(io.BytesIO(photo))
+    second = core.validate_and_draw_boxes(io.BytesIO(photo))
+    assert first[0] is True, first[2]
+    assert first[:4] == second[:4]
+    assert np.array_equal(np.array(first[4]), np.array(second[4]))
+
+    eye_image, notice = core.crop_eye_region(io.BytesIO(photo))
+    assert eye_image is not None and notice is None
+
+    stats = core.result_cache_stats()
+    assert stats["misses"] == 1 and stats["hits"] == 2, stats
+    assert abs(stats["hit_rate"] - 2 / 3) < 1e-9
+    assert stats["kinds"]["detection"] == {"hits": 2, "misses": 1}
+    assert stats["entries"] == 1 and stats["bytes"] > 0
+    print("SUCCESS: Detection cache hits")
+
+
+def test_cached_values_are_copies():
+    """Callers can't change what later lookups get back"""
+    print("Testing cached values are copies...")
+    core.clear_result_cache()
+    value = core.cached_result("a" * 64, "detection", "v1", lambda: {"faces": [[1, 2, 3, 4]]})
+    value["faces"].clear()
+    again = core.cached_result("a" * 64, "detection", "v1", lambda: {"faces": []})
+    assert again == {"faces": [[1, 2, 3, 4]]}
+    print("SUCCESS: Cached values are copies")
+
+
+def test_version_change_misses():
+    """A different detector or model version recomputes"""
+    print("Testing version change...")
+    core.clear_result_cache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return {"n": len(calls)}
+
+    assert core.cached_result("b" * 64, "predictions", "float32:1:1", compute) == {"n": 1}
+    assert core.cached_result("b" * 64, "predictions", "float32:1:1", compute) == {"n": 1}
+    assert core.cached_result("b" * 64, "predictions", "int8:1:2", compute) == {"n": 2}
+    assert core.cached_result(None, "predictions", "int8:1:2", compute) == {"n": 3}
+    assert len(calls) == 3
+    print("SUCCESS: Version change")
+
+
+def test_eviction():
+    """Least recently used entries go first, by count and by size"""
+    print("Testing eviction...")
+    entries, size = result_cache.RESULT_CACHE_ENTRIES, result_cache.RESULT_CACHE_BYTES
+    try:
+        core.clear_result_cache()
+        result_cache.RESULT_CACHE_ENTRIES = 2
+        for digest in ("1", "2"):
+            core.cached_result(digest, "detection", "v", lambda: {"x": 1})
+        core.cached_result("1", "detection", "v", lambda: {"x": 2})  # touch 1, so 2 is oldest
+        core.cached_result("3", "detection", "v", lambda: {"x": 3})
+        assert core.cached_result("1", "detection", "v", lambda: {"x": 0}) == {"x": 1}
+        assert core.cached_result("2", "detection", "v", lambda: {"x": 0}) == {"x": 0}
+        assert core.result_cache_stats()["evictions"] == 2
+
+        core.clear_result_cache()
+        result_cache.RESULT_CACHE_ENTRIES = 100
+        result_cache.RESULT_CACHE_BYTES = 100
+        core.cached_result("big", "detection", "v", lambda: {"x": "y" * 200})  # larger than the cache: not kept
+        for digest in "abcde":
+            core.cached_result(digest, "detection", "v", lambda: {"x": "y" * 20})
+        stats = core.result_cache_stats()
+        assert stats["entries"] == 3 and stats["bytes"] <= 100, stats
+        assert core.cached_result("a", "detection", "v", lambda: None) is None
+    finally:
+        result_cache.RESULT_CACHE_ENTRIES, result_cache.RESULT_CACHE_BYTES = entries, size
+        core.clear_result_cache()
+    print("SUCCESS: Eviction")
+
+
+def test_assessment_predictions_cached():
+    """assess_eye_image runs the model once per image and model version"""
+    print("Testing prediction cache...")
+    core.clear_result_cache()
+    calls = []
+    originals = pipeline.preprocess_eye_image, pipeline.predict_eye_disease, pipeline.eye_model_version
+    try:
+        pipeline.preprocess_eye_image = lambda image: image
+        pipeline.predict_eye_disease = lambda image: calls.append(image.size) or {label: 0.25 for label in core.EYE_CLASSES}
+        pipeline.eye_model_version = lambda: "float32:1:1"
+        photo = synthetic_face()
+
+        first = core.assess_eye_image(io.BytesIO(photo))
+        second = core.assess_eye_image(io.BytesIO(photo))
+        assert first["valid"] and first == second
+        assert len(calls) == 1
+
+        pipeline.eye_model_version = lambda: "float32:1:2"
+        assert core.assess_eye_image(io.BytesIO(photo)) == first
+        assert len(calls) == 2
+        assert core.result_cache_stats()["kinds"]["predictions"] == {"hits": 1, "misses": 2}
+    finally:
+        pipeline.preprocess_eye_image, pipeline.predict_eye_disease, pipeline.eye_model_version = originals
+        core.clear_result_cache()
+    print("SUCCESS: Prediction cache")
+
+
+def test_fallback_predictions_versioned_apart():
+    """Placeholder predictions from a missing model never share a real model's cache key"""
+    print("Testing fallback version...")
+    originals = inference.get_inference_client, inference.load_eye_model, inference.model_version
+    try:
+        inference.get_inference_client = lambda: None
+        inference.model_version = lambda: "float32:1:1"
+        inference.load_eye_model = lambda: None
+        assert core.eye_model_version() == inference.FALLBACK_MODEL_VERSION
+
+        inference.load_eye_model = lambda: (lambda batch: batch)
+        assert core.eye_model_version() == "float32:1:1"
+
+        # The shared server serves the model without it loading locally
+        inference.get_inference_client = lambda: object()
+        inference.load_eye_model = lambda: None
+        assert core.eye_model_version() == "float32:1:1"
+    finally:
+        inference.get_inference_client, inference.load_eye_model, inference.model_version = originals
+    print("SUCCESS: Fallback version")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Result Cache...\n")
+
+    tests = [
+        test_repeated_image_hits_cache,
+        test_cached_values_are_copies,
+        test_version_change_misses,
+        test_eviction,
+        test_assessment_predictions_cached,
+        test_fallback_predictions_versioned_apart,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test model timing, timing export and startup warm-up
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import tf_runtime
+
+
+def reset_timings():
+    tf_runtime._timings.clear()
+
+
+def test_first_inference_kept_apart():
+    """The first call is reported separately from steady-state calls"""
+    print("Testing first vs steady-state timing...")
+    reset_timings()
+    calls = []
+
+    def predict(inputs):
+        if not calls:
+            time.sleep(0.05)  # graph tracing
+        calls.append(inputs)
+        return np.zeros((len(inputs), 1))
+
+    timed = tf_runtime.timed_predictor("hearing", predict)
+    tf_runtime.record_load("hearing", 120.0)
+    for _ in range(5):
+        output = timed(np.zeros((1, 2)))
+    assert output.shape == (1, 1)
+
+    summary = tf_runtime.timing_summary()["hearing"]
+    assert summary["load_ms"] == 120.0
+    assert summary["first_inference_ms"] >= 50
+    assert summary["steady_runs"] == 4
+    assert summary["steady_mean_ms"] < summary["first_inference_ms"]
+    assert summary["steady_p95_ms"] >= summary["steady_mean_ms"]
+    print("SUCCESS: First vs steady-state timing")
+
+
+def test_failed_calls_still_timed():
+    """A predict call that raises is still recorded and re-raised"""
+    print("Testing failed call timing...")
+    reset_timings()
+
+    def predict(inputs):
+        raise ValueError("bad input")
+
+    timed = tf_runtime.timed_predictor("eye", predict)
+    try:
+        timed(np.zeros((1, 224, 224, 3)))
+        raise AssertionError("error swallowed")
+    except ValueError:
+        pass
+    assert tf_runtime.timing_summary()["eye"]["first_inference_ms"] is not None
+    print("SUCCESS: Failed call timing")
+
+
+def test_warm_up_exports_timings():
+    """Warm-up runs dummy inputs of each model's shape and writes the JSON report"""
+    print("Testing warm-up export...")
+    reset_timings()
+    shapes = {}
+
+    def predictor(name):
+        def predict(inputs):
+            shapes.setdefault(name, []).append(inputs.shape)
+            return np.zeros((len(inputs), 1))
+        return tf_runtime.timed_predictor(name, predict)
+
+    def broken(inputs):
+        raise RuntimeError("model file is a placeholder")
+
+    path = os.path.join(tempfile.mkdtemp(), "timings.json")
+    report = tf_runtime.warm_up({"eye": predictor("eye"), "hearing": predictor("hearing"),
+                                 "unknown": predictor("unknown")}, runs=3, export_path=path)
+
+    assert shapes["eye"] == [(1, 224, 224, 3)] * 4
+    assert shapes["hearing"] == [(1, 2)] * 4
+    assert "unknown" not in shapes  # no dummy input shape known
+
+    with open(path) as f:
+        exported = json.load(f)
+    assert exported == report
+    assert exported["models"]["eye"]["steady_runs"] == 3
+    assert exported["pid"] == os.getpid()
+
+    # One failing model doesn't stop the others being warmed up
+    tf_runtime.warm_up({"eye": broken, "hearing": predictor("hearing")}, runs=1, export_path=None)
+    assert len(shapes["hearing"]) == 6
+    print("SUCCESS: Warm-up export")
+
+
+def test_start_warm_up_runs_once():
+    """Background warm-up starts one thread per process and survives loader errors"""
+    print("Testing background warm-up...")
+    loads = []
+
+    def load_models():
+        loads.append(1)
+        raise ImportError("No module named 'tensorflow'")
+
+    first = tf_runtime.start_warm_up(load_models)
+    first.join(timeout=5)
+    assert tf_runtime.start_warm_up(load_models) is first
+    assert loads == [1]
+    print("SUCCESS: Background warm-up")
+
+
+def main():
+    """Run all tests"""
+    print("Testing TensorFlow Runtime Settings...\n")
+
+    tests = [
+        test_first_inference_kept_apart,
+        test_failed_calls_still_timed,
+        test_warm_up_exports_timings,
+        test_start_warm_up_runs_once,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Test hot/cold assessment tiering: monthly rollover and transparent reads
+"""
+
+import os
+import sqlite3
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+import tiering
+from db_fixtures import DAY, temp_db
+
+
+def hot_count(db):
+    conn = sqlite3.connect(db.db_path)
+    try:
+        return conn.execute("SELECT COUNT(*) FROM assessments").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_rollover_writes_monthly_archives():
+    """Rows outside the hot window move to one file per month"""
+    print("Testing rollover...")
+    with temp_db(200, spacing_days=3) as (db, _):
+        moved = tiering.roll_over(db.db_path, months=6, batch_size=7)
+        cutoff = tiering.hot_cutoff(6)
+
+        archives = tiering.list_archives(db.archive_dir)
+        assert moved > 0 and hot_count(db) + moved == 200
+        assert all(end <= cutoff for _, end, _ in archives)
+        for start, end, path in archives:
+            conn = sqlite3.connect(path)
+            low, high = conn.execute("SELECT MIN(created_epoch), MAX(created_epoch) FROM assessments").fetchone()
+            conn.close()
+            assert start <= low and high < end, os.path.basename(path)
+
+        assert tiering.roll_over(db.db_path, months=6) == 0
+        print(f"SUCCESS: {moved} rows in {len(archives)} monthly archives")
+
+
+def test_reads_union_tiers():
+    """Read APIs return the same data before and after rollover"""
+    print("\nTesting transparent reads...")
+    with temp_db(200, spacing_days=3) as (db, patient_id):
+        before_all = db.get_all_assessments()
+        before_stats = db.get_statistics()
+        before_months = db.get_monthly_assessment_counts()
+
+        tiering.roll_over(db.db_path, months=6)
+
+        after_all = db.get_all_assessments()
+        assert list(after_all['id']) == list(before_all['id'])
+        assert after_all['created_epoch'].is_monotonic_decreasing
+        assert len(db.get_patient_assessments(patient_id)) == 200
+        assert len(db.get_critical_patients()) == 20
+
+        after_stats = db.get_statistics()
+        assert after_stats['total_assessments'] == before_stats['total_assessments'] == 200
+        assert after_stats['critical_cases'] == before_stats['critical_cases']
+        assert db.get_monthly_assessment_counts().equals(before_months)
+        print("SUCCESS: Reads span hot and archive tiers")
+
+
+def test_recent_reads_skip_archives():
+    """Hot-range and latest-N reads never attach an archive"""
+    print("\nTesting hot-only reads...")
+    with temp_db(200, spacing_days=3) as (db, patient_id):
+        tiering.roll_over(db.db_path, months=6)
+
+        attached = []
+        original = tiering.archives_for_range
+
+        def tracking(*args, **kwargs):
+            paths = original(*args, **kwargs)
+            attached.extend(paths)
+            return paths
+
+        import database
+        database.archives_for_range = tracking
+        try:
+            week = db.get_all_assessments(since=int(time.time()) - 7 * DAY)
+            latest = db.get_patient_assessments(patient_id, limit=3)
+            assert len(week) == 3 and len(latest) == 3
+            assert attached == []
+
+            older = db.get_patient_assessments(patient_id, since=int(time.time()) - 400 * DAY)
+            assert attached and len(older) == 134
+        finally:
+            database.archives_for_range = original
+        print("SUCCESS: Recent reads stay in the hot database")
+
+
+def test_short_hot_window_reads():
+    """Rows archived with fewer than HOT_MONTHS months are still read by `since` queries"""
+    print("\nTesting short hot window...")
+    with temp_db(200, spacing_days=3) as (db, patient_id):
+        since = int(time.time()) - 150 * DAY
+        assert tiering.hot_cutoff(2) > since > tiering.hot_cutoff()
+        before = db.get_patient_assessments(patient_id, since=since)
+        before_all = db.get_all_assessments(since=since)
+
+        assert tiering.roll_over(db.db_path, months=2) > 0
+        after = db.get_patient_assessments(patient_id, since=since)
+        assert list(after['id']) == list(before['id'])
+        assert list(db.get_all_assessments(since=since)['id']) == list(before_all['id'])
+        assert len(db.get_patient_assessments(patient_id, since=since, limit=40)) == 40
+        print(f"SUCCESS: {len(after)} rows since the cutoff, hot and archived")
+
+
+def test_rollover_job_starts_once():
+    """The background job is a single daemon thread per database"""
+    print("\nTesting rollover job...")
+    with temp_db(50, spacing_days=3) as (db, _):
+        job = tiering.start_rollover_job(db.db_path, months=1, interval=3600)
+        assert tiering.start_rollover_job(db.db_path, months=1, interval=3600) is job
+        assert job.daemon
+
+        deadline = time.time() + 10
+        while hot_count(db) == 50 and time.time() < deadline:
+            time.sleep(0.05)
+        assert hot_count(db) < 50
+        print("SUCCESS: Rollover job ran")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Tiering...\n")
+
+    tests = [
+        test_rollover_writes_monthly_archives,
+        test_reads_union_tiers,
+        test_recent_reads_skip_archives,
+        test_short_hot_window_reads,
+        test_rollover_job_starts_once,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test the SQL time-bucket aggregations behind the analytics heatmap and monthly trend
+"""
+
+import calendar
+import sys
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import pandas as pd
+
+sys.path.append(str(Path(__file__).parent / "utils"))
+
+from db_fixtures import add_assessments, temp_db
+
+
+TIMESTAMPS = [
+    '2024-01-01 09:15:00',  # Monday
+    '2024-01-01 09:45:00',  # Monday
+    '2024-01-03 14:00:00',  # Wednesday
+    '2024-02-04 23:59:59',  # Sunday
+    '2024-03-09 00:00:00',  # Saturday
+]
+
+
+@contextmanager
+def timestamped_db():
+    """Temporary database with assessments at known times"""
+    with temp_db() as (db, patient_id):
+        epochs = [int(calendar.timegm(time.strptime(ts, '%Y-%m-%d %H:%M:%S'))) for ts in TIMESTAMPS]
+        add_assessments(db, patient_id, epochs)
+        yield db
+
+
+def test_heatmap_matches_pandas():
+    """SQL weekday x hour buckets equal the old pandas pivot"""
+    print("Testing activity heatmap buckets...")
+    with timestamped_db() as db:
+        times = pd.to_datetime(pd.Series(TIMESTAMPS))
+        day_order = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+        expected = pd.DataFrame({'day_of_week': times.dt.day_name(), 'hour': times.dt.hour})
+        expected = expected.groupby(['day_of_week', 'hour']).size().unstack(fill_value=0).reindex(day_order)
+
+        heatmap = db.get_activity_heatmap()
+        assert list(heatmap.index) == day_order
+        assert list(heatmap.columns) == [0, 9, 14, 23]
+        assert heatmap.loc['Monday', 9] == 2
+        pd.testing.assert_frame_equal(heatmap, expected, check_names=False, check_dtype=False, check_column_type=False)
+        print("SUCCESS: Heatmap buckets match")
+
+
+def test_monthly_counts():
+    """Monthly buckets come back as a small 'YYYY-MM' series"""
+    print("\nTesting monthly buckets...")
+    with timestamped_db() as db:
+        monthly = db.get_monthly_assessment_counts()
+    assert monthly.to_dict() == {'2024-01': 3, '2024-02': 1, '2024-03': 1}
+    print("SUCCESS: Monthly counts match")
+
+
+def test_empty_database():
+    """No assessments gives empty aggregates"""
+    print("\nTesting empty database...")
+    with temp_db() as (db, _):
+        assert db.get_activity_heatmap().columns.empty
+        assert db.get_monthly_assessment_counts().empty
+        print("SUCCESS: Empty aggregates")
+
+
+def main():
+    """Run all tests"""
+    print("Testing Time Buckets...\n")
+
+    tests = [
+        test_heatmap_matches_pandas,
+        test_monthly_counts,
+        test_empty_database,
+    ]
+
+    for test in tests:
+        test()
+
+    print(f"\nTest Results: {len(tests)}/{len(tests)} tests passed")
+    return True
+
+
+if __name__ == "__main__":
+    success = main()
+    exit(0 if success else 1)
@@ -0,0 +1,85 @@
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+from charts import data_version
+
+
+SUMMARY_COLUMNS = ['patient_id', 'name', 'age', 'gender', 'created_at', 'risk_level', 'critical_flag', 'assessment_type']
+SUMMARY_CACHE_SIZE = 4
+
+_summary_cache = OrderedDict()
+_summary_cache_lock = threading.Lock()
+
+
+def summarize_patients(assessments):
+    """One row per patient with their latest assessment details.
+
+    Columns: patient_id, name, age, gender, created_at (latest), risk_level
+    (from the latest assessment), critical_flag (ever critical) and
+    assessment_type (number of assessments). The latest row per patient is
+    found with a numeric groupby idxmax over created_epoch (or the parsed
+    created_at) instead of a Python call per group; ties keep the first row
+    in query order.
+    """
+    if assessments.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+
+    if 'created_epoch' in assessments.columns:
+        # Integer epoch column - no timestamp parsing needed
+        recency = assessments['created_epoch'].fillna(-1).astype('int64')
+    else:
+        timestamps = pd.to_datetime(assessments['created_at'], format='ISO8601', errors='coerce')
+        # NaT becomes the smallest int64, so unparseable dates never win
+        recency = pd.Series(timestamps.values.astype('int64'), index=assessments.index)
+    latest_rows = recency.groupby(assessments['patient_id'], sort=True).idxmax()
+
+    summary = assessments.loc[latest_rows.values, ['patient_id', 'name', 'age', 'gender', 'created_at', 'risk_level']]
+    totals = assessments.groupby('patient_id', sort=False).agg(
+        critical_flag=('critical_flag', 'max'),
+        assessment_type=('assessment_type', 'count')
+    )
+    summary = summary.join(totals, on='patient_id')
+    return summary[SUMMARY_COLUMNS].reset_index(drop=True)
+
+
+def summary_version(assessments):
+    """Cheap data version for the patient summary.
+
+    Assessment rows are never updated in place, so their ids stand in for
+    risk level, flag and date; patient details can change and are hashed
+    once per patient.
+    """
+    if 'id' not in assessments.columns:
+        return data_version(assessments)
+    patients = assessments.drop_duplicates('patient_id')[['patient_id', 'name', 'age', 'gender']]
+    return data_version(assessments[['id', 'patient_id']], patients)
+
+
+def get_patient_summary(assessments):
+    """summarize_patients() cached per data version.
+
+    Reruns that only change the search box or filters reuse the summary.
+    The returned frame is shared between sessions - filter it, don't modify it.
+    """
+    key = summary_version(assessments)
+
+    with _summary_cache_lock:
+        if key in _summary_cache:
+            _summary_cache.move_to_end(key)
+            return _summary_cache[key]
+
+    summary = summarize_patients(assessments)
+
+    with _summary_cache_lock:
+        _summary_cache[key] = summary
+        _summary_cache.move_to_end(key)
+        while len(_summary_cache) > SUMMARY_CACHE_SIZE:
+            _summary_cache.popitem(last=False)
+    return summary
+
+
+def clear_summary_cache():
+    with _summary_cache_lock:
+        _summary_cache.clear()
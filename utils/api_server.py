@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+HTTP API for partner kiosks: eye photo validation and inference, hearing
+prediction and tests, saving assessments and reading a patient's history.
+
+Usage: MEDICAL_API_KEY=<key> python utils/api_server.py [port] [host]
+
+Every request except GET /health needs the key in an X-API-Key header.
+Photos are sent as the raw request body (Content-Type image/*) or as the
+"image" field of a multipart form.
+"""
+
+import asyncio
+import functools
+import hmac
+import io
+import json
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from aiohttp import web
+
+import core
+from repository import get_repository
+from storage import SQLITE_POOL_SIZE
+
+
+API_HOST = os.environ.get("MEDICAL_API_HOST", "127.0.0.1")
+API_PORT = int(os.environ.get("MEDICAL_API_PORT", "8080"))
+API_KEY_ENV = "MEDICAL_API_KEY"
+API_KEY_HEADER = "X-API-Key"
+MAX_UPLOAD_BYTES = 10 * 1024 * 1024
+UPLOAD_CHUNK_BYTES = 64 * 1024
+CPU_WORKERS = os.cpu_count() or 2
+DB_WORKERS = SQLITE_POOL_SIZE
+QUEUE_FACTOR = 4  # requests admitted per worker before answering 503
+RETRY_AFTER_SECONDS = 1
+DEFAULT_HISTORY_LIMIT = 50
+MAX_HISTORY_LIMIT = 500
+
+REPOSITORY = web.AppKey("repository", object)
+API_KEY = web.AppKey("api_key", str)
+CPU_POOL = web.AppKey("cpu_pool", object)
+DB_POOL = web.AppKey("db_pool", object)
+UPLOAD_LIMIT = web.AppKey("upload_limit", int)
+
+
+class WorkPool:
+    """Thread pool with an admission limit.
+
+    Detection, inference and SQLite all release the GIL in their native
+    code, so threads keep the event loop free without pickling images to
+    other processes. At most `max_pending` requests hold a slot at once;
+    beyond that requests get 503 + Retry-After instead of queueing without
+    bound. Upload handlers take their slot before reading the body, so a
+    rejected request never buffers its photo.
+    """
+
+    def __init__(self, name, workers, max_pending=None):
+        self.name = name
+        self.max_pending = max_pending or workers * QUEUE_FACTOR
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix=f"api-{name}")
+        self.pending = 0
+        self.stats = {"completed": 0, "failed": 0, "rejected": 0}
+
+    @contextmanager
+    def slot(self):
+        """Admit one request for the duration of the block, or raise 503"""
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise web.HTTPServiceUnavailable(
+                reason=f"{self.name} workers busy",
+                headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+            )
+        self.pending += 1
+        try:
+            yield
+        finally:
+            self.pending -= 1
+
+    async def execute(self, fn, *args, **kwargs):
+        """Run `fn` on a worker thread; the caller already holds a slot()"""
+        loop = asyncio.get_running_loop()
+        try:
+            result = await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        self.stats["completed"] += 1
+        return result
+
+    async def run(self, fn, *args, **kwargs):
+        """execute() within a slot of its own"""
+        with self.slot():
+            return await self.execute(fn, *args, **kwargs)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def json_error(status, message, headers=None):
+    return web.json_response({"error": message}, status=status, headers=headers)
+
+
+@web.middleware
+async def error_middleware(request, handler):
+    """Every error leaves as {"error": ...} JSON"""
+    try:
+        return await handler(request)
+    except web.HTTPException as e:
+        if e.status < 400:
+            raise
+        headers = {k: v for k, v in e.headers.items() if k == "Retry-After"}
+        return json_error(e.status, e.reason, headers)
+    except Exception as e:
+        print(f"API error on {request.method} {request.path}: {e}")
+        return json_error(500, "Internal server error")
+
+
+@web.middleware
+async def auth_middleware(request, handler):
+    if request.path != "/health":
+        key = request.headers.get(API_KEY_HEADER, "")
+        if not hmac.compare_digest(key.encode(), request.app[API_KEY].encode()):
+            raise web.HTTPUnauthorized(reason="Missing or invalid API key")
+    return await handler(request)
+
+
+async def read_upload(request):
+    """The photo as BytesIO, streamed in chunks and capped at the upload limit"""
+    limit = request.app[UPLOAD_LIMIT]
+    if request.content_length is not None and request.content_length > limit:
+        raise web.HTTPRequestEntityTooLarge(max_size=limit, actual_size=request.content_length,
+                                            reason=f"Image larger than {limit} bytes")
+
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        while True:
+            part = await reader.next()
+            if part is None:
+                raise web.HTTPBadRequest(reason='Multipart upload has no "image" field')
+            if part.name == "image":
+                break
+        read_chunk = functools.partial(part.read_chunk, UPLOAD_CHUNK_BYTES)
+    else:
+        read_chunk = functools.partial(request.content.readany)
+
+    buffer = io.BytesIO()
+    while True:
+        chunk = await read_chunk()
+        if not chunk:
+            break
+        if buffer.tell() + len(chunk) > limit:
+            raise web.HTTPRequestEntityTooLarge(max_size=limit, actual_size=buffer.tell() + len(chunk),
+                                                reason=f"Image larger than {limit} bytes")
+        buffer.write(chunk)
+    if not buffer.tell():
+        raise web.HTTPBadRequest(reason="Empty image upload")
+    buffer.seek(0)
+    return buffer
+
+
+async def read_json(request):
+    try:
+        body = await request.json()
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise web.HTTPBadRequest(reason="Request body must be JSON")
+    if not isinstance(body, dict):
+        raise web.HTTPBadRequest(reason="Request body must be a JSON object")
+    return body
+
+
+def number_field(body, name, required=True, default=None):
+    value = body.get(name, default)
+    if value is None and not required:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise web.HTTPBadRequest(reason=f'"{name}" must be a number')
+    return value
+
+
+def int_param(value, name, default=None, minimum=None, maximum=None):
+    if value is None or value == "":
+        return default
+    try:
+        value = int(value)
+    except ValueError:
+        raise web.HTTPBadRequest(reason=f'"{name}" must be an integer')
+    if minimum is not None and value < minimum:
+        raise web.HTTPBadRequest(reason=f'"{name}" must be at least {minimum}')
+    return min(value, maximum) if maximum else value
+
+
+async def require_patient(request, patient_id):
+    patient = await request.app[DB_POOL].run(request.app[REPOSITORY].get_patient, patient_id)
+    if patient is None:
+        raise web.HTTPNotFound(reason=f"Patient {patient_id} not found")
+
+
+async def saved_assessment(request, save, *args):
+    """Run a core save_* helper on the DB pool; returns the new assessment id"""
+    assessment_id = await request.app[DB_POOL].run(save, *args, repository=request.app[REPOSITORY])
+    if assessment_id is None:
+        raise web.HTTPInternalServerError(reason="Assessment could not be saved")
+    return int(assessment_id)
+
+
+# ============ HANDLERS ============
+
+
+async def health(request):
+    return web.json_response({
+        "status": "ok",
+        "pools": {pool.name: {"pending": pool.pending, **pool.stats}
+                  for pool in (request.app[CPU_POOL], request.app[DB_POOL])},
+        "result_cache": core.result_cache_stats(),
+    })
+
+
+async def validate_eye_image(request):
+    """POST /v1/eye/validate - face/eye detection only"""
+    cpu_pool = request.app[CPU_POOL]
+    with cpu_pool.slot():
+        image = await read_upload(request)
+        is_valid, error_type, message, details, _ = await cpu_pool.execute(
+            core.validate_and_draw_boxes, image, annotate=False)
+    if error_type == "invalid_image":
+        raise web.HTTPBadRequest(reason=message)
+    return web.json_response({"valid": is_valid, "error_type": error_type, "message": message,
+                              "validation_details": details})
+
+
+async def analyze_eye_image(request):
+    """POST /v1/eye/analyze[?patient_id=] - validation, eye crop and eye model; saved when patient_id is given"""
+    patient_id = int_param(request.query.get("patient_id"), "patient_id", minimum=1)
+    if patient_id is not None:
+        await require_patient(request, patient_id)
+    cpu_pool = request.app[CPU_POOL]
+    with cpu_pool.slot():
+        image = await read_upload(request)
+        result = await cpu_pool.execute(core.assess_eye_image, image)
+    if result["error_type"] == "invalid_image":
+        raise web.HTTPBadRequest(reason=result["message"])
+    if not result["valid"]:
+        return web.json_response(result, status=422)
+
+    if patient_id is not None:
+        result["assessment_id"] = await saved_assessment(
+            request, core.save_assessment, patient_id, "Eye Disease Assessment",
+            result["predictions"], result["risk_level"], None, result["critical"],
+        )
+    return web.json_response(result)
+
+
+async def predict_hearing(request):
+    """POST /v1/hearing/predict {age, physical_score}"""
+    body = await read_json(request)
+    age = number_field(body, "age")
+    physical_score = number_field(body, "physical_score")
+    result = await request.app[CPU_POOL].run(core.predict_hearing_loss, age, physical_score)
+    return web.json_response(result)
+
+
+async def hearing_test(request):
+    """POST /v1/hearing/test {left_threshold_db, right_threshold_db[, test_frequency, patient_id]}"""
+    body = await read_json(request)
+    frequency = number_field(body, "test_frequency", default=core.hearing.TEST_FREQUENCY)
+    left = number_field(body, "left_threshold_db", required=False)
+    right = number_field(body, "right_threshold_db", required=False)
+    if left is None and right is None:
+        raise web.HTTPBadRequest(reason="At least one of left_threshold_db, right_threshold_db is required")
+
+    left_results = core.ear_result(left, frequency) if left is not None else None
+    right_results = core.ear_result(right, frequency) if right is not None else None
+    left_score = core.analyze_single_ear_results(left_results)[0]
+    right_score = core.analyze_single_ear_results(right_results)[0]
+    overall_score, risk_level = core.overall_hearing_result(left_score, right_score)
+    results = core.hearing_test_results(left_results, right_results, overall_score)
+    response = {"risk_level": risk_level, "results": results}
+
+    patient_id = body.get("patient_id")
+    if patient_id is not None:
+        patient_id = int_param(str(patient_id), "patient_id", minimum=1)
+        await require_patient(request, patient_id)
+        response["assessment_id"] = await saved_assessment(
+            request, core.save_hearing_test_results, patient_id, "Online Hearing Test", results, risk_level,
+        )
+    return web.json_response(response)
+
+
+async def save_assessment(request):
+    """POST /v1/assessments {patient_id, assessment_type, results, risk_level[, recommendations, critical_flag]}"""
+    body = await read_json(request)
+    missing = [f for f in ("patient_id", "assessment_type", "results", "risk_level") if body.get(f) is None]
+    if missing:
+        raise web.HTTPBadRequest(reason=f"Missing fields: {', '.join(missing)}")
+    patient_id = int_param(str(body["patient_id"]), "patient_id", minimum=1)
+    await require_patient(request, patient_id)
+
+    results = body["results"]
+    if not isinstance(results, (dict, str)):
+        results = json.dumps(results)
+    critical_flag = body.get("critical_flag")
+    assessment_id = await saved_assessment(
+        request, core.save_assessment, patient_id, str(body["assessment_type"]), results, str(body["risk_level"]),
+        body.get("recommendations"), None if critical_flag is None else bool(critical_flag),
+    )
+    return web.json_response({"assessment_id": assessment_id}, status=201)
+
+
+async def assessment_history(request):
+    """GET /v1/patients/{patient_id}/assessments[?limit=&since=] - newest first"""
+    patient_id = int_param(request.match_info["patient_id"], "patient_id", minimum=1)
+    limit = int_param(request.query.get("limit"), "limit", DEFAULT_HISTORY_LIMIT, minimum=1, maximum=MAX_HISTORY_LIMIT)
+    since = int_param(request.query.get("since"), "since", minimum=0)
+    await require_patient(request, patient_id)
+    df = await request.app[DB_POOL].run(request.app[REPOSITORY].get_patient_assessments, patient_id, since, limit)
+    return web.Response(text=df.to_json(orient="records"), content_type="application/json")
+
+
+# ============ APPLICATION ============
+
+
+def create_app(api_key, repository=None, cpu_workers=CPU_WORKERS, db_workers=DB_WORKERS,
+               max_pending_cpu=None, max_pending_db=None, max_upload_bytes=MAX_UPLOAD_BYTES):
+    """The aiohttp application; `repository` defaults to get_repository()"""
+    if not api_key:
+        raise ValueError(f"An API key is required (set {API_KEY_ENV})")
+
+    app = web.Application(middlewares=[error_middleware, auth_middleware])
+    app[API_KEY] = api_key
+    app[REPOSITORY] = repository or get_repository()
+    app[CPU_POOL] = WorkPool("cpu", cpu_workers, max_pending_cpu)
+    app[DB_POOL] = WorkPool("db", db_workers, max_pending_db)
+    app[UPLOAD_LIMIT] = max_upload_bytes
+
+    async def shutdown_pools(app):
+        app[CPU_POOL].shutdown()
+        app[DB_POOL].shutdown()
+
+    app.on_cleanup.append(shutdown_pools)
+    app.add_routes([
+        web.get("/health", health),
+        web.post("/v1/eye/validate", validate_eye_image),
+        web.post("/v1/eye/analyze", analyze_eye_image),
+        web.post("/v1/hearing/predict", predict_hearing),
+        web.post("/v1/hearing/test", hearing_test),
+        web.post("/v1/assessments", save_assessment),
+        web.get("/v1/patients/{patient_id}/assessments", assessment_history),
+    ])
+    return app
+
+
+def main():
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else API_PORT
+    host = sys.argv[2] if len(sys.argv) > 2 else API_HOST
+    api_key = os.environ.get(API_KEY_ENV)
+    if not api_key:
+        print(f"Set {API_KEY_ENV} to the key partner kiosks will send in {API_KEY_HEADER}")
+        return 1
+
+    print(f"Medical API on http://{host}:{port} ({CPU_WORKERS} cpu workers, {DB_WORKERS} db workers)")
+    web.run_app(create_app(api_key), host=host, port=port, print=None)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
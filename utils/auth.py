@@ -1,8 +1,17 @@
 import streamlit as st
 import sqlite3
 import hashlib
-import time
+import hmac
+import base64
+import json
 import os
+import threading
+import time
+from collections import OrderedDict
+
+from cache_bus import create_cache_epoch, get_epoch_watcher
+from db_pool import SQLitePool
+from key_file import read_or_create_key
 
 
 def init_session_state():
@@ -21,68 +30,436 @@ def init_session_state():
         st.session_state['admin_user'] = None
     if 'just_logged_in' not in st.session_state:
         st.session_state['just_logged_in'] = False
+    restore_session()
+
+
+USERS_DB_PATH = 'data/users.db'
+
+# Default staff accounts seeded on first start: username -> (email, password, role, full_name)
+DEFAULT_ACCOUNTS = {
+    "admin": ("admin@hospital.com", "admin123", "admin", "System Administrator"),
+    "doctor": ("doctor@hospital.com", "doctor123", "doctor", "Dr. Smith"),
+}
+
+# Cached credential rows are served only while users.db's cache epoch is
+# unchanged, so a password change or removed account made by any worker
+# process takes effect on the next login everywhere.
+CREDENTIAL_CACHE_SIZE = 1024
+
+_pool = None
+_pool_lock = threading.Lock()
+_store_ready = False
+_bootstrap_lock = threading.Lock()
+_credential_cache = OrderedDict()
+_credential_cache_lock = threading.Lock()
+
+# Signed session tokens let a page (or a reconnected browser) resolve the user
+# without reading the users table. The token rides in the ?session= query
+# parameter. Logouts (revoked_sessions) and per-user generations, bumped on a
+# password change, live in users.db so every worker process honours them; a
+# decoded token is re-checked only after one of those tables changed.
+SESSION_TOKEN_PARAM = 'session'
+SESSION_COOKIE_NAME = 'medical_session'
+SESSION_TOKEN_TTL = 12 * 60 * 60
+SESSION_CACHE_SIZE = 1024
+SESSION_SECRET_PATH = 'data/session_secret.key'
+
+_session_secret = None
+_session_secret_lock = threading.Lock()
+_session_cache = OrderedDict()  # token -> (claims, revocation epoch they were checked at)
+_session_cache_lock = threading.Lock()
+
+
+def get_users_pool():
+    """Process-wide connection pool for the users database"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = SQLitePool(USERS_DB_PATH)
+    return _pool
+
+
+def close_user_store():
+    """Close pooled connections and forget the bootstrap (e.g. after moving USERS_DB_PATH)"""
+    global _pool, _store_ready
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = None
+        _store_ready = False
+    clear_credential_cache()
 
 
 def create_user_table():
     """Create users table and default entries"""
     try:
-        os.makedirs('data', exist_ok=True)
-        conn = sqlite3.connect('data/users.db')
-        c = conn.cursor()
-        
-        create_table_sql = """
-        CREATE TABLE IF NOT EXISTS users (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            username TEXT UNIQUE NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            role TEXT DEFAULT 'patient',
-            full_name TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-        """
-        c.execute(create_table_sql)
-        
-        admin_pw = hash_password("admin123")
-        doctor_pw = hash_password("doctor123")
-        
-        c.execute('SELECT * FROM users WHERE username = ?', ("admin",))
-        if not c.fetchone():
-            c.execute('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)',
-                      ("admin", "admin@hospital.com", admin_pw, "admin", "System Administrator"))
-        
-        c.execute('SELECT * FROM users WHERE username = ?', ("doctor",))
-        if not c.fetchone():
-            c.execute('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)',
-                      ("doctor", "doctor@hospital.com", doctor_pw, "doctor", "Dr. Smith"))
-        
-        conn.commit()
-        conn.close()
+        with get_users_pool().connection() as conn:
+            c = conn.cursor()
+            
+            create_table_sql = """
+            CREATE TABLE IF NOT EXISTS users (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                username TEXT UNIQUE NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                role TEXT DEFAULT 'patient',
+                full_name TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            """
+            c.execute(create_table_sql)
+            
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS revoked_sessions (
+                token_hash TEXT PRIMARY KEY,
+                expires INTEGER NOT NULL
+            )
+            """)
+            c.execute("""
+            CREATE TABLE IF NOT EXISTS session_generations (
+                user_id INTEGER PRIMARY KEY,
+                generation INTEGER NOT NULL DEFAULT 0
+            )
+            """)
+            create_cache_epoch(c, tables=("users", "revoked_sessions", "session_generations"))
+            
+            # Only hash passwords for default accounts that are actually missing
+            placeholders = ", ".join("?" for _ in DEFAULT_ACCOUNTS)
+            c.execute(f'SELECT username FROM users WHERE username IN ({placeholders})',
+                      tuple(DEFAULT_ACCOUNTS))
+            existing = {row[0] for row in c.fetchall()}
+            
+            for username, (email, password, role, full_name) in DEFAULT_ACCOUNTS.items():
+                if username not in existing:
+                    c.execute('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)',
+                              (username, email, hash_password(password), role, full_name))
+        return True
     except Exception as e:
         st.error(f"Database initialization error: {e}")
         st.info("The app will continue with limited functionality.")
+        return False
+
+
+def ensure_user_store():
+    """Create and seed the users table once per process"""
+    global _store_ready
+    if not _store_ready:
+        with _bootstrap_lock:
+            if not _store_ready:
+                _store_ready = create_user_table()
+    return _store_ready
 
 
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 
+def _users_epoch():
+    """Changes whenever any process changes a user, revokes a token or bumps a generation"""
+    if not ensure_user_store():
+        raise RuntimeError("users database unavailable")
+    return get_epoch_watcher(USERS_DB_PATH).current()
+
+
+def clear_credential_cache(username=None):
+    """Drop cached credential rows (all, or one user's after an update)"""
+    with _credential_cache_lock:
+        if username is None:
+            _credential_cache.clear()
+        else:
+            _credential_cache.pop(username, None)
+
+
+def get_user_credentials(username, use_cache=True):
+    """Look up a user row by username via the UNIQUE(username) index.
+    
+    Returns (id, username, email, role, full_name, password_hash, created_at) or None.
+    Rows are cached per process until users.db changes (one PRAGMA per
+    cached lookup); unknown usernames are not cached.
+    """
+    epoch = _users_epoch()
+    with _credential_cache_lock:
+        cached = _credential_cache.get(username) if use_cache else None
+        if cached and cached[1] == epoch:
+            _credential_cache.move_to_end(username)
+            return cached[0]
+    
+    with get_users_pool().connection() as conn:
+        row = conn.execute('SELECT id, username, email, role, full_name, password, created_at FROM users WHERE username=?',
+                           (username,)).fetchone()
+    
+    if row:
+        with _credential_cache_lock:
+            _credential_cache[username] = (row, epoch)
+            _credential_cache.move_to_end(username)
+            while len(_credential_cache) > CREDENTIAL_CACHE_SIZE:
+                _credential_cache.popitem(last=False)
+    return row
+
+
+def _get_session_secret():
+    """HMAC key from MEDICAL_APP_SECRET, else the per-host key in SESSION_SECRET_PATH (0600, created on first use)"""
+    global _session_secret
+    if _session_secret is None:
+        with _session_secret_lock:
+            if _session_secret is None:
+                env_secret = os.environ.get('MEDICAL_APP_SECRET')
+                if env_secret:
+                    _session_secret = env_secret.encode()
+                else:
+                    _session_secret = read_or_create_key(SESSION_SECRET_PATH)
+    return _session_secret
+
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode()
+
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+
+def _sign(payload):
+    return _b64encode(hmac.new(_get_session_secret(), payload.encode(), hashlib.sha256).digest())
+
+
+def _token_hash(token):
+    """Revoked tokens are stored hashed, so the table never holds usable tokens"""
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def get_session_generation(user_id):
+    """Current token generation of a user; tokens from older generations are invalid"""
+    with get_users_pool().connection() as conn:
+        row = conn.execute('SELECT generation FROM session_generations WHERE user_id=?', (user_id,)).fetchone()
+    return row[0] if row else 0
+
+
+def end_user_sessions(user_id):
+    """Invalidate every token issued to a user so far, in all processes (e.g. password change)"""
+    ensure_user_store()
+    with get_users_pool().connection() as conn:
+        conn.execute('''
+            INSERT INTO session_generations (user_id, generation) VALUES (?, 1)
+            ON CONFLICT(user_id) DO UPDATE SET generation = generation + 1
+        ''', (user_id,))
+
+
+def issue_session_token(user, ttl=None):
+    """Return a signed token carrying the user record, its generation and an expiry time"""
+    ensure_user_store()
+    expires = int(time.time() + (SESSION_TOKEN_TTL if ttl is None else ttl))
+    claims = {
+        "id": user["id"],
+        "username": user["username"],
+        "email": user.get("email"),
+        "role": user["role"],
+        "full_name": user.get("full_name"),
+        "created_at": user.get("created_at"),
+        "gen": get_session_generation(user["id"]),
+        "exp": expires
+    }
+    payload = _b64encode(json.dumps(claims, separators=(',', ':')).encode())
+    return f"{payload}.{_sign(payload)}"
+
+
+def _cache_session(token, claims, epoch):
+    with _session_cache_lock:
+        _session_cache[token] = (claims, epoch)
+        _session_cache.move_to_end(token)
+        while len(_session_cache) > SESSION_CACHE_SIZE:
+            _session_cache.popitem(last=False)
+
+
+def _verified_claims(token):
+    """Claims of a correctly signed token (expired or not), else None"""
+    try:
+        payload, signature = token.split('.', 1)
+        if not hmac.compare_digest(signature, _sign(payload)):
+            return None
+        return json.loads(_b64decode(payload))
+    except (ValueError, TypeError):
+        return None
+
+
+def _session_is_current(token, claims):
+    """Not logged out, and issued in the user's current generation"""
+    with get_users_pool().connection() as conn:
+        revoked, generation = conn.execute('''
+            SELECT EXISTS (SELECT 1 FROM revoked_sessions WHERE token_hash = ?),
+                   COALESCE((SELECT generation FROM session_generations WHERE user_id = ?), 0)
+        ''', (_token_hash(token), claims["id"])).fetchone()
+    return not revoked and claims.get("gen", 0) == generation
+
+
+def decode_session_token(token):
+    """Return the user record for a valid, unexpired, unrevoked token, else None.
+    
+    Decoded records are cached per process: repeat lookups skip the HMAC
+    check and JSON parse, and only re-check revocation after some process
+    changed users.db - a logout, a new generation, a user update (one
+    PRAGMA otherwise).
+    If users.db can't be read, no token is accepted.
+    """
+    if not token:
+        return None
+    now = time.time()
+    try:
+        epoch = _users_epoch()
+    except Exception as e:
+        print(f"Cannot check session revocation: {e}")
+        return None
+    
+    with _session_cache_lock:
+        claims, checked = _session_cache.get(token, (None, None))
+        if claims is not None:
+            if claims["exp"] <= now:
+                del _session_cache[token]
+                return None
+            if checked == epoch:
+                _session_cache.move_to_end(token)
+                return claims
+    
+    if claims is None:
+        claims = _verified_claims(token)
+        if claims is None or claims.get("exp", 0) <= now:
+            return None
+    
+    try:
+        current = _session_is_current(token, claims)
+    except Exception as e:
+        print(f"Cannot check session revocation: {e}")
+        return None
+    if not current:
+        with _session_cache_lock:
+            _session_cache.pop(token, None)
+        return None
+    _cache_session(token, claims, epoch)
+    return claims
+
+
+def revoke_session_token(token):
+    """Invalidate a token in every process (logout)"""
+    claims = _verified_claims(token) if token else None
+    if claims is None:
+        return  # not a token we issued - nothing to revoke
+    now = int(time.time())
+    ensure_user_store()
+    with get_users_pool().connection() as conn:
+        # Forget revocations once the token would have expired anyway
+        conn.execute('DELETE FROM revoked_sessions WHERE expires <= ?', (now,))
+        if claims.get("exp", 0) > now:
+            conn.execute('INSERT OR REPLACE INTO revoked_sessions (token_hash, expires) VALUES (?, ?)',
+                         (_token_hash(token), claims["exp"]))
+    with _session_cache_lock:
+        _session_cache.pop(token, None)
+
+
+def _incoming_session_token():
+    """Token from the query string, or from a cookie set in front of the app"""
+    token = st.query_params.get(SESSION_TOKEN_PARAM)
+    if token:
+        return token
+    try:
+        return st.context.cookies.get(SESSION_COOKIE_NAME)
+    except Exception:
+        return None
+
+
+def start_session(user):
+    """Populate session state for a logged-in user and attach a session token"""
+    st.session_state['authenticated'] = True
+    st.session_state['username'] = user['username']
+    st.session_state['user_role'] = user['role']
+    st.session_state['user_id'] = user['id']
+    if user['role'] in ('admin', 'doctor'):
+        st.session_state['admin_authenticated'] = True
+        st.session_state['admin_user'] = user
+    token = issue_session_token(user)
+    st.session_state['session_token'] = token
+    st.query_params[SESSION_TOKEN_PARAM] = token
+
+
+def restore_session():
+    """Rebuild identity from the session token without touching users.db.
+    
+    Called on every page load via init_session_state(). A fresh browser
+    session (e.g. after a reconnect) is logged back in from the token, and
+    the token is put back on the URL after st.switch_page() drops it.
+    """
+    try:
+        if st.session_state.get('authenticated'):
+            token = st.session_state.get('session_token')
+            if token and st.query_params.get(SESSION_TOKEN_PARAM) != token:
+                st.query_params[SESSION_TOKEN_PARAM] = token
+            return
+        
+        token = _incoming_session_token()
+        user = decode_session_token(token)
+        if user is None:
+            if token and SESSION_TOKEN_PARAM in st.query_params:
+                del st.query_params[SESSION_TOKEN_PARAM]
+            return
+        
+        user = {key: value for key, value in user.items() if key not in ("exp", "gen")}
+        st.session_state['authenticated'] = True
+        st.session_state['username'] = user['username']
+        st.session_state['user_role'] = user['role']
+        st.session_state['user_id'] = user['id']
+        if user['role'] in ('admin', 'doctor'):
+            st.session_state['admin_authenticated'] = True
+            st.session_state['admin_user'] = user
+        st.session_state['session_token'] = token
+    except Exception:
+        # Query params/context are unavailable outside a script run
+        pass
+
+
+def get_session_user():
+    """Decoded user record for the current session, or None"""
+    return decode_session_token(st.session_state.get('session_token'))
+
+
+def refresh_session(end_other_sessions=False, **changes):
+    """Re-issue the session token after the user's own record changed.
+    
+    With `end_other_sessions` (password change) every other token of the
+    user - other browsers and devices - stops working as well.
+    """
+    user = get_session_user()
+    if user is None:
+        return
+    revoke_session_token(st.session_state.get('session_token'))
+    if end_other_sessions:
+        end_user_sessions(user["id"])
+    user = {key: value for key, value in user.items() if key not in ("exp", "gen")}
+    user.update(changes)
+    start_session(user)
+
+
+def end_session():
+    """Revoke the current session token and remove it from the URL"""
+    revoke_session_token(st.session_state.get('session_token'))
+    try:
+        if SESSION_TOKEN_PARAM in st.query_params:
+            del st.query_params[SESSION_TOKEN_PARAM]
+    except Exception:
+        pass
+
+
 def verify_user(username, password):
     try:
-        conn = sqlite3.connect('data/users.db')
-        c = conn.cursor()
         pw_hash = hash_password(password)
-        c.execute('SELECT id, username, email, role, full_name FROM users WHERE username=? AND password=?',
-                  (username, pw_hash))
-        user = c.fetchone()
-        conn.close()
-        if user:
+        user = get_user_credentials(username)
+        if user and hmac.compare_digest(user[5], pw_hash):
             return {
                 "id": user[0],
                 "username": user[1],
                 "email": user[2],
                 "role": user[3],
-                "full_name": user[4]
+                "full_name": user[4],
+                "created_at": user[6]
             }
         return None
     except Exception as e:
@@ -92,13 +469,10 @@ def verify_user(username, password):
 
 def create_user(username, email, password, role="patient", full_name=""):
     try:
-        conn = sqlite3.connect('data/users.db')
-        c = conn.cursor()
         pw_hash = hash_password(password)
-        c.execute('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)',
-                  (username, email, pw_hash, role, full_name))
-        conn.commit()
-        conn.close()
+        with get_users_pool().connection() as conn:
+            conn.execute('INSERT INTO users (username, email, password, role, full_name) VALUES (?, ?, ?, ?, ?)',
+                         (username, email, pw_hash, role, full_name))
         return True
     except sqlite3.IntegrityError:
         return False
@@ -130,13 +504,7 @@ def login_flow(admin_only=False):
         if submitted:
             success, user = authenticate_user(username, password, admin_only)
             if success:
-                st.session_state['authenticated'] = True
-                st.session_state['username'] = username
-                st.session_state['user_role'] = user['role']
-                st.session_state['user_id'] = user['id']
-                if user['role'] in ('admin', 'doctor'):
-                    st.session_state['admin_authenticated'] = True
-                    st.session_state['admin_user'] = user
+                start_session(user)
                 st.session_state['just_logged_in'] = True
                 st.success(f"Welcome {user['full_name']}")
                 
@@ -161,7 +529,7 @@ def patient_login():
 
 
 def show_login_signup():
-    create_user_table()
+    ensure_user_store()
     st.title("Medical Assessment Platform")
     st.markdown("---")
     
@@ -207,11 +575,14 @@ def show_user_profile():
     username = st.session_state.get('username')
     
     try:
-        conn = sqlite3.connect('data/users.db')
-        c = conn.cursor()
-        c.execute('SELECT username, email, full_name, role, created_at FROM users WHERE id=?', (user_id,))
-        user = c.fetchone()
-        conn.close()
+        session_user = get_session_user()
+        if session_user and session_user["id"] == user_id:
+            user = (session_user["username"], session_user["email"], session_user["full_name"],
+                    session_user["role"], session_user["created_at"])
+        else:
+            with get_users_pool().connection() as conn:
+                user = conn.execute('SELECT username, email, full_name, role, created_at FROM users WHERE id=?',
+                                    (user_id,)).fetchone()
         
         if user:
             st.info(f"**Role:** {user[3].title()}")
@@ -234,12 +605,11 @@ def show_user_profile():
                     
                     if new_name != user[2] or new_email != user[1]:
                         try:
-                            conn = sqlite3.connect('data/users.db')
-                            c = conn.cursor()
-                            c.execute('UPDATE users SET full_name=?, email=? WHERE id=?', 
-                                     (new_name, new_email, user_id))
-                            conn.commit()
-                            conn.close()
+                            with get_users_pool().connection() as conn:
+                                conn.execute('UPDATE users SET full_name=?, email=? WHERE id=?', 
+                                             (new_name, new_email, user_id))
+                            clear_credential_cache(user[0])
+                            refresh_session(full_name=new_name, email=new_email)
                             updated = True
                         except sqlite3.IntegrityError:
                             st.error("Email already registered to another account.")
@@ -257,12 +627,14 @@ def show_user_profile():
                             return
                         if verify_user(username, current_pw):
                             try:
-                                conn = sqlite3.connect('data/users.db')
-                                c = conn.cursor()
-                                c.execute('UPDATE users SET password=? WHERE id=?', 
-                                         (hash_password(new_pw), user_id))
-                                conn.commit()
-                                conn.close()
+                                with get_users_pool().connection() as conn:
+                                    conn.execute('UPDATE users SET password=? WHERE id=?', 
+                                                 (hash_password(new_pw), user_id))
+                                clear_credential_cache(user[0])
+                                if get_session_user():
+                                    refresh_session(end_other_sessions=True)
+                                else:
+                                    end_user_sessions(user_id)
                                 updated = True
                             except Exception as e:
                                 st.error(f"Failed to update password: {e}")
@@ -300,9 +672,11 @@ def get_current_user():
 
 def logout():
     """Log out current user"""
+    end_session()
     keys_to_clear = {
         'authenticated', 'username', 'user_role', 
-        'admin_authenticated', 'user_id', 'admin_user', 'just_logged_in'
+        'admin_authenticated', 'user_id', 'admin_user', 'just_logged_in',
+        'session_token'
     }
     
     for key in list(st.session_state.keys()):
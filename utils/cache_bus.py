@@ -0,0 +1,134 @@
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import pandas as pd
+
+
+# Cross-process invalidation for cached database reads. Triggers on patients
+# and assessments bump the single row of the cache_epoch table on every
+# write, from any process. Each process keeps one connection per database
+# and only re-reads the epoch when PRAGMA data_version says another
+# connection committed, so checking before serving a cached read costs one
+# pragma call.
+
+READ_CACHE_SIZE = 64
+READ_CACHE_TTL = 10 * 60
+
+CACHE_EPOCH_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS cache_epoch (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        epoch INTEGER NOT NULL DEFAULT 0
+    )
+'''
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+_read_cache = OrderedDict()
+_read_cache_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def create_cache_epoch(cursor, tables=("patients", "assessments")):
+    """Create the cache_epoch row and the triggers that bump it"""
+    cursor.execute(CACHE_EPOCH_SCHEMA)
+    cursor.execute("INSERT OR IGNORE INTO cache_epoch (id, epoch) VALUES (1, 0)")
+    for table in tables:
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_cache_epoch
+                AFTER {event} ON {table}
+                BEGIN
+                    UPDATE cache_epoch SET epoch = epoch + 1 WHERE id = 1;
+                END
+            ''')
+
+
+class EpochWatcher:
+    """Current cache epoch of one database, re-read only after other commits"""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._version = None
+        self._epoch = None
+
+    def current(self):
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version != self._version:
+                self._epoch = self._conn.execute("SELECT epoch FROM cache_epoch WHERE id = 1").fetchone()[0]
+                self._version = version
+            return self._epoch
+
+
+def get_epoch_watcher(db_path):
+    """The process-wide epoch watcher for `db_path`"""
+    with _watchers_lock:
+        watcher = _watchers.get(db_path)
+        if watcher is None:
+            watcher = _watchers[db_path] = EpochWatcher(db_path)
+        return watcher
+
+
+def _copy(value):
+    """Callers get their own copy, so mutating a result never edits the cache"""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+def _is_empty(value):
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.empty
+    return not value
+
+
+def cached_read(db_path, key, load):
+    """Serve load() from the per-process cache while the database epoch is unchanged.
+
+    Entries also expire after READ_CACHE_TTL seconds, for reads that depend
+    on the clock (e.g. "last 7 days"). Empty results are not cached - they
+    are cheap to recompute and are also what a failed read returns.
+    """
+    if not READ_CACHE_SIZE:
+        return load()
+
+    epoch = get_epoch_watcher(db_path).current()
+    cache_key = (db_path, key)
+    now = time.monotonic()
+
+    with _read_cache_lock:
+        entry = _read_cache.get(cache_key)
+        if entry is not None and entry[0] == epoch and now - entry[1] < READ_CACHE_TTL:
+            _read_cache.move_to_end(cache_key)
+            _stats["hits"] += 1
+            return _copy(entry[2])
+        _stats["misses"] += 1
+
+    value = load()
+    if _is_empty(value):
+        return value
+
+    with _read_cache_lock:
+        _read_cache[cache_key] = (epoch, now, value)
+        _read_cache.move_to_end(cache_key)
+        while len(_read_cache) > READ_CACHE_SIZE:
+            _read_cache.popitem(last=False)
+    return _copy(value)
+
+
+def read_cache_stats():
+    """Hit/miss counters and current size of this process's read cache"""
+    with _read_cache_lock:
+        return dict(_stats, size=len(_read_cache))
+
+
+def clear_read_cache():
+    with _read_cache_lock:
+        _read_cache.clear()
+        _stats.update(hits=0, misses=0)
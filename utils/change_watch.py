@@ -0,0 +1,71 @@
+import sqlite3
+import threading
+
+import pandas as pd
+
+from database import DEFAULT_DB_PATH
+
+
+# Cheap change detection on the live database. PRAGMA data_version changes
+# whenever another connection commits, so a watcher that keeps one
+# connection open per process can tell "nothing new" from a single pragma
+# call and only queries assessments when something was written.
+
+CRITICAL_POLL_SECONDS = 5
+NEW_CRITICAL_QUERY = '''
+    SELECT a.*, p.name, p.age, p.gender, p.phone, p.email
+    FROM assessments a
+    JOIN patients p ON a.patient_id = p.id
+    WHERE a.id > ? AND a.id <= ? AND a.critical_flag = TRUE
+    ORDER BY a.id DESC
+'''
+
+_watchers = {}
+_watchers_lock = threading.Lock()
+
+
+class CriticalCaseWatcher:
+    """Polls one database for critical assessments newer than a given id"""
+
+    def __init__(self, db_path=DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._version = None
+        self._max_id = 0
+
+    def poll(self, after_id):
+        """New critical assessments with id > `after_id`, newest first.
+
+        Returns (rows, last_id); pass last_id back in as `after_id` on the
+        next poll. While data_version is unchanged and the caller has seen
+        the latest id, no table is read at all.
+        """
+        with self._lock:
+            version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._version and after_id >= self._max_id:
+                return pd.DataFrame(), after_id
+
+            self._version = version
+            self._max_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM assessments").fetchone()[0]
+            if self._max_id <= after_id:
+                return pd.DataFrame(), after_id
+
+            # Range scan on the rowid - only rows written since the last poll.
+            # Capped at the max id just read: a row committed in between is
+            # left for the next poll instead of being returned twice.
+            rows = pd.read_sql_query(NEW_CRITICAL_QUERY, self._conn, params=[after_id, self._max_id])
+            return rows, self._max_id
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+def get_critical_watcher(db_path=DEFAULT_DB_PATH):
+    """The process-wide watcher for `db_path`, shared by all sessions"""
+    with _watchers_lock:
+        watcher = _watchers.get(db_path)
+        if watcher is None:
+            watcher = _watchers[db_path] = CriticalCaseWatcher(db_path)
+        return watcher
@@ -0,0 +1,120 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+
+
+# ============ CHART RENDER CACHE ============
+
+
+class ChartCache:
+    """Thread-safe LRU cache of rendered chart bytes"""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Return cache size and hit/miss counters"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "bytes": sum(len(v) for v in self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+
+# Shared by every session in this process - charts only depend on their data
+chart_cache = ChartCache()
+
+
+def _update_digest(digest, part):
+    """Feed one aggregate into the running hash"""
+    if isinstance(part, (pd.Series, pd.DataFrame)):
+        if isinstance(part, pd.DataFrame):
+            digest.update(repr(list(part.columns)).encode())
+        digest.update(pd.util.hash_pandas_object(part, index=True).values.tobytes())
+    elif isinstance(part, np.ndarray):
+        digest.update(str(part.dtype).encode())
+        digest.update(np.ascontiguousarray(part).tobytes())
+    elif isinstance(part, dict):
+        for key in sorted(part, key=str):
+            digest.update(repr(key).encode())
+            _update_digest(digest, part[key])
+    elif isinstance(part, (list, tuple)):
+        digest.update(f"<{type(part).__name__}:{len(part)}>".encode())
+        for item in part:
+            _update_digest(digest, item)
+    else:
+        digest.update(repr(part).encode())
+
+
+def data_version(*parts):
+    """Stable content hash of the aggregates a chart is drawn from"""
+    digest = hashlib.sha1()
+    for part in parts:
+        _update_digest(digest, part)
+    return digest.hexdigest()
+
+
+def render_chart(name, data, draw, figsize=(10, 6), fmt="png", dpi=100, cache=None):
+    """Render a chart to image bytes, reusing the cached bytes while data is unchanged.
+
+    `draw(fig, ax, data)` does the plotting. The figure is created outside
+    pyplot so it is never registered as an open figure, and it is cleared
+    as soon as the bytes are written.
+    """
+    cache = chart_cache if cache is None else cache
+    key = (name, data_version(data), tuple(figsize), fmt, dpi)
+
+    cached = cache.get(key)
+    if cached is not None:
+        return cached
+
+    fig = Figure(figsize=figsize)
+    try:
+        ax = fig.subplots()
+        draw(fig, ax, data)
+        fig.tight_layout()
+        buffer = io.BytesIO()
+        fig.savefig(buffer, format=fmt, dpi=dpi)
+        image_bytes = buffer.getvalue()
+    finally:
+        fig.clear()
+
+    cache.put(key, image_bytes)
+    return image_bytes
@@ -0,0 +1,26 @@
+"""
+Headless core of the medical assessment platform: detection, inference,
+scoring and persistence, importable without Streamlit.
+
+The pages and utils/model_utils.py are thin UIs over this package; batch
+jobs, services and benchmarks import it directly:
+
+    sys.path.append("utils")
+    from core import validate_and_draw_boxes, predict_hearing_loss
+"""
+
+from .detection import (DETECTOR_VERSION, convert_to_grayscale, crop_eye_region, cv2_to_pil, detect_features, pil_to_cv2,
+                        validate_and_draw_boxes)
+from .hearing import (analyze_single_ear_results, ear_result, generate_hearing_level_tone, get_hearing_interpretation,
+                      hearing_test_results, overall_hearing_result)
+from .inference import (EYE_CLASSES, dummy_hearing_result, eye_model_version, load_eye_model, load_hearing_model,
+                        load_hearing_scaler, predict_eye_disease, predict_hearing_loss, preprocess_eye_image)
+from .persistence import (save_acuity_results, save_ai_detection_results, save_assessment,
+                          save_hearing_test_results)
+from .photo import Photo, as_photo
+from .pipeline import assess_eye_image
+from .quality import assess_image_quality, quality_message
+from .result_cache import cached_result, clear_result_cache, image_digest, result_cache_stats
+from .scoring import (analyze_eye_disease, analyze_hearing_symptoms, calculate_overall_health_score, eye_risk_level,
+                      generate_eye_recommendations, generate_health_recommendations, generate_hearing_recommendations,
+                      generate_recommendations, is_critical, score_acuity, score_ai_detection, score_hearing_test)
@@ -0,0 +1,261 @@
+"""Face/eye detection on captured photos with OpenCV Haar cascades"""
+
+import io
+import os
+from functools import lru_cache
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .photo import DETECTION_MAX_SIDE, Photo, as_photo, open_image  # noqa: F401 - open_image re-exported
+from .quality import assess_image_quality, quality_message
+from .result_cache import cached_result
+
+
+FACE_CASCADE = "haarcascade_frontalface_default.xml"
+EYE_CASCADE = "haarcascade_eye.xml"
+DETECTOR_VERSION = f"haar/{cv2.__version__}/1.1-5/{DETECTION_MAX_SIDE}"  # part of the result cache key
+
+# Box colours (RGB - annotation draws on Photo.display() copies)
+COLOR_RED = (255, 0, 0)
+COLOR_GREEN = (0, 255, 0)
+COLOR_BLUE = (0, 0, 255)
+COLOR_YELLOW = (255, 255, 0)
+
+
+@lru_cache(maxsize=None)
+def load_cascades():
+    """(face, eye) classifiers, loaded once per process; None if the files are missing"""
+    face_cascade_path = cv2.data.haarcascades + FACE_CASCADE
+    eye_cascade_path = cv2.data.haarcascades + EYE_CASCADE
+    if not os.path.exists(face_cascade_path) or not os.path.exists(eye_cascade_path):
+        return None
+    return cv2.CascadeClassifier(face_cascade_path), cv2.CascadeClassifier(eye_cascade_path)
+
+
+def pil_to_cv2(pil_image):
+    """Convert PIL Image to OpenCV (BGR) format"""
+    open_cv_image = np.array(pil_image.convert('RGB'))
+    return open_cv_image[:, :, ::-1].copy()
+
+
+def cv2_to_pil(cv2_image):
+    """Convert OpenCV (BGR) image to PIL (RGB) format"""
+    if not isinstance(cv2_image, np.ndarray):
+        raise TypeError("Input must be a NumPy array")
+    if cv2_image.ndim != 3 or cv2_image.shape[2] != 3:
+        raise ValueError("Input array must be in BGR format (3 channels)")
+    return Image.fromarray(cv2.cvtColor(cv2_image, cv2.COLOR_BGR2RGB))
+
+
+def detect_eyes(eye_cascade, roi_gray, face_width, face_height):
+    """Eye boxes inside a face region, relative to that region"""
+    return eye_cascade.detectMultiScale(roi_gray, 1.1, 5, minSize=(int(face_width * 0.1), int(face_height * 0.1)))
+
+
+def eye_crop_box(face, eyes):
+    """(crop box relative to the face, notice) for the region around both eyes.
+
+    The box pads the eyes' bounding box by 30% horizontally and 50%
+    vertically, clamped to the face. It is None, with a notice saying why,
+    when two usable eyes weren't found.
+    """
+    _, _, w, h = face
+    if len(eyes) < 2:
+        return None, f"Could not detect two eyes for cropping (found {len(eyes)}). Showing full face ROI instead."
+
+    min_ex = min(ex for ex, _, _, _ in eyes)
+    min_ey = min(ey for _, ey, _, _ in eyes)
+    max_ex = max(ex + ew for ex, _, ew, _ in eyes)
+    max_ey = max(ey + eh for _, ey, _, eh in eyes)
+    eye_width = max_ex - min_ex
+    eye_height = max_ey - min_ey
+    if eye_width <= 0 or eye_height <= 0:
+        return None, "Detected eye region has zero or negative dimensions. Falling back to face ROI."
+
+    padding_x = int(eye_width * 0.3)
+    padding_y = int(eye_height * 0.5)
+    crop_x1 = max(0, min_ex - padding_x)
+    crop_y1 = max(0, min_ey - padding_y)
+    crop_x2 = min(w, max_ex + padding_x)
+    crop_y2 = min(h, max_ey + padding_y)
+    if crop_y1 >= crop_y2 or crop_x1 >= crop_x2:
+        return None, "Calculated eye crop coordinates are invalid. Falling back to face ROI."
+    return [crop_x1, crop_y1, crop_x2, crop_y2], None
+
+
+def _scale_boxes(boxes, factor):
+    return [[int(round(v * factor)) for v in box] for box in boxes]
+
+
+def detect_features(photo):
+    """Face and eye boxes for a Photo, cached by the photo's content digest.
+
+    Detection runs on Photo.detection_view(); boxes are in full-photo
+    pixels. Returns {'faces': [[x, y, w, h], ...], 'face': the largest face
+    or None, 'eyes': eye boxes relative to that face, 'crop': eye crop box
+    relative to that face or None, 'crop_notice': why there is no crop}.
+    None if the Haar cascade files are missing.
+    """
+    cascades = load_cascades()
+    if cascades is None:
+        return None
+
+    def detect():
+        face_cascade, eye_cascade = cascades
+        gray, scale = photo.detection_view()
+        faces = [[int(v) for v in f] for f in face_cascade.detectMultiScale(gray, 1.1, 5, minSize=(30, 30))]
+        if not faces:
+            return {"faces": [], "face": None, "eyes": [], "crop": None, "crop_notice": None}
+
+        # With several faces, the largest is taken as the patient's
+        face = max(faces, key=lambda f: f[2] * f[3])
+        x, y, w, h = face
+        eyes = [[int(v) for v in e] for e in detect_eyes(eye_cascade, gray[y:y+h, x:x+w], w, h)]
+        crop, crop_notice = eye_crop_box(face, eyes)
+
+        factor = 1 / scale
+        face = _scale_boxes([face], factor)[0]
+        if crop is not None:
+            crop = [min(v, limit) for v, limit in zip(_scale_boxes([crop], factor)[0], (face[2], face[3]) * 2)]
+        return {"faces": _scale_boxes(faces, factor), "face": face, "eyes": _scale_boxes(eyes, factor),
+                "crop": crop, "crop_notice": crop_notice}
+
+    return cached_result(photo.digest, "detection", DETECTOR_VERSION, detect)
+
+
+def annotated_image(photo, boxes):
+    """PIL copy of the photo at display size with (box, colour) pairs drawn on it"""
+    canvas, scale = photo.display()
+    for (x, y, w, h), color in boxes:
+        x1, y1 = int(round(x * scale)), int(round(y * scale))
+        x2, y2 = int(round((x + w) * scale)), int(round((y + h) * scale))
+        cv2.rectangle(canvas, (x1, y1), (x2, y2), color, 2)
+    return Image.fromarray(canvas)
+
+
+def validate_and_draw_boxes(image_data, annotate=True):
+    """
+    Validates the image and draws boxes on it for visual feedback.
+    Returns: (is_valid, error_type, message, validation_details, annotated_pil_image)
+
+    image_data is a file-like object or a decoded Photo. error_type is None
+    when valid; 'invalid_image' and 'error' mean the photo couldn't be
+    checked at all, 'poor_quality' that it failed the quality checks run
+    before detection, the others describe what was detected.
+    validation_details['quality'] holds the quality metrics. The annotated
+    image is a display-size copy, or None when annotate is False.
+    """
+    photo = None
+    try:
+        try:
+            photo = as_photo(image_data)
+        except Exception as img_err:
+            return False, 'invalid_image', f"Invalid image file provided: {img_err}", {}, None
+
+        quality = assess_image_quality(photo.detection_view()[0], photo.size)
+        if quality["rejected"]:
+            return (False, 'poor_quality', quality_message(quality), {'quality': quality},
+                    annotated_image(photo, []) if annotate else None)
+
+        detection = detect_features(photo)
+        if detection is None:
+            return (False, 'error', "Haar cascade files not found. Cannot perform validation.", {'quality': quality},
+                    annotated_image(photo, []) if annotate else None)
+
+        faces = detection["faces"]
+        faces_detected = len(faces)
+        eyes_detected_total = 0
+        is_valid = False
+        boxes = []
+
+        if faces_detected == 0:
+            message = "No face detected. Please ensure your face is clearly visible and well-lit."
+            error_type = 'no_face'
+
+        elif faces_detected > 1:
+            message = f"Multiple faces detected ({faces_detected}). Please ensure only one person is in the frame."
+            error_type = 'multiple_faces'
+            boxes = [(face, COLOR_RED) for face in faces]
+
+        else:
+            (x, y, w, h) = detection["face"]
+            eyes = detection["eyes"]
+            eyes_detected_total = len(eyes)
+            boxes = [((x+ex, y+ey, ew, eh), COLOR_BLUE) for (ex, ey, ew, eh) in eyes]
+
+            if eyes_detected_total < 2:
+                message = f"Eyes not clearly detected ({eyes_detected_total} eye(s) found). Please ensure both eyes are open and visible."
+                error_type = 'no_eyes'
+                boxes.append((detection["face"], COLOR_RED))
+            else:
+                message = "Image validation successful"
+                error_type = None
+                is_valid = True
+                boxes.append((detection["face"], COLOR_GREEN))
+
+        validation_details = {
+            'faces_detected': faces_detected,
+            'eyes_detected': eyes_detected_total,
+            'quality': quality
+        }
+        return is_valid, error_type, message, validation_details, annotated_image(photo, boxes) if annotate else None
+
+    except Exception as e:
+        # Return the unannotated photo if drawing fails
+        try:
+            original_image = annotated_image(photo, []) if photo is not None and annotate else None
+        except Exception:
+            original_image = None
+        return False, 'error', f"Error processing image: {str(e)}", {}, original_image
+
+
+def crop_eye_region(image_data):
+    """Crops the image to the bounding box containing both detected eyes.
+
+    image_data is a file-like object or a decoded Photo. Returns (image,
+    notice): notice explains a fallback (face region, original image) or
+    why nothing could be cropped (image None); None on success.
+    """
+    photo = None
+    try:
+        try:
+            photo = as_photo(image_data)
+        except Exception as img_err:
+            return None, f"Invalid image file for cropping: {img_err}"
+
+        detection = detect_features(photo)
+        if detection is None:
+            return None, "Haar cascade files not found for cropping."
+        if detection["face"] is None:
+            return None, "No face detected for cropping eyes."
+
+        x, y, w, h = detection["face"]
+        if detection["crop"] is None:
+            return photo.to_pil(photo.crop((x, y, x+w, y+h))), detection["crop_notice"]
+
+        crop_x1, crop_y1, crop_x2, crop_y2 = detection["crop"]
+        eye_region = photo.crop((x+crop_x1, y+crop_y1, x+crop_x2, y+crop_y2))
+        if eye_region.size == 0:
+            return (photo.to_pil(photo.crop((x, y, x+w, y+h))),
+                    "Eye cropping resulted in an empty image. Falling back to face ROI.")
+        return photo.to_pil(eye_region), None
+
+    except Exception as e:
+        # Return the original image if cropping fails badly
+        if photo is not None:
+            return photo.to_pil(), f"Error during eye region cropping: {e}"
+        return None, f"Error during eye region cropping: {e}"
+
+
+def convert_to_grayscale(image_data):
+    """Converts an image (PIL, BytesIO or Photo) to grayscale PIL image."""
+    if isinstance(image_data, Photo):
+        return Image.fromarray(image_data.gray)
+    if isinstance(image_data, io.BytesIO):
+        image_data.seek(0)
+        image_data = Image.open(image_data)
+    elif not isinstance(image_data, Image.Image):
+        raise TypeError(f"Invalid data type for grayscale conversion: {type(image_data)}")
+    return image_data.convert('L')
@@ -0,0 +1,129 @@
+"""Pure-tone hearing test: tone synthesis and threshold classification"""
+
+import io
+from datetime import date
+
+import numpy as np
+import soundfile as sf
+
+
+SAMPLE_RATE = 44100
+TEST_FREQUENCY = 1000
+
+
+def get_hearing_interpretation(hearing_level):
+    """Get hearing interpretation based on dB HL level."""
+    if hearing_level <= 20:
+        return "Normal Hearing", "#4caf50"
+    elif hearing_level <= 40:
+        return "Mild Hearing Loss", "#ff9800"
+    elif hearing_level <= 70:
+        return "Moderate Hearing Loss", "#f44336"
+    elif hearing_level <= 90:
+        return "Severe Hearing Loss", "#d32f2f"
+    else:
+        return "Profound Hearing Loss", "#8e24aa"
+
+
+def analyze_single_ear_results(results):
+    """Analyze single ear test results and return score, status, and color."""
+    if not results:
+        return None, "Not Tested", "#999"
+
+    # Lower threshold = better hearing = higher score
+    threshold = results.get('hearing_threshold_db', 0)
+    status, color = get_hearing_interpretation(threshold)
+    return int(max(0, 100 - threshold)), status, color
+
+
+def ear_result(hearing_threshold_db, test_frequency=TEST_FREQUENCY):
+    """Stored result for one ear from its measured threshold"""
+    return {
+        'hearing_threshold_db': hearing_threshold_db,
+        'classification': get_hearing_interpretation(hearing_threshold_db)[0],
+        'test_frequency': test_frequency
+    }
+
+
+def overall_hearing_result(left_score, right_score):
+    """(overall_score, risk_level) from both ears' scores; 0 unless both were tested"""
+    overall_score = (left_score + right_score) // 2 if left_score is not None and right_score is not None else 0
+    if overall_score >= 80:
+        return overall_score, "Normal"
+    elif overall_score >= 60:
+        return overall_score, "Mild"
+    return overall_score, "Significant"
+
+
+def hearing_test_results(left_results, right_results, overall_score):
+    """Results record saved for an online hearing test"""
+    left_results = left_results or {}
+    right_results = right_results or {}
+    return {
+        "left_ear": left_results,
+        "right_ear": right_results,
+        "overall_score": overall_score,
+        "test_date": date.today().isoformat(),
+        "left_threshold": left_results.get('hearing_threshold_db', 'N/A'),
+        "right_threshold": right_results.get('hearing_threshold_db', 'N/A'),
+        "left_classification": left_results.get('classification', 'Not tested'),
+        "right_classification": right_results.get('classification', 'Not tested')
+    }
+
+
+def generate_hearing_level_tone(frequency, hearing_level_db, ear_side, duration=3.0):
+    """
+    Generate a tone at a specific hearing level (dB HL) for a specific ear.
+
+    Args:
+        frequency (int): Frequency in Hz
+        hearing_level_db (int): Hearing level in dB HL (0-100)
+        ear_side (str): 'left' or 'right'
+        duration (float): Duration in seconds
+
+    Returns:
+        BytesIO: WAV audio data or None if error
+    """
+    try:
+        t = np.linspace(0, duration, int(SAMPLE_RATE * duration), endpoint=False)
+
+        # Exponential mapping of 0-100 dB HL to 0-0.7 amplitude (avoids clipping)
+        if hearing_level_db <= 0:
+            amplitude = 0.0
+        else:
+            normalized_db = min(100, max(0, hearing_level_db))
+            amplitude = (normalized_db / 100.0) ** 0.4 * 0.7
+
+        tone = np.sin(2 * np.pi * frequency * t)
+        audio_signal = np.zeros_like(tone)
+
+        if amplitude > 0:
+            # Raised-cosine 20ms fade in/out to prevent clicks
+            fade_samples = int(0.02 * SAMPLE_RATE)
+            envelope = np.ones(len(t))
+            if len(t) > 2 * fade_samples:
+                envelope[:fade_samples] = 0.5 * (1 - np.cos(np.pi * np.arange(fade_samples) / fade_samples))
+                envelope[-fade_samples:] = 0.5 * (1 + np.cos(np.pi * np.arange(fade_samples) / fade_samples))
+            audio_signal = amplitude * envelope * tone
+
+        # Stereo [samples, 2] with the tone only in the tested ear
+        stereo_signal = np.zeros((len(t), 2))
+        if ear_side == 'left':
+            stereo_signal[:, 0] = audio_signal
+        elif ear_side == 'right':
+            stereo_signal[:, 1] = audio_signal
+
+        max_val = np.max(np.abs(stereo_signal))
+        if max_val > 0.95:
+            stereo_signal = stereo_signal * 0.95 / max_val
+
+        audio_data = np.clip(stereo_signal * 32767, -32767, 32767).astype(np.int16)
+
+        buffer = io.BytesIO()
+        sf.write(buffer, audio_data, SAMPLE_RATE, format='WAV', subtype='PCM_16')
+        buffer.seek(0)
+        return buffer
+
+    except Exception as e:
+        print(f"Error in generate_hearing_level_tone: {str(e)}")
+        return None
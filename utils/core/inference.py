@@ -0,0 +1,137 @@
+"""Eye and hearing model inference, without any UI dependencies"""
+
+import pickle
+from functools import lru_cache
+
+import numpy as np
+
+from eye_model import load_eye_predictor, model_version
+from inference_server import MODEL_FILES, get_inference_client, remote_predict
+from tf_runtime import load_keras_predictor
+
+
+EYE_CLASSES = ["Normal", "Mild Diabetic Retinopathy", "Moderate Diabetic Retinopathy", "Severe Diabetic Retinopathy"]
+HEARING_SCALER_PATH = "models/hearing_scaler.pkl"
+FALLBACK_MODEL_VERSION = "fallback"
+
+
+def load_eye_model():
+    """Predict callable for the EYE_MODEL_VARIANT build, or None if it can't load"""
+    return load_eye_predictor()
+
+
+def eye_model_version():
+    """Identifies the eye model file being served; part of the result cache key.
+
+    FALLBACK_MODEL_VERSION when neither the inference server nor a local
+    model can serve predictions, so placeholder results are never cached
+    under a real model's version.
+    """
+    if get_inference_client() is None and load_eye_model() is None:
+        return FALLBACK_MODEL_VERSION
+    return model_version()
+
+
+def preprocess_eye_image(image):
+    """Image -> (1, 224, 224, 3) model input in [0, 1]"""
+    import tensorflow as tf
+
+    image = tf.image.resize(np.array(image), [224, 224])
+    return np.expand_dims(image / 255.0, axis=0)
+
+
+def predict_eye_disease(processed_image):
+    """{class: probability} for a preprocessed eye image"""
+    # The shared inference server batches this with other sessions' requests
+    output = remote_predict("eye", processed_image)
+    if output is None:
+        model = load_eye_model()
+        output = model(processed_image) if model is not None else None
+    if output is not None:
+        return {label: float(p) for label, p in zip(EYE_CLASSES, output[0])}
+
+    # No model available - realistic-looking placeholder results so the
+    # rest of the pipeline can still be exercised
+    return {
+        "Normal": 0.65,
+        "Mild Diabetic Retinopathy": 0.20,
+        "Moderate Diabetic Retinopathy": 0.10,
+        "Severe Diabetic Retinopathy": 0.05
+    }
+
+
+@lru_cache(maxsize=None)
+def load_hearing_model():
+    """Predict callable for the hearing model, or None if it can't load.
+
+    Already loaded if startup warm-up ran; a failed load is remembered for
+    the life of the process rather than retried on every prediction.
+    """
+    try:
+        return load_keras_predictor("hearing", MODEL_FILES["hearing"])
+    except Exception as e:
+        print(f"Error loading hearing model: {e}")
+        return None
+
+
+@lru_cache(maxsize=None)
+def load_hearing_scaler(path=HEARING_SCALER_PATH):
+    """The hearing model's input scaler, loaded once per process; None if it can't load"""
+    try:
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+    except Exception as e:
+        print(f"Error loading hearing scaler: {e}")
+        return None
+
+
+def dummy_hearing_result(physical_score):
+    """Rule-of-thumb result used when the hearing model can't load"""
+    return {
+        "status": "Normal" if physical_score > 35 else "Hearing Loss",
+        "confidence": 0.75,
+        "probability": 0.25 if physical_score > 35 else 0.75,
+        "risk_level": "Low" if physical_score > 40 else "Moderate"
+    }
+
+
+def hearing_result(prediction_prob):
+    """Hearing model output probability -> status, confidence and risk level"""
+    prediction = "Hearing Loss" if prediction_prob > 0.5 else "Normal"
+    confidence = float(prediction_prob if prediction_prob > 0.5 else 1 - prediction_prob)
+
+    if prediction_prob < 0.3:
+        risk_level = "Low"
+    elif prediction_prob < 0.7:
+        risk_level = "Moderate"
+    else:
+        risk_level = "High"
+
+    return {
+        "status": prediction,
+        "confidence": confidence,
+        "probability": float(prediction_prob),
+        "risk_level": risk_level
+    }
+
+
+def predict_hearing_loss(age, physical_score):
+    """Predict hearing loss based on age and physical score.
+
+    Falls back to dummy_hearing_result() when the scaler or model can't load;
+    other failures propagate to the caller.
+    """
+    scaler = load_hearing_scaler()
+    if scaler is None:
+        return dummy_hearing_result(physical_score)
+
+    input_scaled = scaler.transform(np.array([[age, physical_score]]))
+
+    # On the shared inference server if one is running
+    output = remote_predict("hearing", input_scaled)
+    if output is None:
+        model = load_hearing_model()
+        if model is None:
+            return dummy_hearing_result(physical_score)
+        output = model(input_scaled)
+    return hearing_result(output[0][0])
@@ -0,0 +1,77 @@
+"""Saving assessment results through the repository layer.
+
+Each function takes the patient id explicitly and returns the new assessment
+id (None if the repository couldn't store it).
+"""
+
+import json
+from datetime import date
+
+from image_store import IMAGES_KEY
+from repository import get_repository
+
+from .scoring import (count_detected_conditions, generate_recommendations, is_critical, score_acuity,
+                      score_ai_detection, score_hearing_test)
+
+
+def save_assessment(patient_id, assessment_type, results, risk_level, recommendations=None,
+                    critical_flag=None, repository=None):
+    """Store one assessment; recommendations and the critical flag are derived when not given"""
+    repository = repository or get_repository()
+    if not recommendations:
+        recommendations = generate_recommendations(assessment_type, results, risk_level)
+    if critical_flag is None:
+        critical_flag = is_critical(results, risk_level)
+    return repository.add_assessment(
+        patient_id=patient_id,
+        assessment_type=assessment_type,
+        results=results,
+        risk_level=risk_level,
+        recommendations=recommendations,
+        critical_flag=critical_flag
+    )
+
+
+def save_acuity_results(patient_id, data, accuracy, acuity, status, repository=None):
+    """Store a visual acuity test"""
+    risk_level, recommendations, critical_flag = score_acuity(accuracy)
+    results_data = {
+        'test_type': 'Visual Acuity Test',
+        'accuracy_percentage': accuracy,
+        'estimated_acuity': acuity,
+        'status': status,
+        'total_lines': len(data.get('lines', [])),
+        'correct_count': data.get('correct_count', 0),
+        'total_count': data.get('total_count', 0),
+        'detailed_answers': data.get('answers', []),
+        'test_date': date.today().isoformat()
+    }
+    return save_assessment(patient_id, "Visual Acuity Test", results_data, risk_level,
+                           recommendations, critical_flag, repository)
+
+
+def save_ai_detection_results(patient_id, analysis_results, quality_metrics, overall, validation_details,
+                              repository=None, images=None):
+    """Store an AI eye disease detection run; `images` maps roles to image-store digests"""
+    risk_level, recommendations, critical_flag = score_ai_detection(analysis_results, overall)
+    results_data = {
+        'test_type': 'AI Eye Disease Detection',
+        'overall_healthy': overall.get('healthy', False),
+        'conditions_detected_count': count_detected_conditions(analysis_results),
+        'analysis_results': analysis_results or {},
+        'quality_metrics': quality_metrics or {},
+        'validation_details': validation_details or {},
+        'recommendation': overall.get('recommendation', 'N/A'),
+        'test_date': date.today().isoformat()
+    }
+    if images:
+        results_data[IMAGES_KEY] = images
+    return save_assessment(patient_id, "AI Eye Disease Detection", results_data, risk_level,
+                           recommendations, critical_flag, repository)
+
+
+def save_hearing_test_results(patient_id, assessment_type, results, risk_level, repository=None):
+    """Store an online hearing test"""
+    recommendations, critical_flag = score_hearing_test(risk_level)
+    return save_assessment(patient_id, assessment_type, json.dumps(results), risk_level,
+                           recommendations, critical_flag, repository)
@@ -0,0 +1,123 @@
+"""A captured photo decoded once, with views derived on first use.
+
+The pipeline used to decode the upload in every step and convert between
+PIL and OpenCV layouts at each hop, each a full-frame copy. A Photo keeps
+one read-only RGB array; everything else is derived from it lazily:
+
+- detection_view(): grayscale copy at most DETECTION_MAX_SIDE wide/high -
+  the Haar cascades' working memory is ~30x their input, so full-size
+  phone photos are searched at this size and boxes scaled back
+- crop(): NumPy slices of the RGB array, not copies
+- display(): a writable copy at most DISPLAY_MAX_SIDE for drawing boxes
+  on; the full frame is never copied for annotation
+"""
+
+import io
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from .result_cache import image_digest
+
+
+DETECTION_MAX_SIDE = 1280
+DISPLAY_MAX_SIDE = 800
+# Like PIL: 3-channel 8-bit, EXIF orientation not applied
+DECODE_FLAGS = cv2.IMREAD_COLOR | cv2.IMREAD_IGNORE_ORIENTATION
+
+
+def open_image(image_data):
+    """Verified PIL image from a file-like object (upload, camera photo or BytesIO)"""
+    image_data.seek(0)
+    image = Image.open(image_data)
+    image.verify()
+    image_data.seek(0)
+    return Image.open(image_data)
+
+
+def downscale(array, max_side):
+    """(array, scale): `array` resized so its longest side is at most `max_side`"""
+    height, width = array.shape[:2]
+    scale = min(1.0, max_side / max(height, width))
+    if scale < 1:
+        array = cv2.resize(array, (max(1, round(width * scale)), max(1, round(height * scale))),
+                           interpolation=cv2.INTER_AREA)
+    return array, scale
+
+
+class Photo:
+    """One decoded photo: a read-only RGB array plus lazily derived views"""
+
+    def __init__(self, rgb, digest=None):
+        rgb.flags.writeable = False
+        self.rgb = rgb
+        self.digest = digest  # SHA-256 of the encoded bytes, for the result cache
+        self._detection = None
+        self._gray = None
+
+    @classmethod
+    def open(cls, image_data):
+        """Decode image bytes (a file-like object); raises if they aren't an image.
+
+        PIL checks the file (and its size, against decompression bombs);
+        OpenCV then decodes straight into the one array that is kept, so
+        no intermediate full-size buffers are made. Formats OpenCV can't
+        read are decoded by PIL.
+        """
+        image = open_image(image_data)
+        digest = image_digest(image_data)
+        if isinstance(image_data, io.BytesIO):
+            with image_data.getbuffer() as encoded:
+                bgr = cv2.imdecode(np.frombuffer(encoded, np.uint8), DECODE_FLAGS)
+        else:
+            image_data.seek(0)
+            bgr = cv2.imdecode(np.frombuffer(image_data.read(), np.uint8), DECODE_FLAGS)
+            image_data.seek(0)
+
+        if bgr is None:
+            rgb = np.array(image.convert("RGB"))
+        else:
+            rgb = cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB, dst=bgr)
+        return cls(rgb, digest)
+
+    @property
+    def size(self):
+        """(width, height), as PIL reports it"""
+        return self.rgb.shape[1], self.rgb.shape[0]
+
+    @property
+    def gray(self):
+        """Full-resolution grayscale array"""
+        if self._gray is None:
+            self._gray = cv2.cvtColor(self.rgb, cv2.COLOR_RGB2GRAY)
+        return self._gray
+
+    def detection_view(self):
+        """(grayscale array, scale) for face/eye detection and the quality checks.
+
+        Boxes found in it map back to the full photo by dividing by `scale`.
+        """
+        if self._detection is None:
+            small, scale = downscale(self.rgb, DETECTION_MAX_SIDE)
+            self._detection = cv2.cvtColor(small, cv2.COLOR_RGB2GRAY), scale
+        return self._detection
+
+    def crop(self, box):
+        """View of the (x1, y1, x2, y2) region of the RGB array"""
+        x1, y1, x2, y2 = box
+        return self.rgb[y1:y2, x1:x2]
+
+    def display(self, max_side=DISPLAY_MAX_SIDE):
+        """(writable RGB copy, scale) at most `max_side`, for drawing on"""
+        small, scale = downscale(self.rgb, max_side)
+        return (small.copy() if small is self.rgb else small), scale
+
+    def to_pil(self, region=None):
+        """The photo, or a region from crop(), as a PIL image"""
+        return Image.fromarray(self.rgb if region is None else np.ascontiguousarray(region))
+
+
+def as_photo(image_data):
+    """`image_data` decoded into a Photo, unless it already is one"""
+    return image_data if isinstance(image_data, Photo) else Photo.open(image_data)
@@ -0,0 +1,54 @@
+"""End-to-end assessment of one eye photo, for callers without a UI"""
+
+from .detection import DETECTOR_VERSION, crop_eye_region, validate_and_draw_boxes
+from .inference import eye_model_version, predict_eye_disease, preprocess_eye_image
+from .photo import Photo
+from .result_cache import cached_result
+from .scoring import eye_risk_level, is_critical
+
+
+def assess_eye_image(image_data):
+    """Validate a photo, crop the eye region and run the eye model.
+
+    Returns a dict with valid, error_type, message and validation_details;
+    valid photos also get predictions, risk_level, critical and crop_notice
+    (why the crop fell back to the face or full image, else None).
+    Predictions for a photo already seen with the same detector and model
+    come from the result cache.
+    """
+    try:
+        photo = Photo.open(image_data)  # decoded once for every stage below
+    except Exception as e:
+        return {"valid": False, "error_type": "invalid_image", "message": f"Invalid image file provided: {e}",
+                "validation_details": {}}
+
+    is_valid, error_type, message, validation_details, _ = validate_and_draw_boxes(photo, annotate=False)
+    result = {
+        "valid": is_valid,
+        "error_type": error_type,
+        "message": message,
+        "validation_details": validation_details,
+    }
+    if not is_valid:
+        return result
+
+    def predict():
+        eye_image, crop_notice = crop_eye_region(photo)
+        if eye_image is None:
+            eye_image = photo.to_pil()
+        return {
+            "predictions": predict_eye_disease(preprocess_eye_image(eye_image)),
+            "crop_notice": crop_notice,
+        }
+
+    version = f"{DETECTOR_VERSION}+{eye_model_version()}"
+    inference = cached_result(photo.digest, "predictions", version, predict)
+    predictions = inference["predictions"]
+    risk_level = eye_risk_level(predictions)
+    result.update(
+        predictions=predictions,
+        risk_level=risk_level,
+        critical=bool(is_critical(predictions, risk_level)),
+        crop_notice=inference["crop_notice"],
+    )
+    return result
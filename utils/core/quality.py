@@ -0,0 +1,111 @@
+"""Fast photo quality checks that run before face/eye detection.
+
+Measured on a grayscale copy downscaled to QUALITY_MAX_SIDE, so the cost
+is a few milliseconds whatever the camera resolution:
+
+- sharpness: variance of the Laplacian (low means blurred or out of focus)
+- exposure: mean brightness and the share of near-black pixels
+- glare: share of saturated pixels (flash, window or screen reflections)
+- resolution: shorter side of the original photo
+
+Photos past a REJECT threshold are turned away before the Haar cascades
+and the model run; those past a WARN threshold go through but are
+flagged in overall_quality.
+"""
+
+import cv2
+import numpy as np
+
+
+QUALITY_MAX_SIDE = 320
+SHARPNESS_REJECT = 15.0
+SHARPNESS_WARN = 50.0
+BRIGHTNESS_REJECT = (35.0, 220.0)
+BRIGHTNESS_WARN = (60.0, 190.0)
+DARK_PIXEL = 16
+DARK_FRACTION_REJECT = 0.6
+GLARE_PIXEL = 250
+GLARE_FRACTION_REJECT = 0.25
+GLARE_FRACTION_WARN = 0.05
+MIN_SIDE_REJECT = 160
+MIN_SIDE_WARN = 360
+
+# issue -> (message shown when the photo is rejected, label in overall_quality)
+QUALITY_ISSUES = {
+    "low_resolution": ("Photo resolution is too low. Please move closer or use a higher-resolution camera.",
+                       "Low resolution"),
+    "blurry": ("Photo is too blurry. Hold the camera steady and make sure your face is in focus.", "Blurry"),
+    "underexposed": ("Photo is too dark. Please face a light source or turn on more lights.", "Dim lighting"),
+    "overexposed": ("Photo is overexposed. Please move away from bright light behind or in front of you.",
+                    "Overexposed"),
+    "glare": ("Too much glare in the photo. Please avoid direct light, flash and reflective glasses.", "Glare"),
+}
+
+
+def downscaled_gray(img_bgr, max_side=QUALITY_MAX_SIDE):
+    """Grayscale copy of a BGR (or grayscale) image, longest side at most `max_side`"""
+    height, width = img_bgr.shape[:2]
+    scale = max_side / max(height, width)
+    if scale < 1:
+        img_bgr = cv2.resize(img_bgr, (max(1, round(width * scale)), max(1, round(height * scale))),
+                             interpolation=cv2.INTER_AREA)
+    return img_bgr if img_bgr.ndim == 2 else cv2.cvtColor(img_bgr, cv2.COLOR_BGR2GRAY)
+
+
+def assess_image_quality(image, size=None):
+    """Quality metrics and verdict for a BGR or grayscale image array.
+
+    `size` is the original photo's (width, height) when `image` is a
+    downscaled copy of it. Returns {'width', 'height', 'sharpness',
+    'brightness', 'dark_fraction', 'glare_fraction', 'rejected': issues
+    that stop the photo, 'warnings': issues that only flag it,
+    'overall_quality'}.
+    """
+    width, height = size or (image.shape[1], image.shape[0])
+    gray = downscaled_gray(image)
+
+    histogram = np.bincount(gray.ravel(), minlength=256) / gray.size
+    brightness = float(np.dot(histogram, np.arange(256)))
+    dark_fraction = float(histogram[:DARK_PIXEL].sum())
+    glare_fraction = float(histogram[GLARE_PIXEL:].sum())
+    sharpness = float(cv2.Laplacian(gray, cv2.CV_64F).var())
+    short_side = min(height, width)
+
+    rejected, warnings = [], []
+
+    def check(issue, reject, warn):
+        if reject:
+            rejected.append(issue)
+        elif warn:
+            warnings.append(issue)
+
+    check("low_resolution", short_side < MIN_SIDE_REJECT, short_side < MIN_SIDE_WARN)
+    check("blurry", sharpness < SHARPNESS_REJECT, sharpness < SHARPNESS_WARN)
+    check("underexposed", brightness < BRIGHTNESS_REJECT[0] or dark_fraction > DARK_FRACTION_REJECT,
+          brightness < BRIGHTNESS_WARN[0])
+    check("overexposed", brightness > BRIGHTNESS_REJECT[1], brightness > BRIGHTNESS_WARN[1])
+    check("glare", glare_fraction > GLARE_FRACTION_REJECT, glare_fraction > GLARE_FRACTION_WARN)
+
+    if rejected:
+        overall_quality = "Poor - " + ", ".join(QUALITY_ISSUES[issue][1] for issue in rejected)
+    elif warnings:
+        overall_quality = "Fair - " + ", ".join(QUALITY_ISSUES[issue][1] for issue in warnings)
+    else:
+        overall_quality = "Good"
+
+    return {
+        "width": width,
+        "height": height,
+        "sharpness": round(sharpness, 1),
+        "brightness": round(brightness, 1),
+        "dark_fraction": round(dark_fraction, 3),
+        "glare_fraction": round(glare_fraction, 3),
+        "rejected": rejected,
+        "warnings": warnings,
+        "overall_quality": overall_quality,
+    }
+
+
+def quality_message(quality):
+    """What to tell the patient about a rejected photo"""
+    return " ".join(QUALITY_ISSUES[issue][0] for issue in quality["rejected"])
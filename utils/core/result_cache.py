@@ -0,0 +1,104 @@
+"""Per-process cache of image analysis results, keyed by image content.
+
+Re-uploading or re-capturing the same photo yields the same SHA-256, so
+detection boxes, crop coordinates and model outputs are looked up by
+(digest, kind, version) instead of being recomputed. `version` names
+whatever produced the value (detector settings, model variant and file),
+so a new model never serves old outputs. Values are small JSON-style
+dicts; the cache is bounded by entry count and by their encoded size,
+evicting least recently used entries first.
+"""
+
+import copy
+import io
+import json
+import threading
+from collections import OrderedDict
+from hashlib import sha256
+
+
+RESULT_CACHE_ENTRIES = 1024
+RESULT_CACHE_BYTES = 4 * 1024 * 1024
+
+_results = OrderedDict()  # key -> (value, size)
+_results_lock = threading.Lock()
+_size = 0
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+_kind_stats = {}
+
+
+def image_digest(image_data):
+    """SHA-256 of an image's bytes (bytes or a file-like object, left rewound)"""
+    if isinstance(image_data, (bytes, bytearray)):
+        return sha256(image_data).hexdigest()
+    if isinstance(image_data, io.BytesIO):
+        return sha256(image_data.getbuffer()).hexdigest()
+    image_data.seek(0)
+    digest = sha256(image_data.read()).hexdigest()
+    image_data.seek(0)
+    return digest
+
+
+def cached_result(digest, kind, version, compute):
+    """compute() for this image, served from the cache when already known.
+
+    A None digest (content unknown) always computes.
+    """
+    if digest is None or not RESULT_CACHE_ENTRIES:
+        return compute()
+
+    key = (digest, kind, version)
+    with _results_lock:
+        counts = _kind_stats.setdefault(kind, {"hits": 0, "misses": 0})
+        entry = _results.get(key)
+        if entry is not None:
+            _results.move_to_end(key)
+            _stats["hits"] += 1
+            counts["hits"] += 1
+            return copy.deepcopy(entry[0])
+        _stats["misses"] += 1
+        counts["misses"] += 1
+
+    value = compute()
+    _store(key, value)
+    return copy.deepcopy(value)
+
+
+def _store(key, value):
+    global _size
+    size = len(json.dumps(value, default=str))
+    if size > RESULT_CACHE_BYTES:
+        return
+    with _results_lock:
+        previous = _results.pop(key, None)
+        if previous is not None:
+            _size -= previous[1]
+        _results[key] = (copy.deepcopy(value), size)
+        _size += size
+        while len(_results) > RESULT_CACHE_ENTRIES or _size > RESULT_CACHE_BYTES:
+            _, (_, evicted_size) = _results.popitem(last=False)
+            _size -= evicted_size
+            _stats["evictions"] += 1
+
+
+def result_cache_stats():
+    """Hit/miss/eviction counters, hit rate (overall and per kind) and current size"""
+    with _results_lock:
+        lookups = _stats["hits"] + _stats["misses"]
+        return dict(
+            _stats,
+            hit_rate=_stats["hits"] / lookups if lookups else 0.0,
+            entries=len(_results),
+            bytes=_size,
+            kinds={kind: dict(counts) for kind, counts in _kind_stats.items()},
+        )
+
+
+def clear_result_cache():
+    global _size
+    with _results_lock:
+        _results.clear()
+        _size = 0
+        for counts in (_stats, *_kind_stats.values()):
+            for name in counts:
+                counts[name] = 0
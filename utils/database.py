@@ -1,19 +1,105 @@
 import sqlite3
 import pandas as pd
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 import os
 import json
+import re
+import threading
+from contextlib import contextmanager
+from functools import wraps
+
+from cache_bus import cached_read, create_cache_epoch
+from storage import get_engine, sqlite_url
+from tiering import archive_dir_for, archives_for_range
+
+DEFAULT_DB_PATH = "data/medical_assessment.db"
+
+PATIENT_FIELDS = ('name', 'age', 'gender', 'email', 'phone')
+PATIENT_SEARCH_COLUMNS = ['id', 'name', 'age', 'gender', 'email', 'phone']
+PATIENT_SEARCH_CANDIDATES = 200
+
+_initialized_paths = set()
+_init_lock = threading.Lock()
+
+
+def ensure_schema(db_path=DEFAULT_DB_PATH):
+    """Create/migrate the database once per process.
+    
+    The analytics snapshot calls this before copying the file, so a
+    database no page has opened yet still has its tables and newer
+    columns such as assessments.created_epoch.
+    """
+    MedicalDB(db_path)
+
+
+def utc_now():
+    """Current UTC time as (CURRENT_TIMESTAMP-style text, epoch seconds)"""
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    return now.strftime('%Y-%m-%d %H:%M:%S'), int(now.timestamp())
+
+
+def epoch_cached(method):
+    """Cache a MedicalDB read per process until any process writes.
+    
+    Read-only copies (the analytics snapshot) are not cached - they are
+    replaced as a file, which the epoch check can't see.
+    """
+    @wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.read_only:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        return cached_read(self.db_path, key, lambda: method(self, *args, **kwargs))
+    return wrapper
+
 
 class MedicalDB:
-    def __init__(self, db_path="data/medical_assessment.db"):
+    def __init__(self, db_path=DEFAULT_DB_PATH, archive_dir=None, archive_until=None, read_only=False):
+        """`read_only` opens an existing copy (e.g. the analytics snapshot)
+        without running migrations. `archive_dir`/`archive_until` say which
+        archived rows belong with it; rows archived from `archive_until`
+        (epoch) on are ignored.
+        """
         self.db_path = db_path
+        self.archive_dir = archive_dir or archive_dir_for(db_path)
+        self.archive_until = archive_until
+        self.read_only = read_only
+        if read_only:
+            return
         os.makedirs(os.path.dirname(db_path), exist_ok=True)
-        self.init_database()
+        # Pages build a MedicalDB per rerun - only the first one per process runs the DDL
+        if db_path not in _initialized_paths:
+            with _init_lock:
+                if db_path not in _initialized_paths:
+                    self.init_database()
+                    _initialized_paths.add(db_path)
+    
+    def _connect(self):
+        """A new, unpooled connection (read-only for snapshot copies)"""
+        if self.read_only:
+            return sqlite3.connect(f"file:{os.path.abspath(self.db_path)}?mode=ro", uri=True)
+        return sqlite3.connect(self.db_path)
+    
+    @contextmanager
+    def _connection(self):
+        """Borrow a pooled connection from the storage engine; commits on success"""
+        if self.read_only:
+            conn = self._connect()
+            try:
+                yield conn
+            finally:
+                conn.close()
+        else:
+            with get_engine(sqlite_url(self.db_path)).connection() as conn:
+                yield conn
     
     def init_database(self):
         conn = sqlite3.connect(self.db_path)
         cursor = conn.cursor()
         
+        # WAL lets the dashboards' reads and the screening pages' writes run concurrently
+        cursor.execute("PRAGMA journal_mode = WAL")
+        
         # Patients table
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS patients (
@@ -38,179 +124,422 @@ class MedicalDB:
                 recommendations TEXT,
                 critical_flag BOOLEAN DEFAULT FALSE,
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                created_epoch INTEGER,
                 FOREIGN KEY (patient_id) REFERENCES patients (id)
             )
         ''')
         
+        self._migrate_created_epoch(cursor)
+        self._create_patient_search(cursor)
+        
+        # Bumped by triggers on every patient/assessment write; cached reads check it
+        create_cache_epoch(cursor)
+        
         conn.commit()
         conn.close()
         print(f"Database initialized at: {self.db_path}")
     
-    def add_patient(self, name, age, gender, email="", phone=""):
-        """Add a new patient to the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _migrate_created_epoch(self, cursor):
+        """Integer UTC epoch copy of created_at for index-friendly range/order queries"""
+        columns = [row[1] for row in cursor.execute("PRAGMA table_info(assessments)")]
+        if 'created_epoch' not in columns:
+            cursor.execute("ALTER TABLE assessments ADD COLUMN created_epoch INTEGER")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assessments_created_epoch ON assessments (created_epoch)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_assessments_patient_epoch ON assessments (patient_id, created_epoch)")
         
+        # Writers that don't set created_epoch (raw INSERTs) get it from created_at
         cursor.execute('''
-            INSERT INTO patients (name, age, gender, email, phone)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (name, age, gender, email, phone))
+            CREATE TRIGGER IF NOT EXISTS assessments_fill_created_epoch
+            AFTER INSERT ON assessments
+            WHEN NEW.created_epoch IS NULL AND NEW.created_at IS NOT NULL
+            BEGIN
+                UPDATE assessments SET created_epoch = CAST(strftime('%s', NEW.created_at) AS INTEGER)
+                WHERE id = NEW.id;
+            END
+        ''')
         
-        patient_id = cursor.lastrowid
-        conn.commit()
-        conn.close()
+        # Backfill existing rows (an index lookup once everything is filled)
+        cursor.execute('''
+            UPDATE assessments SET created_epoch = CAST(strftime('%s', created_at) AS INTEGER)
+            WHERE created_epoch IS NULL AND created_at IS NOT NULL
+        ''')
+    
+    def _create_patient_search(self, cursor):
+        """FTS5 index over patient name/email/phone, kept in sync by triggers"""
+        exists = cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='patients_fts'"
+        ).fetchone()
+        try:
+            cursor.execute('''
+                CREATE VIRTUAL TABLE IF NOT EXISTS patients_fts USING fts5(
+                    name, email, phone,
+                    content='patients', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2',
+                    prefix='2 3'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            # SQLite built without FTS5 - search_patients() falls back to LIKE
+            print(f"Patient search index unavailable: {e}")
+            return
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_insert AFTER INSERT ON patients BEGIN
+                INSERT INTO patients_fts (rowid, name, email, phone) VALUES (NEW.id, NEW.name, NEW.email, NEW.phone);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_delete AFTER DELETE ON patients BEGIN
+                INSERT INTO patients_fts (patients_fts, rowid, name, email, phone)
+                VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone);
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS patients_fts_update AFTER UPDATE OF name, email, phone ON patients BEGIN
+                INSERT INTO patients_fts (patients_fts, rowid, name, email, phone)
+                VALUES ('delete', OLD.id, OLD.name, OLD.email, OLD.phone);
+                INSERT INTO patients_fts (rowid, name, email, phone) VALUES (NEW.id, NEW.name, NEW.email, NEW.phone);
+            END
+        ''')
+        
+        if not exists:
+            # Index the patients that were added before the search table existed
+            cursor.execute("INSERT INTO patients_fts (patients_fts) VALUES ('rebuild')")
+    
+    def add_patient(self, name, age, gender, email="", phone=""):
+        """Add a new patient to the database"""
+        with self._connection() as conn:
+            cursor = conn.execute('''
+                INSERT INTO patients (name, age, gender, email, phone)
+                VALUES (?, ?, ?, ?, ?)
+            ''', (name, age, gender, email, phone))
+            patient_id = cursor.lastrowid
         print(f"Patient added with ID: {patient_id}")
         return patient_id
     
+    def get_patient(self, patient_id):
+        """One patient's details as a dict, or None"""
+        with self._connection() as conn:
+            df = pd.read_sql_query(
+                "SELECT id, name, age, gender, email, phone, created_at FROM patients WHERE id = ?",
+                conn, params=[patient_id]
+            )
+        return df.iloc[0].to_dict() if not df.empty else None
+    
+    def update_patient(self, patient_id, **fields):
+        """Update the given PATIENT_FIELDS of one patient"""
+        fields = {k: v for k, v in fields.items() if k in PATIENT_FIELDS}
+        if not fields:
+            return False
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        with self._connection() as conn:
+            conn.execute(f"UPDATE patients SET {assignments} WHERE id = ?", (*fields.values(), patient_id))
+        return True
+    
     def add_assessment(self, patient_id, assessment_type, results, risk_level, recommendations, critical_flag=False):
         """Add a new assessment to the database"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
             # Convert results to JSON string if it's a dict
             if isinstance(results, dict):
                 results_str = json.dumps(results)
             else:
                 results_str = str(results)
             
-            cursor.execute('''
-                INSERT INTO assessments (patient_id, assessment_type, results, risk_level, recommendations, critical_flag)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (patient_id, assessment_type, results_str, risk_level, recommendations, critical_flag))
-            
-            assessment_id = cursor.lastrowid
-            conn.commit()
-            conn.close()
+            created_at, created_epoch = utc_now()
+            with self._connection() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO assessments (patient_id, assessment_type, results, risk_level, recommendations, critical_flag,
+                                             created_at, created_epoch)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ''', (patient_id, assessment_type, results_str, risk_level, recommendations, critical_flag,
+                      created_at, created_epoch))
+                assessment_id = cursor.lastrowid
             print(f"Assessment added with ID: {assessment_id} for patient: {patient_id}")
             return assessment_id
             
         except Exception as e:
             print(f"Error adding assessment: {e}")
-            if conn:
-                conn.close()
             return None
     
-    def get_patient_assessments(self, patient_id):
-        """Get all assessments for a specific patient"""
+    def _read_tiers(self, query, params=(), since=None, limit=None):
+        """Run an assessments query over the hot table and the archive months it reaches.
+        
+        `query` names the table as {assessments}. Archive files overlapping
+        `since` (epoch, None = all history) are attached one at a time, newest
+        first, so results ordered by created_epoch DESC stay in order when
+        concatenated. Which archive months exist decides, not HOT_MONTHS, so
+        rows rolled over with a shorter hot window are still found. With
+        `limit`, archives are only read while fewer than `limit` rows have
+        been found. With `archive_until`, archive rows from
+        that epoch on are skipped - the hot table already holds them.
+        """
+        archive_table = "archive.assessments"
+        if self.archive_until is not None:
+            archive_table = f"(SELECT * FROM archive.assessments WHERE created_epoch < {int(self.archive_until)})"
+        
+        with self._connection() as conn:
+            frames = [pd.read_sql_query(query.replace("{assessments}", "main.assessments"), conn, params=params)]
+            found = len(frames[0])
+            
+            if limit is None or found < limit:
+                for path in archives_for_range(self.archive_dir, since, self.archive_until):
+                    if limit is not None and found >= limit:
+                        break
+                    conn.execute("ATTACH DATABASE ? AS archive", (path,))
+                    try:
+                        frame = pd.read_sql_query(query.replace("{assessments}", archive_table), conn, params=params)
+                    finally:
+                        conn.execute("DETACH DATABASE archive")
+                    if not frame.empty:
+                        frames.append(frame)
+                        found += len(frame)
+        
+        df = pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0]
+        return df.head(limit) if limit is not None else df
+    
+    @epoch_cached
+    def get_patient_assessments(self, patient_id, since=None, limit=None):
+        """Get a patient's assessments, newest first.
+        
+        `since` (epoch) bounds how far back to read; `limit` keeps only the
+        latest rows and skips archive months once enough are found.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
             query = '''
                 SELECT id, assessment_type, results, risk_level, recommendations, 
-                       critical_flag, created_at
-                FROM assessments 
-                WHERE patient_id = ?
-                ORDER BY created_at DESC
+                       COALESCE(critical_flag, 0) AS critical_flag, created_at
+                FROM {assessments} 
+                WHERE patient_id = ? AND created_epoch >= ?
+                ORDER BY created_epoch DESC
             '''
-            df = pd.read_sql_query(query, conn, params=[patient_id])
-            conn.close()
-            return df
+            params = [patient_id, since or 0]
+            if limit is not None:
+                query += " LIMIT ?"
+                params.append(limit)
+            return self._read_tiers(query, params, since=since, limit=limit)
         except Exception as e:
             print(f"Error getting patient assessments: {e}")
             return pd.DataFrame()
     
+    @epoch_cached
     def get_all_patients(self):
         """Get all patients"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            df = pd.read_sql_query("SELECT * FROM patients ORDER BY created_at DESC", conn)
-            conn.close()
-            return df
+            with self._connection() as conn:
+                return pd.read_sql_query("SELECT * FROM patients ORDER BY created_at DESC", conn)
         except Exception as e:
             print(f"Error getting patients: {e}")
             return pd.DataFrame()
     
-    def get_all_assessments(self):
-        """Get all assessments with patient info"""
+    @epoch_cached
+    def get_all_assessments(self, since=None, raise_errors=False):
+        """Get all assessments with patient info (from `since` epoch, if given).
+        
+        A failed read returns an empty DataFrame unless `raise_errors` - for
+        callers (image gc) that must not mistake an error for "no rows".
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
             query = '''
                 SELECT a.*, p.name, p.age, p.gender 
-                FROM assessments a 
+                FROM {assessments} a 
                 JOIN patients p ON a.patient_id = p.id 
-                ORDER BY a.created_at DESC
+                WHERE a.created_epoch >= ?
+                ORDER BY a.created_epoch DESC
             '''
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return self._read_tiers(query, [since or 0], since=since)
         except Exception as e:
+            if raise_errors:
+                raise
             print(f"Error getting all assessments: {e}")
             return pd.DataFrame()
     
-    def get_critical_patients(self):
-        """Get patients with critical assessments"""
+    @epoch_cached
+    def get_critical_patients(self, since=None):
+        """Get patients with critical assessments (from `since` epoch, if given)"""
         try:
-            conn = sqlite3.connect(self.db_path)
             query = '''
                 SELECT a.*, p.name, p.age, p.gender, p.phone, p.email
-                FROM assessments a 
+                FROM {assessments} a 
                 JOIN patients p ON a.patient_id = p.id 
-                WHERE a.critical_flag = TRUE
-                ORDER BY a.created_at DESC
+                WHERE a.critical_flag = TRUE AND a.created_epoch >= ?
+                ORDER BY a.created_epoch DESC
             '''
-            df = pd.read_sql_query(query, conn)
-            conn.close()
-            return df
+            return self._read_tiers(query, [since or 0], since=since)
         except Exception as e:
             print(f"Error getting critical patients: {e}")
             return pd.DataFrame()
     
+    def search_patients(self, query, limit=20):
+        """Ranked type-ahead patient search over name, email and phone.
+        
+        Every word in `query` is matched as a prefix ("jo sm" finds John
+        Smith); accents and case are ignored. If no patient matches all
+        words, patients matching any word are returned instead. A numeric
+        query also matches the patient ID exactly, listed first.
+        Returns up to `limit` rows with PATIENT_SEARCH_COLUMNS, best first.
+        """
+        terms = re.findall(r'\w+', query or '')
+        if not terms:
+            return pd.DataFrame(columns=PATIENT_SEARCH_COLUMNS)
+        
+        try:
+            with self._connection() as conn:
+                columns = ", ".join(f"p.{c}" for c in PATIENT_SEARCH_COLUMNS)
+                
+                rows = []
+                if query.strip().isdigit():
+                    rows += conn.execute(f"SELECT {columns} FROM patients p WHERE p.id = ?",
+                                         (int(query.strip()),)).fetchall()
+                
+                try:
+                    prefixes = [f'"{term}"*' for term in terms]
+                    matched = []
+                    for match in (" AND ".join(prefixes), " OR ".join(prefixes)):
+                        # bm25 is only computed for the first PATIENT_SEARCH_CANDIDATES
+                        # matches, so broad one- or two-letter prefixes stay fast
+                        matched = conn.execute(f'''
+                            SELECT {columns}
+                            FROM (
+                                SELECT rowid, rank FROM patients_fts
+                                WHERE patients_fts MATCH ?
+                                LIMIT ?
+                            ) hits
+                            JOIN patients p ON p.id = hits.rowid
+                            ORDER BY hits.rank
+                            LIMIT ?
+                        ''', (match, PATIENT_SEARCH_CANDIDATES, limit)).fetchall()
+                        if matched or len(terms) == 1:
+                            break
+                except sqlite3.OperationalError:
+                    # No FTS5 - unranked substring match on the first word
+                    like = f"%{terms[0]}%"
+                    matched = conn.execute(f'''
+                        SELECT {columns} FROM patients p
+                        WHERE p.name LIKE ? OR p.email LIKE ? OR p.phone LIKE ?
+                        LIMIT ?
+                    ''', (like, like, like, limit)).fetchall()
+                rows += matched
+            
+            results = pd.DataFrame.from_records(rows, columns=PATIENT_SEARCH_COLUMNS).drop_duplicates('id')
+            return results.head(limit).reset_index(drop=True)
+        except Exception as e:
+            print(f"Error searching patients: {e}")
+            return pd.DataFrame(columns=PATIENT_SEARCH_COLUMNS)
+    
+    @epoch_cached
     def get_statistics(self):
         """Get database statistics"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            
-            stats = {}
-            
-            # Total patients
-            stats['total_patients'] = pd.read_sql_query("SELECT COUNT(*) as count FROM patients", conn).iloc[0]['count']
-            
-            # Total assessments
-            stats['total_assessments'] = pd.read_sql_query("SELECT COUNT(*) as count FROM assessments", conn).iloc[0]['count']
-            
-            # Critical cases
-            stats['critical_cases'] = pd.read_sql_query("SELECT COUNT(*) as count FROM assessments WHERE critical_flag = TRUE", conn).iloc[0]['count']
+            with self._connection() as conn:
+                stats = {}
+                
+                # Total patients
+                stats['total_patients'] = pd.read_sql_query("SELECT COUNT(*) as count FROM patients", conn).iloc[0]['count']
+                
+                # Totals span every tier; archive months only add small per-file counts
+                totals = self._read_tiers('''
+                    SELECT COUNT(*) as total, COALESCE(SUM(critical_flag = TRUE), 0) as critical
+                    FROM {assessments}
+                ''')
+                
+                # Total assessments
+                stats['total_assessments'] = int(totals['total'].sum())
+                
+                # Critical cases
+                stats['critical_cases'] = int(totals['critical'].sum())
+                
+                # Assessments by type
+                by_type = self._read_tiers("SELECT assessment_type, COUNT(*) as count FROM {assessments} GROUP BY assessment_type")
+                stats['by_type'] = by_type.groupby('assessment_type', as_index=False, sort=True)['count'].sum()
+                
+                # Daily assessments (last 7 days) - range scan on the epoch index
+                today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+                since = int((today - timedelta(days=7)).timestamp())
+                stats['daily_assessments'] = pd.read_sql_query('''
+                    SELECT DATE(created_epoch / 86400 * 86400, 'unixepoch') as date, COUNT(*) as count 
+                    FROM assessments 
+                    WHERE created_epoch >= ?
+                    GROUP BY created_epoch / 86400
+                    ORDER BY date DESC
+                ''', conn, params=[since])
             
-            # Assessments by type
-            stats['by_type'] = pd.read_sql_query("SELECT assessment_type, COUNT(*) as count FROM assessments GROUP BY assessment_type", conn)
-            
-            # Daily assessments (last 7 days)
-            stats['daily_assessments'] = pd.read_sql_query('''
-                SELECT DATE(created_at) as date, COUNT(*) as count 
-                FROM assessments 
-                WHERE created_at >= date('now', '-7 days')
-                GROUP BY DATE(created_at)
-                ORDER BY date DESC
-            ''', conn)
-            
-            conn.close()
             return stats
         except Exception as e:
             print(f"Error getting statistics: {e}")
             return {}
     
+    @epoch_cached
+    def get_assessment_time_buckets(self, *formats, since=None):
+        """Count assessments per strftime() bucket of created_epoch, grouped in SQL.
+        
+        e.g. ('%w', '%H') gives weekday x hour counts, ('%Y-%m',) monthly
+        counts. Returns columns bucket_0 ... bucket_n and count, summed over
+        the hot table and the archive months from `since` (epoch) on.
+        """
+        try:
+            buckets = [f"bucket_{i}" for i in range(len(formats))]
+            columns = ", ".join(f"strftime(?, created_epoch, 'unixepoch') AS {name}" for name in buckets)
+            group_by = ", ".join(buckets)
+            query = f'''
+                SELECT {columns}, COUNT(*) as count
+                FROM {{assessments}}
+                WHERE created_epoch >= ?
+                GROUP BY {group_by}
+                ORDER BY {group_by}
+            '''
+            df = self._read_tiers(query, list(formats) + [since or 0], since=since)
+            if df.empty:
+                return df
+            return df.groupby(buckets, as_index=False, sort=True)['count'].sum()
+        except Exception as e:
+            print(f"Error getting assessment time buckets: {e}")
+            return pd.DataFrame()
+    
+    def get_activity_heatmap(self):
+        """Assessments per weekday (rows, Monday first) and hour of day (columns)"""
+        day_names = ['Sunday', 'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+        day_order = day_names[1:] + day_names[:1]
+        
+        df = self.get_assessment_time_buckets('%w', '%H')
+        if df.empty:
+            return pd.DataFrame(index=day_order)
+        
+        df['day_of_week'] = [day_names[int(d)] for d in df['bucket_0']]
+        df['hour'] = df['bucket_1'].astype(int)
+        heatmap = df.pivot_table(index='day_of_week', columns='hour', values='count', aggfunc='sum', fill_value=0)
+        return heatmap.reindex(day_order)
+    
+    def get_monthly_assessment_counts(self):
+        """Assessments per calendar month, indexed by 'YYYY-MM'"""
+        df = self.get_assessment_time_buckets('%Y-%m')
+        if df.empty:
+            return pd.Series(dtype='int64')
+        counts = df.set_index('bucket_0')['count']
+        counts.index.name = 'month'
+        return counts
+    
     def test_connection(self):
         """Test database connection and show structure"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Show tables
-            cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-            tables = cursor.fetchall()
-            print(f"Tables in database: {[table[0] for table in tables]}")
-            
-            # Show assessments table structure
-            cursor.execute("PRAGMA table_info(assessments)")
-            columns = cursor.fetchall()
-            print(f"Assessments table columns: {[(col[1], col[2]) for col in columns]}")
-            
-            # Count records
-            cursor.execute("SELECT COUNT(*) FROM assessments")
-            assessment_count = cursor.fetchone()[0]
-            print(f"Total assessments in database: {assessment_count}")
+            with self._connection() as conn:
+                cursor = conn.cursor()
+                
+                # Show tables
+                cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+                tables = cursor.fetchall()
+                print(f"Tables in database: {[table[0] for table in tables]}")
+                
+                # Show assessments table structure
+                cursor.execute("PRAGMA table_info(assessments)")
+                columns = cursor.fetchall()
+                print(f"Assessments table columns: {[(col[1], col[2]) for col in columns]}")
+                
+                # Count records
+                cursor.execute("SELECT COUNT(*) FROM assessments")
+                assessment_count = cursor.fetchone()[0]
+                print(f"Total assessments in database: {assessment_count}")
             
-            conn.close()
             return True
         except Exception as e:
             print(f"Database connection test failed: {e}")
@@ -0,0 +1,138 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from database import DEFAULT_DB_PATH
+from tiering import archive_dir_for, list_archives
+
+
+BACKUP_DIR = "data/backups"
+BACKUP_KEEP = 7
+BACKUP_PAGES_PER_STEP = 256
+INCREMENTAL_VACUUM_PAGES = 2000
+
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def database_metrics(db_path=DEFAULT_DB_PATH, backup_dir=BACKUP_DIR):
+    """Live size and page statistics for the maintenance panel"""
+    conn = sqlite3.connect(db_path)
+    try:
+        page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+        page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+        freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        auto_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+    return {
+        "size_bytes": _file_size(db_path) + _file_size(db_path + "-wal"),
+        "page_size": page_size,
+        "page_count": page_count,
+        "freelist_count": freelist_count,
+        "free_bytes": freelist_count * page_size,
+        "auto_vacuum": {0: "none", 1: "full", 2: "incremental"}.get(auto_vacuum, str(auto_vacuum)),
+        "last_backup": last_backup_time(backup_dir),
+        "archive_bytes": sum(_file_size(path) for _, _, path in list_archives(archive_dir_for(db_path))),
+    }
+
+
+def optimize_database(db_path=DEFAULT_DB_PATH, vacuum_pages=INCREMENTAL_VACUUM_PAGES):
+    """Refresh planner statistics and return free pages to the OS.
+
+    ANALYZE + PRAGMA optimize keep query plans current. Free pages are
+    released with PRAGMA incremental_vacuum, which only locks the database
+    briefly. A database still in auto_vacuum=NONE mode is switched to
+    INCREMENTAL, which needs one full VACUUM.
+    """
+    before = database_metrics(db_path)
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA optimize")
+        full_vacuum = conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2
+        if full_vacuum:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+        else:
+            conn.execute(f"PRAGMA incremental_vacuum({int(vacuum_pages)})")
+    finally:
+        conn.close()
+    after = database_metrics(db_path)
+
+    return {
+        "full_vacuum": full_vacuum,
+        "pages_freed": before["page_count"] - after["page_count"],
+        "bytes_freed": before["size_bytes"] - after["size_bytes"],
+        "before": before,
+        "after": after,
+    }
+
+
+def backup_database(db_path=DEFAULT_DB_PATH, backup_dir=BACKUP_DIR, pages=BACKUP_PAGES_PER_STEP,
+                    keep=BACKUP_KEEP, progress=None):
+    """Online backup with the SQLite backup API.
+
+    Copies `pages` pages per step and sleeps between steps, so writers are
+    not blocked for the whole copy. `progress(remaining, total)` is called
+    after each step. Only the newest `keep` backups are retained.
+    Returns the path of the new backup.
+    """
+    os.makedirs(backup_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    stamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+    target_path = os.path.join(backup_dir, f"{name}_{stamp}.db")
+    partial_path = target_path + ".partial"
+
+    source = sqlite3.connect(db_path)
+    target = sqlite3.connect(partial_path)
+    try:
+        source.backup(target, pages=pages, sleep=0.005,
+                      progress=(lambda status, remaining, total: progress(remaining, total)) if progress else None)
+    finally:
+        target.close()
+        source.close()
+    # Renamed only once complete, so a half-written file never counts as the last backup
+    os.replace(partial_path, target_path)
+
+    for old in list_backups(backup_dir, name)[keep:]:
+        os.remove(old)
+    return target_path
+
+
+def list_backups(backup_dir=BACKUP_DIR, name=None):
+    """Backup files, newest first"""
+    if not os.path.isdir(backup_dir):
+        return []
+    prefix = f"{name}_" if name else ""
+    paths = [os.path.join(backup_dir, f) for f in os.listdir(backup_dir)
+             if f.endswith(".db") and f.startswith(prefix)]
+    return sorted(paths, key=os.path.getmtime, reverse=True)
+
+
+def last_backup_time(backup_dir=BACKUP_DIR):
+    """Modification time of the newest backup, or None"""
+    backups = list_backups(backup_dir)
+    return datetime.fromtimestamp(os.path.getmtime(backups[0])) if backups else None
+
+
+def format_bytes(size):
+    """Human-readable byte count"""
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(size) < 1024 or unit == "GB":
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def format_age(moment):
+    """'5 minutes ago' style text for a datetime, or 'Never'"""
+    if moment is None:
+        return "Never"
+    seconds = max(0, (datetime.now() - moment).total_seconds())
+    for unit, length in (("day", 86400), ("hour", 3600), ("minute", 60)):
+        if seconds >= length:
+            count = int(seconds // length)
+            return f"{count} {unit}{'s' if count != 1 else ''} ago"
+    return "just now"
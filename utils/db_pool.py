@@ -0,0 +1,67 @@
+import sqlite3
+import queue
+import threading
+import os
+from contextlib import contextmanager
+
+
+class SQLitePool:
+    """Small pool of reusable SQLite connections.
+
+    Streamlit runs every session on its own thread, so connections are opened
+    with check_same_thread=False and handed to one borrower at a time.
+    """
+
+    def __init__(self, db_path, size=4, timeout=10.0):
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self._closed = False
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        conn.execute("PRAGMA busy_timeout = %d" % int(self.timeout * 1000))
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success, rolls back on error"""
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def _release(self, conn):
+        with self._lock:
+            if self._closed:
+                conn.close()
+                return
+            try:
+                self._idle.put_nowait(conn)
+            except queue.Full:
+                # More borrowers than pool slots - drop the extra connection
+                conn.close()
+
+    def close(self):
+        """Close all idle connections; borrowed ones close when returned"""
+        with self._lock:
+            self._closed = True
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
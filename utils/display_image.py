@@ -0,0 +1,149 @@
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import streamlit as st
+from PIL import Image
+
+from image_store import DIGEST_PATTERN, get_image_store
+from perf import perf_enabled
+
+
+# Images for the browser, sized for where they are rendered. st.image sends
+# whatever it is given over the websocket - PIL images as JPEG quality 100 -
+# so full-resolution photos and crops cost megabytes per rerun on clinic
+# Wi-Fi. show_display_image() resizes to the rendered width, encodes once
+# per image hash and records the bytes sent per page (shown with ?perf=1).
+#
+# JPEG is what st.image passes through untouched; it re-encodes anything
+# else (WebP included) as JPEG itself, so WEBP is only for callers serving
+# the bytes some other way.
+
+DISPLAY_WIDTH = int(os.environ.get("MEDICAL_DISPLAY_WIDTH", "720"))
+DISPLAY_QUALITY = int(os.environ.get("MEDICAL_DISPLAY_QUALITY", "80"))
+DISPLAY_FORMATS = ("JPEG", "WEBP")
+DISPLAY_CACHE_BYTES = 32 * 1024 * 1024
+IMAGE_BYTES_KEY = '_image_bytes'
+
+_encoded = OrderedDict()  # (image hash, width, format, quality) -> bytes
+_encoded_lock = threading.Lock()
+_encoded_size = 0
+_stats = {"hits": 0, "misses": 0}
+
+
+def image_hash(source):
+    """Content hash of an image-store digest, file path, encoded bytes, PIL image or array"""
+    if isinstance(source, str):
+        if DIGEST_PATTERN.match(source):
+            return source
+        with open(source, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    if isinstance(source, (bytes, bytearray)):
+        return hashlib.sha256(source).hexdigest()
+    if isinstance(source, Image.Image):
+        digest = hashlib.sha256(f"{source.mode}{source.size}".encode())
+        digest.update(source.tobytes())
+        return digest.hexdigest()
+    array = np.ascontiguousarray(source)
+    digest = hashlib.sha256(f"{array.dtype}{array.shape}".encode())
+    digest.update(array.data)
+    return digest.hexdigest()
+
+
+def open_source(source):
+    """PIL image for anything image_hash() accepts"""
+    if isinstance(source, str):
+        return get_image_store().load_image(source) if DIGEST_PATTERN.match(source) else Image.open(source)
+    if isinstance(source, (bytes, bytearray)):
+        return Image.open(io.BytesIO(source))
+    if isinstance(source, Image.Image):
+        return source
+    return Image.fromarray(np.asarray(source))
+
+
+def encode_display_image(image, width=DISPLAY_WIDTH, format="JPEG", quality=DISPLAY_QUALITY):
+    """`image` scaled down to at most `width` pixels wide, encoded as JPEG or WebP"""
+    if format not in DISPLAY_FORMATS:
+        raise ValueError(f"Unsupported display format {format!r}; expected one of {', '.join(DISPLAY_FORMATS)}")
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    if image.width > width:
+        image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, quality=quality)
+    return buffer.getvalue()
+
+
+def display_image_bytes(source, width=DISPLAY_WIDTH, format="JPEG", quality=DISPLAY_QUALITY):
+    """encode_display_image() of `source`, cached per image hash and settings"""
+    global _encoded_size
+    key = (image_hash(source), width, format, quality)
+    with _encoded_lock:
+        data = _encoded.get(key)
+        if data is not None:
+            _encoded.move_to_end(key)
+            _stats["hits"] += 1
+            return data
+        _stats["misses"] += 1
+
+    data = encode_display_image(open_source(source), width, format, quality)
+    with _encoded_lock:
+        if key not in _encoded:
+            _encoded[key] = data
+            _encoded_size += len(data)
+        while _encoded_size > DISPLAY_CACHE_BYTES and _encoded:
+            _, evicted = _encoded.popitem(last=False)
+            _encoded_size -= len(evicted)
+    return data
+
+
+def display_cache_stats():
+    with _encoded_lock:
+        return dict(_stats, entries=len(_encoded), bytes=_encoded_size)
+
+
+def record_image_bytes(page, sent):
+    """Count one image of `sent` bytes against `page` for this session"""
+    pages = st.session_state.setdefault(IMAGE_BYTES_KEY, {})
+    counts = pages.setdefault(page, {"images": 0, "bytes": 0, "largest": 0})
+    counts["images"] += 1
+    counts["bytes"] += sent
+    counts["largest"] = max(counts["largest"], sent)
+
+
+def show_display_image(source, page, caption=None, use_container_width=True, width=DISPLAY_WIDTH,
+                       quality=DISPLAY_QUALITY):
+    """st.image of a display-size JPEG of `source`, counted against `page`"""
+    data = display_image_bytes(source, width, "JPEG", quality)
+    record_image_bytes(page, len(data))
+    st.image(data, caption=caption, output_format="JPEG", use_container_width=use_container_width)
+
+
+def image_bytes_summary():
+    """Per-page image counts and bytes sent for this session"""
+    return [
+        {
+            "Page": page,
+            "Images": counts["images"],
+            "Sent (KB)": round(counts["bytes"] / 1024, 1),
+            "Avg (KB)": round(counts["bytes"] / counts["images"] / 1024, 1),
+            "Largest (KB)": round(counts["largest"] / 1024, 1),
+        }
+        for page, counts in st.session_state.get(IMAGE_BYTES_KEY, {}).items()
+        if counts["images"]
+    ]
+
+
+def show_image_bytes():
+    """Show image bytes sent in the sidebar when perf mode is enabled"""
+    if not perf_enabled():
+        return
+    summary = image_bytes_summary()
+    with st.sidebar.expander("🖼️ Image Bytes Sent", expanded=True):
+        if summary:
+            st.dataframe(summary, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No images sent yet.")
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Eye disease model variants for CPU-only clinic laptops.
+
+Build step: converts models/eye_disease_model.h5 into float16 and int8
+post-training-quantised TFLite files, calibrating int8 on a small set of
+eye photos.
+
+Usage: python utils/eye_model.py <calibration image folder> [max images]
+
+At runtime EYE_MODEL_VARIANT (float32 | float16 | int8) picks the file that
+load_eye_predictor() serves; a missing quantised file falls back to float32.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from tf_runtime import configure_threads, load_keras_predictor, record_load, timed_predictor
+
+
+EYE_MODEL_PATH = "models/eye_disease_model.h5"
+EYE_INPUT_SIZE = 224
+VARIANTS = ("float32", "float16", "int8")
+DEFAULT_VARIANT = os.environ.get("EYE_MODEL_VARIANT", "float32")
+CALIBRATION_IMAGES = 100
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+_predictors = {}
+_predictors_lock = threading.Lock()
+
+
+def variant_path(variant, model_path=EYE_MODEL_PATH):
+    """File holding `variant` of the model"""
+    if variant not in VARIANTS:
+        raise ValueError(f"Unknown eye model variant {variant!r}; expected one of {', '.join(VARIANTS)}")
+    if variant == "float32":
+        return model_path
+    return f"{os.path.splitext(model_path)[0]}_{variant}.tflite"
+
+
+def resolve_variant(variant=None, model_path=EYE_MODEL_PATH):
+    """Requested variant if its file exists, else float32"""
+    variant = variant or DEFAULT_VARIANT
+    if variant != "float32" and not os.path.exists(variant_path(variant, model_path)):
+        print(f"Eye model variant {variant} not built - using float32")
+        return "float32"
+    return variant
+
+
+def model_version(variant=None, model_path=EYE_MODEL_PATH):
+    """'<variant>:<size>:<mtime_ns>' of the file that would be served, for cache keys.
+
+    Rebuilding or replacing the file changes it; 'missing' stands in for
+    size and mtime while there is no file (placeholder predictions).
+    """
+    variant = variant or DEFAULT_VARIANT
+    if variant != "float32" and not os.path.exists(variant_path(variant, model_path)):
+        variant = "float32"
+    try:
+        stat = os.stat(variant_path(variant, model_path))
+    except OSError:
+        return f"{variant}:missing"
+    return f"{variant}:{stat.st_size}:{stat.st_mtime_ns}"
+
+
+def load_calibration_images(folder, limit=CALIBRATION_IMAGES):
+    """Up to `limit` images from `folder`, preprocessed like preprocess_eye_image()"""
+    from PIL import Image
+
+    names = sorted(n for n in os.listdir(folder) if n.lower().endswith(IMAGE_EXTENSIONS))[:limit]
+    images = []
+    for name in names:
+        with Image.open(os.path.join(folder, name)) as image:
+            images.append(preprocess(np.array(image.convert("RGB"))))
+    return images
+
+
+def preprocess(image):
+    """RGB array -> (1, 224, 224, 3) float32 in [0, 1], as preprocess_eye_image()"""
+    import tensorflow as tf
+
+    resized = tf.image.resize(image, [EYE_INPUT_SIZE, EYE_INPUT_SIZE]).numpy()
+    return np.expand_dims(resized / 255.0, axis=0).astype(np.float32)
+
+
+def build_variants(calibration_images, model_path=EYE_MODEL_PATH):
+    """Write the float16 and int8 TFLite variants; returns {variant: path}.
+
+    float16 halves the weights and keeps float activations. int8 quantises
+    weights and activations using ranges observed on `calibration_images`;
+    input and output stay float32, so callers don't change.
+    """
+    import tensorflow as tf
+
+    model = tf.keras.models.load_model(model_path)
+    written = {}
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.target_spec.supported_types = [tf.float16]
+    written["float16"] = _write(converter.convert(), variant_path("float16", model_path))
+
+    def representative_dataset():
+        for image in calibration_images:
+            yield [image]
+
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    converter.representative_dataset = representative_dataset
+    converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    written["int8"] = _write(converter.convert(), variant_path("int8", model_path))
+    return written
+
+
+def _write(data, path):
+    with open(path, "wb") as f:
+        f.write(data)
+    return path
+
+
+def quantize(values, scale, zero_point, dtype):
+    """Float array -> integer tensor values for a quantised input"""
+    info = np.iinfo(dtype)
+    return np.clip(np.round(values / scale + zero_point), info.min, info.max).astype(dtype)
+
+
+def dequantize(values, scale, zero_point):
+    """Integer tensor values -> float array for a quantised output"""
+    return (values.astype(np.float32) - zero_point) * scale
+
+
+class TFLitePredictor:
+    """predict(batch) over a TFLite interpreter, one image at a time.
+
+    The interpreter is not thread-safe, so calls are serialised.
+    """
+
+    def __init__(self, path, num_threads=None):
+        import tensorflow as tf
+
+        self.path = path
+        self._interpreter = tf.lite.Interpreter(model_path=path, num_threads=num_threads)
+        self._interpreter.allocate_tensors()
+        self._input = self._interpreter.get_input_details()[0]
+        self._output = self._interpreter.get_output_details()[0]
+        self._lock = threading.Lock()
+
+    def __call__(self, batch):
+        outputs = []
+        with self._lock:
+            for image in np.asarray(batch, dtype=np.float32):
+                value = image[np.newaxis]
+                if self._input["dtype"] != np.float32:
+                    value = quantize(value, *self._input["quantization"], self._input["dtype"])
+                self._interpreter.set_tensor(self._input["index"], value)
+                self._interpreter.invoke()
+                output = self._interpreter.get_tensor(self._output["index"])
+                if self._output["dtype"] != np.float32:
+                    output = dequantize(output, *self._output["quantization"])
+                outputs.append(output[0])
+        return np.stack(outputs)
+
+
+def load_eye_predictor(variant=None, model_path=EYE_MODEL_PATH, num_threads=None):
+    """Process-wide predict callable for the selected variant, or None if it can't load"""
+    variant = resolve_variant(variant, model_path)
+    key = (variant, model_path)
+    with _predictors_lock:
+        if key in _predictors:
+            return _predictors[key]
+        try:
+            if variant == "float32":
+                predictor = load_keras_predictor("eye", model_path)
+            else:
+                configure_threads()
+                start = time.perf_counter()
+                interpreter = TFLitePredictor(variant_path(variant, model_path), num_threads)
+                record_load("eye", (time.perf_counter() - start) * 1000)
+                predictor = timed_predictor("eye", interpreter)
+        except Exception as e:
+            print(f"Error loading eye model ({variant}): {e}")
+            predictor = None
+        _predictors[key] = predictor
+        return predictor
+
+
+def main():
+    if len(sys.argv) < 2:
+        print(__doc__)
+        return 1
+    limit = int(sys.argv[2]) if len(sys.argv) > 2 else CALIBRATION_IMAGES
+    images = load_calibration_images(sys.argv[1], limit)
+    if not images:
+        print(f"No calibration images found in {sys.argv[1]}")
+        return 1
+
+    print(f"Calibrating on {len(images)} images...")
+    for variant, path in build_variants(images).items():
+        print(f"{variant:<8} {path}  {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+    print(f"float32  {EYE_MODEL_PATH}  {os.path.getsize(EYE_MODEL_PATH) / 1024 / 1024:.1f} MB")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
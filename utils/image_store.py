@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Content-addressed image store for assessment photos.
+
+Usage: python utils/image_store.py gc [grace hours]
+
+Images are written once under their SHA-256 (<root>/ab/cd/<digest>) with a
+JPEG thumbnail next to them; sessions and saved results keep only the hex
+digest. gc removes images no saved assessment refers to once they are
+older than the grace period, which covers patients still mid-test.
+"""
+
+import io
+import os
+import re
+import sys
+import threading
+import time
+from hashlib import sha256
+
+from PIL import Image
+
+
+IMAGE_STORE_DIR = os.environ.get("MEDICAL_IMAGE_STORE", "data/images")
+THUMBNAIL_SIZE = (256, 256)
+THUMBNAIL_SUFFIX = ".thumb.jpg"
+IMAGE_GC_GRACE = 24 * 60 * 60
+IMAGE_GC_INTERVAL = 6 * 60 * 60
+
+DIGEST_PATTERN = re.compile(r"^[0-9a-f]{64}$")
+IMAGES_KEY = "images"  # results_data[IMAGES_KEY] = {role: digest}
+
+_stores = {}
+_stores_lock = threading.Lock()
+_gc_jobs = {}
+_gc_jobs_lock = threading.Lock()
+
+
+class ImageStore:
+    """Write-once image files addressed by the SHA-256 of their bytes"""
+
+    def __init__(self, root=IMAGE_STORE_DIR):
+        self.root = root
+
+    def path(self, digest):
+        """File holding the image with `digest`"""
+        if not DIGEST_PATTERN.match(digest or ""):
+            raise ValueError(f"Not an image digest: {digest!r}")
+        return os.path.join(self.root, digest[:2], digest[2:4], digest)
+
+    def thumbnail_path(self, digest):
+        return self.path(digest) + THUMBNAIL_SUFFIX
+
+    def exists(self, digest):
+        return isinstance(digest, str) and bool(DIGEST_PATTERN.match(digest)) and os.path.exists(self.path(digest))
+
+    def put(self, data, thumbnail=True):
+        """Store image bytes (bytes or a file-like object); returns the digest.
+
+        An image that is already stored isn't rewritten - its timestamp is
+        refreshed so gc counts the grace period from its latest use.
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            data.seek(0)
+            data = data.read()
+        digest = sha256(data).hexdigest()
+        path = self.path(digest)
+        if os.path.exists(path):
+            os.utime(path)
+            return digest
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._write(path, data)
+        if thumbnail:
+            try:
+                self._write_thumbnail(digest, data)
+            except Exception as e:
+                print(f"Could not create thumbnail for {digest}: {e}")
+        return digest
+
+    def put_image(self, image, format="PNG", thumbnail=True):
+        """Encode a PIL image and store it; returns the digest"""
+        buffer = io.BytesIO()
+        image.save(buffer, format=format)
+        return self.put(buffer.getvalue(), thumbnail)
+
+    def open(self, digest):
+        """The stored bytes as a BytesIO, ready for PIL or the detection code"""
+        with open(self.path(digest), "rb") as f:
+            return io.BytesIO(f.read())
+
+    def load_image(self, digest):
+        """The stored image as a PIL image"""
+        return Image.open(self.open(digest))
+
+    def thumbnail(self, digest):
+        """Path of the image's thumbnail, created if it's missing"""
+        path = self.thumbnail_path(digest)
+        if not os.path.exists(path):
+            with open(self.path(digest), "rb") as f:
+                self._write_thumbnail(digest, f.read())
+        return path
+
+    def digests(self):
+        """(digest, mtime) for every stored image"""
+        for dirpath, _, filenames in os.walk(self.root):
+            for name in filenames:
+                if DIGEST_PATTERN.match(name):
+                    yield name, os.path.getmtime(os.path.join(dirpath, name))
+
+    def collect_garbage(self, referenced, grace=IMAGE_GC_GRACE):
+        """Delete images not in `referenced` that are older than `grace` seconds; returns how many"""
+        cutoff = time.time() - grace
+        removed = 0
+        for digest, mtime in list(self.digests()):
+            if digest in referenced or mtime >= cutoff:
+                continue
+            for path in (self.thumbnail_path(digest), self.path(digest)):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+            removed += 1
+        return removed
+
+    def _write_thumbnail(self, digest, data):
+        with Image.open(io.BytesIO(data)) as image:
+            image = image.convert("RGB")
+            image.thumbnail(THUMBNAIL_SIZE)
+            buffer = io.BytesIO()
+            image.save(buffer, format="JPEG", quality=80)
+        self._write(self.thumbnail_path(digest), buffer.getvalue())
+
+    @staticmethod
+    def _write(path, data):
+        partial_path = f"{path}.{os.getpid()}.{threading.get_ident()}.partial"
+        with open(partial_path, "wb") as f:
+            f.write(data)
+        os.replace(partial_path, path)
+
+
+def get_image_store(root=IMAGE_STORE_DIR):
+    """The process-wide store for `root`"""
+    with _stores_lock:
+        store = _stores.get(root)
+        if store is None:
+            store = _stores[root] = ImageStore(root)
+        return store
+
+
+def referenced_digests(repository):
+    """Digests any saved assessment (hot or archived) refers to.
+
+    Raises if the assessments can't be read - an empty set from a failed
+    read would let gc delete every stored photo.
+    """
+    assessments = repository.get_all_assessments(raise_errors=True)
+    if assessments.empty:
+        return set()
+    results = assessments["results"].dropna()
+    results = results[results.str.contains(f'"{IMAGES_KEY}"', regex=False)]
+    return {digest for text in results for digest in re.findall(r"[0-9a-f]{64}", text)}
+
+
+def collect_garbage(repository, store=None, grace=IMAGE_GC_GRACE):
+    """Remove unreferenced images past the grace period; returns how many.
+
+    Nothing is removed when no saved assessment refers to any image while
+    the store holds some: that is far more likely a database read gone wrong
+    (wrong file, emptied table) than every photo being abandoned.
+    """
+    store = store or get_image_store()
+    referenced = referenced_digests(repository)
+    if not referenced and next(store.digests(), None) is not None:
+        print(f"No saved assessment refers to an image in {store.root}; not collecting garbage")
+        return 0
+    return store.collect_garbage(referenced, grace)
+
+
+def start_image_gc_job(repository_factory, root=IMAGE_STORE_DIR, interval=IMAGE_GC_INTERVAL):
+    """Run collect_garbage() now and every `interval` seconds in a daemon thread.
+
+    Started at most once per store per process; returns the thread.
+    """
+    with _gc_jobs_lock:
+        job = _gc_jobs.get(root)
+        if job is not None and job.is_alive():
+            return job
+
+        def run():
+            while True:
+                try:
+                    removed = collect_garbage(repository_factory(), get_image_store(root))
+                    if removed:
+                        print(f"Removed {removed} unreferenced images from {root}")
+                except Exception as e:
+                    print(f"Image garbage collection failed: {e}")
+                time.sleep(interval)
+
+        job = threading.Thread(target=run, name="image-gc", daemon=True)
+        job.start()
+        _gc_jobs[root] = job
+        return job
+
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != "gc":
+        print(__doc__)
+        return 1
+    from repository import get_repository
+
+    grace = float(sys.argv[2]) * 3600 if len(sys.argv) > 2 else IMAGE_GC_GRACE
+    removed = collect_garbage(get_repository(), grace=grace)
+    print(f"Removed {removed} unreferenced images from {IMAGE_STORE_DIR}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Shared inference server: loads the eye and hearing models once per host and
+serves every Streamlit process over a Unix socket, coalescing concurrent
+requests into micro-batches.
+
+Usage: python utils/inference_server.py [socket path]
+"""
+
+import itertools
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import Future
+from multiprocessing import AuthenticationError
+from multiprocessing.connection import Client, Listener
+
+import numpy as np
+
+from eye_model import load_eye_predictor
+from key_file import read_or_create_key
+from tf_runtime import configure_threads, load_keras_predictor, warm_up
+
+
+INFERENCE_SOCKET = os.environ.get("MEDICAL_INFERENCE_SOCKET", "data/inference.sock")
+# multiprocessing.connection unpickles every message once the HMAC handshake
+# passes, so the key must be secret: MEDICAL_INFERENCE_KEY, else a random
+# per-host key created on first use, readable by this user only
+INFERENCE_KEY_PATH = os.environ.get("MEDICAL_INFERENCE_KEY_FILE", "data/inference.key")
+MAX_BATCH_SIZE = 32
+MAX_WAIT_SECONDS = 0.01
+REQUEST_TIMEOUT = 30
+MODEL_FILES = {
+    "eye": "models/eye_disease_model.h5",
+    "hearing": "models/hearing_assessment_model.h5",
+}
+
+_clients = {}
+_clients_lock = threading.Lock()
+_authkey = None
+_authkey_lock = threading.Lock()
+
+
+def get_inference_authkey():
+    """HMAC key shared by the server and its clients on this host"""
+    global _authkey
+    if _authkey is None:
+        with _authkey_lock:
+            if _authkey is None:
+                env_key = os.environ.get("MEDICAL_INFERENCE_KEY")
+                if env_key:
+                    _authkey = env_key.encode()
+                else:
+                    _authkey = read_or_create_key(INFERENCE_KEY_PATH)
+    return _authkey
+
+
+class MicroBatcher:
+    """Runs requests for the same model together.
+
+    A batch starts with the first waiting request and takes whatever else
+    arrives within `max_wait` seconds, up to `max_batch` rows. Inputs are
+    stacked along axis 0, run through one predict call per model, and the
+    output rows are split back per request.
+    """
+
+    def __init__(self, predict_fns, max_batch=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self.predict_fns = predict_fns
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "batches": 0, "rows": 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="inference-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, model, inputs):
+        """Queue `inputs` (rows along axis 0) for `model`; returns a Future"""
+        future = Future()
+        self._queue.put((model, np.asarray(inputs), future))
+        return future
+
+    def close(self):
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            rows = len(first[1])
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while rows < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+                rows += len(item[1])
+            self._run_batch(batch)
+            if stop:
+                return
+
+    def _run_batch(self, batch):
+        by_model = {}
+        for item in batch:
+            by_model.setdefault(item[0], []).append(item)
+
+        for model, items in by_model.items():
+            try:
+                predict = self.predict_fns.get(model)
+                if predict is None:
+                    raise KeyError(f"Model not loaded: {model}")
+                outputs = np.asarray(predict(np.concatenate([inputs for _, inputs, _ in items])))
+            except Exception as e:
+                for _, _, future in items:
+                    future.set_exception(e)
+                continue
+
+            offset = 0
+            for _, inputs, future in items:
+                future.set_result(outputs[offset:offset + len(inputs)])
+                offset += len(inputs)
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(items)
+            self.stats["rows"] += offset
+
+
+class InferenceServer:
+    """Accepts client connections and feeds their requests to one MicroBatcher"""
+
+    def __init__(self, predict_fns, address=INFERENCE_SOCKET, authkey=None,
+                 max_batch=MAX_BATCH_SIZE, max_wait=MAX_WAIT_SECONDS):
+        self.address = address
+        authkey = authkey or get_inference_authkey()
+        if os.path.lexists(address):
+            os.remove(address)  # left over from a server that didn't shut down cleanly
+        os.makedirs(os.path.dirname(address) or ".", exist_ok=True)
+        # The socket is created 0600 - no window in which other users can connect
+        umask = os.umask(0o177)
+        try:
+            self._listener = Listener(address, family="AF_UNIX", authkey=authkey)
+        finally:
+            os.umask(umask)
+        self.batcher = MicroBatcher(predict_fns, max_batch, max_wait)
+        self._connections = set()
+        self._closed = False
+
+    def serve_forever(self):
+        while not self._closed:
+            try:
+                conn = self._listener.accept()
+            except (OSError, EOFError, AuthenticationError):
+                if self._closed:
+                    return
+                continue  # failed handshake (wrong authkey) - keep serving
+            self._connections.add(conn)
+            threading.Thread(target=self._handle, args=(conn,), name="inference-client", daemon=True).start()
+
+    def _handle(self, conn):
+        send_lock = threading.Lock()
+
+        def reply(request_id, future):
+            try:
+                message = (request_id, future.result(), None)
+            except Exception as e:
+                message = (request_id, None, f"{type(e).__name__}: {e}")
+            with send_lock:
+                try:
+                    conn.send(message)
+                except OSError:
+                    pass  # client went away
+
+        while True:
+            try:
+                request_id, model, inputs = conn.recv()
+            except (EOFError, OSError):
+                break
+            self.batcher.submit(model, inputs).add_done_callback(
+                lambda future, request_id=request_id: reply(request_id, future)
+            )
+        self._connections.discard(conn)
+        conn.close()
+
+    def close(self):
+        self._closed = True
+        self._listener.close()
+        for conn in list(self._connections):
+            # Shutting the socket down wakes the handler's recv(); clients see
+            # EOF and fall back to local models
+            try:
+                with socket.fromfd(conn.fileno(), socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass  # handler already closed it
+        self.batcher.close()
+        if os.path.exists(self.address):
+            os.remove(self.address)
+
+
+class InferenceClient:
+    """One connection per process to the inference server, shared by all sessions"""
+
+    def __init__(self, address=INFERENCE_SOCKET, authkey=None):
+        # The handshake is mutual: a socket planted by someone without the key fails it
+        self._conn = Client(address, family="AF_UNIX", authkey=authkey or get_inference_authkey())
+        self._send_lock = threading.Lock()
+        self._pending = {}
+        self._ids = itertools.count()
+        self.connected = True
+        threading.Thread(target=self._read, name="inference-reader", daemon=True).start()
+
+    def predict(self, model, inputs, timeout=REQUEST_TIMEOUT):
+        """Model output for `inputs` (rows along axis 0)"""
+        future = Future()
+        with self._send_lock:
+            if not self.connected:
+                raise ConnectionError("Inference server connection closed")
+            request_id = next(self._ids)
+            self._pending[request_id] = future
+            self._conn.send((request_id, model, np.asarray(inputs)))
+        return future.result(timeout)
+
+    def _read(self):
+        while True:
+            try:
+                request_id, output, error = self._conn.recv()
+            except (EOFError, OSError):
+                break
+            future = self._pending.pop(request_id, None)
+            if future is None:
+                continue
+            if error:
+                future.set_exception(RuntimeError(error))
+            else:
+                future.set_result(output)
+
+        with self._send_lock:
+            self.connected = False
+            pending, self._pending = self._pending, {}
+        for future in pending.values():
+            future.set_exception(ConnectionError("Inference server connection closed"))
+
+    def close(self):
+        self._conn.close()
+
+
+def get_inference_client(address=INFERENCE_SOCKET):
+    """The process-wide client for `address`, or None when no server is listening"""
+    with _clients_lock:
+        client = _clients.get(address)
+        if client is not None and client.connected:
+            return client
+        _clients.pop(address, None)
+        if not os.path.exists(address):
+            return None
+        try:
+            client = _clients[address] = InferenceClient(address)
+        except (OSError, EOFError, AuthenticationError) as e:
+            if isinstance(e, AuthenticationError):
+                print(f"Inference server at {address} failed authentication - not using it")
+            return None
+        return client
+
+
+def remote_predict(model, inputs, address=INFERENCE_SOCKET):
+    """Run `model` on the shared server; None if it is unavailable.
+
+    Callers fall back to loading the model in their own process.
+    """
+    client = get_inference_client(address)
+    if client is None:
+        return None
+    try:
+        return client.predict(model, inputs)
+    except Exception as e:
+        print(f"Shared inference failed for {model}: {e}")
+        return None
+
+
+def load_models(model_files=MODEL_FILES):
+    """predict callables for every model file that loads"""
+    predict_fns = {}
+    for name, path in model_files.items():
+        if name == "eye":
+            # Serves the EYE_MODEL_VARIANT build (float32, float16 or int8)
+            predictor = load_eye_predictor(model_path=path)
+            if predictor is not None:
+                predict_fns[name] = predictor
+            continue
+        try:
+            predict_fns[name] = load_keras_predictor(name, path)
+        except Exception as e:
+            print(f"Skipping {name} model ({path}): {e}")
+    return predict_fns
+
+
+def load_local_models(address=INFERENCE_SOCKET, model_files=MODEL_FILES):
+    """load_models() for this process's startup warm-up - none while the shared server answers.
+
+    The server already holds every model once per host; if it goes away
+    later, callers load the model they need on first use.
+    """
+    if get_inference_client(address) is not None:
+        print(f"Models served by the inference server at {address} - skipping local warm-up")
+        return {}
+    return load_models(model_files)
+
+
+def main():
+    address = sys.argv[1] if len(sys.argv) > 1 else INFERENCE_SOCKET
+    configure_threads()
+    predict_fns = load_models()
+    if not predict_fns:
+        print("No models loaded - nothing to serve")
+        return 1
+    # Trace every model before the socket opens, so no client pays for it
+    for name, timing in warm_up(predict_fns)["models"].items():
+        print(f"{name}: loaded in {timing['load_ms']:.0f} ms, first inference {timing['first_inference_ms']:.0f} ms")
+
+    server = InferenceServer(predict_fns, address)
+    print(f"Serving {', '.join(sorted(predict_fns))} on {address} "
+          f"(batches of up to {MAX_BATCH_SIZE}, {MAX_WAIT_SECONDS * 1000:.0f} ms max wait)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+import os
+import secrets
+
+
+# Per-host secret keys (session signing, inference authentication) kept in
+# owner-only files next to the databases. Every worker process on the host
+# reads the same file, so a key made by one of them is trusted by all.
+
+KEY_BYTES = 32
+
+
+def read_or_create_key(path, size=KEY_BYTES):
+    """The key stored at `path`, created from `size` random bytes on first use.
+
+    A new key is written to a private temporary file and linked into place,
+    so of several processes starting together exactly one key wins and no
+    process reads a half-written file. A key file readable by group or
+    others, or an empty one, raises PermissionError instead of being used.
+    """
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    if not os.path.exists(path):
+        temp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{secrets.token_hex(4)}")
+        fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(secrets.token_bytes(size))
+            os.link(temp_path, path)
+        except FileExistsError:
+            pass  # another process linked its key first - use that one
+        finally:
+            os.remove(temp_path)
+
+    if os.stat(path).st_mode & 0o077:
+        raise PermissionError(f"{path} is readable by other users; chmod 600 it")
+    with open(path, "rb") as f:
+        key = f.read()
+    if not key:
+        raise PermissionError(f"{path} is empty")
+    return key
@@ -1,115 +1,41 @@
-import tensorflow as tf
+"""
+Streamlit side of the assessment pipeline: session-based patient handling and
+messages around the headless functions in utils/core.
+"""
+
 import numpy as np
-from PIL import Image
 import streamlit as st
-import pickle
 import time
-from database import MedicalDB
-
-
-# ============ EYE DISEASE FUNCTIONS ============
-
-
-def load_eye_model():
-    # For now, we'll create a simple working model instead of loading the broken one
-    # This will let your app work while we fix the real model
-    return None  # We'll handle this in predict function
+from repository import get_repository
+import core
+from core import (EYE_CLASSES, analyze_hearing_symptoms, calculate_overall_health_score, dummy_hearing_result,
+                  generate_eye_recommendations, generate_health_recommendations, generate_hearing_recommendations,
+                  load_eye_model, predict_eye_disease, preprocess_eye_image)
 
 
-def preprocess_eye_image(image):
-    # Make image the right size
-    image = np.array(image)
-    # Resize to standard size
-    image = tf.image.resize(image, [224, 224])
-    image = image / 255.0
-    image = np.expand_dims(image, axis=0)
-    return image
+# ============ MODEL FUNCTIONS ============
 
 
-def predict_eye_disease(processed_image):
-    # For now, return realistic-looking dummy results
-    # This lets you test your app interface
-    
-    # Simulate some analysis time
-    import time
-    time.sleep(1)  # Pretend we're analyzing
-    
-    # Return realistic predictions
-    results = {
-        "Normal": 0.65,
-        "Mild Diabetic Retinopathy": 0.20,
-        "Moderate Diabetic Retinopathy": 0.10,
-        "Severe Diabetic Retinopathy": 0.05
-    }
-    
-    return results
-
-
-# ============ HEARING ASSESSMENT FUNCTIONS ============
-
-
-@st.cache_resource
 def load_hearing_model():
-    """Load the trained hearing assessment model"""
-    try:
-        model = tf.keras.models.load_model('models/hearing_assessment_model.h5')
-        return model
-    except Exception as e:
-        st.error(f"Error loading hearing model: {e}")
-        return None
+    """Predict callable for the hearing model - already loaded if startup warm-up ran"""
+    model = core.load_hearing_model()
+    if model is None:
+        st.error("Error loading hearing model")
+    return model
 
 
-@st.cache_resource
 def load_hearing_scaler():
     """Load the hearing assessment data scaler"""
-    try:
-        with open('models/hearing_scaler.pkl', 'rb') as f:
-            scaler = pickle.load(f)
-        return scaler
-    except Exception as e:
-        st.error(f"Error loading hearing scaler: {e}")
-        return None
+    scaler = core.load_hearing_scaler()
+    if scaler is None:
+        st.error("Error loading hearing scaler")
+    return scaler
 
 
 def predict_hearing_loss(age, physical_score):
     """Predict hearing loss based on age and physical score"""
     try:
-        model = load_hearing_model()
-        scaler = load_hearing_scaler()
-        
-        if model is None or scaler is None:
-            # Return dummy results if model can't load
-            return {
-                "status": "Normal" if physical_score > 35 else "Hearing Loss",
-                "confidence": 0.75,
-                "probability": 0.25 if physical_score > 35 else 0.75,
-                "risk_level": "Low" if physical_score > 40 else "Moderate"
-            }
-        
-        # Prepare input data
-        input_data = np.array([[age, physical_score]])
-        input_scaled = scaler.transform(input_data)
-        
-        # Make prediction
-        prediction_prob = model.predict(input_scaled)[0][0]
-        prediction = "Hearing Loss" if prediction_prob > 0.5 else "Normal"
-        confidence = float(prediction_prob if prediction_prob > 0.5 else 1 - prediction_prob)
-        
-        # Determine risk level based on probability
-        if prediction_prob < 0.3:
-            risk_level = "Low"
-        elif prediction_prob < 0.7:
-            risk_level = "Moderate"
-        else:
-            risk_level = "High"
-        
-        return {
-            "status": prediction,
-            "confidence": confidence,
-            "probability": float(prediction_prob),
-            "risk_level": risk_level
-        }
-        
+        return core.predict_hearing_loss(age, physical_score)
     except Exception as e:
         st.error(f"Hearing prediction error: {e}")
         return {
@@ -120,49 +46,6 @@ def predict_hearing_loss(age, physical_score):
         }
 
 
-def analyze_hearing_symptoms(symptoms_dict):
-    """Analyze hearing symptoms and provide assessment"""
-    
-    # Scoring system for symptoms
-    score = 0
-    
-    if symptoms_dict.get('hearing_difficulty', 'No') != 'No':
-        score += 2
-    if symptoms_dict.get('ear_pain', 'No') != 'No':
-        score += 1
-    if symptoms_dict.get('ringing', 'No') != 'No':
-        score += 2
-    if symptoms_dict.get('balance_issues', 'No') != 'No':
-        score += 1
-    if symptoms_dict.get('discharge', 'No') != 'No':
-        score += 2
-    
-    # Age factor
-    age = symptoms_dict.get('age', 30)
-    if age > 60:
-        score += 1
-    elif age > 40:
-        score += 0.5
-    
-    # Determine assessment
-    if score <= 2:
-        assessment = "Low Risk"
-        recommendation = "Continue regular hearing check-ups. No immediate concern."
-    elif score <= 4:
-        assessment = "Moderate Risk"
-        recommendation = "Consider consulting an audiologist for detailed evaluation."
-    else:
-        assessment = "High Risk"
-        recommendation = "Immediate consultation with ENT specialist recommended."
-    
-    return {
-        "risk_score": score,
-        "assessment": assessment,
-        "recommendation": recommendation,
-        "symptoms_detected": score > 2
-    }
-
-
 # ============ PATIENT REGISTRATION & DATABASE FUNCTIONS ============
 
 
@@ -191,7 +74,7 @@ def register_patient_session():
             
             if submit and name and age:
                 try:
-                    db = MedicalDB()
+                    db = get_repository()
                     patient_id = db.add_patient(name, age, gender, email, phone)
                     
                     st.session_state['patient_registered'] = True
@@ -232,31 +115,9 @@ def save_assessment_result(assessment_type, results, risk_level, recommendations
     """Save assessment results to database"""
     if st.session_state.get('patient_registered') and st.session_state.get('patient_id'):
         try:
-            db = MedicalDB()
-            
-            # Generate recommendations if not provided
-            if not recommendations:
-                if assessment_type == "Eye Disease Assessment":
-                    recommendations = generate_eye_recommendations(results, risk_level)
-                elif assessment_type == "Hearing Assessment":
-                    recommendations = generate_hearing_recommendations(results, risk_level)
-                else:
-                    recommendations = f"Based on {assessment_type}, risk level: {risk_level}"
-            
-            # Determine if case is critical
-            critical_flag = risk_level in ['High', 'Severe', 'Critical'] or (
-                isinstance(results, dict) and 
-                max(results.values()) > 0.8 if results else False
-            )
-            
-            db.add_assessment(
-                patient_id=st.session_state['patient_id'],
-                assessment_type=assessment_type,
-                results=str(results),
-                risk_level=risk_level,
-                recommendations=recommendations,
-                critical_flag=critical_flag
-            )
+            critical_flag = core.is_critical(results, risk_level)
+            core.save_assessment(st.session_state['patient_id'], assessment_type, str(results), risk_level,
+                                 recommendations, critical_flag)
             
             # Show appropriate warnings
             if critical_flag:
@@ -273,105 +134,6 @@ def save_assessment_result(assessment_type, results, risk_level, recommendations
         st.info("💾 Results displayed but not saved (patient not registered in database)")
 
 
-def generate_eye_recommendations(results, risk_level):
-    """Generate specific eye health recommendations"""
-    recommendations = []
-    
-    if risk_level in ['High', 'Severe']:
-        recommendations.append("👨‍⚕️ URGENT: Consult an ophthalmologist within 24-48 hours")
-        recommendations.append("👁️ Avoid straining your eyes until professional evaluation")
-        recommendations.append("📋 Bring this report to your eye doctor appointment")
-    elif risk_level == 'Moderate':
-        recommendations.append("👁️ Schedule an eye examination within 2-4 weeks")
-        recommendations.append("👁️ Monitor symptoms and report any changes")
-    
-    recommendations.extend([
-        "🍎 Maintain a diet rich in leafy greens and omega-3 fatty acids",
-        "💧 Stay hydrated and get adequate sleep",
-        "🚫 Avoid smoking and limit alcohol consumption",
-        "🌞 Protect eyes from UV radiation with quality sunglasses"
-    ])
-    
-    return "; ".join(recommendations)
-
-
-def generate_hearing_recommendations(results, risk_level):
-    """Generate specific hearing health recommendations"""
-    recommendations = []
-    
-    if risk_level in ['High', 'Severe']:
-        recommendations.append("👨‍⚕️ URGENT: See an ENT specialist or audiologist immediately")
-        recommendations.append("🔊 Avoid loud environments until professional evaluation")
-    elif risk_level == 'Moderate':
-        recommendations.append("👂 Schedule a hearing test with an audiologist")
-        recommendations.append("🔊 Be mindful of noise exposure")
-    
-    recommendations.extend([
-        "🛡️ Protect ears from loud noises (>85 dB)",
-        "🧽 Keep ears clean and dry",
-        "💊 Avoid medications that may affect hearing without doctor consultation",
-        "🏥 Regular hearing check-ups, especially if over 50"
-    ])
-    
-    return "; ".join(recommendations)
-
-
-# ============ UTILITY FUNCTIONS ============
-
-
-def calculate_overall_health_score(eye_result, hearing_result):
-    """Calculate overall health score based on both assessments"""
-    
-    eye_score = 100 - (eye_result.get("Mild Diabetic Retinopathy", 0) * 25 + 
-                       eye_result.get("Moderate Diabetic Retinopathy", 0) * 50 + 
-                       eye_result.get("Severe Diabetic Retinopathy", 0) * 75) * 100
-    
-    hearing_score = 100 - (hearing_result.get("probability", 0) * 100)
-    
-    overall_score = (eye_score + hearing_score) / 2
-    
-    if overall_score >= 80:
-        health_status = "Excellent"
-    elif overall_score >= 60:
-        health_status = "Good"
-    elif overall_score >= 40:
-        health_status = "Fair"
-    else:
-        health_status = "Needs Attention"
-    
-    return {
-        "overall_score": round(overall_score, 1),
-        "eye_score": round(eye_score, 1),
-        "hearing_score": round(hearing_score, 1),
-        "health_status": health_status
-    }
-
-
-def generate_health_recommendations(eye_result, hearing_result):
-    """Generate personalized health recommendations"""
-    
-    recommendations = []
-    
-    # Eye recommendations
-    if eye_result.get("Normal", 0) < 0.7:
-        recommendations.append("👁️ Schedule regular eye exams with an ophthalmologist")
-        recommendations.append("👁️ Monitor blood sugar levels if diabetic")
-        recommendations.append("👁️ Maintain a healthy diet rich in vitamins A, C, and E")
-    
-    # Hearing recommendations  
-    if hearing_result.get("status") == "Hearing Loss":
-        recommendations.append("🔊 Consult with an audiologist for hearing evaluation")
-        recommendations.append("🔊 Protect ears from loud noises")
-        recommendations.append("🔊 Consider hearing aids if recommended by specialist")
-    
-    # General recommendations
-    recommendations.append("🏥 Maintain regular health check-ups")
-    recommendations.append("💊 Follow prescribed medications as directed")
-    recommendations.append("🥗 Maintain a balanced diet and regular exercise")
-    
-    return recommendations
-
-
 # ============ PATIENT SESSION MANAGEMENT ============
 
 
@@ -1,6 +1,8 @@
 import streamlit as st
 from pathlib import Path
 
+from auth import end_session
+
 def load_navbar_css():
     """Load custom CSS for the navbar"""
     st.markdown("""
@@ -434,7 +436,8 @@ def show_streamlit_navbar():
             
             with col_logout:
                 if st.button("🚪", key="nav_logout", use_container_width=True):
-                    # Clear session state for logout
+                    # Revoke the session token, then clear session state for logout
+                    end_session()
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
                     st.switch_page('streamlit_app.py')
@@ -448,7 +451,8 @@ def show_streamlit_navbar():
             
             with col_logout:
                 if st.button("🚪 Logout", key="nav_logout", use_container_width=True):
-                    # Clear session state for logout
+                    # Revoke the session token, then clear session state for logout
+                    end_session()
                     for key in list(st.session_state.keys()):
                         del st.session_state[key]
                     st.switch_page('streamlit_app.py')
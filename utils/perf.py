@@ -0,0 +1,79 @@
+import streamlit as st
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+TIMINGS_KEY = '_render_timings'
+MAX_SAMPLES = 50
+
+
+def perf_enabled():
+    """Timing display is opt-in via the ?perf=1 query parameter"""
+    return st.query_params.get("perf") == "1"
+
+
+def record_timing(label, elapsed_ms):
+    """Store one render duration (ms) for this session"""
+    timings = st.session_state.setdefault(TIMINGS_KEY, {})
+    if label not in timings:
+        timings[label] = deque(maxlen=MAX_SAMPLES)
+    timings[label].append(elapsed_ms)
+
+
+@contextmanager
+def render_timer(label):
+    """Time a page or fragment render.
+
+    Recorded in `finally` so renders that end in st.rerun()/st.stop()
+    are still counted.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_timing(label, (time.perf_counter() - start) * 1000)
+
+
+def timing_summary():
+    """Return per-label render statistics for this session"""
+    summary = []
+    for label, samples in st.session_state.get(TIMINGS_KEY, {}).items():
+        if not samples:
+            continue
+        ordered = sorted(samples)
+        summary.append({
+            "Render": label,
+            "Count": len(samples),
+            "Last (ms)": round(samples[-1], 1),
+            "Median (ms)": round(ordered[len(ordered) // 2], 1),
+            "Max (ms)": round(ordered[-1], 1)
+        })
+    return summary
+
+
+def show_render_timings():
+    """Show render timings in the sidebar when perf mode is enabled"""
+    if not perf_enabled():
+        return
+    summary = timing_summary()
+    with st.sidebar.expander("⏱️ Render Timings", expanded=True):
+        if summary:
+            st.dataframe(summary, hide_index=True, use_container_width=True)
+        else:
+            st.caption("No renders recorded yet.")
+
+
+def show_fragment_timing(fragment_label, page_label):
+    """Inline caption comparing the last fragment rerun with a full page rerun"""
+    if not perf_enabled():
+        return
+    timings = st.session_state.get(TIMINGS_KEY, {})
+    fragment_samples = timings.get(fragment_label)
+    page_samples = timings.get(page_label)
+    if not fragment_samples:
+        return
+    caption = f"⏱️ Last interaction: {fragment_samples[-1]:.1f} ms (fragment rerun)"
+    if page_samples:
+        caption += f" vs {page_samples[-1]:.1f} ms for the last full page rerun"
+    st.caption(caption)
@@ -0,0 +1,294 @@
+import json
+import os
+import re
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+
+from database import DEFAULT_DB_PATH, PATIENT_FIELDS, PATIENT_SEARCH_COLUMNS, MedicalDB, utc_now
+from snapshot import get_analytics_db
+from storage import DATABASE_URL_ENV, get_engine, sqlite_url
+
+
+# Repository layer: the one place pages get patient and assessment data
+# from. With the default SQLite file it is MedicalDB itself (pooled
+# connections, archive tiers, FTS search, cross-process read cache). With
+# MEDICAL_DB_URL pointing at a server database, SQLRepository runs the same
+# reads and writes in portable SQL over a SQLAlchemy pool.
+
+SERVER_SCHEMA = [
+    '''
+    CREATE TABLE IF NOT EXISTS patients (
+        id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        name TEXT NOT NULL,
+        age INTEGER,
+        gender TEXT,
+        email TEXT,
+        phone TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS assessments (
+        id INTEGER GENERATED BY DEFAULT AS IDENTITY PRIMARY KEY,
+        patient_id INTEGER REFERENCES patients (id),
+        assessment_type TEXT NOT NULL,
+        results TEXT,
+        risk_level TEXT,
+        recommendations TEXT,
+        critical_flag BOOLEAN DEFAULT FALSE,
+        created_at TEXT,
+        created_epoch BIGINT
+    )
+    ''',
+    "CREATE INDEX IF NOT EXISTS idx_assessments_created_epoch ON assessments (created_epoch)",
+    "CREATE INDEX IF NOT EXISTS idx_assessments_patient_epoch ON assessments (patient_id, created_epoch)",
+]
+
+_repositories = {}
+_repositories_lock = threading.Lock()
+
+
+class SQLRepository:
+    """MedicalDB's page-facing API in portable SQL for a server database.
+
+    Archive tiers, FTS search, the analytics snapshot and file maintenance
+    (rollover, backup, VACUUM) are SQLite features and stay with MedicalDB;
+    a server database holds all rows in one table, serves reports from its
+    own consistent reads and is maintained with its own tooling.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.db_path = None
+        with self.engine.connection() as conn:
+            cursor = conn.cursor()
+            for statement in SERVER_SCHEMA:
+                cursor.execute(statement)
+
+    def _query(self, sql, params=()):
+        with self.engine.connection() as conn:
+            return pd.read_sql_query(self.engine.sql(sql), conn, params=list(params))
+
+    def _execute(self, sql, params=()):
+        """Run one statement; returns the first column of its first row, if any"""
+        with self.engine.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(self.engine.sql(sql), tuple(params))
+            row = cursor.fetchone() if cursor.description else None
+            return row[0] if row else None
+
+    def add_patient(self, name, age, gender, email="", phone=""):
+        """Add a new patient; returns its id"""
+        return self._execute('''
+            INSERT INTO patients (name, age, gender, email, phone)
+            VALUES (?, ?, ?, ?, ?)
+            RETURNING id
+        ''', (name, age, gender, email, phone))
+
+    def add_assessment(self, patient_id, assessment_type, results, risk_level, recommendations, critical_flag=False):
+        """Add a new assessment; returns its id, or None on error"""
+        try:
+            results_str = json.dumps(results) if isinstance(results, dict) else str(results)
+            created_at, created_epoch = utc_now()
+            return self._execute('''
+                INSERT INTO assessments (patient_id, assessment_type, results, risk_level, recommendations,
+                                         critical_flag, created_at, created_epoch)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                RETURNING id
+            ''', (patient_id, assessment_type, results_str, risk_level, recommendations,
+                  bool(critical_flag), created_at, created_epoch))
+        except Exception as e:
+            print(f"Error adding assessment: {e}")
+            return None
+
+    def get_patient(self, patient_id):
+        """One patient's details as a dict, or None"""
+        df = self._query("SELECT id, name, age, gender, email, phone, created_at FROM patients WHERE id = ?",
+                         (patient_id,))
+        return df.iloc[0].to_dict() if not df.empty else None
+
+    def update_patient(self, patient_id, **fields):
+        """Update the given PATIENT_FIELDS of one patient"""
+        fields = {k: v for k, v in fields.items() if k in PATIENT_FIELDS}
+        if not fields:
+            return False
+        assignments = ", ".join(f"{k} = ?" for k in fields)
+        self._execute(f"UPDATE patients SET {assignments} WHERE id = ?", (*fields.values(), patient_id))
+        return True
+
+    def get_patient_assessments(self, patient_id, since=None, limit=None):
+        """A patient's assessments, newest first"""
+        query = '''
+            SELECT id, assessment_type, results, risk_level, recommendations,
+                   COALESCE(critical_flag, FALSE) AS critical_flag, created_at
+            FROM assessments
+            WHERE patient_id = ? AND created_epoch >= ?
+            ORDER BY created_epoch DESC
+        '''
+        params = [patient_id, since or 0]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        return self._query(query, params)
+
+    def get_all_patients(self):
+        """Get all patients"""
+        return self._query("SELECT * FROM patients ORDER BY created_at DESC")
+
+    def get_all_assessments(self, since=None, raise_errors=False):
+        """Get all assessments with patient info (from `since` epoch, if given).
+
+        As with MedicalDB, a failed read returns an empty DataFrame unless
+        `raise_errors`.
+        """
+        try:
+            return self._query('''
+                SELECT a.*, p.name, p.age, p.gender
+                FROM assessments a
+                JOIN patients p ON a.patient_id = p.id
+                WHERE a.created_epoch >= ?
+                ORDER BY a.created_epoch DESC
+            ''', [since or 0])
+        except Exception as e:
+            if raise_errors:
+                raise
+            print(f"Error getting all assessments: {e}")
+            return pd.DataFrame()
+
+    def get_critical_patients(self, since=None):
+        """Get patients with critical assessments (from `since` epoch, if given)"""
+        return self._query('''
+            SELECT a.*, p.name, p.age, p.gender, p.phone, p.email
+            FROM assessments a
+            JOIN patients p ON a.patient_id = p.id
+            WHERE a.critical_flag = TRUE AND a.created_epoch >= ?
+            ORDER BY a.created_epoch DESC
+        ''', [since or 0])
+
+    def get_statistics(self):
+        """Same keys as MedicalDB.get_statistics()"""
+        stats = {'total_patients': int(self._query("SELECT COUNT(*) AS count FROM patients").iloc[0]['count'])}
+        totals = self._query('''
+            SELECT COUNT(*) AS total, SUM(CASE WHEN critical_flag THEN 1 ELSE 0 END) AS critical
+            FROM assessments
+        ''').iloc[0]
+        stats['total_assessments'] = int(totals['total'])
+        stats['critical_cases'] = int(totals['critical'] or 0)
+        stats['by_type'] = self._query('''
+            SELECT assessment_type, COUNT(*) AS count FROM assessments
+            GROUP BY assessment_type ORDER BY assessment_type
+        ''')
+
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        since = int((today - timedelta(days=7)).timestamp())
+        daily = self._query('''
+            SELECT created_epoch / 86400 AS day, COUNT(*) AS count
+            FROM assessments
+            WHERE created_epoch >= ?
+            GROUP BY created_epoch / 86400
+            ORDER BY day DESC
+        ''', [since])
+        daily['date'] = pd.to_datetime(daily['day'] * 86400, unit='s').dt.strftime('%Y-%m-%d')
+        stats['daily_assessments'] = daily[['date', 'count']]
+        return stats
+
+    def search_patients(self, query, limit=20):
+        """Type-ahead patient search, same columns as MedicalDB.search_patients().
+
+        Without an FTS index every word must occur (case-insensitively) in
+        the name, email or phone; if no patient matches all words, patients
+        matching any word are returned instead. A numeric query also matches
+        the patient ID exactly, listed first. Matches are ordered by name.
+        """
+        terms = [term.lower() for term in re.findall(r'\w+', query or '')]
+        if not terms:
+            return pd.DataFrame(columns=PATIENT_SEARCH_COLUMNS)
+
+        columns = ", ".join(PATIENT_SEARCH_COLUMNS)
+        frames = []
+        if query.strip().isdigit():
+            frames.append(self._query(f"SELECT {columns} FROM patients WHERE id = ?", [int(query.strip())]))
+
+        term_match = "(LOWER(name) LIKE ? OR LOWER(COALESCE(email, '')) LIKE ? OR COALESCE(phone, '') LIKE ?)"
+        params = [f"%{term}%" for term in terms for _ in range(3)]
+        for joiner in (" AND ", " OR "):
+            matched = self._query(f'''
+                SELECT {columns} FROM patients
+                WHERE {joiner.join([term_match] * len(terms))}
+                ORDER BY name, id
+                LIMIT ?
+            ''', params + [limit])
+            if not matched.empty or len(terms) == 1:
+                break
+        frames.append(matched)
+
+        results = pd.concat(frames, ignore_index=True).drop_duplicates('id')
+        return results.head(limit).reset_index(drop=True)
+
+    def get_assessment_time_buckets(self, *formats, since=None):
+        """Same result as MedicalDB.get_assessment_time_buckets(), for hour or coarser formats.
+
+        strftime() is SQLite-only, so the database groups by UTC hour and
+        the hourly counts (at most 24 a day) are bucketed here.
+        """
+        buckets = [f"bucket_{i}" for i in range(len(formats))]
+        hours = self._query('''
+            SELECT created_epoch / 3600 AS hour, COUNT(*) AS count
+            FROM assessments
+            WHERE created_epoch >= ?
+            GROUP BY created_epoch / 3600
+        ''', [since or 0])
+        if hours.empty:
+            return pd.DataFrame(columns=buckets + ['count'])
+
+        times = pd.to_datetime(hours['hour'] * 3600, unit='s')
+        for name, fmt in zip(buckets, formats):
+            hours[name] = times.dt.strftime(fmt)
+        return hours.groupby(buckets, as_index=False, sort=True)['count'].sum()
+
+    # Both only call get_assessment_time_buckets(), so MedicalDB's versions apply as is
+    get_activity_heatmap = MedicalDB.get_activity_heatmap
+    get_monthly_assessment_counts = MedicalDB.get_monthly_assessment_counts
+
+    def test_connection(self):
+        """Check the server database answers and print the assessment count"""
+        try:
+            count = self._execute("SELECT COUNT(*) FROM assessments")
+            print(f"Total assessments in database: {count}")
+            return True
+        except Exception as e:
+            print(f"Database connection test failed: {e}")
+            return False
+
+
+def is_sqlite(repository):
+    """True for the SQLite file backend - the one with archives, snapshots and file maintenance"""
+    return isinstance(repository, MedicalDB)
+
+
+def get_repository(url=None):
+    """Repository for `url` (default: MEDICAL_DB_URL, else the SQLite file)"""
+    url = url or os.environ.get(DATABASE_URL_ENV) or sqlite_url(DEFAULT_DB_PATH)
+    engine = get_engine(url)
+    if engine.dialect == "sqlite":
+        return MedicalDB(engine.db_path)
+
+    with _repositories_lock:
+        repository = _repositories.get(url)
+        if repository is None:
+            repository = _repositories[url] = SQLRepository(engine)
+        return repository
+
+
+def get_analytics_repository(url=None):
+    """Repository for admin reports, and the datetime its data is as of.
+
+    SQLite reports read the analytics snapshot so they never hold locks on
+    the live file; a server database is read directly, as of now.
+    """
+    repository = get_repository(url)
+    if is_sqlite(repository):
+        return get_analytics_db(repository.db_path)
+    return repository, datetime.now()
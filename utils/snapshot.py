@@ -0,0 +1,127 @@
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from database import DEFAULT_DB_PATH, MedicalDB, ensure_schema
+from tiering import archive_dir_for
+
+
+# Read-only analytics snapshot: the admin dashboard reads a copy of the live
+# database made with the SQLite backup API, so long report queries never hold
+# locks on the file the eye and hearing pages write to. The copy lives in
+# <db folder>/snapshots/ and is refreshed in the background once it is older
+# than SNAPSHOT_MAX_AGE seconds.
+
+SNAPSHOT_MAX_AGE = 5 * 60
+SNAPSHOT_PAGES_PER_STEP = 512
+
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def snapshot_dir_for(db_path):
+    """Snapshot folder that belongs to a live database file"""
+    return os.path.join(os.path.dirname(db_path) or ".", "snapshots")
+
+
+def snapshot_path_for(db_path):
+    name = os.path.splitext(os.path.basename(db_path))[0]
+    return os.path.join(snapshot_dir_for(db_path), f"{name}_analytics.db")
+
+
+def _refresh_lock(db_path):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(db_path, threading.Lock())
+
+
+def read_snapshot_info(snapshot_path):
+    """(as_of_epoch, hot_floor_epoch) stored in a snapshot, or None if unreadable"""
+    if not os.path.exists(snapshot_path):
+        return None
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(snapshot_path)}?mode=ro", uri=True)
+        try:
+            return conn.execute("SELECT as_of_epoch, hot_floor FROM snapshot_info").fetchone()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return None
+
+
+def refresh_snapshot(db_path=DEFAULT_DB_PATH, pages=SNAPSHOT_PAGES_PER_STEP):
+    """Copy the live database into its analytics snapshot.
+
+    The backup API copies `pages` pages per step and yields between steps,
+    so screening writes keep going during the copy. The copy is written to a
+    temporary file, stamped with its as-of time and swapped in with
+    os.replace(), so readers always see a complete snapshot; a failed copy
+    leaves no file behind. Returns the as-of epoch.
+    """
+    ensure_schema(db_path)  # a fresh database still snapshots as an empty one
+    snapshot_path = snapshot_path_for(db_path)
+    os.makedirs(os.path.dirname(snapshot_path), exist_ok=True)
+    partial_path = f"{snapshot_path}.{threading.get_ident()}.partial"
+
+    try:
+        source = sqlite3.connect(db_path, timeout=30)
+        target = sqlite3.connect(partial_path)
+        try:
+            source.backup(target, pages=pages, sleep=0.001)
+            as_of = int(time.time())
+            # Archived rows from the oldest hot row on are skipped when reading the
+            # snapshot, so a rollover after this copy doesn't count them twice
+            hot_floor = target.execute("SELECT MIN(created_epoch) FROM assessments").fetchone()[0]
+            target.execute("PRAGMA journal_mode = DELETE")
+            target.execute("CREATE TABLE snapshot_info (as_of_epoch INTEGER, hot_floor INTEGER)")
+            target.execute("INSERT INTO snapshot_info VALUES (?, ?)", (as_of, hot_floor if hot_floor is not None else as_of))
+            target.commit()
+        finally:
+            target.close()
+            source.close()
+        os.replace(partial_path, snapshot_path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return as_of
+
+
+def _refresh_in_background(db_path):
+    lock = _refresh_lock(db_path)
+    if not lock.acquire(blocking=False):
+        return  # a refresh is already running
+
+    def run():
+        try:
+            refresh_snapshot(db_path)
+        except Exception as e:
+            print(f"Analytics snapshot refresh failed: {e}")
+        finally:
+            lock.release()
+
+    threading.Thread(target=run, name="analytics-snapshot", daemon=True).start()
+
+
+def get_analytics_db(db_path=DEFAULT_DB_PATH, max_age=SNAPSHOT_MAX_AGE):
+    """Read-only MedicalDB over the analytics snapshot and its as-of datetime.
+
+    A missing snapshot is built before returning; a stale one is served as is
+    while a background thread refreshes it, so the dashboard never waits on
+    a copy it already has.
+    """
+    snapshot_path = snapshot_path_for(db_path)
+    info = read_snapshot_info(snapshot_path)
+    if info is None:
+        with _refresh_lock(db_path):
+            info = read_snapshot_info(snapshot_path)
+            if info is None:
+                refresh_snapshot(db_path)
+                info = read_snapshot_info(snapshot_path)
+    elif time.time() - info[0] > max_age:
+        _refresh_in_background(db_path)
+
+    as_of, hot_floor = info
+    db = MedicalDB(snapshot_path, archive_dir=archive_dir_for(db_path), archive_until=hot_floor, read_only=True)
+    return db, datetime.fromtimestamp(as_of)
@@ -0,0 +1,188 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+
+# TensorFlow process settings, model warm-up and model timing.
+# Several Streamlit workers share a host, so TF's default thread pools (one
+# thread per core each) oversubscribe the CPU; MEDICAL_TF_INTRA_OP_THREADS /
+# MEDICAL_TF_INTER_OP_THREADS cap them (0 keeps TF's default). Warm-up loads
+# every model and runs dummy inputs through it before patients do, and the
+# load / first-inference / steady-state timings are exported as JSON.
+
+TF_INTRA_OP_THREADS = int(os.environ.get("MEDICAL_TF_INTRA_OP_THREADS", "0"))
+TF_INTER_OP_THREADS = int(os.environ.get("MEDICAL_TF_INTER_OP_THREADS", "0"))
+MODEL_TIMINGS_PATH = "data/model_timings.json"
+STEADY_SAMPLES = 200
+WARM_UP_RUNS = 3
+WARM_UP_SHAPES = {
+    "eye": (1, 224, 224, 3),
+    "hearing": (1, 2),
+}
+
+_threads_configured = None
+_threads_lock = threading.Lock()
+_keras_models = {}
+_keras_lock = threading.Lock()
+_timings = {}
+_timings_lock = threading.Lock()
+_warm_up_thread = None
+_warm_up_lock = threading.Lock()
+
+
+def configure_threads(intra=None, inter=None):
+    """Apply the TF thread pool sizes once per process, before TF starts its runtime.
+
+    Returns the (intra, inter) actually requested, or None if TF had already
+    initialised and kept its defaults.
+    """
+    global _threads_configured
+    with _threads_lock:
+        if _threads_configured is not None:
+            return _threads_configured or None
+        import tensorflow as tf
+
+        intra = TF_INTRA_OP_THREADS if intra is None else intra
+        inter = TF_INTER_OP_THREADS if inter is None else inter
+        try:
+            if intra:
+                tf.config.threading.set_intra_op_parallelism_threads(intra)
+            if inter:
+                tf.config.threading.set_inter_op_parallelism_threads(inter)
+            _threads_configured = (intra, inter)
+        except RuntimeError as e:
+            print(f"TensorFlow thread settings not applied: {e}")
+            _threads_configured = ()
+        return _threads_configured or None
+
+
+def _entry(model):
+    return _timings.setdefault(model, {"load_ms": None, "first_inference_ms": None,
+                                       "steady": deque(maxlen=STEADY_SAMPLES)})
+
+
+def record_load(model, elapsed_ms):
+    with _timings_lock:
+        _entry(model)["load_ms"] = elapsed_ms
+
+
+def record_inference(model, elapsed_ms):
+    """The first call per model is kept apart - it pays for graph tracing"""
+    with _timings_lock:
+        entry = _entry(model)
+        if entry["first_inference_ms"] is None:
+            entry["first_inference_ms"] = elapsed_ms
+        else:
+            entry["steady"].append(elapsed_ms)
+
+
+def timed_predictor(model, predict):
+    """Wrap a predict callable so every call is recorded under `model`"""
+    def run(inputs):
+        start = time.perf_counter()
+        try:
+            return predict(inputs)
+        finally:
+            record_inference(model, (time.perf_counter() - start) * 1000)
+    return run
+
+
+def load_keras_predictor(model, path):
+    """Timed predict callable for a Keras model file, loaded once per process.
+
+    Raises if the file can't be loaded; only successful loads are cached.
+    """
+    with _keras_lock:
+        if path in _keras_models:
+            return _keras_models[path]
+        configure_threads()
+        import tensorflow as tf
+
+        start = time.perf_counter()
+        keras_model = tf.keras.models.load_model(path)
+        record_load(model, (time.perf_counter() - start) * 1000)
+
+        predictor = timed_predictor(model, lambda inputs: keras_model.predict(inputs, verbose=0))
+        _keras_models[path] = predictor
+        return predictor
+
+
+def timing_summary():
+    """{model: load_ms, first_inference_ms, steady_runs, steady_mean_ms, steady_p95_ms}"""
+    with _timings_lock:
+        summary = {}
+        for model, entry in _timings.items():
+            steady = list(entry["steady"])
+            summary[model] = {
+                "load_ms": entry["load_ms"],
+                "first_inference_ms": entry["first_inference_ms"],
+                "steady_runs": len(steady),
+                "steady_mean_ms": float(np.mean(steady)) if steady else None,
+                "steady_p95_ms": float(np.percentile(steady, 95)) if steady else None,
+            }
+        return summary
+
+
+def export_timings(path=MODEL_TIMINGS_PATH):
+    """Write timing_summary() (plus thread settings and pid) as JSON"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    report = {
+        "exported_at": datetime.now().isoformat(timespec="seconds"),
+        "pid": os.getpid(),
+        "intra_op_threads": TF_INTRA_OP_THREADS,
+        "inter_op_threads": TF_INTER_OP_THREADS,
+        "models": timing_summary(),
+    }
+    partial_path = f"{path}.{os.getpid()}.partial"
+    with open(partial_path, "w") as f:
+        json.dump(report, f, indent=2)
+    os.replace(partial_path, path)
+    return report
+
+
+def warm_up(predict_fns, runs=WARM_UP_RUNS, export_path=MODEL_TIMINGS_PATH):
+    """Run dummy inputs through every loaded model so tracing happens now.
+
+    One call traces the graph; the next `runs` calls give a steady-state
+    baseline. Timings are exported to `export_path` when given.
+    """
+    for model, predict in predict_fns.items():
+        shape = WARM_UP_SHAPES.get(model)
+        if shape is None:
+            continue
+        dummy = np.zeros(shape, dtype=np.float32)
+        try:
+            for _ in range(runs + 1):
+                predict(dummy)
+        except Exception as e:
+            print(f"Warm-up failed for {model}: {e}")
+    return export_timings(export_path) if export_path else timing_summary()
+
+
+def start_warm_up(load_models, runs=WARM_UP_RUNS):
+    """load_models() and warm_up() in a daemon thread, once per process.
+
+    Model loaders are cached per process, so a patient request that arrives
+    mid warm-up waits for the same load instead of starting another.
+    """
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is not None:
+            return _warm_up_thread
+
+        def run():
+            try:
+                predict_fns = load_models()
+                if predict_fns:
+                    warm_up(predict_fns, runs)
+            except Exception as e:
+                print(f"Model warm-up failed: {e}")
+
+        _warm_up_thread = threading.Thread(target=run, name="model-warm-up", daemon=True)
+        _warm_up_thread.start()
+        return _warm_up_thread
@@ -0,0 +1,169 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+
+
+# Hot/cold tiering for assessments: the live database keeps the last
+# HOT_MONTHS calendar months, older rows live in one SQLite file per month
+# under <db folder>/archive/. MedicalDB attaches an archive file only when a
+# read's date range overlaps its month.
+
+HOT_MONTHS = 12
+ROLLOVER_BATCH_SIZE = 500
+ROLLOVER_INTERVAL = 6 * 60 * 60
+
+ARCHIVE_PATTERN = re.compile(r"^assessments_(\d{4})_(\d{2})\.db$")
+ARCHIVE_COLUMNS = "id, patient_id, assessment_type, results, risk_level, recommendations, critical_flag, created_at, created_epoch"
+ARCHIVE_SCHEMA = '''
+    CREATE TABLE IF NOT EXISTS archive.assessments (
+        id INTEGER PRIMARY KEY,
+        patient_id INTEGER,
+        assessment_type TEXT NOT NULL,
+        results TEXT,
+        risk_level TEXT,
+        recommendations TEXT,
+        critical_flag BOOLEAN DEFAULT FALSE,
+        created_at TIMESTAMP,
+        created_epoch INTEGER
+    )
+'''
+
+_jobs = {}
+_jobs_lock = threading.Lock()
+
+
+def archive_dir_for(db_path):
+    """Archive folder that belongs to a hot database file"""
+    return os.path.join(os.path.dirname(db_path) or ".", "archive")
+
+
+def month_start(epoch):
+    """Epoch of the first second of the UTC month containing `epoch`"""
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    return int(datetime(moment.year, moment.month, 1, tzinfo=timezone.utc).timestamp())
+
+
+def add_months(epoch, months):
+    """Epoch of the UTC month start `months` months after the month containing `epoch`"""
+    moment = datetime.fromtimestamp(month_start(epoch), timezone.utc)
+    index = moment.year * 12 + moment.month - 1 + months
+    return int(datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc).timestamp())
+
+
+def hot_cutoff(months=HOT_MONTHS, now=None):
+    """Rows created before this epoch belong in the archive.
+
+    Aligned to a month start, so every month lives in exactly one tier.
+    """
+    return add_months(time.time() if now is None else now, -(months - 1))
+
+
+def archive_path(archive_dir, epoch):
+    moment = datetime.fromtimestamp(epoch, timezone.utc)
+    return os.path.join(archive_dir, f"assessments_{moment.year:04d}_{moment.month:02d}.db")
+
+
+def list_archives(archive_dir):
+    """Archive months as (start_epoch, end_epoch, path), newest first"""
+    if not os.path.isdir(archive_dir):
+        return []
+    archives = []
+    for name in os.listdir(archive_dir):
+        match = ARCHIVE_PATTERN.match(name)
+        if match:
+            start = int(datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc).timestamp())
+            archives.append((start, add_months(start, 1), os.path.join(archive_dir, name)))
+    return sorted(archives, reverse=True)
+
+
+def archives_for_range(archive_dir, since=None, until=None):
+    """Archive files overlapping [since, until); None means unbounded"""
+    return [path for start, end, path in list_archives(archive_dir)
+            if (since is None or end > since) and (until is None or start < until)]
+
+
+def roll_over(db_path, months=HOT_MONTHS, archive_dir=None, batch_size=ROLLOVER_BATCH_SIZE):
+    """Move assessments older than the hot window into their monthly archives.
+
+    Rows move in batches of `batch_size`, oldest first. Each batch is one
+    short transaction: copy into the month's archive (attached for the
+    batch), then delete from the hot table. Returns the number of rows moved.
+    """
+    archive_dir = archive_dir or archive_dir_for(db_path)
+    cutoff = hot_cutoff(months)
+    os.makedirs(archive_dir, exist_ok=True)
+
+    conn = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+    moved = 0
+    try:
+        while True:
+            row = conn.execute(
+                "SELECT created_epoch FROM assessments WHERE created_epoch < ? ORDER BY created_epoch LIMIT 1",
+                (cutoff,)
+            ).fetchone()
+            if row is None:
+                break
+            start = month_start(row[0])
+            end = min(add_months(start, 1), cutoff)
+
+            conn.execute("ATTACH DATABASE ? AS archive", (archive_path(archive_dir, start),))
+            try:
+                conn.execute(ARCHIVE_SCHEMA)
+                conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_created_epoch ON assessments (created_epoch)")
+                conn.execute("CREATE INDEX IF NOT EXISTS archive.idx_archive_patient_epoch ON assessments (patient_id, created_epoch)")
+                while True:
+                    conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        ids = [r[0] for r in conn.execute(
+                            "SELECT id FROM main.assessments WHERE created_epoch >= ? AND created_epoch < ? "
+                            "ORDER BY created_epoch LIMIT ?",
+                            (start, end, batch_size)
+                        )]
+                        if ids:
+                            placeholders = ", ".join("?" for _ in ids)
+                            conn.execute(f'''
+                                INSERT OR REPLACE INTO archive.assessments ({ARCHIVE_COLUMNS})
+                                SELECT {ARCHIVE_COLUMNS} FROM main.assessments WHERE id IN ({placeholders})
+                            ''', ids)
+                            conn.execute(f"DELETE FROM main.assessments WHERE id IN ({placeholders})", ids)
+                        conn.execute("COMMIT")
+                    except Exception:
+                        conn.execute("ROLLBACK")
+                        raise
+                    moved += len(ids)
+                    if len(ids) < batch_size:
+                        break
+            finally:
+                conn.execute("DETACH DATABASE archive")
+    finally:
+        conn.close()
+    return moved
+
+
+def start_rollover_job(db_path, months=HOT_MONTHS, interval=ROLLOVER_INTERVAL):
+    """Run roll_over() now and every `interval` seconds in a daemon thread.
+
+    Started at most once per database per process; returns the thread.
+    """
+    with _jobs_lock:
+        job = _jobs.get(db_path)
+        if job is not None and job.is_alive():
+            return job
+
+        def run():
+            while True:
+                try:
+                    moved = roll_over(db_path, months)
+                    if moved:
+                        print(f"Archived {moved} assessments from {db_path}")
+                except Exception as e:
+                    print(f"Assessment rollover failed: {e}")
+                time.sleep(interval)
+
+        job = threading.Thread(target=run, name="assessment-rollover", daemon=True)
+        job.start()
+        _jobs[db_path] = job
+        return job